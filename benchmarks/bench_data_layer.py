@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据层基准测试
+覆盖网站目录查询、统计管理器的记录/保存/查询、登录注册和 DatabaseManager 的各类查询路径；
+数据库部分在独立的 bench_ schema 中用合成数据运行，结束后删除
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import BenchmarkSuite, add_common_arguments, finish
+from benchmarks.synthetic_data import (
+    BENCH_PASSWORD, DatasetSpec, SyntheticDataset, drop_schema, load_database_config, prepare_schema
+)
+from src.data import website_data
+
+
+DEFAULT_OUTPUT = "benchmarks/results/data_layer.json"
+DEFAULT_SCHEMA = "bench_data_layer"
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='数据层基准测试',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python benchmarks/bench_data_layer.py --no-db                    # 只运行不需要数据库的项目
+  python benchmarks/bench_data_layer.py --users 200 --visits 100000
+  python benchmarks/bench_data_layer.py -b baseline.json           # 与基线比较，有回归时退出码为 1
+        """
+    )
+    data_group = parser.add_argument_group('合成数据规模')
+    defaults = DatasetSpec()
+    data_group.add_argument('--users', type=int, default=defaults.users, help='用户数')
+    data_group.add_argument('--sites', type=int, default=defaults.sites, help='网站目录中的网站数')
+    data_group.add_argument('--sites-per-user', type=int, default=defaults.sites_per_user, help='每个用户的自定义网站数')
+    data_group.add_argument('--visits', type=int, default=defaults.visits, help='访问事件数')
+    data_group.add_argument('--logs', type=int, default=defaults.logs, help='系统日志数')
+    data_group.add_argument('--seed', type=int, default=defaults.seed, help='随机种子')
+
+    db_group = parser.add_argument_group('数据库')
+    db_group.add_argument('--no-db', action='store_true', help='跳过需要数据库的项目')
+    db_group.add_argument('--config', '-c', default='config.ini', help='数据库配置文件 (默认: config.ini)')
+    db_group.add_argument('--schema', default=DEFAULT_SCHEMA, help=f'测试数据所在 schema，会被删除重建 (默认: {DEFAULT_SCHEMA})')
+    db_group.add_argument('--keep-schema', action='store_true', help='结束后保留测试 schema')
+
+    add_common_arguments(parser, DEFAULT_OUTPUT)
+    return parser.parse_args()
+
+
+@contextmanager
+def patched_catalog(catalog):
+    """临时用合成数据替换内置网站目录"""
+    original = website_data.RECOMMENDED_WEBSITES
+    website_data.RECOMMENDED_WEBSITES = catalog
+    try:
+        yield
+    finally:
+        website_data.RECOMMENDED_WEBSITES = original
+
+
+@contextmanager
+def working_directory(path):
+    """StatisticsManager 使用相对路径保存统计文件，在临时目录中运行避免覆盖真实数据"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def bench_catalog(suite, dataset):
+    group = 'catalog'
+    keywords = dataset.search_keywords(3)
+    largest = max(dataset.catalog, key=lambda name: len(dataset.catalog[name]))
+    with patched_catalog(dataset.catalog):
+        suite.run('get_all_websites', website_data.get_all_websites, group)
+        suite.run('get_websites_by_category', lambda: website_data.get_websites_by_category(largest), group)
+        suite.run('get_top_rated_websites', lambda: website_data.get_top_rated_websites(10), group)
+        suite.run('search_websites_hit', lambda: [website_data.search_websites(word) for word in keywords], group,
+                  keywords=len(keywords))
+        suite.run('search_websites_miss', lambda: website_data.search_websites('zzzz-not-found'), group)
+
+
+def seed_statistics(manager, dataset):
+    """按合成的日志和访问记录填充统计数据"""
+    data = manager.stats_data
+    usernames = [user['username'] for user in dataset.users]
+    preferences = data["user_preferences"]
+    for username in usernames:
+        preferences[username] = {"login_times": [], "favorite_categories": {}, "search_keywords": []}
+
+    daily = defaultdict(lambda: {"logins": 0, "searches": 0, "visits": 0})
+    for user_index, action, details, created_at in dataset.logs:
+        day = daily[created_at.strftime("%Y-%m-%d")]
+        if action == 'login':
+            preferences[usernames[user_index]]["login_times"].append(created_at.isoformat())
+            day["logins"] += 1
+        elif action == 'search':
+            preferences[usernames[user_index]]["search_keywords"].append(
+                {"keyword": details.split(": ", 1)[-1], "timestamp": created_at.isoformat()})
+            day["searches"] += 1
+
+    clicks = Counter()
+    visits = {}
+    for user_index, name, url, visited_at in dataset.visits:
+        clicks[name] += 1
+        daily[visited_at.strftime("%Y-%m-%d")]["visits"] += 1
+        entry = visits.setdefault(url, {"count": 0, "last_visit": None, "visitors": []})
+        entry["count"] += 1
+        entry["last_visit"] = visited_at.isoformat()
+        if usernames[user_index] not in entry["visitors"]:
+            entry["visitors"].append(usernames[user_index])
+
+    data["website_clicks"] = dict(clicks)
+    data["website_visits"] = visits
+    data["daily_activity"] = dict(daily)
+    data["favorite_categories"] = dict(Counter(site['category'] for site in dataset.all_sites()))
+    data["login_count"] = sum(day["logins"] for day in daily.values())
+    data["search_count"] = sum(day["searches"] for day in daily.values())
+    data["total_visits"] = len(dataset.visits)
+
+
+def bench_statistics(suite, dataset):
+    try:
+        from src.core.managers import StatisticsManager
+    except ImportError as e:
+        print(f"⚠️ 跳过统计管理器测试（{e}）")
+        return
+
+    group = 'statistics'
+    username = dataset.users[0]['username'] if dataset.users else 'bench'
+    sites = dataset.all_sites()[:50] or [{'name': 'bench', 'category': 'bench'}]
+    site_cycle = itertools.cycle(sites)
+
+    with tempfile.TemporaryDirectory(prefix="bench_stats_") as directory, working_directory(directory):
+        manager = StatisticsManager()
+        seed_statistics(manager, dataset)
+        manager.save_statistics()
+
+        suite.run('record_login', lambda: manager.record_login(username), group)
+        suite.run('record_search', lambda: manager.record_search('code', username), group)
+
+        def record_visit():
+            site = next(site_cycle)
+            manager.record_website_visit(site['name'], site['category'])
+        suite.run('record_website_visit', record_visit, group, note='每次访问都会保存整个统计文件')
+        suite.run('save_statistics', manager.save_statistics, group,
+                  file_bytes=os.path.getsize(manager.stats_file))
+        suite.run('load_statistics', manager.load_statistics, group)
+        suite.run('get_popular_websites', lambda: manager.get_popular_websites(10), group)
+        suite.run('get_daily_activity', lambda: manager.get_daily_activity(30), group)
+        suite.run('get_user_activity_summary', lambda: manager.get_user_activity_summary(username), group)
+        suite.run('get_system_overview', manager.get_system_overview, group)
+        suite.run('get_top_websites', lambda: manager.get_top_websites(10), group)
+
+
+def bench_auth(suite, db_manager, dataset):
+    from src.core.auth_system import AuthController
+
+    group = 'auth'
+    auth = AuthController(db_manager)
+    username = dataset.users[0]['username']
+    suite.run('login_success', lambda: auth.login(username, BENCH_PASSWORD), group)
+
+    def login_wrong_password():
+        auth.login(username, 'wrong-password')
+        auth.security_manager.clear_failed_attempts(username)
+    suite.run('login_wrong_password', login_wrong_password, group)
+
+    def login_unknown_user():
+        auth.login('bench_nobody', BENCH_PASSWORD)
+        auth.security_manager.clear_failed_attempts('bench_nobody')
+    suite.run('login_unknown_user', login_unknown_user, group)
+
+    counter = itertools.count()
+    suite.run('register', lambda: auth.register(f"bench_reg_{next(counter)}", BENCH_PASSWORD, BENCH_PASSWORD), group)
+
+
+def bench_database(suite, db_manager, dataset, user_ids):
+    from src.core.frecency import FrecencyIndex
+    from src.core.visit_events import INSERT_EVENTS_SQL, record_website_stats
+    from src.core.url_utils import normalize_url
+
+    group = 'database'
+    user_id = user_ids[0]
+    site = dataset.all_sites()[0]
+    events = [(user_id, site['name'], site['url'], normalize_url(site['url']), dataset.now)] * 50
+
+    suite.run('execute_query_user_websites', lambda: db_manager.execute_query(
+        "SELECT id, name, url, category FROM user_websites WHERE user_id = %s ORDER BY created_at DESC", (user_id,)
+    ), group)
+    suite.run('execute_prepared_user_websites_with_counts',
+              lambda: db_manager.execute_prepared('user_websites_with_counts', (user_id,)), group)
+    suite.run('execute_prepared_auth_user',
+              lambda: db_manager.execute_prepared('auth_user_by_username', (dataset.users[0]['username'],)), group)
+    suite.run('execute_non_query_log_action', lambda: db_manager.execute_non_query(
+        "INSERT INTO system_logs (user_id, action, details, created_at) VALUES (%s, %s, %s, %s)",
+        (user_id, 'benchmark', 'bench_data_layer', dataset.now)
+    ), group)
+    suite.run('record_website_stats', lambda: record_website_stats(db_manager, user_id, site['name'], site['url']), group)
+    suite.run('execute_batches_visit_events',
+              lambda: db_manager.execute_batches(INSERT_EVENTS_SQL, [events], page_size=len(events)), group,
+              rows=len(events))
+    suite.run('frecency_index_load', lambda: FrecencyIndex.load(db_manager, user_id), group)
+    suite.run('admin_action_counts', lambda: db_manager.execute_query(
+        "SELECT action, COUNT(*) FROM system_logs GROUP BY action ORDER BY COUNT(*) DESC"
+    ), group)
+    suite.run('iter_query_system_logs', lambda: sum(1 for _ in db_manager.iter_query(
+        "SELECT id, user_id, action, details, created_at FROM system_logs"
+    )), group, rows=len(dataset.logs))
+
+
+def run_database_benchmarks(suite, args, dataset, selected):
+    from src.core.auth_system import DatabaseManager
+
+    db_config = load_database_config(args.config)
+    if db_config is None:
+        return False
+    print(f"🗄️ 准备测试 schema {args.schema}（{db_config['host']}:{db_config['port']}/{db_config['database']}）...")
+    if not prepare_schema(db_config, args.schema):
+        print("❌ 测试 schema 创建失败，跳过数据库测试")
+        return False
+
+    db_manager = DatabaseManager(
+        host=db_config['host'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        port=int(db_config['port'])
+    )
+    try:
+        print("📥 写入合成数据...")
+        user_ids = dataset.load(db_manager)
+        if not user_ids:
+            print("❌ 合成数据写入失败，跳过数据库测试")
+            return False
+        db_manager.execute_non_query("ANALYZE")
+
+        if selected('auth'):
+            bench_auth(suite, db_manager, dataset)
+        if selected('database'):
+            bench_database(suite, db_manager, dataset, user_ids)
+        return True
+    finally:
+        if not args.keep_schema:
+            drop_schema(db_manager, args.schema)
+        db_manager.disconnect()
+
+
+def main():
+    args = parse_arguments()
+    spec = DatasetSpec(
+        users=max(args.users, 1),
+        sites=max(args.sites, 1),
+        sites_per_user=args.sites_per_user,
+        visits=args.visits,
+        logs=args.logs,
+        seed=args.seed,
+    )
+    print(f"🧪 生成合成数据: 用户 {spec.users}，网站 {spec.sites}，访问 {spec.visits}，日志 {spec.logs}")
+    dataset = SyntheticDataset(spec)
+
+    suite = BenchmarkSuite('data_layer', rounds=args.rounds, parameters=vars(spec))
+
+    def selected(group):
+        return args.filter in group
+
+    if selected('catalog'):
+        print("📚 网站目录")
+        bench_catalog(suite, dataset)
+    if selected('statistics'):
+        print("📈 统计管理器")
+        bench_statistics(suite, dataset)
+    database_ok = True
+    if not args.no_db and (selected('auth') or selected('database')):
+        print("🔐 登录注册 / 🗄️ 数据库")
+        database_ok = run_database_benchmarks(suite, args, dataset, selected)
+
+    exit_code = finish(suite, args)
+    return exit_code if database_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
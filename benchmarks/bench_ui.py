@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+界面渲染基准测试
+在无显示环境（QT_QPA_PLATFORM=offscreen）下计时主窗口构建、网站卡片网格重建、主题切换
+和管理员/我的网站表格填充，并记录控件数量和峰值内存
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 必须在导入 PyQt6 之前设置
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from benchmarks.harness import BenchmarkSuite, add_common_arguments, current_rss_mb, finish, peak_rss_mb
+from benchmarks.synthetic_data import DatasetSpec, SyntheticDataset
+
+
+DEFAULT_OUTPUT = "benchmarks/results/ui.json"
+DEFAULT_CARD_COUNTS = "10,100,1000,10000"
+DEFAULT_ROW_COUNTS = "100,1000,5000"
+LOG_LIMIT = 100                     # 管理员日志页的查询带 LIMIT 100
+
+BENCH_USER = {
+    'id': 1,
+    'username': 'bench_admin',
+    'email': 'bench@bench.example.com',
+    'display_name': 'bench_admin',
+    'avatar_path': 'default_avatar.png',
+    'is_admin': True,
+}
+
+UserWebsiteRow = namedtuple('UserWebsiteRow', [
+    'id', 'name', 'url', 'description', 'category', 'rating', 'is_private', 'created_at',
+    'total_count', 'public_count',
+])
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='界面渲染基准测试（无需显示器）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python benchmarks/bench_ui.py
+  python benchmarks/bench_ui.py --cards 10,100,1000 --rows 500
+  python benchmarks/bench_ui.py -b benchmarks/results/ui_baseline.json
+        """
+    )
+    parser.add_argument('--cards', default=DEFAULT_CARD_COUNTS, help=f'网站卡片数量，逗号分隔 (默认: {DEFAULT_CARD_COUNTS})')
+    parser.add_argument('--rows', default=DEFAULT_ROW_COUNTS, help=f'表格行数，逗号分隔 (默认: {DEFAULT_ROW_COUNTS})')
+    parser.add_argument('--theme-cards', type=int, default=100, help='主题切换时显示的卡片数 (默认: 100)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    add_common_arguments(parser, DEFAULT_OUTPUT)
+    return parser.parse_args()
+
+
+def parse_counts(text):
+    return sorted({int(value) for value in text.split(',') if value.strip()})
+
+
+class SyntheticDBManager:
+    """按查询内容返回合成数据的数据库管理器（只用于界面计时，与各窗口 __main__ 中的 MockDBManager 相同接口）"""
+
+    def __init__(self, dataset):
+        self.sites = dataset.all_sites()
+        self.now = dataset.now
+        self.size = 0
+
+    def _site(self, index):
+        return self.sites[index % len(self.sites)]
+
+    def _moment(self, index):
+        return self.now - timedelta(minutes=index)
+
+    def execute_query(self, query, params=None):
+        if "FROM system_logs" in query:
+            return [
+                (self._moment(index), f"bench_user_{index % 50:05d}", "visit_website",
+                 f"访问网站: {self._site(index)['name']}", "127.0.0.1")
+                for index in range(min(self.size, LOG_LIMIT))
+            ]
+        if "FROM user_websites uw" in query:
+            return [
+                (index + 1, self._site(index)['name'], f"bench_user_{index % 50:05d}", self._site(index)['category'],
+                 self._site(index)['rating'], bool(index % 3))
+                for index in range(self.size)
+            ]
+        if "FROM users" in query and "ORDER BY created_at" in query:
+            return [
+                (index + 1, f"bench_user_{index:05d}", f"user{index}@bench.example.com", index == 0, self._moment(index))
+                for index in range(self.size)
+            ]
+        return []
+
+    def user_website_rows(self):
+        public_count = sum(1 for index in range(self.size) if not index % 3)
+        rows = []
+        for index in range(self.size):
+            site = self._site(index)
+            rows.append(UserWebsiteRow(
+                index + 1, site['name'], f"{site['url']}{index}", site['description'], site['category'],
+                site['rating'], bool(index % 3), self._moment(index), self.size, public_count
+            ))
+        return rows
+
+    def execute_prepared(self, name, params=None):
+        if name == 'user_websites_with_counts':
+            return self.user_website_rows()
+        return []
+
+    def execute_returning(self, query, params=None):
+        return []
+
+    def execute_non_query(self, query, params=None):
+        return True
+
+    def execute_batches(self, query, batches, template=None, page_size=500):
+        for _ in batches:
+            pass
+        return True
+
+    def iter_query(self, query, params=None, itersize=2000):
+        return iter([])
+
+    def clone(self):
+        return self
+
+    def connect(self):
+        return True
+
+    def disconnect(self):
+        pass
+
+
+@contextmanager
+def isolated_environment():
+    """在临时目录中运行，统计、主题配置和图标缓存等相对路径文件不影响真实数据"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_ui_") as directory:
+        os.makedirs(os.path.join(directory, "config"), exist_ok=True)
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def widget_count(window) -> int:
+    return len(window.findChildren(QWidget)) + 1
+
+
+def settle(app):
+    """处理挂起的布局、样式和重绘事件（offscreen 平台同样会绘制到后备缓冲）"""
+    app.processEvents()
+    app.processEvents()
+
+
+def close_window(app, window):
+    stop = getattr(window, 'stop_background_tasks', None)
+    if stop is not None:
+        stop()
+    window._logout_confirmed = True         # 跳过退出确认框
+    window.close()
+    window.deleteLater()
+    settle(app)
+    gc.collect()
+
+
+def offline_main_window_class():
+    """不连接数据库的主窗口（与数据库不可用时的离线模式相同的行为）"""
+    from src.ui.main_window import MainWindow
+
+    class OfflineMainWindow(MainWindow):
+        def create_database_manager(self):
+            raise Exception("基准测试不连接数据库")
+
+    return OfflineMainWindow
+
+
+def memory_extra(window=None):
+    extra = {'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+    if window is not None:
+        extra['widgets'] = widget_count(window)
+    return extra
+
+
+def bench_main_window(suite, app, dataset, card_counts, theme_cards):
+    window_class = offline_main_window_class()
+    group = 'main_window'
+
+    # 构建计时包含关闭和销毁，保证每轮从相同的状态开始（主窗口使用内置网站目录）
+    def construct():
+        window = window_class(dict(BENCH_USER))
+        close_window(app, window)
+    suite.run('construct_and_close', construct, group, iterations=1)
+
+    def construct_and_show():
+        window = window_class(dict(BENCH_USER))
+        window.show()
+        settle(app)
+        close_window(app, window)
+    suite.run('construct_show_close', construct_and_show, group, iterations=1)
+
+    window = window_class(dict(BENCH_USER))
+    window.resize(1600, 1000)
+    window.show()
+    settle(app)
+    sites = dataset.all_sites()
+    # 合成网址无需获取图标，标记为已请求避免后台网络访问
+    window.favicon_requested.update(site['url'] for site in sites)
+
+    for count in card_counts:
+        websites = sites[:count]
+
+        def rebuild(websites=websites):
+            window.current_websites = websites
+            window.update_website_display(f"bench {len(websites)}")
+            settle(app)
+        result = suite.run(f'update_website_display_{count}', rebuild, group,
+                           iterations=1, cards=count)
+        if result is not None:
+            result.extra.update(memory_extra(window))
+
+    themes = list(window.theme_manager.get_available_themes())
+    window.current_websites = sites[:theme_cards]
+    window.update_website_display("bench theme")
+    settle(app)
+    theme_index = [0]
+
+    def switch_theme():
+        theme_index[0] = (theme_index[0] + 1) % len(themes)
+        window.theme_manager.set_theme(themes[theme_index[0]])
+        window.apply_current_theme()
+        settle(app)
+    result = suite.run('apply_current_theme', switch_theme, group, iterations=len(themes),
+                       cards=theme_cards, themes=len(themes))
+    if result is not None:
+        result.extra.update(memory_extra(window))
+    close_window(app, window)
+
+
+def bench_admin_window(suite, app, db_manager, row_counts):
+    from src.ui.admin_window import AdminWindow
+
+    group = 'admin_window'
+    db_manager.size = 0
+    window = AdminWindow(dict(BENCH_USER), db_manager)
+    window.resize(1400, 900)
+    window.show()
+    settle(app)
+
+    for count in row_counts:
+        db_manager.size = count
+        for name, load in (('load_users', window.load_users), ('load_websites', window.load_websites),
+                           ('load_logs', window.load_logs)):
+            def populate(load=load):
+                load()
+                settle(app)
+            result = suite.run(f'{name}_{count}', populate, group, iterations=1,
+                               rows=min(count, LOG_LIMIT) if name == 'load_logs' else count)
+            if result is not None:
+                result.extra.update(memory_extra(window))
+    close_window(app, window)
+
+
+def bench_user_websites_window(suite, app, db_manager, row_counts):
+    from src.ui.user_websites_window import UserWebsitesWindow
+
+    group = 'user_websites_window'
+    db_manager.size = 0
+    window = UserWebsitesWindow(dict(BENCH_USER), db_manager)
+    window.resize(1400, 900)
+    window.show()
+    settle(app)
+
+    for count in row_counts:
+        db_manager.size = count
+        rows = db_manager.user_website_rows()
+        window.favicon_requested.update(row.url for row in rows)
+
+        def load():
+            window.load_user_websites()
+            settle(app)
+        result = suite.run(f'load_user_websites_{count}', load, group, iterations=1, rows=count)
+        if result is not None:
+            result.extra.update(memory_extra(window))
+    close_window(app, window)
+
+
+def main():
+    args = parse_arguments()
+    card_counts = parse_counts(args.cards)
+    row_counts = parse_counts(args.rows)
+    spec = DatasetSpec(users=1, sites=max(card_counts + [args.theme_cards, 1]), sites_per_user=0,
+                       visits=0, logs=0, seed=args.seed)
+    dataset = SyntheticDataset(spec)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"🖥️ Qt 平台: {app.platformName()}")
+
+    suite = BenchmarkSuite('ui', rounds=args.rounds, parameters={
+        'cards': card_counts, 'rows': row_counts, 'theme_cards': args.theme_cards,
+        'platform': app.platformName(), 'seed': args.seed,
+    })
+
+    def selected(group):
+        return args.filter in group
+
+    with isolated_environment():
+        db_manager = SyntheticDBManager(dataset)
+        if selected('main_window'):
+            print("🏠 主窗口")
+            bench_main_window(suite, app, dataset, card_counts, args.theme_cards)
+        if selected('admin_window'):
+            print("👑 管理员面板")
+            bench_admin_window(suite, app, db_manager, row_counts)
+        if selected('user_websites_window'):
+            print("🌐 我的网站")
+            bench_user_websites_window(suite, app, db_manager, row_counts)
+
+    suite.parameters['peak_rss_mb'] = peak_rss_mb()
+    if suite.parameters['peak_rss_mb']:
+        print(f"📦 峰值内存: {suite.parameters['peak_rss_mb']:.1f} MB")
+    return finish(suite, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
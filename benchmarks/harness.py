@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试框架
+按轮次重复计时并汇总为 JSON，与基线结果逐项比较中位数，变慢超过阈值的记为回归
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ROUNDS = 7
+MIN_ROUND_TIME = 0.02               # 单轮耗时不足时自动增加每轮的调用次数（秒）
+DEFAULT_THRESHOLD = 10.0            # 中位数变慢超过该百分比记为回归
+
+
+@dataclass
+class BenchmarkResult:
+    """单项基准测试结果（耗时为每次调用的毫秒数）"""
+    name: str
+    group: str
+    rounds: int
+    iterations: int                 # 每轮调用次数
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    p95_ms: float
+    max_ms: float
+    ops_per_sec: float
+    extra: Dict[str, object] = field(default_factory=dict)
+    error: str = ''
+
+
+@dataclass
+class Comparison:
+    """与基线的比较结果"""
+    name: str
+    baseline_ms: Optional[float]
+    current_ms: Optional[float]
+    change_percent: Optional[float]
+    status: str                     # regression / improvement / unchanged / new / missing / error
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(len(ordered) * percent / 100 + 0.5)) - 1))
+    return ordered[index]
+
+
+def calibrate(func: Callable[[], object], min_round_time=MIN_ROUND_TIME) -> int:
+    """估算每轮需要调用多少次才能让单轮耗时达到 min_round_time"""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or iterations >= 1_000_000:
+            return iterations
+        iterations = min(1_000_000, max(iterations * 2, int(iterations * min_round_time / max(elapsed, 1e-9))))
+
+
+def measure(name: str, func: Callable[[], object], group='', rounds=DEFAULT_ROUNDS,
+            iterations: Optional[int] = None, **extra) -> BenchmarkResult:
+    """计时 func：未指定 iterations 时先预热并校准每轮调用次数（有副作用的操作可指定次数跳过预热）"""
+    if iterations is None:
+        iterations = calibrate(func)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations * 1000)
+
+    median = statistics.median(samples)
+    return BenchmarkResult(
+        name=name,
+        group=group,
+        rounds=rounds,
+        iterations=iterations,
+        min_ms=min(samples),
+        median_ms=median,
+        mean_ms=statistics.fmean(samples),
+        p95_ms=_percentile(samples, 95),
+        max_ms=max(samples),
+        ops_per_sec=1000 / median if median else 0.0,
+        extra=extra,
+    )
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """当前常驻内存（MB，读取 /proc，其他平台返回 None）"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+class BenchmarkSuite:
+    """一组基准测试的运行记录"""
+
+    def __init__(self, name, rounds=DEFAULT_ROUNDS, parameters=None):
+        self.name = name
+        self.rounds = rounds
+        self.parameters = dict(parameters or {})
+        self.results: List[BenchmarkResult] = []
+
+    def run(self, name, func, group='', iterations=None, **extra) -> Optional[BenchmarkResult]:
+        """运行一项并记录结果；出错时记录错误信息后继续后面的项目"""
+        full_name = f"{group}.{name}" if group else name
+        try:
+            result = measure(full_name, func, group, self.rounds, iterations, **extra)
+        except Exception as e:
+            print(f"❌ {full_name} 运行失败: {e}")
+            self.results.append(BenchmarkResult(full_name, group, 0, 0, 0, 0, 0, 0, 0, 0, extra, error=str(e)))
+            return None
+        self.results.append(result)
+        print(f"   {full_name:<48} {result.median_ms:>10.3f} ms  (p95 {result.p95_ms:.3f} ms, ×{result.iterations})")
+        return result
+
+    def record(self, result: BenchmarkResult):
+        """登记在外部计时的结果（如只能运行一次的操作）"""
+        self.results.append(result)
+        print(f"   {result.name:<48} {result.median_ms:>10.3f} ms")
+
+    def to_dict(self) -> dict:
+        return {
+            'suite': self.name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': self.parameters,
+            'results': [asdict(result) for result in self.results],
+        }
+
+    def save(self, path) -> bool:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            print(f"💾 结果已写入: {path}")
+            return True
+        except OSError as e:
+            print(f"❌ 写入结果失败: {e}")
+            return False
+
+
+def load_results(path) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取基线失败: {e}")
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold=DEFAULT_THRESHOLD) -> List[Comparison]:
+    """按名称比较两次结果的中位数耗时"""
+    baseline_results = {item['name']: item for item in baseline.get('results', [])}
+    comparisons = []
+    for item in current.get('results', []):
+        previous = baseline_results.pop(item['name'], None)
+        if item.get('error'):
+            comparisons.append(Comparison(item['name'], previous and previous['median_ms'], None, None, 'error'))
+            continue
+        if previous is None or previous.get('error') or not previous['median_ms']:
+            comparisons.append(Comparison(item['name'], None, item['median_ms'], None, 'new'))
+            continue
+        change = (item['median_ms'] - previous['median_ms']) / previous['median_ms'] * 100
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        comparisons.append(Comparison(item['name'], previous['median_ms'], item['median_ms'], change, status))
+    for name, previous in baseline_results.items():
+        comparisons.append(Comparison(name, previous['median_ms'], None, None, 'missing'))
+    return comparisons
+
+
+STATUS_ICONS = {
+    'regression': '🔴', 'improvement': '🟢', 'unchanged': '⚪', 'new': '🆕', 'missing': '❔', 'error': '❌',
+}
+
+
+def print_comparison(comparisons: List[Comparison], threshold=DEFAULT_THRESHOLD):
+    print(f"📊 与基线比较（中位数，阈值 ±{threshold:.0f}%）:")
+    for item in comparisons:
+        icon = STATUS_ICONS[item.status]
+        if item.change_percent is None:
+            print(f"   {icon} {item.name:<48} {item.status}")
+        else:
+            print(f"   {icon} {item.name:<48} {item.baseline_ms:>10.3f} → {item.current_ms:>10.3f} ms "
+                  f"({item.change_percent:+.1f}%)")
+    regressions = sum(1 for item in comparisons if item.status == 'regression')
+    if regressions:
+        print(f"⚠️ {regressions} 项变慢超过 {threshold:.0f}%")
+    else:
+        print("✅ 没有超过阈值的回归")
+
+
+def add_common_arguments(parser: argparse.ArgumentParser, default_output):
+    group = parser.add_argument_group('结果输出')
+    group.add_argument('--output', '-o', default=default_output, help=f'结果 JSON 文件 (默认: {default_output})')
+    group.add_argument('--baseline', '-b', help='基线结果 JSON 文件，给出时输出逐项比较')
+    group.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'中位数变慢超过该百分比记为回归 (默认: {DEFAULT_THRESHOLD:.0f})')
+    group.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help=f'每项计时轮数 (默认: {DEFAULT_ROUNDS})')
+    group.add_argument('--filter', '-k', default='', help='只运行名称包含该字符串的分组')
+
+
+def finish(suite: BenchmarkSuite, args) -> int:
+    """保存结果并与基线比较；有回归或运行失败的项目时返回 1"""
+    suite.save(args.output)
+    failed = any(result.error for result in suite.results)
+    if not args.baseline:
+        return 1 if failed else 0
+    baseline = load_results(args.baseline)
+    if baseline is None:
+        return 1
+    comparisons = compare(suite.to_dict(), baseline, args.threshold)
+    print_comparison(comparisons, args.threshold)
+    return 1 if failed or any(item.status == 'regression' for item in comparisons) else 0
+
@@ -0,0 +1,539 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多客户端负载测试
+模拟 N 个并发虚拟用户（每个一条独立连接）在同一个 PostgreSQL 上执行登录、访问记录、系统日志、
+网站增删改查和管理员面板查询，操作之间按给定分布等待（思考时间），
+统计吞吐量、延迟百分位和锁等待；数据在独立的 bench_ schema 中生成，结束后删除
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import BenchmarkResult, BenchmarkSuite, add_common_arguments, finish
+from benchmarks.synthetic_data import (
+    BENCH_PASSWORD, DatasetSpec, SyntheticDataset, drop_schema, load_database_config, prepare_schema
+)
+from src.core.latency import LatencyHistogram
+from src.core.url_utils import url_hash
+
+
+DEFAULT_OUTPUT = "benchmarks/results/load_test.json"
+DEFAULT_SCHEMA = "bench_load_test"
+DEFAULT_MIX = "login=1,visit=10,log=5,crud=3,admin=1"
+DEFAULT_THINK = "exp:1.0"
+LOCK_SAMPLE_INTERVAL = 0.2          # 锁等待采样间隔（秒）
+MAX_OWNED_SITES = 20                # 每个虚拟用户自己添加的网站上限，超过后只改/删/查
+
+# 以下语句与界面中的同名操作相同（界面模块依赖 PyQt6，这里不直接导入）
+LOG_ACTION_SQL = """
+INSERT INTO system_logs (user_id, action, details, created_at)
+VALUES (%s, %s, %s, %s)
+"""
+
+INSERT_WEBSITE_SQL = """
+INSERT INTO user_websites (user_id, name, url, description, category, rating, is_private, created_at, url_hash)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (user_id, url_hash) DO NOTHING
+RETURNING id
+"""
+
+UPDATE_WEBSITE_SQL = """
+UPDATE user_websites
+SET name = %s, url = %s, url_hash = %s, description = %s, category = %s, rating = %s,
+    is_private = %s, updated_at = %s
+WHERE id = %s
+"""
+
+DELETE_WEBSITE_SQL = "DELETE FROM user_websites WHERE id = %s"
+
+ADMIN_USERS_SQL = """
+SELECT id, username, email, is_admin, created_at
+FROM users
+ORDER BY created_at DESC
+"""
+
+ADMIN_WEBSITES_SQL = """
+SELECT uw.id, uw.name, u.username, uw.category, uw.rating, uw.is_private
+FROM user_websites uw
+JOIN users u ON uw.user_id = u.id
+ORDER BY uw.created_at DESC
+"""
+
+ADMIN_LOGS_SQL = """
+SELECT sl.created_at, u.username, sl.action, sl.details, sl.ip_address
+FROM system_logs sl
+LEFT JOIN users u ON sl.user_id = u.id
+ORDER BY sl.created_at DESC
+LIMIT 100
+"""
+
+ADMIN_COUNT_QUERIES = [
+    ("SELECT COUNT(*) FROM users", None),
+    ("SELECT COUNT(*) FROM users WHERE last_login >= %s", 'week_ago'),
+    ("SELECT COUNT(*) FROM users WHERE is_admin = TRUE", None),
+    ("SELECT COUNT(*) FROM user_websites", None),
+    ("SELECT COUNT(*) FROM user_websites WHERE is_private = FALSE", None),
+    ("SELECT COUNT(*) FROM user_websites WHERE is_private = TRUE", None),
+]
+
+# 本库中其他会话持有、尚未授予的锁（按锁类型、表名和等待事件汇总）
+LOCK_WAITS_SQL = """
+SELECT l.locktype, COALESCE(c.relname, ''), COALESCE(a.wait_event, ''), COUNT(*)
+FROM pg_locks l
+JOIN pg_stat_activity a ON a.pid = l.pid
+LEFT JOIN pg_class c ON c.oid = l.relation
+WHERE NOT l.granted AND a.datname = current_database()
+GROUP BY 1, 2, 3
+"""
+
+DATABASE_STATS_SQL = """
+SELECT xact_commit, xact_rollback, deadlocks
+FROM pg_stat_database
+WHERE datname = current_database()
+"""
+
+
+class ThinkTime:
+    """思考时间分布：exp:均值、uniform:下限,上限、fixed:秒数 或 none（秒）"""
+
+    def __init__(self, text):
+        self.text = text
+        kind, _, values = text.partition(':')
+        try:
+            numbers = [float(value) for value in values.split(',') if value.strip()]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的思考时间: {text}")
+
+        if kind == 'none':
+            self.sample = lambda rng: 0.0
+        elif kind == 'fixed' and len(numbers) == 1 and numbers[0] >= 0:
+            self.sample = lambda rng: numbers[0]
+        elif kind == 'exp' and len(numbers) == 1 and numbers[0] > 0:
+            self.sample = lambda rng: rng.expovariate(1 / numbers[0])
+        elif kind == 'uniform' and len(numbers) == 2 and 0 <= numbers[0] <= numbers[1]:
+            self.sample = lambda rng: rng.uniform(numbers[0], numbers[1])
+        else:
+            raise argparse.ArgumentTypeError(f"无效的思考时间: {text}（可用 exp:1.0、uniform:0.5,2、fixed:1、none）")
+
+    def __call__(self, rng) -> float:
+        return self.sample(rng)
+
+    def __str__(self):
+        return self.text
+
+
+def parse_mix(text):
+    """操作权重：login=1,visit=10,..."""
+    weights = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"未知操作: {name}（可用: {', '.join(SCENARIOS)}）")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的权重: {item}")
+    if not any(weight > 0 for weight in weights.values()):
+        raise argparse.ArgumentTypeError("至少需要一个正权重")
+    return weights
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='多客户端数据库负载测试',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+使用示例:
+  python benchmarks/load_test.py --clients 30 --duration 120
+  python benchmarks/load_test.py --clients 50 --think uniform:0.2,1 --mix visit=10,crud=5,admin=2
+  python benchmarks/load_test.py --think none -b benchmarks/results/load_baseline.json
+
+操作: login（AuthController.login）、visit（record_visit）、log（log_action）、
+      crud（我的网站增删改查）、admin（管理员面板查询）；默认权重 {DEFAULT_MIX}
+        """
+    )
+    load_group = parser.add_argument_group('负载')
+    load_group.add_argument('--clients', '-n', type=int, default=20, help='并发虚拟用户数 (默认: 20)')
+    load_group.add_argument('--duration', '-d', type=float, default=60.0, help='持续时间，秒 (默认: 60)')
+    load_group.add_argument('--ramp-up', type=float, default=5.0, help='虚拟用户在这段时间内依次启动，秒 (默认: 5)')
+    load_group.add_argument('--think', type=ThinkTime, default=DEFAULT_THINK,
+                            help=f'操作间的思考时间分布 (默认: {DEFAULT_THINK})')
+    load_group.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help=f'操作权重 (默认: {DEFAULT_MIX})')
+    load_group.add_argument('--visit-batch', type=int, default=50, help='访问事件攒批大小，与界面相同 (默认: 50)')
+
+    data_group = parser.add_argument_group('合成数据规模')
+    data_group.add_argument('--users', type=int, default=200, help='用户数，不少于虚拟用户数 (默认: 200)')
+    data_group.add_argument('--sites', type=int, default=2000, help='网站目录中的网站数 (默认: 2000)')
+    data_group.add_argument('--sites-per-user', type=int, default=30, help='每个用户的自定义网站数 (默认: 30)')
+    data_group.add_argument('--visits', type=int, default=50000, help='预置访问事件数 (默认: 50000)')
+    data_group.add_argument('--logs', type=int, default=50000, help='预置系统日志数 (默认: 50000)')
+    data_group.add_argument('--seed', type=int, default=42, help='随机种子')
+
+    db_group = parser.add_argument_group('数据库')
+    db_group.add_argument('--config', '-c', default='config.ini', help='数据库配置文件 (默认: config.ini)')
+    db_group.add_argument('--schema', default=DEFAULT_SCHEMA, help=f'测试数据所在 schema，会被删除重建 (默认: {DEFAULT_SCHEMA})')
+    db_group.add_argument('--keep-schema', action='store_true', help='结束后保留测试 schema')
+
+    add_common_arguments(parser, DEFAULT_OUTPUT)
+    return parser.parse_args()
+
+
+class VirtualUser(threading.Thread):
+    """一个虚拟用户：独立连接，按权重随机选择操作，操作之间等待思考时间"""
+
+    def __init__(self, index, db_manager, dataset, user_id, args, stop_event, start_delay):
+        super().__init__(name=f"vu-{index}", daemon=True)
+        from src.core.auth_system import AuthController
+        from src.core.visit_events import VisitEventRecorder
+
+        self.index = index
+        self.db_manager = db_manager
+        self.auth = AuthController(db_manager)
+        self.recorder = VisitEventRecorder(db_manager, batch_size=args.visit_batch)
+        self.user = dataset.users[index % len(dataset.users)]
+        self.user_id = user_id
+        self.sites = dataset.all_sites()
+        self.think = args.think
+        self.stop_event = stop_event
+        self.start_delay = start_delay
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.scenarios = [name for name, weight in args.mix.items() if weight > 0]
+        self.weights = [args.mix[name] for name in self.scenarios]
+        self.owned_sites = []
+        self.sequence = itertools.count()
+        self.histograms = {}
+        self.failures = Counter()
+
+    def timed(self, name, func):
+        """执行并计时一个操作；返回 False 或抛出异常都记为失败"""
+        started = time.perf_counter()
+        try:
+            ok = func() is not False
+        except Exception as e:
+            self.failures[f"{name}: {e}"] += 1
+            ok = False
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(time.perf_counter() - started, error=not ok)
+
+    def run(self):
+        if self.stop_event.wait(self.start_delay):
+            return
+        try:
+            while not self.stop_event.is_set():
+                scenario = self.rng.choices(self.scenarios, self.weights)[0]
+                SCENARIOS[scenario](self)
+                if self.stop_event.wait(self.think(self.rng)):
+                    break
+        finally:
+            self.timed('visit_flush', self.recorder.flush)
+            self.db_manager.disconnect()
+
+    # ------------------------------------------------------------------
+    # 操作
+    # ------------------------------------------------------------------
+
+    def login(self):
+        self.timed('login', lambda: self.auth.login(self.user['username'], BENCH_PASSWORD)[0])
+
+    def record_visit(self):
+        site = self.rng.choice(self.sites)
+
+        def visit():
+            from src.core.visit_events import record_website_stats
+            self.recorder.record(self.user_id, site['name'], site['url'])
+            return record_website_stats(self.db_manager, self.user_id, site['name'], site['url'])
+        self.timed('record_visit', visit)
+
+    def log_action(self):
+        site = self.rng.choice(self.sites)
+        self.timed('log_action', lambda: self.db_manager.execute_non_query(LOG_ACTION_SQL, (
+            self.user_id, "访问网站", f"访问了网站: {site['name']}", datetime.now()
+        )))
+
+    def website_values(self, url):
+        site = self.rng.choice(self.sites)
+        return (site['name'], url, url_hash(url), site['description'], site['category'],
+                site['rating'], self.rng.random() < 0.3)
+
+    def crud(self):
+        if not self.owned_sites or (len(self.owned_sites) < MAX_OWNED_SITES and self.rng.random() < 0.4):
+            self.timed('crud_add', self.add_website)
+            return
+        action = self.rng.choice(('list', 'update', 'delete'))
+        if action == 'list':
+            self.timed('crud_list', lambda: self.db_manager.execute_prepared(
+                'user_websites_with_counts', (self.user_id,)
+            ))
+        elif action == 'update':
+            website_id, url = self.rng.choice(self.owned_sites)
+            name, url, digest, description, category, rating, is_private = self.website_values(url)
+            self.timed('crud_update', lambda: self.db_manager.execute_non_query(UPDATE_WEBSITE_SQL, (
+                name, url, digest, description, category, rating, is_private, datetime.now(), website_id
+            )))
+        else:
+            website_id, url = self.owned_sites.pop(self.rng.randrange(len(self.owned_sites)))
+            self.timed('crud_delete', lambda: self.db_manager.execute_non_query(DELETE_WEBSITE_SQL, (website_id,)))
+
+    def add_website(self):
+        """与界面相同：先按网址哈希查重，再插入（唯一索引兜底）"""
+        url = f"https://vu{self.index}-{next(self.sequence)}.load.example.com/"
+        name, url, digest, description, category, rating, is_private = self.website_values(url)
+        if self.db_manager.execute_prepared('user_website_by_url_hash', (self.user_id, digest)):
+            return True
+        result = self.db_manager.execute_returning(INSERT_WEBSITE_SQL, (
+            self.user_id, name, url, description, category, rating, is_private, datetime.now(), digest
+        ))
+        if not result:
+            return False
+        self.owned_sites.append((result[0][0], url))
+        return True
+
+    def admin(self):
+        page = self.rng.choice(('statistics', 'users', 'websites', 'logs'))
+        if page == 'statistics':
+            self.timed('admin_statistics', self.admin_statistics)
+        elif page == 'users':
+            self.timed('admin_users', lambda: self.db_manager.execute_query(ADMIN_USERS_SQL))
+        elif page == 'websites':
+            self.timed('admin_websites', lambda: self.db_manager.execute_query(ADMIN_WEBSITES_SQL))
+        else:
+            self.timed('admin_logs', lambda: self.db_manager.execute_query(ADMIN_LOGS_SQL))
+
+    def admin_statistics(self):
+        """管理员面板统计页的全部查询"""
+        from src.core.popularity import PopularityRanking
+        from src.core.visit_events import VisitAnalytics
+
+        week_ago = datetime.now() - timedelta(days=7)
+        for query, param in ADMIN_COUNT_QUERIES:
+            self.db_manager.execute_query(query, (week_ago,) if param else None)
+        analytics = VisitAnalytics(self.db_manager)
+        analytics.total_visits()
+        analytics.daily_trend(7)
+        analytics.hourly_on(date.today())
+        PopularityRanking(self.db_manager).top(1)
+
+
+SCENARIOS = {
+    'login': VirtualUser.login,
+    'visit': VirtualUser.record_visit,
+    'log': VirtualUser.log_action,
+    'crud': VirtualUser.crud,
+    'admin': VirtualUser.admin,
+}
+
+
+class LockMonitor(threading.Thread):
+    """定期采样未授予的锁，按 (锁类型, 表, 等待事件) 累计采样次数，估算锁等待时间"""
+
+    def __init__(self, db_manager, stop_event, interval=LOCK_SAMPLE_INTERVAL):
+        super().__init__(name="lock-monitor", daemon=True)
+        self.db_manager = db_manager
+        self.stop_event = stop_event
+        self.interval = interval
+        self.samples = 0
+        self.waiting_samples = Counter()
+        self.peak_waiting = 0
+
+    def run(self):
+        try:
+            while not self.stop_event.wait(self.interval):
+                rows = self.db_manager.execute_query(LOCK_WAITS_SQL)
+                self.samples += 1
+                waiting = 0
+                for locktype, relation, wait_event, count in rows:
+                    self.waiting_samples[(locktype, relation, wait_event)] += count
+                    waiting += count
+                self.peak_waiting = max(self.peak_waiting, waiting)
+        finally:
+            self.db_manager.disconnect()
+
+    def summary(self):
+        """各类锁等待的估算总时长（秒）= 采样到的等待会话数 × 采样间隔"""
+        return [
+            {'locktype': locktype, 'relation': relation, 'wait_event': wait_event,
+             'samples': count, 'estimated_wait_s': round(count * self.interval, 3)}
+            for (locktype, relation, wait_event), count in self.waiting_samples.most_common()
+        ]
+
+
+def database_counters(db_manager):
+    rows = db_manager.execute_query(DATABASE_STATS_SQL)
+    if not rows:
+        return {}
+    commits, rollbacks, deadlocks = rows[0]
+    return {'xact_commit': commits, 'xact_rollback': rollbacks, 'deadlocks': deadlocks}
+
+
+def histogram_result(name, histogram, elapsed):
+    """把一个操作的延迟直方图转换为与基准测试相同的结果格式（中位数即 p50）"""
+    return BenchmarkResult(
+        name=f"load.{name}",
+        group='load',
+        rounds=1,
+        iterations=histogram.count,
+        min_ms=histogram.percentile(0) * 1000,
+        median_ms=histogram.percentile(50) * 1000,
+        mean_ms=histogram.mean * 1000,
+        p95_ms=histogram.percentile(95) * 1000,
+        max_ms=histogram.max * 1000,
+        ops_per_sec=histogram.count / elapsed if elapsed else 0.0,
+        extra={'count': histogram.count, 'errors': histogram.errors, 'p99_ms': histogram.percentile(99) * 1000},
+    )
+
+
+def print_report(results, total, elapsed, lock_monitor, counters):
+    print(f"\n📊 负载测试结果（{elapsed:.1f} 秒）")
+    print(f"   {'操作':<20}{'次数':>9}{'失败':>7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(f"   {result.name[5:]:<20}{result.extra['count']:>9}{result.extra['errors']:>7}"
+              f"{result.ops_per_sec:>10.1f}{result.median_ms:>10.2f}{result.p95_ms:>10.2f}"
+              f"{result.extra['p99_ms']:>10.2f}{result.max_ms:>10.2f}")
+    print(f"   {'合计':<20}{total.count:>9}{total.errors:>7}{total.count / elapsed if elapsed else 0:>10.1f}"
+          f"{total.percentile(50) * 1000:>10.2f}{total.percentile(95) * 1000:>10.2f}"
+          f"{total.percentile(99) * 1000:>10.2f}{total.max * 1000:>10.2f}")
+
+    locks = lock_monitor.summary()
+    print(f"\n🔒 锁等待（每 {lock_monitor.interval * 1000:.0f} ms 采样，共 {lock_monitor.samples} 次，"
+          f"最多同时等待 {lock_monitor.peak_waiting} 个会话）")
+    if not locks:
+        print("   未采样到锁等待")
+    for item in locks[:10]:
+        relation = item['relation'] or '-'
+        print(f"   {item['locktype']:<14}{relation:<28}{item['wait_event']:<16}≈ {item['estimated_wait_s']:.2f} s")
+    if counters:
+        print(f"   事务提交 {counters['xact_commit']}，回滚 {counters['xact_rollback']}，死锁 {counters['deadlocks']}")
+
+
+def run_load(args, db_manager, dataset, user_ids):
+    """启动虚拟用户和锁采样线程，持续 duration 秒后停止并汇总"""
+    stop_event = threading.Event()
+    clients = [
+        VirtualUser(index, db_manager.clone(), dataset, user_ids[index % len(user_ids)], args, stop_event,
+                    args.ramp_up * index / args.clients)
+        for index in range(args.clients)
+    ]
+    lock_monitor = LockMonitor(db_manager.clone(), stop_event)
+    before = database_counters(db_manager)
+
+    print(f"🚀 {args.clients} 个虚拟用户，持续 {args.duration:g} 秒（{args.ramp_up:g} 秒内依次启动）...")
+    started = time.perf_counter()
+    lock_monitor.start()
+    for client in clients:
+        client.start()
+    try:
+        stop_event.wait(args.duration)
+    except KeyboardInterrupt:
+        print("⏹️ 提前结束")
+    stop_event.set()
+    for client in clients:
+        client.join()
+    lock_monitor.join()
+    elapsed = time.perf_counter() - started
+
+    after = database_counters(db_manager)
+    counters = {key: after[key] - before.get(key, 0) for key in after}
+
+    merged = {}
+    failures = Counter()
+    for client in clients:
+        failures.update(client.failures)
+        for name, histogram in client.histograms.items():
+            merged.setdefault(name, LatencyHistogram()).merge(histogram)
+    total = LatencyHistogram()
+    for name, histogram in merged.items():
+        if name != 'visit_flush':
+            total.merge(histogram)
+
+    results = [histogram_result(name, merged[name], elapsed) for name in sorted(merged)]
+    print_report(results, total, elapsed, lock_monitor, counters)
+    for message, count in failures.most_common(5):
+        print(f"   ❌ {message} ×{count}")
+    return results, {
+        'elapsed_s': round(elapsed, 3),
+        'throughput_ops': round(total.count / elapsed, 2) if elapsed else 0.0,
+        'errors': total.errors,
+        'lock_waits': lock_monitor.summary(),
+        'lock_peak_waiting': lock_monitor.peak_waiting,
+        'lock_samples': lock_monitor.samples,
+        'database_counters': counters,
+    }
+
+
+def main():
+    args = parse_arguments()
+    if args.clients < 1 or args.duration <= 0:
+        print("❌ 虚拟用户数和持续时间必须大于 0")
+        return 1
+
+    from src.core.auth_system import DatabaseManager
+
+    spec = DatasetSpec(
+        users=max(args.users, args.clients),
+        sites=max(args.sites, 1),
+        sites_per_user=args.sites_per_user,
+        visits=args.visits,
+        logs=args.logs,
+        seed=args.seed,
+    )
+    db_config = load_database_config(args.config)
+    if db_config is None:
+        return 1
+
+    print(f"🧪 生成合成数据: 用户 {spec.users}，网站 {spec.sites}，访问 {spec.visits}，日志 {spec.logs}")
+    dataset = SyntheticDataset(spec)
+
+    print(f"🗄️ 准备测试 schema {args.schema}（{db_config['host']}:{db_config['port']}/{db_config['database']}）...")
+    if not prepare_schema(db_config, args.schema):
+        print("❌ 测试 schema 创建失败")
+        return 1
+
+    db_manager = DatabaseManager(
+        host=db_config['host'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        port=int(db_config['port'])
+    )
+    try:
+        print("📥 写入合成数据...")
+        user_ids = dataset.load(db_manager)
+        if not user_ids:
+            print("❌ 合成数据写入失败")
+            return 1
+        db_manager.execute_non_query("ANALYZE")
+
+        results, summary = run_load(args, db_manager, dataset, [user_ids[index] for index in sorted(user_ids)])
+    finally:
+        if not args.keep_schema:
+            drop_schema(db_manager, args.schema)
+        db_manager.disconnect()
+
+    parameters = dict(vars(spec))
+    parameters.update({
+        'clients': args.clients, 'duration': args.duration, 'ramp_up': args.ramp_up,
+        'think': str(args.think), 'mix': args.mix, 'visit_batch': args.visit_batch,
+    })
+    parameters.update(summary)
+    suite = BenchmarkSuite('load_test', rounds=1, parameters=parameters)
+    suite.results.extend(results)
+    return finish(suite, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
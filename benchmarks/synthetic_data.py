@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试用的合成数据
+按给定的用户、网站、访问和日志数量生成可复现（固定随机种子）的数据集，
+可替换内置网站目录，也可写入独立的数据库 schema
+"""
+
+import configparser
+import hashlib
+import os
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from src.core.frecency import visit_weight
+from src.core.popularity import log_add
+from src.core.url_utils import normalize_url, url_hash
+from src.core.visit_events import INSERT_EVENTS_SQL
+
+
+BENCH_PASSWORD = "Bench#2025pass"
+USERNAME_PREFIX = "bench_user_"
+SCHEMA_PREFIX = "bench_"
+HISTORY_DAYS = 90
+BATCH_ROWS = 2000
+
+CATEGORY_NAMES = [
+    "学习教育", "开发工具", "设计素材", "新闻资讯", "影音娱乐", "生活服务",
+    "办公效率", "金融理财", "健康医疗", "旅游出行", "购物比价", "社区论坛",
+]
+WORDS = [
+    "在线", "课程", "代码", "设计", "新闻", "视频", "音乐", "地图", "云盘", "翻译", "文档", "社区",
+    "open", "cloud", "code", "design", "news", "music", "learn", "docs", "search", "shop", "travel", "data",
+]
+LOG_ACTIONS = ["login", "logout", "add_website", "edit_website", "delete_website", "visit_website", "search"]
+
+
+@dataclass
+class DatasetSpec:
+    """数据规模"""
+    users: int = 50
+    sites: int = 1000               # 网站目录中的网站数
+    sites_per_user: int = 50        # 每个用户的自定义网站数
+    visits: int = 20000
+    logs: int = 20000
+    seed: int = 42
+
+
+class SyntheticDataset:
+    """合成数据集（全部在内存中，写入数据库前不依赖 psycopg2）"""
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.now = datetime.now().replace(microsecond=0)
+        self.users = self._make_users()
+        self.catalog = self._make_catalog()
+        self.user_websites = self._make_user_websites()
+        self.visits = self._make_visits()
+        self.logs = self._make_logs()
+
+    def _text(self, words=3):
+        return "".join(self.random.choice(WORDS) for _ in range(words))
+
+    def _moment(self):
+        return self.now - timedelta(seconds=self.random.randrange(HISTORY_DAYS * 86400))
+
+    def _make_users(self) -> List[Dict]:
+        return [
+            {'username': f"{USERNAME_PREFIX}{index:05d}", 'email': f"user{index}@bench.example.com"}
+            for index in range(self.spec.users)
+        ]
+
+    def _make_catalog(self) -> Dict[str, List[Dict]]:
+        """与 website_data.RECOMMENDED_WEBSITES 结构相同的网站目录"""
+        catalog = defaultdict(list)
+        for index in range(self.spec.sites):
+            group = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+            catalog[group].append({
+                'name': f"{self._text(2)} {index}",
+                'url': f"https://site{index}.bench.example.com/",
+                'description': f"{self._text(4)}，{self._text(3)}",
+                'category': self._text(1),
+                'rating': self.random.randint(1, 5),
+            })
+        return dict(catalog)
+
+    def _make_user_websites(self) -> List[Tuple[int, Dict]]:
+        """(用户序号, 网站) 列表，每个用户从目录中抽取不重复的网站"""
+        sites = self.all_sites()
+        per_user = min(self.spec.sites_per_user, len(sites))
+        return [
+            (user_index, site)
+            for user_index in range(self.spec.users)
+            for site in self.random.sample(sites, per_user)
+        ]
+
+    def _make_visits(self) -> List[Tuple[int, str, str, datetime]]:
+        """访问事件：用户的网站按 Zipf 分布被访问（少数网站占大部分访问）"""
+        by_user = defaultdict(list)
+        for user_index, site in self.user_websites:
+            by_user[user_index].append(site)
+        if not by_user:
+            return []
+        weights = {user_index: [1 / (rank + 1) for rank in range(len(sites))] for user_index, sites in by_user.items()}
+        user_indexes = list(by_user)
+        visits = []
+        for _ in range(self.spec.visits):
+            user_index = self.random.choice(user_indexes)
+            site = self.random.choices(by_user[user_index], weights[user_index])[0]
+            visits.append((user_index, site['name'], site['url'], self._moment()))
+        visits.sort(key=lambda visit: visit[3])
+        return visits
+
+    def _make_logs(self) -> List[Tuple[int, str, str, datetime]]:
+        if not self.users:
+            return []
+        return [
+            (self.random.randrange(self.spec.users), action, f"{action}: {self._text(3)}", self._moment())
+            for action in self.random.choices(LOG_ACTIONS, k=self.spec.logs)
+        ]
+
+    def all_sites(self) -> List[Dict]:
+        return [site for group in self.catalog.values() for site in group]
+
+    def search_keywords(self, count=5) -> List[str]:
+        """目录中出现过的关键词（命中查询）"""
+        return self.random.sample(WORDS, min(count, len(WORDS)))
+
+    # ------------------------------------------------------------------
+    # 写入数据库
+    # ------------------------------------------------------------------
+
+    def load(self, db_manager) -> Dict[int, int]:
+        """写入用户、自定义网站、访问记录和系统日志，返回 用户序号 -> 用户 id；失败返回空字典"""
+        password_hash = hashlib.sha256(BENCH_PASSWORD.encode('utf-8')).hexdigest()
+        users = [(user['username'], password_hash, user['email'], self.now) for user in self.users]
+        if not db_manager.execute_batches(
+            "INSERT INTO users (username, password_hash, email, created_at) VALUES %s", [users]
+        ):
+            return {}
+
+        rows = db_manager.execute_query(
+            "SELECT id, username FROM users WHERE username LIKE %s", (USERNAME_PREFIX + '%',)
+        )
+        ids_by_name = {username: user_id for user_id, username in rows}
+        user_ids = {index: ids_by_name[user['username']] for index, user in enumerate(self.users)}
+
+        websites = [
+            (user_ids[user_index], site['name'], site['url'], url_hash(site['url']), site['description'],
+             site['category'], site['rating'], bool(index % 3), self._moment())
+            for index, (user_index, site) in enumerate(self.user_websites)
+        ]
+        steps = [
+            ("INSERT INTO user_websites (user_id, name, url, url_hash, description, category, rating, "
+             "is_private, created_at) VALUES %s", websites),
+            ("INSERT INTO website_stats (website_name, website_url, url_hash, user_id, visit_count, "
+             "last_visited, frecency) VALUES %s", self._stats_rows(user_ids)),
+            (INSERT_EVENTS_SQL, [
+                (user_ids[user_index], name, url, normalize_url(url), visited_at)
+                for user_index, name, url, visited_at in self.visits
+            ]),
+            ("INSERT INTO system_logs (user_id, action, details, created_at) VALUES %s", [
+                (user_ids[user_index], action, details, created_at)
+                for user_index, action, details, created_at in self.logs
+            ]),
+        ]
+        for query, rows in steps:
+            batches = [rows[start:start + BATCH_ROWS] for start in range(0, len(rows), BATCH_ROWS)]
+            if not db_manager.execute_batches(query, batches, page_size=BATCH_ROWS):
+                return {}
+        return user_ids
+
+    def _stats_rows(self, user_ids):
+        """按 (用户, 网址) 汇总访问次数、最后访问时间和常用度"""
+        stats = {}
+        for user_index, name, url, visited_at in self.visits:
+            key = (user_index, url_hash(url))
+            weight = visit_weight(visited_at)
+            entry = stats.get(key)
+            if entry is None:
+                stats[key] = [name, url, 1, visited_at, weight]
+            else:
+                entry[2] += 1
+                entry[3] = max(entry[3], visited_at)
+                entry[4] = log_add(entry[4], weight)
+        return [
+            (name, url, digest, user_ids[user_index], count, last_visited, frecency)
+            for (user_index, digest), (name, url, count, last_visited, frecency) in stats.items()
+        ]
+
+
+def load_database_config(path):
+    """读取配置文件的 [database] 节（不存在时不创建默认配置）"""
+    if not os.path.exists(path):
+        print(f"❌ 配置文件 {path} 不存在")
+        return None
+    config = configparser.ConfigParser()
+    config.read(path, encoding='utf-8')
+    return {
+        'host': config.get('database', 'host', fallback='localhost'),
+        'port': config.get('database', 'port', fallback='5432'),
+        'database': config.get('database', 'database', fallback='user_auth_system'),
+        'user': config.get('database', 'user', fallback='postgres'),
+        'password': config.get('database', 'password', fallback='')
+    }
+
+
+def prepare_schema(db_config, schema) -> bool:
+    """在独立的 schema 中建立与正式库相同的表结构
+
+    连接参数通过 PGOPTIONS 设置 search_path，之后本进程所有连接（包括 clone 出的后台连接）都只访问该 schema；
+    schema 会先被删除重建，因此名称必须以 bench_ 开头
+    """
+    if not schema.startswith(SCHEMA_PREFIX):
+        print(f"❌ 基准测试 schema 名称必须以 {SCHEMA_PREFIX} 开头: {schema}")
+        return False
+
+    from scripts.init_database_enhanced import (
+        create_connection, create_database_manager, create_enhanced_tables, setup_frecency,
+        setup_log_partitions, setup_popularity, setup_url_dedup, setup_visit_analytics
+    )
+
+    connection = create_connection(db_config)
+    if connection is None:
+        return False
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        cursor.execute(f'CREATE SCHEMA "{schema}"')
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+    os.environ['PGOPTIONS'] = f"-c search_path={schema}"
+    connection = create_connection(db_config)
+    if connection is None or not create_enhanced_tables(connection):
+        return False
+    connection.close()
+
+    db_manager = create_database_manager(db_config)
+    try:
+        return all(setup(db_manager) for setup in (
+            setup_log_partitions, setup_visit_analytics, setup_popularity, setup_url_dedup, setup_frecency
+        ))
+    finally:
+        db_manager.disconnect()
+
+
+def drop_schema(db_manager, schema) -> bool:
+    return db_manager.execute_non_query(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
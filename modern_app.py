@@ -11,13 +11,22 @@ import os
 import argparse
 import configparser
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QEvent
 from PyQt6.QtGui import QFont
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from src.core.api_client import RemoteServices
 from src.core.auth_system import DatabaseManager, ConfigManager
+from src.core.frecency import FrecencySchema
+from src.core.log_partitions import LogPartitionManager, start_partition_maintenance
+from src.core.metrics import configure_metrics_export
+from src.core.slow_query import configure_slow_query_log
+from src.core.stall_watchdog import DEFAULT_THRESHOLD_MS as STALL_THRESHOLD_MS, start_stall_watchdog
+from src.core.tracing import span, tracer
+from src.core.url_dedup import UrlDeduplicator
+from src.core.visit_events import VisitSchema
 from src.ui.modern_login_window import ModernLoginWindow
 
 
@@ -35,6 +44,8 @@ def parse_arguments():
   python modern_app.py --window-size 1200x800   # 设置窗口大小
   python modern_app.py --theme dark             # 设置界面主题
   python modern_app.py --debug                  # 启用调试模式
+  python modern_app.py --trace trace.json       # 记录操作耗时，用 Perfetto 打开
+  python modern_app.py --server http://192.168.1.10:8765   # 瘦客户端模式，连接 API 服务器
   python modern_app.py --version                # 显示版本信息
         """
     )
@@ -53,6 +64,8 @@ def parse_arguments():
     db_group.add_argument('--db-name', help='数据库名称')
     db_group.add_argument('--db-user', help='数据库用户名')
     db_group.add_argument('--db-password', help='数据库密码')
+    db_group.add_argument('--server', metavar='URL',
+                          help='API 服务器地址（瘦客户端模式，不直接连接数据库；默认读取 [api] server_url）')
     
     # 界面配置
     ui_group = parser.add_argument_group('界面配置')
@@ -70,13 +83,27 @@ def parse_arguments():
                               help='全屏模式启动')
     feature_group.add_argument('--no-splash', action='store_true', 
                               help='跳过启动画面')
+    feature_group.add_argument('--trace', metavar='FILE',
+                              help='记录登录、查询、界面构建和重绘耗时，退出时写入 Chrome trace 文件')
     
     return parser.parse_args()
 
 
+class TracedApplication(QApplication):
+    """记录窗口重绘耗时的应用程序（只在 --trace 时使用，避免平时每个事件多一次 Python 调用）"""
+    
+    def notify(self, receiver, event):
+        if event.type() == QEvent.Type.UpdateRequest:
+            title = getattr(receiver, 'title', None)       # 顶层窗口（QWindow）使用窗口标题
+            name = title() if callable(title) and title() else type(receiver).__name__
+            with span(f"paint {name}", 'paint'):
+                return super().notify(receiver, event)
+        return super().notify(receiver, event)
+
+
 def setup_application(args):
     """设置应用程序"""
-    app = QApplication(sys.argv)
+    app = TracedApplication(sys.argv) if args.trace else QApplication(sys.argv)
     app.setApplicationName("现代化网站推荐系统")
     app.setApplicationVersion("2.0.0")
     app.setOrganizationName("Modern Web Recommendation")
@@ -163,6 +190,59 @@ def print_startup_info(args):
         print("-" * 60)
 
 
+def initialize_database(config_manager, args):
+    """连接数据库并创建或升级数据表，连接失败时返回的管理器处于离线状态"""
+    # 初始化数据库管理器
+    print("✅ 正在初始化数据库...")
+    db_config = config_manager.get_database_config()
+    
+    if args.debug:
+        print(f"🔍 数据库配置: {db_config['host']}:{db_config['port']}/{db_config['database']}")
+    
+    db_manager = DatabaseManager(
+        host=db_config['host'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        port=int(db_config['port'])
+    )
+    
+    # 连接数据库
+    print("🔗 正在连接数据库...")
+    if db_manager.connect():
+        print("✅ 数据库连接成功")
+        
+        # 创建数据表
+        if db_manager.create_tables():
+            print("✅ 数据表创建成功")
+        
+        # 提前创建后续月份的日志分区
+        partition_manager = LogPartitionManager(db_manager)
+        log_table_kind = partition_manager.table_kind()
+        if log_table_kind == 'p':
+            partition_manager.ensure_partitions()
+        elif log_table_kind == 'r':
+            print("⚠️ system_logs 仍是普通表，请运行 scripts/init_database_enhanced.py 迁移为分区表")
+        
+        # 网址去重索引（首次启动新版本时回填哈希并合并重复网址）
+        if not UrlDeduplicator(db_manager).ensure():
+            print("⚠️ 网址去重索引创建失败，添加网站和记录访问可能失败")
+        
+        # 网址常用度（首次启动新版本时按已有访问记录回填）
+        if not FrecencySchema(db_manager).ensure():
+            print("⚠️ 网址常用度列创建失败，记录访问可能失败")
+        
+        # 访问事件表和按小时/按天的汇总表（旧版本数据库没有这些表）
+        if not VisitSchema(db_manager).ensure():
+            print("⚠️ 访问事件表创建失败，访问统计将无法记录")
+        
+        print("👑 管理员账户已准备就绪")
+    else:
+        print("⚠️ 数据库连接失败，使用离线模式")
+    
+    return db_manager
+
+
 def main():
     """主函数"""
     try:
@@ -175,41 +255,51 @@ def main():
         # 创建应用程序
         app = setup_application(args)
         
+        # 操作追踪
+        if args.trace:
+            tracer().start(args.trace)
+            print(f"🧭 操作追踪已启用，退出时写入: {args.trace}")
+        
         # 加载配置
         print("✅ 正在加载配置...")
         config_manager = load_config_with_args(args)
         
-        # 初始化数据库管理器
-        print("✅ 正在初始化数据库...")
-        db_config = config_manager.get_database_config()
+        # 慢查询日志（[performance] 节，slow_query_ms = 0 时关闭）
+        slow_query_log = configure_slow_query_log(config_manager.config)
+        if slow_query_log and args.debug:
+            print(f"🔍 慢查询阈值: {slow_query_log.threshold * 1000:.0f} ms，日志: {slow_query_log.log_path}")
         
-        if args.debug:
-            print(f"🔍 数据库配置: {db_config['host']}:{db_config['port']}/{db_config['database']}")
+        # 运行指标导出（[metrics] 节，http_port 为 0 且 textfile 为空时不启动）
+        metrics_exporter = configure_metrics_export(config_manager.config)
         
-        db_manager = DatabaseManager(
-            host=db_config['host'],
-            database=db_config['database'],
-            user=db_config['user'],
-            password=db_config['password'],
-            port=int(db_config['port'])
-        )
+        # 界面卡顿检测（调试模式或配置了 stall_threshold_ms 时启用）
+        stall_watchdog = None
+        stall_threshold = config_manager.config.getint('performance', 'stall_threshold_ms', fallback=0)
+        if args.debug or stall_threshold > 0:
+            stall_watchdog = start_stall_watchdog(stall_threshold or STALL_THRESHOLD_MS, verbose=args.debug)
+            print(f"🧊 界面卡顿检测已启用（阈值 {stall_watchdog.threshold * 1000:.0f} ms，日志: {stall_watchdog.log_path}）")
         
-        # 连接数据库
-        print("🔗 正在连接数据库...")
-        if db_manager.connect():
-            print("✅ 数据库连接成功")
-            
-            # 创建数据表
-            if db_manager.create_tables():
-                print("✅ 数据表创建成功")
-            
-            print("👑 管理员账户已准备就绪")
+        # 瘦客户端模式通过 API 服务器访问数据，否则直接连接数据库
+        services = None
+        db_manager = None
+        partition_maintainer = None
+        server_url = args.server or config_manager.config.get('api', 'server_url', fallback='').strip()
+        if server_url:
+            print(f"🌐 瘦客户端模式，API 服务器: {server_url}")
+            services = RemoteServices(server_url)
+            if services.ping():
+                print("✅ API 服务器连接成功")
+            else:
+                print("⚠️ API 服务器暂时不可用，登录时会重新连接")
         else:
-            print("⚠️ 数据库连接失败，使用离线模式")
+            db_manager = initialize_database(config_manager, args)
+            if db_manager.connection is not None:
+                # 长时间运行跨月后，后台继续创建后续月份的日志分区
+                partition_maintainer = start_partition_maintenance(db_manager)
         
         # 创建现代化登录窗口
         print("🎨 正在创建现代化登录界面...")
-        login_window = ModernLoginWindow(db_manager, config_manager)
+        login_window = ModernLoginWindow(db_manager, config_manager, services)
         
         # 应用窗口大小设置
         if args.window_size:
@@ -233,7 +323,8 @@ def main():
             # 打开主窗口
             try:
                 from src.ui.main_window import MainWindow
-                main_window = MainWindow(user_info)
+                with span('main_window.create', 'ui'):
+                    main_window = MainWindow(user_info, services)
                 
                 # 应用窗口设置
                 if args.window_size:
@@ -284,7 +375,19 @@ def main():
         print("=" * 60)
         
         # 运行应用程序
-        sys.exit(app.exec())
+        exit_code = app.exec()
+        if args.trace and tracer().stop():
+            print(f"🧭 追踪文件已写入: {args.trace}")
+        if stall_watchdog is not None:
+            stall_watchdog.stop()
+            stall_watchdog.print_report()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
+        if partition_maintainer is not None:
+            partition_maintainer.stop()
+        if services is not None:
+            services.close()
+        sys.exit(exit_code)
         
     except KeyboardInterrupt:
         print("\n🔌 用户中断，正在退出...")
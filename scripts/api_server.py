@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API 服务器启动脚本
+多台电脑上的桌面客户端以瘦客户端模式（modern_app.py --server URL）共用一个服务进程，
+数据库连接由服务进程内的连接池统一管理
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.api_server import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_SESSION_TTL, create_ssl_context, run_server
+from src.core.auth_system import DatabaseManager, ConfigManager
+from src.core.db_pool import DEFAULT_POOL_SIZE, PooledDatabaseManager
+from src.core.frecency import FrecencySchema
+from src.core.log_partitions import LogPartitionManager, start_partition_maintenance
+from src.core.metrics import configure_metrics_export
+from src.core.services import DEFAULT_CACHE_TTL, Services
+from src.core.slow_query import configure_slow_query_log
+from src.core.url_dedup import UrlDeduplicator
+from src.core.visit_events import VisitSchema
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='网站推荐系统 API 服务器',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/api_server.py                          # 按 config.ini 的 [api] 节启动
+  python scripts/api_server.py --host 0.0.0.0 --certfile server.crt --keyfile server.key
+                                                        # 允许局域网内的客户端通过 HTTPS 连接
+  python scripts/api_server.py --pool-size 10 --cache-ttl 0 # 10 条数据库连接，不缓存统计结果
+        """
+    )
+
+    parser.add_argument('--config', '-c', default='config.ini', help='配置文件路径 (默认: config.ini)')
+    parser.add_argument('--host', help=f'监听地址 (默认: [api] host 或 {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, help=f'监听端口 (默认: [api] port 或 {DEFAULT_PORT})')
+    parser.add_argument('--pool-size', type=int, help=f'数据库连接池大小 (默认: [api] pool_size 或 {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--cache-ttl', type=float,
+                        help=f'统计结果缓存秒数，0 表示不缓存 (默认: [api] cache_ttl 或 {DEFAULT_CACHE_TTL:.0f})')
+    parser.add_argument('--session-ttl', type=int,
+                        help=f'登录会话有效期（秒） (默认: [api] session_ttl 或 {DEFAULT_SESSION_TTL})')
+    parser.add_argument('--certfile', help='TLS 证书（PEM），配置后使用 HTTPS (默认: [api] certfile)')
+    parser.add_argument('--keyfile', help='TLS 私钥（PEM） (默认: [api] keyfile)')
+
+    return parser.parse_args()
+
+
+def prepare_schema(db_manager):
+    """创建或升级数据表（与桌面端启动时相同）"""
+    if not db_manager.create_tables():
+        return False
+    partition_manager = LogPartitionManager(db_manager)
+    if partition_manager.table_kind() == 'p':
+        partition_manager.ensure_partitions()
+    if not UrlDeduplicator(db_manager).ensure():
+        print("⚠️ 网址去重索引创建失败，添加网站和记录访问可能失败")
+    if not FrecencySchema(db_manager).ensure():
+        print("⚠️ 网址常用度列创建失败，记录访问可能失败")
+    if not VisitSchema(db_manager).ensure():
+        print("⚠️ 访问事件表创建失败，访问统计将无法记录")
+    return True
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    config_manager = ConfigManager(args.config)
+    config = config_manager.config
+
+    try:
+        host = args.host or config.get('api', 'host', fallback=DEFAULT_HOST)
+        port = args.port or config.getint('api', 'port', fallback=DEFAULT_PORT)
+        pool_size = args.pool_size or config.getint('api', 'pool_size', fallback=DEFAULT_POOL_SIZE)
+        cache_ttl = args.cache_ttl if args.cache_ttl is not None else \
+            config.getfloat('api', 'cache_ttl', fallback=DEFAULT_CACHE_TTL)
+        session_ttl = args.session_ttl or config.getint('api', 'session_ttl', fallback=DEFAULT_SESSION_TTL)
+    except ValueError as e:
+        print(f"❌ [api] 配置无效: {e}")
+        return 1
+
+    certfile = args.certfile or config.get('api', 'certfile', fallback='').strip()
+    keyfile = args.keyfile or config.get('api', 'keyfile', fallback='').strip()
+    ssl_context = None
+    if certfile:
+        try:
+            ssl_context = create_ssl_context(certfile, keyfile)
+        except (OSError, ValueError) as e:
+            print(f"❌ 加载 TLS 证书失败: {e}")
+            return 1
+
+    db_config = config_manager.get_database_config()
+    template = DatabaseManager(
+        host=db_config['host'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        port=int(db_config['port'])
+    )
+    print("🔗 正在连接数据库...")
+    if not template.connect():
+        print("❌ 数据库连接失败，API 服务器未启动")
+        return 1
+    if not prepare_schema(template):
+        print("❌ 数据表创建失败，API 服务器未启动")
+        return 1
+    # 服务进程长期运行，后台定期创建后续月份的日志分区
+    partition_maintainer = start_partition_maintenance(template)
+    # 建表使用的连接不放入连接池
+    template.disconnect()
+
+    configure_slow_query_log(config)
+    metrics_exporter = configure_metrics_export(config)
+
+    pool = PooledDatabaseManager(template, size=pool_size)
+    services = Services(pool, cache_ttl=cache_ttl)
+    print(f"🗄️ 连接池大小: {pool_size}，统计缓存: {cache_ttl:g} 秒")
+    try:
+        run_server(services, host, port, session_ttl=session_ttl, ssl_context=ssl_context)
+    finally:
+        pool.disconnect()
+        if partition_maintainer is not None:
+            partition_maintainer.stop()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
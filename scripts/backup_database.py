@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库备份与恢复脚本
+支持全量/增量备份、校验和恢复，可指定任意数据库（例如本地测试库）
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.auth_system import DatabaseManager, ConfigManager
+from src.core.backup_manager import BackupManager, DEFAULT_BACKUP_DIR
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='数据库备份与恢复工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/backup_database.py backup                 # 增量备份（首次为全量）
+  python scripts/backup_database.py backup --full          # 全量备份
+  python scripts/backup_database.py list                   # 列出备份
+  python scripts/backup_database.py verify                 # 校验全部备份
+  python scripts/backup_database.py restore                # 恢复到最近一次备份
+  python scripts/backup_database.py restore 20250101_...   # 恢复到指定备份
+  python scripts/backup_database.py restore --db-name test_restore   # 恢复到本地测试库
+        """
+    )
+
+    parser.add_argument('command', choices=['backup', 'restore', 'list', 'verify'], help='要执行的操作')
+    parser.add_argument('backup_id', nargs='?', help='恢复时使用的备份编号 (默认: 最近一次)')
+    parser.add_argument('--full', action='store_true', help='强制全量备份')
+    parser.add_argument('--backup-dir', default=DEFAULT_BACKUP_DIR,
+                        help=f'备份目录 (默认: {DEFAULT_BACKUP_DIR})')
+    parser.add_argument('--workers', type=int, default=3, help='并行恢复的线程数 (默认: 3)')
+    parser.add_argument('--config', '-c', default='config.ini', help='配置文件路径 (默认: config.ini)')
+
+    # 数据库配置
+    db_group = parser.add_argument_group('数据库配置')
+    db_group.add_argument('--db-host', help='数据库主机地址')
+    db_group.add_argument('--db-port', type=int, help='数据库端口')
+    db_group.add_argument('--db-name', help='数据库名称')
+    db_group.add_argument('--db-user', help='数据库用户名')
+    db_group.add_argument('--db-password', help='数据库密码')
+
+    return parser.parse_args()
+
+
+def create_database_manager(args):
+    """根据配置文件和命令行参数创建数据库管理器"""
+    db_config = ConfigManager(args.config).get_database_config()
+    return DatabaseManager(
+        host=args.db_host or db_config['host'],
+        database=args.db_name or db_config['database'],
+        user=args.db_user or db_config['user'],
+        password=args.db_password or db_config['password'],
+        port=args.db_port or int(db_config['port'])
+    )
+
+
+def print_progress(percent, table):
+    if table:
+        print(f"   [{percent:3d}%] {table}")
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    db_manager = create_database_manager(args)
+    manager = BackupManager(db_manager, args.backup_dir, max_workers=args.workers)
+
+    if args.command == 'list':
+        backups = manager.list_backups()
+        if not backups:
+            print("ℹ️ 还没有任何备份")
+        for backup in backups:
+            kind = "全量" if backup['full'] else "增量"
+            rows = sum(info['rows'] for info in backup['tables'].values())
+            print(f"📦 {backup['backup_id']}  {kind}  {rows} 行")
+        return 0
+
+    if args.command == 'verify':
+        errors = []
+        for backup in manager.list_backups():
+            errors.extend(manager.verify(backup))
+        for error in errors:
+            print(f"❌ {error}")
+        if not errors:
+            print("✅ 全部备份校验通过")
+        return 1 if errors else 0
+
+    if not db_manager.connect():
+        return 1
+
+    try:
+        if args.command == 'backup':
+            print("💾 开始备份...")
+            result = manager.backup(full=args.full, progress_callback=print_progress)
+            if result.success:
+                kind = "全量" if result.full else "增量"
+                print(f"✅ {kind}备份完成: {result.path}")
+        else:
+            print("♻️ 开始恢复...")
+            result = manager.restore(args.backup_id, progress_callback=print_progress)
+            if result.success:
+                print(f"✅ 已恢复到备份 {result.backup_id} ({' → '.join(result.chain)})")
+
+        for table, rows in result.rows.items():
+            print(f"   {table}: {rows} 行")
+        for error in result.errors:
+            print(f"❌ {error}")
+        return 0 if result.success else 1
+    finally:
+        db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,17 @@ except ImportError:
     print("❌ psycopg2 未安装，请运行: pip install psycopg2-binary")
     sys.exit(1)
 
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.auth_system import DatabaseManager
+from src.core.log_partitions import LogPartitionManager
+from src.core.visit_events import VisitSchema
+from src.core.popularity import SCHEMA_STATEMENTS as POPULARITY_SCHEMA_STATEMENTS, PopularityRanking
+from src.core.link_checker import LinkHealthMonitor
+from src.core.url_dedup import UrlDeduplicator
+from src.core.frecency import FrecencySchema
+
 def load_config():
     """加载配置文件"""
     config = configparser.ConfigParser()
@@ -92,18 +103,6 @@ def create_enhanced_tables(connection):
     );
     """
     
-    # 系统日志表（管理员功能）
-    system_logs_table = """
-    CREATE TABLE IF NOT EXISTS system_logs (
-        id SERIAL PRIMARY KEY,
-        user_id INTEGER REFERENCES users(id),
-        action VARCHAR(100) NOT NULL,
-        details TEXT,
-        ip_address VARCHAR(45),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
     # 网站访问统计表
     website_stats_table = """
     CREATE TABLE IF NOT EXISTS website_stats (
@@ -119,7 +118,6 @@ def create_enhanced_tables(connection):
     tables = [
         ("用户表", users_table),
         ("用户自定义网站表", user_websites_table),
-        ("系统日志表", system_logs_table),
         ("网站访问统计表", website_stats_table)
     ]
     
@@ -137,6 +135,72 @@ def create_enhanced_tables(connection):
     cursor.close()
     return True
 
+def create_database_manager(db_config):
+    """创建数据库管理器（供分区、汇总表等模块使用）"""
+    return DatabaseManager(
+        host=db_config['host'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        port=int(db_config['port'])
+    )
+
+def setup_log_partitions(db_manager):
+    """创建按月分区的系统日志表（已有普通表时迁移为分区表）"""
+    if LogPartitionManager(db_manager).setup():
+        print("✅ 系统日志表（按月分区）创建成功")
+        return True
+    print("❌ 系统日志表创建失败")
+    return False
+
+def setup_visit_analytics(db_manager):
+    """创建访问事件表和按小时/按天的汇总表"""
+    if not VisitSchema(db_manager).create():
+        print("❌ 访问事件表创建失败")
+        return False
+    print("✅ 访问事件表和汇总表创建成功")
+    return True
+
+def setup_popularity(db_manager):
+    """创建全站网址热度表及其维护触发器"""
+    if not db_manager.execute_transaction(POPULARITY_SCHEMA_STATEMENTS):
+        print("❌ 网址热度表创建失败")
+        return False
+    if not PopularityRanking(db_manager).seed_from_stats():
+        print("⚠️ 网址热度初始化失败，将从新的访问开始统计")
+    print("✅ 网址热度表和触发器创建成功")
+    return True
+
+def setup_url_dedup(db_manager):
+    """回填规范网址哈希、合并重复网址并建立唯一索引"""
+    summary = UrlDeduplicator(db_manager).migrate()
+    if summary is None:
+        print("❌ 网址去重索引创建失败")
+        return False
+    if not PopularityRanking(db_manager).rekey():
+        print("⚠️ 网址热度数据按新的网址规则归并失败")
+    print(f"✅ 网址去重索引创建成功（合并重复网址 {summary['websites_removed']} 个）")
+    return True
+
+def setup_frecency(db_manager):
+    """为访问记录添加常用度列并按已有访问次数回填"""
+    if not FrecencySchema(db_manager).backfill():
+        print("❌ 网址常用度列创建失败")
+        return False
+    print("✅ 网址常用度列创建成功")
+    return True
+
+def setup_link_health(db_manager):
+    """创建链接检测结果表并登记待检测的链接"""
+    monitor = LinkHealthMonitor(db_manager)
+    if not monitor.setup():
+        print("❌ 链接检测表创建失败")
+        return False
+    if not monitor.sync_targets():
+        print("⚠️ 待检测链接登记失败，将在首次检测时重试")
+    print("✅ 链接检测表创建成功")
+    return True
+
 def create_admin_user(connection):
     """创建默认管理员账户"""
     admin_username = "admin"
@@ -201,7 +265,8 @@ def create_default_avatars_folder():
 - 最大文件大小: 2MB
 
 ## 命名规则
-- 用户头像: `user_{user_id}_{timestamp}.{ext}`
+- 用户头像: `avatar_{内容哈希}.{png|jpg}`（上传时缩小到 512 像素以内并重新编码，相同图片只保存一份）
+- 圆形缩略图: `thumbs/{内容哈希}_{尺寸}.png`
 - 系统头像: `{name}_avatar.{ext}`
 """
     
@@ -238,6 +303,46 @@ def main():
         connection.close()
         return 1
     
+    db_manager = create_database_manager(db_config)
+    try:
+        # 系统日志分区表
+        print("🗂️ 配置系统日志分区...")
+        if not setup_log_partitions(db_manager):
+            connection.close()
+            return 1
+        
+        # 访问事件与汇总表
+        print("📈 创建访问统计汇总表...")
+        if not setup_visit_analytics(db_manager):
+            connection.close()
+            return 1
+        
+        # 全站网址热度
+        print("🔥 创建网址热度表...")
+        if not setup_popularity(db_manager):
+            connection.close()
+            return 1
+        
+        # 网址去重
+        print("🔁 建立网址去重索引...")
+        if not setup_url_dedup(db_manager):
+            connection.close()
+            return 1
+        
+        # 网址常用度
+        print("⭐ 创建网址常用度列...")
+        if not setup_frecency(db_manager):
+            connection.close()
+            return 1
+        
+        # 链接健康检测
+        print("🔗 创建链接检测表...")
+        if not setup_link_health(db_manager):
+            connection.close()
+            return 1
+    finally:
+        db_manager.disconnect()
+    
     # 创建管理员账户
     print("👑 创建管理员账户...")
     create_admin_user(connection)
@@ -256,8 +361,8 @@ def main():
     print("   ✅ 用户头像系统")
     print("   ✅ 管理员功能")
     print("   ✅ 用户自定义网站")
-    print("   ✅ 系统日志记录")
-    print("   ✅ 网站访问统计")
+    print("   ✅ 系统日志记录（按月分区）")
+    print("   ✅ 网站访问统计（访问事件 + 小时/日汇总）")
     print()
     print("👑 管理员账户信息:")
     print("   用户名: admin")
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API 客户端模块（瘦客户端模式）
+桌面程序不直接连接数据库，通过 HTTP/JSON 调用 api_server；
+RemoteServices 与 services.Services 提供相同的方法和返回值，界面代码无需区分
+"""
+
+import base64
+import binascii
+import http.client
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from src.core.auth_system import SecurityManager
+from src.core.avatar_files import AVATAR_DIR, is_avatar_name, save_avatar_bytes
+from src.core.bookmark_importer import DEFAULT_PRIVATE, DEFAULT_RATING, ImportResult
+
+
+DEFAULT_TIMEOUT = 15.0
+IMPORT_TIMEOUT = 300.0                      # 书签导入在服务器端同步完成，大文件需要更长时间
+
+EMPTY_STATISTICS = {
+    'total_users': 0, 'active_users': 0, 'admin_users': 0,
+    'total_websites': 0, 'public_websites': 0, 'private_websites': 0,
+    'visits': {'total_visits': 0, 'trend': [], 'hourly': []},
+    'popular': None,
+}
+
+
+class ApiError(Exception):
+    """请求失败（网络错误时 status 为 0）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _parse_datetime(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def _parse_times(records, fields=('created_at',)):
+    """把 JSON 中的时间字符串还原为 datetime"""
+    for record in records:
+        for field in fields:
+            if record.get(field):
+                record[field] = _parse_datetime(record[field])
+    return records
+
+
+def _parse_visit_overview(overview) -> Dict:
+    overview['trend'] = [(date.fromisoformat(day), visits) for day, visits in overview.get('trend', [])]
+    overview['hourly'] = [tuple(item) for item in overview.get('hourly', [])]
+    return overview
+
+
+class ApiClient:
+    """同步 HTTP 客户端：每个线程一条长连接，登录后自动携带令牌"""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url if '://' in base_url else f"http://{base_url}")
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+        self._local = threading.local()
+
+    @property
+    def base_url(self):
+        scheme = 'https' if self.https else 'http'
+        port = f":{self.port}" if self.port else ''
+        return f"{scheme}://{self.host}{port}{self.prefix}"
+
+    def _connection(self, timeout):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            connection = connection_class(self.host, self.port, timeout=timeout)
+            self._local.connection = connection
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def _discard_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def request(self, method, path, payload=None, params=None, timeout=None):
+        """发送请求并返回解析后的 JSON；失败时抛出 ApiError"""
+        url = self.prefix + path + (f"?{urlencode(params)}" if params else '')
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+
+        # 服务器关闭了空闲的长连接时重新连接一次
+        for attempt in range(2):
+            connection = self._connection(timeout or self.timeout)
+            reused = connection.sock is not None
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                self._discard_connection()
+                if not reused or attempt:
+                    raise ApiError(0, f"与服务器的连接中断: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                self._discard_connection()
+                raise ApiError(0, f"无法连接服务器 {self.base_url}: {e}")
+
+        if response.getheader('Connection', '').lower() == 'close':
+            self._discard_connection()
+        try:
+            result = json.loads(data.decode('utf-8')) if data else {}
+        except (UnicodeDecodeError, ValueError):
+            raise ApiError(response.status, f"服务器返回了无效的内容（HTTP {response.status}）")
+        if response.status != 200:
+            raise ApiError(response.status, result.get('error') or f"HTTP {response.status}")
+        return result
+
+    def close(self):
+        self._discard_connection()
+
+
+class _RemoteService:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def _call(self, failure, action, method, path, payload=None, params=None, timeout=None):
+        """请求失败时打印错误并返回 failure"""
+        try:
+            return self.client.request(method, path, payload, params, timeout)
+        except ApiError as e:
+            print(f"❌ {action}失败: {e.message}")
+            return failure
+
+
+class RemoteAuthService(_RemoteService):
+    """登录注册和个人信息（密码强度提示在本地计算）"""
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.security_manager = SecurityManager()
+
+    def login(self, username, password):
+        try:
+            data = self.client.request('POST', '/api/auth/login', {'username': username, 'password': password})
+        except ApiError as e:
+            print(f"❌ 登录失败: {e.message}")
+            return False, f"❌ {e.message}", None
+        if not data.get('success'):
+            return False, data.get('message', "登录失败"), None
+        self.client.token = data['token']
+        user = _parse_times([data['user']], ('created_at', 'last_login'))[0]
+        # 头像可能是在其他电脑上传的
+        self.fetch_avatar(user.get('avatar_path'))
+        return True, data['message'], user
+
+    def register(self, username, password, confirm_password, email=None):
+        data = self._call({'success': False, 'message': "无法连接服务器，请稍后重试"}, "注册",
+                          'POST', '/api/auth/register', {
+                              'username': username, 'password': password,
+                              'confirm_password': confirm_password, 'email': email,
+                          })
+        return data['success'], data['message']
+
+    def logout(self):
+        if self.client.token:
+            self._call({}, "退出登录", 'POST', '/api/auth/logout')
+            self.client.token = None
+
+    def change_password(self, user_id, old_password, new_password):
+        data = self._call({'success': False, 'message': "密码修改失败，请稍后重试"}, "修改密码",
+                          'POST', '/api/auth/password',
+                          {'old_password': old_password, 'new_password': new_password})
+        return data['success'], data['message']
+
+    def update_profile(self, user_id, username, display_name, email, avatar_path):
+        data = self._call({'success': False, 'message': "个人信息保存失败，请稍后重试"}, "保存个人信息",
+                          'PUT', '/api/profile', {
+                              'username': username, 'display_name': display_name,
+                              'email': email, 'avatar_path': avatar_path,
+                          })
+        return data['success'], data['message']
+
+
+    def upload_avatar(self, user_id, filename):
+        """把本地处理好的头像上传到服务器（保存个人信息前调用），返回 (是否成功, 提示信息)"""
+        try:
+            with open(os.path.join(AVATAR_DIR, filename), 'rb') as f:
+                content = base64.b64encode(f.read()).decode('ascii')
+        except (OSError, TypeError) as e:
+            return False, f"读取头像文件失败: {e}"
+        data = self._call({'success': False, 'message': "头像上传失败，请稍后重试"}, "上传头像",
+                          'POST', '/api/profile/avatar', {'filename': filename, 'content': content})
+        return data['success'], data['message']
+
+    def fetch_avatar(self, filename) -> bool:
+        """本地没有该头像时从服务器下载"""
+        if not is_avatar_name(filename):
+            return False
+        if os.path.exists(os.path.join(AVATAR_DIR, filename)):
+            return True
+        data = self._call(None, "下载头像", 'GET', '/api/avatar', params={'name': filename})
+        if not data:
+            return False
+        try:
+            save_avatar_bytes(filename, base64.b64decode(data['content']), AVATAR_DIR)
+        except (binascii.Error, KeyError, TypeError, ValueError, OSError) as e:
+            print(f"❌ 保存头像失败: {e}")
+            return False
+        return True
+
+
+class RemoteSiteService(_RemoteService):
+    """当前登录用户的网站（user_id 参数只为与本地服务保持相同签名，服务器按会话确定用户）"""
+
+    def list_websites(self, user_id) -> Dict:
+        data = self._call({'websites': [], 'total': 0, 'public': 0}, "加载网站列表", 'GET', '/api/sites')
+        _parse_times(data['websites'])
+        return data
+
+    def search_websites(self, user_id, keyword) -> List[Dict]:
+        data = self._call({'websites': []}, "搜索网站", 'GET', '/api/sites/search', params={'q': keyword})
+        return _parse_times(data['websites'])
+
+    def get_website(self, user_id, website_id) -> Optional[Dict]:
+        website = self._call(None, "获取网站信息", 'GET', f"/api/sites/{int(website_id)}")
+        return _parse_times([website])[0] if website else None
+
+    def add_website(self, user_id, data):
+        result = self._call({'success': False, 'message': "网站添加失败，请稍后重试", 'website': None},
+                            "添加网站", 'POST', '/api/sites', data)
+        website = _parse_times([result['website']])[0] if result.get('website') else None
+        return result['success'], result['message'], website
+
+    def update_website(self, user_id, website_id, data):
+        result = self._call({'success': False, 'message': "网站信息更新失败，请稍后重试"},
+                            "更新网站", 'PUT', f"/api/sites/{int(website_id)}", data)
+        return result['success'], result['message']
+
+    def delete_website(self, user_id, website_id):
+        result = self._call({'success': False, 'message': "网站删除失败，请稍后重试"},
+                            "删除网站", 'DELETE', f"/api/sites/{int(website_id)}")
+        return result['success'], result['message']
+
+    def import_bookmarks(self, user_id, file_path, progress_callback=None, is_cancelled=None,
+                         rating=DEFAULT_RATING, is_private=DEFAULT_PRIVATE) -> ImportResult:
+        """上传书签文件，由服务器解析并导入（上传后不能取消）"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError as e:
+            return ImportResult(errors=[f"读取书签文件失败: {e}"])
+        if is_cancelled is not None and is_cancelled():
+            return ImportResult(cancelled=True)
+
+        try:
+            data = self.client.request('POST', '/api/sites/import', {
+                'filename': file_path.replace('\\', '/').rsplit('/', 1)[-1], 'content': content,
+                'rating': rating, 'is_private': is_private,
+            }, timeout=IMPORT_TIMEOUT)
+        except ApiError as e:
+            return ImportResult(errors=[f"导入书签失败: {e.message}"])
+        result = ImportResult(**data)
+        if progress_callback is not None:
+            progress_callback(100, result)
+        return result
+
+    def record_visit(self, user_id, website_name, website_url):
+        data = self._call({'success': False}, "记录访问", 'POST', '/api/visits',
+                          {'name': website_name, 'url': website_url})
+        return data['success']
+
+    def flush_visits(self):
+        """访问事件由服务器攒批写入"""
+        return True
+
+    def log_action(self, user_id, action, details, ip_address=None):
+        data = self._call({'success': False}, "记录系统日志", 'POST', '/api/logs',
+                          {'action': action, 'details': details})
+        return data['success']
+
+    def clone(self):
+        """HTTP 连接按线程区分，后台线程直接共用"""
+        return self
+
+
+class RemoteStatsService(_RemoteService):
+    def frecency(self, user_id) -> Dict[str, float]:
+        return self._call({}, "读取常用度", 'GET', '/api/stats/frecency')
+
+    def visit_overview(self, days=7) -> Dict:
+        data = self._call(dict(EMPTY_STATISTICS['visits']), "读取访问统计", 'GET', '/api/stats/visits',
+                          params={'days': days})
+        return _parse_visit_overview(data)
+
+    def popular_sites(self, limit=10) -> List[Dict]:
+        data = self._call({'sites': []}, "读取热门网站", 'GET', '/api/stats/popular', params={'limit': limit})
+        return _parse_times(data['sites'], ('last_visited',))
+
+
+class RemoteAdminService(_RemoteService):
+    def statistics(self) -> Dict:
+        data = self._call(None, "加载统计数据", 'GET', '/api/admin/statistics')
+        if data is None:
+            return dict(EMPTY_STATISTICS, visits=dict(EMPTY_STATISTICS['visits']))
+        _parse_visit_overview(data['visits'])
+        return data
+
+    def users(self) -> List[Dict]:
+        return _parse_times(self._call({'users': []}, "加载用户列表", 'GET', '/api/admin/users')['users'])
+
+    def websites(self) -> List[Dict]:
+        return self._call({'websites': []}, "加载网站列表", 'GET', '/api/admin/websites')['websites']
+
+    def logs(self, limit=100) -> List[Dict]:
+        data = self._call({'logs': []}, "加载系统日志", 'GET', '/api/admin/logs', params={'limit': limit})
+        return _parse_times(data['logs'])
+
+    def link_health(self, limit=500) -> Dict:
+        empty = {'summary': {'total': 0, 'checked': 0, 'broken': 0, 'due': 0}, 'broken': []}
+        data = self._call(empty, "加载链接检测结果", 'GET', '/api/admin/links', params={'limit': limit})
+        _parse_times(data['broken'], ('last_checked', 'last_ok'))
+        return data
+
+    def delete_user(self, user_id):
+        return self._call({'success': False}, "删除用户", 'DELETE', f"/api/admin/users/{int(user_id)}")['success']
+
+    def delete_website(self, website_id):
+        return self._call({'success': False}, "删除网站", 'DELETE',
+                          f"/api/admin/websites/{int(website_id)}")['success']
+
+
+class RemoteServices:
+    """通过 API 服务器访问的全部服务（接口与 services.Services 相同）"""
+
+    remote = True
+    db_manager = None
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT):
+        self.client = ApiClient(base_url, timeout)
+        self.auth = RemoteAuthService(self.client)
+        self.sites = RemoteSiteService(self.client)
+        self.stats = RemoteStatsService(self.client)
+        self.admin = RemoteAdminService(self.client)
+
+    def ping(self) -> bool:
+        """检查服务器是否可用"""
+        try:
+            return self.client.request('GET', '/api/health').get('status') == 'ok'
+        except ApiError as e:
+            print(f"❌ API 服务器不可用: {e.message}")
+            return False
+
+    def close(self):
+        self.auth.logout()
+        self.client.close()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地 HTTP/JSON API 服务器
+多个桌面客户端（瘦客户端模式）共用一个服务进程：请求在 asyncio 事件循环中解析，
+业务调用放到线程池中执行，数据库连接来自共享连接池，读多写少的统计结果在进程内缓存
+"""
+
+import asyncio
+import base64
+import binascii
+import ipaddress
+import json
+import re
+import secrets
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from src.core.bookmark_importer import DEFAULT_PRIVATE, DEFAULT_RATING
+from src.core.latency import KIND_ACTION, default_tracker
+from src.core.metrics import API_REQUESTS, API_SESSIONS
+from src.core.visit_events import FLUSH_INTERVAL_MS
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_SESSION_TTL = 8 * 3600              # 会话有效期（秒），每次请求后顺延
+MAX_BODY_BYTES = 20 * 1024 * 1024           # 书签文件随请求上传，限制请求体大小
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_TIMEOUT = 60
+
+ACCESS_PUBLIC = 'public'
+ACCESS_USER = 'user'
+ACCESS_ADMIN = 'admin'
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+
+class HttpError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def encode_json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+
+class Request:
+    """解析后的 HTTP 请求"""
+
+    def __init__(self, method, target, headers, body, peer):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query))
+        self.headers = headers
+        self.body = body
+        self.peer = peer
+        self.params = {}
+        self.token = None
+        self.user = None
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HttpError(400, f"请求内容不是有效的 JSON: {e}")
+        if not isinstance(data, dict):
+            raise HttpError(400, "请求内容必须是 JSON 对象")
+        return data
+
+    def int_param(self, name, default=None) -> int:
+        value = self.query.get(name, default)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise HttpError(400, f"参数 {name} 必须是整数")
+
+    @property
+    def bearer_token(self) -> Optional[str]:
+        value = self.headers.get('authorization', '')
+        if value.lower().startswith('bearer '):
+            return value[7:].strip()
+        return None
+
+
+class Route:
+    """路由：方法 + 路径模式（{name} 匹配一段整数），处理函数在线程池中执行"""
+
+    def __init__(self, method, pattern, handler, access=ACCESS_USER):
+        self.method = method
+        self.pattern = pattern
+        self.regex = re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>\\d+)', pattern) + '$')
+        self.handler = handler
+        self.access = access
+
+
+class SessionStore:
+    """登录会话：随机令牌 → 用户信息，超过有效期未使用的会话失效"""
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_info) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = [time.monotonic() + self.ttl, user_info]
+            API_SESSIONS.set(len(self._sessions))
+        return token
+
+    def get(self, token) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._sessions[token]
+                API_SESSIONS.set(len(self._sessions))
+                return None
+            entry[0] = now + self.ttl
+            return entry[1]
+
+    def remove(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+            API_SESSIONS.set(len(self._sessions))
+
+    def remove_user(self, user_id):
+        """用户被删除后使其所有会话失效"""
+        with self._lock:
+            for token in [token for token, entry in self._sessions.items() if entry[1]['id'] == user_id]:
+                del self._sessions[token]
+            API_SESSIONS.set(len(self._sessions))
+
+    def purge(self):
+        now = time.monotonic()
+        with self._lock:
+            for token in [token for token, entry in self._sessions.items() if entry[0] <= now]:
+                del self._sessions[token]
+            API_SESSIONS.set(len(self._sessions))
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+def create_ssl_context(certfile, keyfile=None) -> ssl.SSLContext:
+    """服务端 TLS 配置（证书和私钥为 PEM 文件，私钥可以与证书放在同一个文件中）"""
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(certfile, keyfile or None)
+    return context
+
+
+def is_loopback(host) -> bool:
+    """监听地址是否只允许本机访问"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ApiServer:
+    """基于 asyncio 的 HTTP/1.1 JSON 服务（支持长连接，配置证书后使用 HTTPS）"""
+
+    def __init__(self, services, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None,
+                 session_ttl=DEFAULT_SESSION_TTL, flush_interval=FLUSH_INTERVAL_MS / 1000, ssl_context=None):
+        self.services = services
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        # 线程数与连接池大小一致，多出的请求在线程池队列中等待，而不是都去抢连接
+        pool_size = getattr(services.db_manager, 'size', None)
+        self.executor = ThreadPoolExecutor(max_workers=workers or pool_size or 5, thread_name_prefix="api")
+        self.sessions = SessionStore(session_ttl)
+        self.flush_interval = flush_interval
+        self.server = None
+        self._flush_task = None
+        self.routes = self._build_routes()
+
+    def _build_routes(self):
+        return [
+            Route('GET', '/api/health', self.health, ACCESS_PUBLIC),
+            Route('POST', '/api/auth/login', self.login, ACCESS_PUBLIC),
+            Route('POST', '/api/auth/register', self.register, ACCESS_PUBLIC),
+            Route('POST', '/api/auth/logout', self.logout),
+            Route('POST', '/api/auth/password', self.change_password),
+            Route('PUT', '/api/profile', self.update_profile),
+            Route('POST', '/api/profile/avatar', self.upload_avatar),
+            Route('GET', '/api/avatar', self.get_avatar),
+            Route('GET', '/api/sites', self.list_websites),
+            Route('POST', '/api/sites', self.add_website),
+            Route('GET', '/api/sites/search', self.search_websites),
+            Route('POST', '/api/sites/import', self.import_bookmarks),
+            Route('GET', '/api/sites/{website_id}', self.get_website),
+            Route('PUT', '/api/sites/{website_id}', self.update_website),
+            Route('DELETE', '/api/sites/{website_id}', self.delete_website),
+            Route('POST', '/api/visits', self.record_visit),
+            Route('POST', '/api/logs', self.log_action),
+            Route('GET', '/api/stats/frecency', self.frecency),
+            Route('GET', '/api/stats/visits', self.visit_overview),
+            Route('GET', '/api/stats/popular', self.popular_sites),
+            Route('GET', '/api/admin/statistics', self.admin_statistics, ACCESS_ADMIN),
+            Route('GET', '/api/admin/users', self.admin_users, ACCESS_ADMIN),
+            Route('GET', '/api/admin/websites', self.admin_websites, ACCESS_ADMIN),
+            Route('GET', '/api/admin/logs', self.admin_logs, ACCESS_ADMIN),
+            Route('GET', '/api/admin/links', self.admin_links, ACCESS_ADMIN),
+            Route('DELETE', '/api/admin/users/{user_id}', self.admin_delete_user, ACCESS_ADMIN),
+            Route('DELETE', '/api/admin/websites/{website_id}', self.admin_delete_website, ACCESS_ADMIN),
+        ]
+
+    # ------------------------------------------------------------------
+    # 运行
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port, ssl=self.ssl_context)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+        scheme = 'https' if self.ssl_context else 'http'
+        print(f"🚀 API 服务器已启动: {scheme}://{self.host}:{self.port}")
+        if self.ssl_context is None and not is_loopback(self.host):
+            # 密码和会话令牌以明文传输
+            print("⚠️ 未配置 TLS 证书却监听了非本机地址，请配置 certfile/keyfile 或改为只监听 127.0.0.1 并通过 HTTPS 反向代理对外提供服务")
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """停止接收请求，写入缓冲的访问事件后关闭线程池"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.services.close)
+        self.executor.shutdown(wait=True)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await loop.run_in_executor(self.executor, self.services.sites.flush_visits)
+                self.sessions.purge()
+            except Exception as e:
+                print(f"⚠️ 定时写入访问事件失败: {e}")
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _read_request(self, reader, peer) -> Optional[Request]:
+        """读取一个请求，连接已关闭时返回 None"""
+        try:
+            line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, "无效的请求行")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(400, "请求头过多")
+        headers[':version'] = version
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "无效的 Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"请求内容超过 {MAX_BODY_BYTES // (1024 * 1024)} MB")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, headers, body, peer)
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        peer = peer[0] if peer else None
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader, peer)
+                except HttpError as e:
+                    await self._write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                status, payload = await self.dispatch(request)
+                keep_alive = (request.headers.get('connection', '').lower() != 'close'
+                              and request.headers[':version'] == 'HTTP/1.1')
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _write_response(self, writer, status, payload, keep_alive=True):
+        body = encode_json(payload)
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    def _match(self, request):
+        allowed = False
+        for route in self.routes:
+            match = route.regex.match(request.path)
+            if match is None:
+                continue
+            if route.method != request.method:
+                allowed = True
+                continue
+            request.params = {name: int(value) for name, value in match.groupdict().items()}
+            return route
+        raise HttpError(405 if allowed else 404, "不支持的请求方法" if allowed else "接口不存在")
+
+    def _authorize(self, route, request):
+        if route.access == ACCESS_PUBLIC:
+            return
+        request.token = request.bearer_token
+        request.user = self.sessions.get(request.token) if request.token else None
+        if request.user is None:
+            raise HttpError(401, "未登录或登录已过期，请重新登录")
+        if route.access == ACCESS_ADMIN and not request.user.get('is_admin'):
+            raise HttpError(403, "只有管理员才能执行该操作")
+
+    async def dispatch(self, request):
+        """执行请求，返回 (状态码, 响应内容)"""
+        started = time.perf_counter()
+        route_name = 'unmatched'
+        status = 500
+        try:
+            route = self._match(request)
+            route_name = f"{route.method} {route.pattern}"
+            self._authorize(route, request)
+            payload = await asyncio.get_running_loop().run_in_executor(self.executor, route.handler, request)
+            status = 200
+            return status, payload
+        except HttpError as e:
+            status = e.status
+            return status, {'error': e.message}
+        except Exception as e:
+            print(f"❌ 处理请求 {request.method} {request.path} 失败: {e}")
+            return status, {'error': "服务器内部错误"}
+        finally:
+            API_REQUESTS.inc(route=route_name, status=str(status))
+            default_tracker().record(KIND_ACTION, f"api {route_name}", time.perf_counter() - started,
+                                     error=status >= 500)
+
+    # ------------------------------------------------------------------
+    # 接口（在线程池中执行）
+    # ------------------------------------------------------------------
+
+    def health(self, request):
+        db_manager = self.services.db_manager
+        stats = getattr(db_manager, 'stats', None)
+        return {
+            'status': 'ok',
+            'sessions': len(self.sessions),
+            'pool': stats() if callable(stats) else None,
+        }
+
+    def login(self, request):
+        data = request.json()
+        success, message, user = self.services.auth.login(data.get('username', ''), data.get('password', ''))
+        if not success:
+            return {'success': False, 'message': message}
+        return {'success': True, 'message': message, 'user': user, 'token': self.sessions.create(user)}
+
+    def register(self, request):
+        data = request.json()
+        success, message = self.services.auth.register(
+            data.get('username', ''), data.get('password', ''), data.get('confirm_password', ''), data.get('email')
+        )
+        return {'success': success, 'message': message}
+
+    def logout(self, request):
+        self.sessions.remove(request.token)
+        return {'success': True}
+
+    def change_password(self, request):
+        data = request.json()
+        success, message = self.services.auth.change_password(
+            request.user['id'], data.get('old_password', ''), data.get('new_password', '')
+        )
+        return {'success': success, 'message': message}
+
+    def update_profile(self, request):
+        data = request.json()
+        user = request.user
+        fields = {name: data.get(name, user.get(name)) or '' for name in ('username', 'display_name', 'email')}
+        avatar_path = data.get('avatar_path', user.get('avatar_path')) or 'default_avatar.png'
+        if not isinstance(avatar_path, str):
+            raise HttpError(400, "avatar_path 必须是字符串")
+        # 头像文件名由服务检查：只能是系统头像或已上传的按内容哈希命名的头像
+        success, message = self.services.auth.update_profile(
+            user['id'], fields['username'], fields['display_name'], fields['email'], avatar_path
+        )
+        if success:
+            user.update(fields, avatar_path=avatar_path)
+        return {'success': success, 'message': message}
+
+    def upload_avatar(self, request):
+        data = request.json()
+        try:
+            content = base64.b64decode(data.get('content') or '', validate=True)
+        except (binascii.Error, TypeError, ValueError):
+            raise HttpError(400, "头像内容不是有效的 base64")
+        success, message = self.services.auth.save_avatar(data.get('filename'), content)
+        if not success:
+            raise HttpError(400, message)
+        return {'success': True, 'message': message}
+
+    def get_avatar(self, request):
+        filename = request.query.get('name', '')
+        content = self.services.auth.read_avatar(filename)
+        if content is None:
+            raise HttpError(404, "头像文件不存在")
+        return {'filename': filename, 'content': base64.b64encode(content).decode('ascii')}
+
+    def list_websites(self, request):
+        return self.services.sites.list_websites(request.user['id'])
+
+    def search_websites(self, request):
+        return {'websites': self.services.sites.search_websites(request.user['id'], request.query.get('q', ''))}
+
+    def get_website(self, request):
+        website = self.services.sites.get_website(request.user['id'], request.params['website_id'])
+        if website is None:
+            raise HttpError(404, "网站信息不存在")
+        return website
+
+    def add_website(self, request):
+        success, message, website = self.services.sites.add_website(request.user['id'], request.json())
+        return {'success': success, 'message': message, 'website': website}
+
+    def update_website(self, request):
+        success, message = self.services.sites.update_website(
+            request.user['id'], request.params['website_id'], request.json()
+        )
+        return {'success': success, 'message': message}
+
+    def delete_website(self, request):
+        success, message = self.services.sites.delete_website(request.user['id'], request.params['website_id'])
+        return {'success': success, 'message': message}
+
+    def import_bookmarks(self, request):
+        data = request.json()
+        if not isinstance(data.get('content'), str):
+            raise HttpError(400, "缺少书签文件内容")
+        rating = data.get('rating', DEFAULT_RATING)
+        is_private = data.get('is_private', DEFAULT_PRIVATE)
+        if not isinstance(rating, int) or isinstance(rating, bool) or not 1 <= rating <= 5:
+            raise HttpError(400, "评分必须是 1-5 的整数")
+        if not isinstance(is_private, bool):
+            raise HttpError(400, "is_private 必须是布尔值")
+        result = self.services.sites.import_bookmark_content(
+            request.user['id'], data.get('filename', 'bookmarks.html'), data['content'],
+            rating=rating, is_private=is_private
+        )
+        return asdict(result)
+
+    def record_visit(self, request):
+        data = request.json()
+        if not data.get('name') or not data.get('url'):
+            raise HttpError(400, "缺少网站名称或地址")
+        return {'success': bool(self.services.sites.record_visit(request.user['id'], data['name'], data['url']))}
+
+    def log_action(self, request):
+        data = request.json()
+        return {'success': bool(self.services.sites.log_action(
+            request.user['id'], data.get('action', ''), data.get('details', ''), request.peer
+        ))}
+
+    def frecency(self, request):
+        return self.services.stats.frecency(request.user['id'])
+
+    def visit_overview(self, request):
+        return self.services.stats.visit_overview(max(1, min(request.int_param('days', 7), 366)))
+
+    def popular_sites(self, request):
+        return {'sites': self.services.stats.popular_sites(max(1, min(request.int_param('limit', 10), 100)))}
+
+    def admin_statistics(self, request):
+        return self.services.admin.statistics()
+
+    def admin_users(self, request):
+        return {'users': self.services.admin.users()}
+
+    def admin_websites(self, request):
+        return {'websites': self.services.admin.websites()}
+
+    def admin_logs(self, request):
+        return {'logs': self.services.admin.logs(request.int_param('limit', 100))}
+
+    def admin_links(self, request):
+        return self.services.admin.link_health(max(1, min(request.int_param('limit', 500), 5000)))
+
+    def admin_delete_user(self, request):
+        user_id = request.params['user_id']
+        if user_id == request.user['id']:
+            raise HttpError(400, "不能删除当前登录的管理员账户")
+        success = self.services.admin.delete_user(user_id)
+        if success:
+            self.sessions.remove_user(user_id)
+        return {'success': success}
+
+    def admin_delete_website(self, request):
+        return {'success': self.services.admin.delete_website(request.params['website_id'])}
+
+
+def run_server(services, host=DEFAULT_HOST, port=DEFAULT_PORT, **kwargs):
+    """在当前线程运行 API 服务器，直到 Ctrl+C"""
+    server = ApiServer(services, host, port, **kwargs)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 API 服务器已停止")
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步数据库访问模块
+基于 psycopg3 的 asyncio 接口实现与 DatabaseManager 相同的方法（均为协程），
+自带连接池，多条查询可通过 gather 在不同连接上同时执行；
+任务被取消时向服务器发送取消请求并关闭该连接
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+try:
+    import psycopg
+    from psycopg.pq import TransactionStatus
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+from src.core.auth_system import DatabaseManager
+from src.core.db_pool import DEFAULT_ACQUIRE_TIMEOUT, DEFAULT_POOL_SIZE, PoolTimeout
+from src.core.latency import KIND_QUERY, default_tracker, fingerprint
+from src.core.metrics import (
+    DB_CONNECT_FAILURES, DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED, DB_POOL_IN_USE, DB_POOL_TIMEOUTS,
+    DB_POOL_WAITS
+)
+from src.core.query_registry import INVALID_STATEMENT_NAME, PreparedStatementSession, get_query
+from src.core.slow_query import active_slow_query_log
+from src.core.tracing import record_span
+
+
+MAX_BIND_PARAMS = 65535             # 单条语句最多的绑定参数个数（PostgreSQL 协议限制）
+
+
+class _PooledConnection:
+    """池中的一个连接槽位，connection 为 None 时在下次借出时重新连接"""
+
+    __slots__ = ('connection', 'statements')
+
+    def __init__(self):
+        self.connection = None
+        self.statements = PreparedStatementSession()
+
+
+def _values_query(query, template, rows):
+    """把 execute_values 风格的语句（VALUES %s）展开为多行 VALUES 和扁平的参数列表"""
+    row_template = template or '(' + ', '.join(['%s'] * len(rows[0])) + ')'
+    values = ', '.join([row_template] * len(rows))
+    return query.replace('%s', values, 1), [value for row in rows for value in row]
+
+
+class AsyncDatabaseManager:
+    """异步数据库管理器（连接池最多 size 条连接，只能在同一个事件循环中使用）"""
+
+    def __init__(self, host, database, user, password, port=5432,
+                 size=DEFAULT_POOL_SIZE, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        # 同步管理器只用于慢查询日志采集执行计划
+        self.template = DatabaseManager(host, database, user, password, port)
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        # 空闲连接队列在事件循环中首次使用时创建（Python 3.8/3.9 的队列创建时绑定当前事件循环）
+        self._idle = None
+        self._created = 0
+        self._cursor_seq = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.latency = default_tracker()
+
+    @classmethod
+    def from_manager(cls, db_manager, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        """使用 DatabaseManager 的连接参数创建"""
+        return cls(db_manager.host, db_manager.database, db_manager.user, db_manager.password,
+                   db_manager.port, size=size, timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # 连接池
+    # ------------------------------------------------------------------
+
+    def _idle_queue(self):
+        if self._idle is None:
+            self._idle = asyncio.LifoQueue()
+        return self._idle
+
+    async def _open(self, pooled):
+        template = self.template
+        try:
+            pooled.connection = await psycopg.AsyncConnection.connect(
+                host=template.host,
+                dbname=template.database,
+                user=template.user,
+                password=template.password,
+                port=template.port,
+                client_encoding='utf8',
+                connect_timeout=10
+            )
+        except Exception as e:
+            DB_CONNECT_FAILURES.inc()
+            print(f"❌ 数据库连接错误: {e}")
+            raise
+        pooled.statements.reset()
+        DB_CONNECTIONS_OPENED.inc()
+        DB_CONNECTIONS_OPEN.inc()
+
+    async def _close(self, pooled):
+        connection, pooled.connection = pooled.connection, None
+        pooled.statements.reset()
+        if connection is None:
+            return
+        DB_CONNECTIONS_OPEN.dec()
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+    async def _acquire(self):
+        idle = self._idle_queue()
+        try:
+            return idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        if self._created < self.size:
+            self._created += 1
+            return _PooledConnection()
+
+        DB_POOL_WAITS.inc()
+        started = time.perf_counter()
+        try:
+            pooled = await asyncio.wait_for(idle.get(), self.timeout)
+        except asyncio.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise PoolTimeout(f"等待数据库连接超过 {self.timeout:.0f} 秒（连接池大小 {self.size}）") from None
+        self.waits += 1
+        self.wait_time += time.perf_counter() - started
+        return pooled
+
+    async def _cancel(self, pooled):
+        """任务被取消：通知服务器中止正在执行的语句，并关闭连接（状态不确定，不再复用）"""
+        connection = pooled.connection
+        if connection is None or connection.closed:
+            return
+        try:
+            if hasattr(connection, 'cancel_safe'):
+                await connection.cancel_safe()
+            else:
+                connection.cancel()
+        except Exception as e:
+            print(f"⚠️ 取消查询失败: {e}")
+        await self._close(pooled)
+
+    async def _release(self, pooled):
+        """归还前结束未提交的事务；连接已断开或状态异常时关闭，下次借出时重新连接"""
+        connection = pooled.connection
+        if connection is not None:
+            try:
+                if connection.closed:
+                    await self._close(pooled)
+                elif connection.info.transaction_status != TransactionStatus.IDLE:
+                    await connection.rollback()
+            except Exception as e:
+                print(f"⚠️ 重置连接状态失败，关闭该连接: {e}")
+                await self._close(pooled)
+        self._idle_queue().put_nowait(pooled)
+
+    @asynccontextmanager
+    async def lease(self):
+        """借出一个连接（同一个 async with 块中的多条语句使用同一条连接）"""
+        if not PSYCOPG_AVAILABLE:
+            raise RuntimeError("psycopg 未安装")
+
+        pooled = await self._acquire()
+        DB_POOL_IN_USE.inc()
+        try:
+            if pooled.connection is None or pooled.connection.closed:
+                await self._open(pooled)
+            yield pooled
+        except asyncio.CancelledError:
+            await self._cancel(pooled)
+            raise
+        finally:
+            DB_POOL_IN_USE.dec()
+            await self._release(pooled)
+
+    def _record_timing(self, query, params, started, error=False, name=None):
+        """记录语句耗时（与 DatabaseManager 相同的统计和慢查询日志）"""
+        elapsed = time.perf_counter() - started
+        label = f"[{name}]" if name else fingerprint(query)
+        self.latency.record(KIND_QUERY, label, elapsed, error)
+        record_span(label, 'db', started, elapsed)
+
+        slow_query_log = active_slow_query_log()
+        if slow_query_log is None or elapsed < slow_query_log.threshold:
+            return
+        if name:
+            query = get_query(name).sql
+        slow_query_log.check(self.template, query, params, elapsed, error, name)
+
+    async def _run(self, work, query, params, failure, message, name=None):
+        """借出连接执行 work(连接)，出错时打印并返回 failure；取消不会被吞掉"""
+        started = time.perf_counter()
+        try:
+            async with self.lease() as pooled:
+                result = await work(pooled)
+        except PoolTimeout as e:
+            print(f"❌ {e}")
+            return failure
+        except Exception as e:
+            self._record_timing(query, params, started, error=True, name=name)
+            print(f"❌ {message}: {e}")
+            return failure
+        self._record_timing(query, params, started, name=name)
+        return result
+
+    # ------------------------------------------------------------------
+    # 与 DatabaseManager 相同的接口
+    # ------------------------------------------------------------------
+
+    async def execute_query(self, query, params=None):
+        """执行查询"""
+        async def work(pooled):
+            async with pooled.connection.cursor() as cursor:
+                await cursor.execute(query, params or None)
+                return await cursor.fetchall() if cursor.description else []
+        return await self._run(work, query, params, [], "查询执行错误")
+
+    async def execute_prepared(self, name, params=None):
+        """执行已登记的预备语句，结果行为具名元组"""
+        registered = get_query(name)
+        params = tuple(params or ())
+        if len(params) != len(registered.param_types):
+            raise ValueError(f"查询 {name} 需要 {len(registered.param_types)} 个参数，实际为 {len(params)}")
+
+        async def execute(pooled):
+            async with pooled.connection.cursor() as cursor:
+                if registered.name not in pooled.statements.prepared:
+                    types = ', '.join(registered.param_types)
+                    signature = f" ({types})" if types else ""
+                    await cursor.execute(f"PREPARE {registered.statement_name}{signature} AS {registered.sql}")
+                    pooled.statements.prepared.add(registered.name)
+
+                if params:
+                    placeholders = ', '.join(['%s'] * len(params))
+                    await cursor.execute(f"EXECUTE {registered.statement_name} ({placeholders})", params)
+                else:
+                    await cursor.execute(f"EXECUTE {registered.statement_name}")
+
+                if cursor.description is None:
+                    return []
+                row_type = pooled.statements._row_type(registered, cursor.description)
+                return [row_type._make(row) for row in await cursor.fetchall()]
+
+        async def work(pooled):
+            try:
+                return await execute(pooled)
+            except Exception as e:
+                if getattr(e, 'sqlstate', None) != INVALID_STATEMENT_NAME:
+                    raise
+                # 服务端已没有该语句，重新准备后重试一次
+                await pooled.connection.rollback()
+                pooled.statements.prepared.discard(registered.name)
+                return await execute(pooled)
+
+        return await self._run(work, None, params, [], f"预备语句执行错误 [{name}]", name=name)
+
+    async def execute_returning(self, query, params=None):
+        """执行带 RETURNING 的写操作，提交后返回结果行"""
+        async def work(pooled):
+            async with pooled.connection.cursor() as cursor:
+                await cursor.execute(query, params or None)
+                result = await cursor.fetchall() if cursor.description else []
+            await pooled.connection.commit()
+            return result
+        return await self._run(work, query, params, [], "写入执行错误")
+
+    async def execute_non_query(self, query, params=None):
+        """执行非查询操作"""
+        async def work(pooled):
+            async with pooled.connection.cursor() as cursor:
+                await cursor.execute(query, params or None)
+            await pooled.connection.commit()
+            return True
+        return await self._run(work, query, params, False, "非查询执行错误")
+
+    async def execute_batches(self, query, batches, template=None, page_size=500):
+        """在单个事务中批量写入多批数据（语句写法与 execute_values 相同），全部成功后统一提交"""
+        async def work(pooled):
+            async with pooled.connection.cursor() as cursor:
+                for rows in batches:
+                    if not rows:
+                        continue
+                    rows = list(rows)
+                    size = max(1, min(page_size, MAX_BIND_PARAMS // max(1, len(rows[0]))))
+                    for offset in range(0, len(rows), size):
+                        await cursor.execute(*_values_query(query, template, rows[offset:offset + size]))
+            await pooled.connection.commit()
+            return True
+        return await self._run(work, query, None, False, "批量写入错误")
+
+    async def execute_transaction(self, statements):
+        """在同一个事务中依次执行多条语句（每项为 SQL 或 (SQL, 参数)），任一失败则全部回滚"""
+        async def work(pooled):
+            async with pooled.connection.cursor() as cursor:
+                for statement in statements:
+                    if isinstance(statement, tuple):
+                        await cursor.execute(*statement)
+                    else:
+                        await cursor.execute(statement)
+            await pooled.connection.commit()
+            return True
+        try:
+            async with self.lease() as pooled:
+                return await work(pooled)
+        except Exception as e:
+            print(f"❌ 事务执行错误: {e}")
+            return False
+
+    async def iter_query(self, query, params=None, itersize=2000):
+        """使用服务端具名游标流式读取查询结果（async for，出错时抛出异常）"""
+        async with self.lease() as pooled:
+            self._cursor_seq += 1
+            cursor = pooled.connection.cursor(name=f"stream_{id(self)}_{self._cursor_seq}")
+            cursor.itersize = itersize
+            try:
+                await cursor.execute(query, params)
+                async for row in cursor:
+                    yield row
+            except Exception as e:
+                print(f"❌ 流式查询错误: {e}")
+                raise
+            finally:
+                # 只读事务，归还连接时统一回滚
+                await cursor.close()
+
+    # ------------------------------------------------------------------
+    # 并发执行
+    # ------------------------------------------------------------------
+
+    async def gather(self, timeout=None, **queries) -> Dict[str, object]:
+        """并发执行多条查询，返回与参数同名的结果；任一条出错、超时或整体被取消时，其余查询一并取消"""
+        tasks = {key: asyncio.ensure_future(query) for key, query in queries.items()}
+        try:
+            pending = asyncio.gather(*tasks.values())
+            results = await (asyncio.wait_for(pending, timeout) if timeout else pending)
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return dict(zip(tasks, results))
+
+    async def connect(self):
+        """检查能否建立连接"""
+        try:
+            async with self.lease():
+                return True
+        except Exception as e:
+            print(f"❌ {e}")
+            return False
+
+    async def close(self):
+        """关闭所有空闲连接"""
+        idle = self._idle_queue()
+        while True:
+            try:
+                pooled = idle.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await self._close(pooled)
+            self._created -= 1
+
+    def stats(self) -> Dict[str, float]:
+        idle = self._idle.qsize() if self._idle is not None else 0
+        return {
+            'size': self.size,
+            'open': self._created,
+            'idle': idle,
+            'in_use': self._created - idle,
+            'waits': self.waits,
+            'wait_ms': round(self.wait_time * 1000, 1),
+        }
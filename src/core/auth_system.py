@@ -20,16 +20,18 @@ from datetime import datetime, timedelta
 try:
     import psycopg2
     from psycopg2 import OperationalError, ProgrammingError
+    from psycopg2.extras import execute_values
     PSYCOPG2_AVAILABLE = True
 except ImportError:
     PSYCOPG2_AVAILABLE = False
 
-from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-    QPushButton, QCheckBox, QMessageBox, QTabWidget, QFormLayout
+from src.core.latency import KIND_QUERY, default_tracker, fingerprint
+from src.core.metrics import (
+    ACCOUNT_LOCKOUTS, DB_CONNECT_FAILURES, DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED, LOGIN_ATTEMPTS
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont
+from src.core.query_registry import QUERY_REGISTRY, PreparedStatementSession
+from src.core.slow_query import active_slow_query_log
+from src.core.tracing import record_span, traced
 
 
 class SecurityManager:
@@ -44,6 +46,7 @@ class SecurityManager:
     
     def record_failed_attempt(self, username, ip_address="unknown"):
         """记录失败的登录尝试"""
+        LOGIN_ATTEMPTS.inc(result='failure')
         current_time = datetime.now()
         
         if username not in self.failed_attempts:
@@ -71,6 +74,7 @@ class SecurityManager:
     def lock_account(self, username):
         """锁定账户"""
         self.locked_accounts[username] = datetime.now()
+        ACCOUNT_LOCKOUTS.inc()
         print(f"🔒 账户 {username} 已被锁定，锁定时间: {self.lockout_duration}秒")
     
     def is_account_locked(self, username):
@@ -100,6 +104,7 @@ class SecurityManager:
     
     def record_successful_login(self, username, ip_address="unknown"):
         """记录成功登录"""
+        LOGIN_ATTEMPTS.inc(result='success')
         # 清除失败记录
         if username in self.failed_attempts:
             del self.failed_attempts[username]
@@ -239,6 +244,29 @@ class ConfigManager:
             'language': 'zh_CN'
         }
         
+        self.config['performance'] = {
+            'slow_query_ms': '200',
+            'explain_slow_queries': 'false',
+            'slow_query_log': 'logs/slow_queries.jsonl',
+            'stall_threshold_ms': '0'
+        }
+        
+        self.config['metrics'] = {
+            'http_host': '127.0.0.1',
+            'http_port': '0',
+            'textfile': '',
+            'textfile_interval': '60'
+        }
+        
+        self.config['api'] = {
+            'host': '127.0.0.1',
+            'port': '8765',
+            'pool_size': '5',
+            'cache_ttl': '30',
+            'session_ttl': '28800',
+            'server_url': ''
+        }
+        
         self.save()
     
     def save(self):
@@ -274,6 +302,9 @@ class DatabaseManager:
         self.password = str(password)
         self.port = int(port)
         self.connection = None
+        self.prepared_statements = PreparedStatementSession()
+        self._cursor_seq = 0
+        self.latency = default_tracker()
     
     def connect(self):
         """连接数据库"""
@@ -293,29 +324,64 @@ class DatabaseManager:
             )
             
             self.connection.set_client_encoding('UTF8')
+            self.prepared_statements.reset()
+            DB_CONNECTIONS_OPENED.inc()
+            DB_CONNECTIONS_OPEN.inc()
             print("✅ 数据库连接成功")
             return True
             
         except OperationalError as e:
+            DB_CONNECT_FAILURES.inc()
             print(f"❌ 数据库连接错误: {e}")
             return False
         except Exception as e:
+            DB_CONNECT_FAILURES.inc()
             print(f"❌ 数据库连接异常: {e}")
             return False
     
+    def clone(self):
+        """创建使用相同连接参数的新管理器（供后台线程使用独立连接）"""
+        return DatabaseManager(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port
+        )
+    
     def disconnect(self):
         """断开数据库连接"""
         if self.connection:
             self.connection.close()
             self.connection = None
+            self.prepared_statements.reset()
+            DB_CONNECTIONS_OPEN.dec()
             print("✅ 数据库连接已断开")
     
+    def _record_timing(self, query, params, started, error=False, name=None):
+        """记录语句耗时（预备语句按名称统计，query 为 None），超过阈值时写入慢查询日志"""
+        elapsed = time.perf_counter() - started
+        label = f"[{name}]" if name else fingerprint(query)
+        self.latency.record(KIND_QUERY, label, elapsed, error)
+        record_span(label, 'db', started, elapsed)
+        
+        slow_query_log = active_slow_query_log()
+        if slow_query_log is None or elapsed < slow_query_log.threshold:
+            return
+        if name:
+            registered = QUERY_REGISTRY.get(name)
+            if registered is None:
+                return
+            query = registered.sql
+        slow_query_log.check(self, query, params, elapsed, error, name)
+    
     def execute_query(self, query, params=None):
         """执行查询"""
         if not self.connection:
             if not self.connect():
                 return []
         
+        started = time.perf_counter()
         try:
             cursor = self.connection.cursor()
             if params:
@@ -329,17 +395,64 @@ class DatabaseManager:
                 result = []
             
             cursor.close()
+            self._record_timing(query, params, started)
             return result
         except Exception as e:
+            self._record_timing(query, params, started, error=True)
             print(f"❌ 查询执行错误: {e}")
             return []
     
+    def execute_prepared(self, name, params=None):
+        """执行已登记的预备语句，结果行为具名元组"""
+        if not self.connection:
+            if not self.connect():
+                return []
+        
+        started = time.perf_counter()
+        try:
+            result = self.prepared_statements.execute(self.connection, name, params)
+            self._record_timing(None, params, started, name=name)
+            return result
+        except Exception as e:
+            self._record_timing(None, params, started, error=True, name=name)
+            if self.connection:
+                self.connection.rollback()
+            print(f"❌ 预备语句执行错误 [{name}]: {e}")
+            return []
+    
+    def execute_returning(self, query, params=None):
+        """执行带 RETURNING 的写操作，提交后返回结果行"""
+        if not self.connection:
+            if not self.connect():
+                return []
+        
+        started = time.perf_counter()
+        try:
+            cursor = self.connection.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            result = cursor.fetchall() if cursor.description else []
+            self.connection.commit()
+            cursor.close()
+            self._record_timing(query, params, started)
+            return result
+        except Exception as e:
+            self._record_timing(query, params, started, error=True)
+            if self.connection:
+                self.connection.rollback()
+            print(f"❌ 写入执行错误: {e}")
+            return []
+    
     def execute_non_query(self, query, params=None):
         """执行非查询操作"""
         if not self.connection:
             if not self.connect():
                 return False
         
+        started = time.perf_counter()
         try:
             cursor = self.connection.cursor()
             if params:
@@ -349,13 +462,94 @@ class DatabaseManager:
             
             self.connection.commit()
             cursor.close()
+            self._record_timing(query, params, started)
             return True
         except Exception as e:
+            self._record_timing(query, params, started, error=True)
             if self.connection:
                 self.connection.rollback()
             print(f"❌ 非查询执行错误: {e}")
             return False
     
+    def execute_batches(self, query, batches, template=None, page_size=500):
+        """在单个事务中批量写入多批数据（execute_values），全部成功后统一提交"""
+        if not PSYCOPG2_AVAILABLE:
+            print("❌ psycopg2 未安装")
+            return False
+        
+        if not self.connection:
+            if not self.connect():
+                return False
+        
+        started = time.perf_counter()
+        try:
+            cursor = self.connection.cursor()
+            for rows in batches:
+                if rows:
+                    execute_values(cursor, query, rows, template=template, page_size=page_size)
+            
+            self.connection.commit()
+            cursor.close()
+            self._record_timing(query, None, started)
+            return True
+        except Exception as e:
+            self._record_timing(query, None, started, error=True)
+            if self.connection:
+                self.connection.rollback()
+            print(f"❌ 批量写入错误: {e}")
+            return False
+    
+    def execute_transaction(self, statements):
+        """在同一个事务中依次执行多条语句（每项为 SQL 或 (SQL, 参数)），任一失败则全部回滚"""
+        if not PSYCOPG2_AVAILABLE:
+            print("❌ psycopg2 未安装")
+            return False
+    
+        if not self.connection:
+            if not self.connect():
+                return False
+    
+        try:
+            cursor = self.connection.cursor()
+            for statement in statements:
+                if isinstance(statement, tuple):
+                    cursor.execute(*statement)
+                else:
+                    cursor.execute(statement)
+    
+            self.connection.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            print(f"❌ 事务执行错误: {e}")
+            return False
+    
+    def iter_query(self, query, params=None, itersize=2000):
+        """使用服务端具名游标流式读取查询结果（每次只取 itersize 行，出错时抛出异常）"""
+        if not PSYCOPG2_AVAILABLE:
+            raise RuntimeError("psycopg2 未安装")
+    
+        if not self.connection:
+            if not self.connect():
+                raise RuntimeError("数据库连接失败")
+    
+        self._cursor_seq += 1
+        cursor = self.connection.cursor(name=f"stream_{id(self)}_{self._cursor_seq}")
+        cursor.itersize = itersize
+        try:
+            cursor.execute(query, params)
+            for row in cursor:
+                yield row
+        except Exception as e:
+            print(f"❌ 流式查询错误: {e}")
+            raise
+        finally:
+            # 只读事务：正常结束、出错或提前停止读取时都回滚，释放游标和快照
+            if self.connection:
+                self.connection.rollback()
+    
     def create_tables(self):
         """创建数据表"""
         users_table = """
@@ -468,6 +662,7 @@ class AuthController:
         else:
             return False, "❌ 注册失败，请稍后重试"
     
+    @traced('auth.login', 'auth')
     def login(self, username, password):
         """用户登录"""
         if not username or not password:
@@ -475,15 +670,12 @@ class AuthController:
         
         # 检查账户是否被锁定
         if self.security_manager.is_account_locked(username):
+            LOGIN_ATTEMPTS.inc(result='locked')
             remaining_time = self.security_manager.get_remaining_lockout_time(username)
             return False, f"🔒 账户已被锁定，请等待 {remaining_time} 秒后重试", None
         
         # 查询用户
-        query = """
-        SELECT id, username, password_hash, email, display_name, avatar_path, is_admin, created_at, last_login 
-        FROM users WHERE username = %s
-        """
-        result = self.db_manager.execute_query(query, (username,))
+        result = self.db_manager.execute_prepared('auth_user_by_username', (username,))
         
         if not result:
             # 记录失败尝试（用户名不存在也算失败）
@@ -491,7 +683,7 @@ class AuthController:
             return False, "用户名不存在", None
         
         user_data = result[0]
-        stored_password_hash = user_data[2]
+        stored_password_hash = user_data.password_hash
         
         # 验证密码
         if self.hash_password(password) != stored_password_hash:
@@ -513,13 +705,13 @@ class AuthController:
         
         # 构建用户信息
         user = {
-            'id': user_data[0],
-            'username': user_data[1],
-            'email': user_data[3],
-            'display_name': user_data[4],
-            'avatar_path': user_data[5],
-            'is_admin': user_data[6],
-            'created_at': user_data[7],
+            'id': user_data.id,
+            'username': user_data.username,
+            'email': user_data.email,
+            'display_name': user_data.display_name,
+            'avatar_path': user_data.avatar_path,
+            'is_admin': user_data.is_admin,
+            'created_at': user_data.created_at,
             'last_login': datetime.now()
         }
         
@@ -582,468 +774,9 @@ class AuthSystem:
             self.db_manager.disconnect()
 
 
-class LoginWindow(QWidget):
-    """登录窗口"""
-    
-    def __init__(self, db_manager, config):
-        super().__init__()
-        self.db_manager = db_manager
-        self.config = config
-        self.auth_controller = AuthController(db_manager)
-        self.init_ui()
-    
-    def init_ui(self):
-        """初始化界面"""
-        self.setWindowTitle("🎨 网站推荐系统 - 用户登录")
-        # 设置响应式布局，支持最小和最大尺寸
-        self.setMinimumSize(800, 500)
-        self.setMaximumSize(1200, 800)
-        self.resize(1000, 650)
-        self.center_window()
-        
-        # 主布局 - 水平分割，支持响应式
-        main_layout = QHBoxLayout()
-        main_layout.setSpacing(0)
-        main_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 左侧欢迎区域 - 使用比例而非固定宽度
-        welcome_widget = self.create_welcome_section()
-        welcome_widget.setMinimumWidth(350)
-        welcome_widget.setMaximumWidth(500)
-        
-        # 右侧表单区域 - 使用比例而非固定宽度
-        form_widget = self.create_form_section()
-        form_widget.setMinimumWidth(450)
-        form_widget.setMaximumWidth(700)
-        
-        # 添加到布局，设置拉伸比例
-        main_layout.addWidget(welcome_widget, 2)  # 左侧占2份
-        main_layout.addWidget(form_widget, 3)     # 右侧占3份
-        
-        self.setLayout(main_layout)
-        
-        # 现代化样式
-        self.setStyleSheet("""
-            QWidget {
-                font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif;
-            }
-            
-            #welcome_section {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                    stop:0 #4facfe, stop:0.5 #00f2fe, stop:1 #43e97b);
-                border-top-left-radius: 20px;
-                border-bottom-left-radius: 20px;
-            }
-            
-            #form_section {
-                background-color: white;
-                border-top-right-radius: 20px;
-                border-bottom-right-radius: 20px;
-            }
-            
-            #welcome_title {
-                color: white;
-                font-size: 36px;
-                font-weight: bold;
-                margin-bottom: 20px;
-            }
-            
-            #welcome_subtitle {
-                color: rgba(255, 255, 255, 0.9);
-                font-size: 18px;
-                line-height: 1.6;
-            }
-            
-            #form_title {
-                color: #333;
-                font-size: 28px;
-                font-weight: bold;
-                margin-bottom: 40px;
-            }
-            
-            QLineEdit {
-                padding: 1.2em 1em;
-                border: 2px solid #e1e5e9;
-                border-radius: 0.6em;
-                font-size: 1em;
-                background-color: white;
-                color: #333;
-                margin-bottom: 1.2em;
-                min-height: 1.5em;
-            }
-            
-            QLineEdit:focus {
-                border-color: #4facfe;
-                outline: none;
-            }
-            
-            QLineEdit::placeholder {
-                color: #999;
-            }
-            
-            QPushButton {
-                padding: 1.2em 1.5em;
-                border: none;
-                border-radius: 0.6em;
-                font-size: 1.1em;
-                font-weight: bold;
-                color: white;
-                background-color: #333;
-                margin-top: 1em;
-                min-height: 1.8em;
-            }
-            
-            QPushButton:hover {
-                background-color: #555;
-            }
-            
-            QPushButton:pressed {
-                background-color: #222;
-            }
-            
-            QTabWidget::pane {
-                border: none;
-                background: transparent;
-            }
-            
-            QTabBar::tab {
-                background: transparent;
-                color: #666;
-                padding: 15px 25px;
-                margin-right: 15px;
-                border: none;
-                font-size: 18px;
-                font-weight: bold;
-            }
-            
-            QTabBar::tab:selected {
-                color: #333;
-                border-bottom: 3px solid #4facfe;
-            }
-            
-            QTabBar::tab:hover {
-                color: #4facfe;
-            }
-            
-            QLabel {
-                color: #333;
-                font-size: 16px;
-                margin-bottom: 8px;
-                font-weight: bold;
-            }
-            
-            #close_btn {
-                background: transparent;
-                color: #666;
-                font-size: 24px;
-                padding: 8px;
-                border: none;
-                border-radius: 20px;
-                width: 40px;
-                height: 40px;
-            }
-            
-            #close_btn:hover {
-                background-color: rgba(0, 0, 0, 0.1);
-                color: #333;
-            }
-            
-            #status_label {
-                color: rgba(255, 255, 255, 0.8);
-                font-size: 14px;
-                margin-top: 20px;
-            }
-        """)
-    
-    def create_welcome_section(self):
-        """创建左侧欢迎区域"""
-        welcome_widget = QWidget()
-        welcome_widget.setObjectName("welcome_section")
-        
-        layout = QVBoxLayout()
-        layout.setContentsMargins(60, 100, 60, 100)
-        layout.setSpacing(40)
-        
-        # 欢迎标题
-        title_label = QLabel("网站推荐系统")
-        title_label.setObjectName("welcome_title")
-        title_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        # 欢迎副标题
-        subtitle_label = QLabel("发现精彩网站\n开启数字世界之旅")
-        subtitle_label.setObjectName("welcome_subtitle")
-        subtitle_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        subtitle_label.setWordWrap(True)
-        
-        # 数据库状态指示
-        db_connected = self.db_manager.connection is not None
-        db_status = "✅ 数据库已连接" if db_connected else "⚠️ 数据库未连接"
-        status_label = QLabel(db_status)
-        status_label.setObjectName("status_label")
-        status_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        layout.addWidget(title_label)
-        layout.addWidget(subtitle_label)
-        layout.addStretch()
-        layout.addWidget(status_label)
-        
-        welcome_widget.setLayout(layout)
-        return welcome_widget
-    
-    def create_form_section(self):
-        """创建右侧表单区域"""
-        form_widget = QWidget()
-        form_widget.setObjectName("form_section")
-        
-        layout = QVBoxLayout()
-        layout.setContentsMargins(60, 60, 60, 60)
-        layout.setSpacing(30)
-        
-        # 顶部关闭按钮
-        top_layout = QHBoxLayout()
-        top_layout.addStretch()
-        close_btn = QPushButton("×")
-        close_btn.setObjectName("close_btn")
-        close_btn.clicked.connect(self.close)
-        top_layout.addWidget(close_btn)
-        
-        # 功能选项卡
-        self.tab_widget = QTabWidget()
-        self.tab_widget.setTabPosition(QTabWidget.TabPosition.North)
-        
-        # 登录选项卡
-        login_tab = self.create_login_tab()
-        self.tab_widget.addTab(login_tab, "登录")
-        
-        # 注册选项卡
-        register_tab = self.create_register_tab()
-        self.tab_widget.addTab(register_tab, "注册")
-        
-        layout.addLayout(top_layout)
-        layout.addWidget(self.tab_widget)
-        layout.addStretch()
-        
-        form_widget.setLayout(layout)
-        return form_widget
-    
-    def create_login_tab(self):
-        """创建登录选项卡"""
-        login_widget = QWidget()
-        layout = QVBoxLayout()
-        layout.setSpacing(25)
-        layout.setContentsMargins(0, 30, 0, 30)
-        
-        # 用户名输入
-        username_label = QLabel("账号：")
-        self.username_input = QLineEdit()
-        self.username_input.setPlaceholderText("请输入用户名")
-        
-        # 密码输入
-        password_label = QLabel("密码：")
-        self.password_input = QLineEdit()
-        self.password_input.setPlaceholderText("请输入密码")
-        self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
-        
-        # 登录按钮
-        login_button = QPushButton("登录")
-        login_button.clicked.connect(self.handle_login)
-        
-        # 回车键登录
-        self.username_input.returnPressed.connect(self.handle_login)
-        self.password_input.returnPressed.connect(self.handle_login)
-        
-        # 添加到布局
-        layout.addWidget(username_label)
-        layout.addWidget(self.username_input)
-        layout.addWidget(password_label)
-        layout.addWidget(self.password_input)
-        layout.addWidget(login_button)
-        layout.addStretch()
-        
-        login_widget.setLayout(layout)
-        return login_widget
-    
-    def create_register_tab(self):
-        """创建注册选项卡"""
-        register_widget = QWidget()
-        layout = QVBoxLayout()
-        layout.setSpacing(20)
-        layout.setContentsMargins(0, 30, 0, 30)
-        
-        # 用户名输入
-        username_label = QLabel("账号：")
-        self.reg_username_input = QLineEdit()
-        self.reg_username_input.setPlaceholderText("3-50个字符，支持中文、字母、数字、下划线")
-        
-        # 邮箱输入
-        email_label = QLabel("邮箱：")
-        self.reg_email_input = QLineEdit()
-        self.reg_email_input.setPlaceholderText("请输入邮箱地址（可选）")
-        
-        # 密码输入
-        password_label = QLabel("密码：")
-        self.reg_password_input = QLineEdit()
-        self.reg_password_input.setPlaceholderText("至少6位字符")
-        self.reg_password_input.setEchoMode(QLineEdit.EchoMode.Password)
-        
-        # 确认密码输入
-        confirm_password_label = QLabel("确认密码：")
-        self.reg_confirm_password_input = QLineEdit()
-        self.reg_confirm_password_input.setPlaceholderText("请再次输入密码")
-        self.reg_confirm_password_input.setEchoMode(QLineEdit.EchoMode.Password)
-        
-        # 注册按钮
-        register_button = QPushButton("注册")
-        register_button.clicked.connect(self.handle_register)
-        
-        # 添加到布局
-        layout.addWidget(username_label)
-        layout.addWidget(self.reg_username_input)
-        layout.addWidget(email_label)
-        layout.addWidget(self.reg_email_input)
-        layout.addWidget(password_label)
-        layout.addWidget(self.reg_password_input)
-        layout.addWidget(confirm_password_label)
-        layout.addWidget(self.reg_confirm_password_input)
-        layout.addWidget(register_button)
-        layout.addStretch()
-        
-        register_widget.setLayout(layout)
-        return register_widget
-    
-    def center_window(self):
-        """窗口居中显示"""
-        screen = self.screen().availableGeometry()
-        size = self.geometry()
-        self.move(
-            (screen.width() - size.width()) // 2,
-            (screen.height() - size.height()) // 2
-        )
-    
-    def handle_login(self):
-        """处理登录"""
-        username = self.username_input.text().strip()
-        password = self.password_input.text()
-        
-        if not username or not password:
-            self.show_message("输入错误", "请输入用户名和密码", QMessageBox.Icon.Warning)
-            return
-        
-        # 执行登录
-        success, message, user = self.auth_controller.login(username, password)
-        
-        if success:
-            print(f"🎉 用户 {user['username']} 登录成功！")
-            print(f"📧 邮箱: {user.get('email', '未设置')}")
-            print(f"📅 注册时间: {user['created_at']}")
-            
-            # 隐藏登录窗口
-            self.hide()
-            
-            # 打开主窗口
-            self.open_main_window(user)
-        else:
-            self.show_message("登录失败", message, QMessageBox.Icon.Critical)
-    
-    def open_main_window(self, user_info):
-        """打开主窗口"""
-        try:
-            from src.ui.main_window import MainWindow
-            
-            self.main_window = MainWindow(user_info)
-            # 检查是否有logout_requested信号
-            if hasattr(self.main_window, 'logout_requested'):
-                self.main_window.logout_requested.connect(self.handle_logout_from_main)
-            self.main_window.show()
-            
-            print("🏠 主窗口已打开")
-            
-        except ImportError as e:
-            print(f"❌ 导入主窗口失败: {e}")
-            self.show_message("错误", "无法打开主窗口，请检查main_window.py文件", QMessageBox.Icon.Critical)
-            self.show()
-        except Exception as e:
-            print(f"❌ 打开主窗口失败: {e}")
-            self.show_message("错误", f"打开主窗口时发生错误: {str(e)}", QMessageBox.Icon.Critical)
-            self.show()
-    
-    def handle_logout_from_main(self):
-        """处理从主窗口发出的登出请求"""
-        print("🔄 用户请求登出，返回登录界面")
-        
-        # 关闭主窗口
-        if hasattr(self, 'main_window'):
-            try:
-                self.main_window.hide()
-                self.main_window.close()
-                self.main_window.deleteLater()
-                delattr(self, 'main_window')
-            except Exception as e:
-                print(f"⚠️ 关闭主窗口时出现问题: {e}")
-        
-        # 清空登录表单
-        self.username_input.clear()
-        self.password_input.clear()
-        
-        # 重新显示登录窗口
-        self.show()
-        self.raise_()
-        self.activateWindow()
-    
-    def handle_register(self):
-        """处理注册"""
-        username = self.reg_username_input.text().strip()
-        email = self.reg_email_input.text().strip()
-        password = self.reg_password_input.text()
-        confirm_password = self.reg_confirm_password_input.text()
-        
-        # 执行注册
-        success, message = self.auth_controller.register(
-            username, password, confirm_password, email if email else None
-        )
-        
-        if success:
-            self.show_message("注册成功", message, QMessageBox.Icon.Information)
-            # 清空注册表单
-            self.reg_username_input.clear()
-            self.reg_email_input.clear()
-            self.reg_password_input.clear()
-            self.reg_confirm_password_input.clear()
-            # 切换到登录选项卡
-            self.tab_widget.setCurrentIndex(0)
-            print(f"🎉 新用户 {username} 注册成功！")
-        else:
-            self.show_message("注册失败", message, QMessageBox.Icon.Critical)
-    
-    def show_message(self, title, message, icon):
-        """显示消息框"""
-        msg_box = QMessageBox()
-        msg_box.setWindowTitle(title)
-        msg_box.setText(message)
-        msg_box.setIcon(icon)
-        
-        # 设置消息框样式
-        msg_box.setStyleSheet("""
-            QMessageBox {
-                background-color: #2c3e50;
-                color: white;
-                font-family: 'Microsoft YaHei';
-            }
-            QMessageBox QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QMessageBox QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
-        
-        msg_box.exec()
-    
-    def closeEvent(self, event):
-        """窗口关闭事件"""
-        event.accept()
\ No newline at end of file
+def __getattr__(name):
+    """旧版登录窗口已移到 src.ui.login_window（本模块不依赖 PyQt6，可在无界面的 API 服务器中使用）"""
+    if name == 'LoginWindow':
+        from src.ui.login_window import LoginWindow
+        return LoginWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+头像缩略图缓存模块
+上传头像时预先生成界面用到的各尺寸圆形缩略图并保存到磁盘，
+显示时通过 QPixmapCache（按文件哈希和尺寸作为键）读取，打开窗口不再解码原图
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QPainterPath, QPixmap, QPixmapCache
+
+from src.core.avatar_files import AVATAR_DIR, THUMBNAIL_DIR
+from src.core.metrics import record_cache_lookup
+
+
+THUMBNAIL_SIZES = (32, 120)         # 主窗口顶栏 32，个人信息页 120
+
+# (路径, 修改时间, 大小) -> 文件哈希，避免重复计算
+_digest_cache: Dict[tuple, str] = {}
+
+
+def file_digest(path) -> str:
+    """计算文件内容哈希（取前 32 位十六进制）"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _digest_cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:32]
+        _digest_cache[key] = digest
+    return digest
+
+
+def thumbnail_path(digest, size, thumbnail_dir=THUMBNAIL_DIR) -> str:
+    return os.path.join(thumbnail_dir, f"{digest}_{size}.png")
+
+
+def render_rounded(image: QImage, size) -> QImage:
+    """把图片居中裁剪并绘制为圆形（只使用 QImage，可在后台线程调用）"""
+    rounded = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    rounded.fill(Qt.GlobalColor.transparent)
+
+    scaled = image.scaled(
+        size, size,
+        Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+        Qt.TransformationMode.SmoothTransformation
+    )
+
+    painter = QPainter(rounded)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    path = QPainterPath()
+    path.addEllipse(0, 0, size, size)
+    painter.setClipPath(path)
+    painter.drawImage((size - scaled.width()) // 2, (size - scaled.height()) // 2, scaled)
+    painter.end()
+    return rounded
+
+
+def generate_thumbnails(source_path, digest=None, sizes=THUMBNAIL_SIZES,
+                        thumbnail_dir=THUMBNAIL_DIR) -> Dict[int, str]:
+    """为头像生成各尺寸的圆形缩略图，返回 尺寸 -> 缩略图路径"""
+    digest = digest or file_digest(source_path)
+    targets = {size: thumbnail_path(digest, size, thumbnail_dir) for size in sizes}
+    missing = [size for size, path in targets.items() if not os.path.exists(path)]
+    if not missing:
+        return targets
+
+    reader = QImageReader(source_path)
+    reader.setAutoTransform(True)
+    # 只解码到最大缩略图所需的尺寸
+    original = reader.size()
+    largest = max(missing)
+    if original.isValid() and min(original.width(), original.height()) > largest * 2:
+        scale = largest * 2 / min(original.width(), original.height())
+        reader.setScaledSize(original * scale)
+
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"无法读取头像图片: {reader.errorString()}")
+
+    os.makedirs(thumbnail_dir, exist_ok=True)
+    for size in missing:
+        temp_path = targets[size] + ".tmp"
+        if not render_rounded(image, size).save(temp_path, "PNG"):
+            raise OSError(f"缩略图保存失败: {targets[size]}")
+        os.replace(temp_path, targets[size])
+    return targets
+
+
+def get_avatar_pixmap(source_path, size, display_size=None) -> Optional[QPixmap]:
+    """获取圆形头像（内存缓存 -> 磁盘缩略图 -> 生成缩略图），失败时返回 None"""
+    if not source_path or not os.path.exists(source_path):
+        return None
+
+    display_size = display_size or size
+    try:
+        digest = file_digest(source_path)
+        cache_key = f"avatar:{digest}:{size}:{display_size}"
+
+        pixmap = QPixmapCache.find(cache_key)
+        hit = pixmap is not None and not pixmap.isNull()
+        record_cache_lookup('avatar', hit)
+        if hit:
+            return pixmap
+
+        path = thumbnail_path(digest, size)
+        if not os.path.exists(path):
+            # 旧头像没有预生成缩略图，生成一次后复用
+            sizes = THUMBNAIL_SIZES if size in THUMBNAIL_SIZES else (size,)
+            path = generate_thumbnails(source_path, digest, sizes=sizes)[size]
+
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return None
+        if display_size != size:
+            pixmap = pixmap.scaled(
+                display_size, display_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+
+        QPixmapCache.insert(cache_key, pixmap)
+        return pixmap
+    except (OSError, ValueError) as e:
+        print(f"❌ 加载头像缩略图失败: {e}")
+        return None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+头像文件模块（不依赖 Qt）
+头像目录、按内容哈希命名的规则和头像文件的保存，
+桌面端处理头像和 API 服务器接收上传的头像共用
+"""
+
+import hashlib
+import os
+import re
+
+
+AVATAR_DIR = "assets/avatars"
+THUMBNAIL_DIR = os.path.join(AVATAR_DIR, "thumbs")
+MAX_AVATAR_BYTES = 2 * 1024 * 1024      # 处理后的头像最大 512 像素，重新编码后远小于此
+
+# 系统自带的头像，以及永远保留的文件
+DEFAULT_AVATARS = {'default_avatar.png', 'admin_avatar.png'}
+PROTECTED_FILES = DEFAULT_AVATARS | {'README.md'}
+
+CONTENT_NAME_PATTERN = re.compile(r'^avatar_([0-9a-f]{32})\.(png|jpg)$')
+LEGACY_NAME_PATTERN = re.compile(r'^user_\d+_\d+\.\w+$')
+THUMBNAIL_NAME_PATTERN = re.compile(r'^([0-9a-f]{32})_\d+\.png$')
+
+_SIGNATURES = {'png': b'\x89PNG\r\n\x1a\n', 'jpg': b'\xff\xd8\xff'}
+
+
+def content_digest(data: bytes) -> str:
+    """头像内容哈希（取前 32 位十六进制）"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def avatar_filename(data: bytes, extension) -> str:
+    return f"avatar_{content_digest(data)}.{extension}"
+
+
+def is_avatar_name(name) -> bool:
+    """是否为可以写入 users.avatar_path 的头像文件名（系统头像或按内容哈希命名的头像）"""
+    return isinstance(name, str) and (name in DEFAULT_AVATARS or bool(CONTENT_NAME_PATTERN.match(name)))
+
+
+def save_avatar_bytes(filename, data: bytes, avatar_dir=AVATAR_DIR) -> str:
+    """校验文件名与内容一致后保存头像，返回文件路径；内容不符时抛出 ValueError"""
+    match = CONTENT_NAME_PATTERN.match(filename) if isinstance(filename, str) else None
+    if match is None:
+        raise ValueError(f"无效的头像文件名: {filename}")
+    if len(data) > MAX_AVATAR_BYTES:
+        raise ValueError(f"头像文件超过 {MAX_AVATAR_BYTES // (1024 * 1024)} MB")
+    if content_digest(data) != match.group(1):
+        raise ValueError("头像内容与文件名不一致")
+    if not data.startswith(_SIGNATURES[match.group(2)]):
+        raise ValueError("头像不是有效的 PNG/JPEG 图片")
+
+    path = os.path.join(avatar_dir, filename)
+    if not os.path.exists(path):
+        os.makedirs(avatar_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return path
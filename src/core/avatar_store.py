@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+头像存储模块
+上传的头像经过解码、方向校正、缩小和重新编码后按内容哈希保存，
+相同内容只存一份；并提供清理不再被 users.avatar_path 引用的头像文件的功能
+"""
+
+import os
+import time
+from typing import List
+
+from PyQt6.QtCore import QBuffer, QIODevice, Qt
+from PyQt6.QtGui import QImageReader
+
+from src.core.avatar_cache import AVATAR_DIR, THUMBNAIL_DIR, file_digest, generate_thumbnails
+from src.core.avatar_files import (
+    CONTENT_NAME_PATTERN, LEGACY_NAME_PATTERN, PROTECTED_FILES, THUMBNAIL_NAME_PATTERN, avatar_filename,
+    save_avatar_bytes
+)
+
+
+MAX_AVATAR_SIZE = 512
+JPEG_QUALITY = 90
+ORPHAN_GRACE_SECONDS = 3600
+
+
+def process_avatar(source_path, avatar_dir=AVATAR_DIR, max_size=MAX_AVATAR_SIZE) -> str:
+    """处理上传的头像并按内容哈希保存，返回保存后的文件名（耗时操作，应在后台线程调用）"""
+    reader = QImageReader(source_path)
+    # 按 EXIF 方向信息旋转
+    reader.setAutoTransform(True)
+
+    original = reader.size()
+    if original.isValid() and max(original.width(), original.height()) > max_size:
+        # 解码时直接缩小，不在内存中展开完整尺寸的图片
+        reader.setScaledSize(original.scaled(max_size, max_size, Qt.AspectRatioMode.KeepAspectRatio))
+
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"无法读取图片: {reader.errorString()}")
+
+    # 有透明通道的保存为 PNG，其余保存为 JPEG
+    has_alpha = image.hasAlphaChannel()
+    image_format, extension, quality = ("PNG", "png", -1) if has_alpha else ("JPEG", "jpg", JPEG_QUALITY)
+
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not image.save(buffer, image_format, quality):
+        raise ValueError("图片编码失败")
+    data = bytes(buffer.data())
+    buffer.close()
+
+    filename = avatar_filename(data, extension)
+    path = save_avatar_bytes(filename, data, avatar_dir)
+    generate_thumbnails(path, CONTENT_NAME_PATTERN.match(filename).group(1))
+    return filename
+
+
+def _avatar_digest(avatar_dir, filename):
+    """头像文件对应的缩略图哈希（内容寻址的文件名里已经包含）"""
+    match = CONTENT_NAME_PATTERN.match(filename)
+    if match:
+        return match.group(1)
+    path = os.path.join(avatar_dir, filename)
+    return file_digest(path) if os.path.exists(path) else None
+
+
+def collect_orphan_avatars(db_manager, avatar_dir=AVATAR_DIR, thumbnail_dir=THUMBNAIL_DIR,
+                           grace_seconds=ORPHAN_GRACE_SECONDS) -> List[str]:
+    """删除没有被任何用户引用的头像和缩略图，返回被删除的文件列表
+
+    最近 grace_seconds 内修改过的文件会保留（可能是已上传但尚未保存资料的头像）
+    """
+    rows = db_manager.execute_query(
+        "SELECT DISTINCT avatar_path FROM users WHERE avatar_path IS NOT NULL"
+    )
+    if not rows:
+        # 查询失败时不能当作“没有任何引用”处理
+        print("⚠️ 未读取到头像引用，跳过清理")
+        return []
+
+    referenced = {os.path.basename(row[0]) for row in rows}
+    referenced_digests = {_avatar_digest(avatar_dir, name) for name in referenced} - {None}
+    cutoff = time.time() - grace_seconds
+    removed = []
+
+    def remove(path, label):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed.append(label)
+        except OSError as e:
+            print(f"⚠️ 删除头像文件失败 {path}: {e}")
+
+    if os.path.isdir(avatar_dir):
+        for name in os.listdir(avatar_dir):
+            if name in PROTECTED_FILES or name in referenced:
+                continue
+            if CONTENT_NAME_PATTERN.match(name) or LEGACY_NAME_PATTERN.match(name):
+                remove(os.path.join(avatar_dir, name), name)
+
+    if os.path.isdir(thumbnail_dir):
+        for name in os.listdir(thumbnail_dir):
+            match = THUMBNAIL_NAME_PATTERN.match(name)
+            if match and match.group(1) not in referenced_digests:
+                remove(os.path.join(thumbnail_dir, name), f"thumbs/{name}")
+
+    return removed
@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据备份与恢复模块
+按数据表记录高水位（更新时间），重复备份时只复制发生变化的行；
+恢复时校验文件校验和，并在多个数据表之间并行写入
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from src.core.frecency import FrecencySchema
+from src.core.log_partitions import PARENT_TABLE, LogPartitionManager
+from src.core.url_dedup import UrlDeduplicator
+
+
+DEFAULT_BACKUP_DIR = "backups"
+MANIFEST_NAME = "manifest.json"
+BATCH_SIZE = 1000
+CHUNK_SIZE = 1024 * 1024
+# 增量备份的起点向前重叠的时长：时间戳在提交之前就已确定，上次备份读取时尚未提交、
+# 时间戳却早于高水位的行，会在下一次增量中被重新读到（重复的行恢复时覆盖写入）
+HWM_OVERLAP = timedelta(minutes=10)
+
+
+@dataclass(frozen=True)
+class BackupTable:
+    """参与备份的数据表"""
+    name: str
+    columns: tuple
+    hwm_expr: str           # 高水位表达式（时间戳），增量时从高水位减去 HWM_OVERLAP 处开始读取
+    conflict_columns: tuple = ('id',)
+    partition_key: str = ''     # 表已分区时主键包含分区键，恢复时一并作为冲突列
+
+
+# 顺序即恢复顺序：users 必须最先写入，其余表都引用它
+BACKUP_TABLES = [
+    BackupTable(
+        'users',
+        ('id', 'username', 'password_hash', 'email', 'display_name', 'avatar_path',
+         'is_admin', 'created_at', 'last_login', 'updated_at'),
+        # 登录只更新 last_login，两者取较大值
+        'GREATEST(updated_at, last_login)'
+    ),
+    BackupTable(
+        'user_websites',
+        ('id', 'user_id', 'name', 'url', 'description', 'category',
+         'rating', 'is_private', 'created_at', 'updated_at'),
+        'updated_at'
+    ),
+    BackupTable(
+        'website_stats',
+        ('id', 'website_name', 'website_url', 'user_id', 'visit_count', 'last_visited'),
+        'last_visited'
+    ),
+    BackupTable(
+        'system_logs',
+        ('id', 'user_id', 'action', 'details', 'ip_address', 'created_at'),
+        # 不能用自增 id：序列值在提交前分配，较小的 id 可能晚于较大的 id 提交
+        'created_at',
+        # 尚未迁移为分区表的旧库中 system_logs 仍是以 id 为主键的普通表
+        partition_key='created_at'
+    ),
+]
+
+TABLES_BY_NAME = {table.name: table for table in BACKUP_TABLES}
+
+
+@dataclass
+class BackupResult:
+    """备份结果"""
+    backup_id: str = ""
+    path: str = ""
+    full: bool = True
+    rows: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return not self.errors
+
+
+@dataclass
+class RestoreResult:
+    """恢复结果"""
+    backup_id: str = ""
+    chain: List[str] = field(default_factory=list)
+    rows: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return not self.errors
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+def file_checksum(path):
+    """计算文件的 SHA-256 校验和"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_lines(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BackupManager:
+    """数据备份管理器"""
+
+    def __init__(self, db_manager, backup_dir=DEFAULT_BACKUP_DIR, max_workers=3):
+        self.db_manager = db_manager
+        self.backup_dir = backup_dir
+        self.max_workers = max_workers
+
+    # ------------------------------------------------------------------
+    # 备份清单
+    # ------------------------------------------------------------------
+
+    def list_backups(self):
+        """按时间顺序列出全部备份清单"""
+        manifests = []
+        if not os.path.isdir(self.backup_dir):
+            return manifests
+
+        for name in sorted(os.listdir(self.backup_dir)):
+            manifest_path = os.path.join(self.backup_dir, name, MANIFEST_NAME)
+            if os.path.exists(manifest_path):
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifests.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ 读取备份清单失败 {manifest_path}: {e}")
+        return manifests
+
+    def get_backup(self, backup_id):
+        for manifest in self.list_backups():
+            if manifest['backup_id'] == backup_id:
+                return manifest
+        return None
+
+    def get_chain(self, backup_id=None):
+        """获取恢复到指定备份所需的备份链（最近一次全量备份及其后的增量）"""
+        manifests = {manifest['backup_id']: manifest for manifest in self.list_backups()}
+        if not manifests:
+            return []
+
+        backup_id = backup_id or max(manifests)
+        chain = []
+        while backup_id:
+            manifest = manifests.get(backup_id)
+            if manifest is None:
+                raise ValueError(f"备份链不完整，缺少备份: {backup_id}")
+            chain.append(manifest)
+            backup_id = None if manifest['full'] else manifest['parent']
+        return list(reversed(chain))
+
+    def verify(self, manifest):
+        """校验备份文件，返回错误列表"""
+        errors = []
+        path = os.path.join(self.backup_dir, manifest['backup_id'])
+        for table, info in manifest['tables'].items():
+            for file_key, checksum_key in (('file', 'sha256'), ('ids_file', 'ids_sha256')):
+                file_path = os.path.join(path, info[file_key])
+                if not os.path.exists(file_path):
+                    errors.append(f"{manifest['backup_id']}/{info[file_key]} 文件缺失")
+                elif file_checksum(file_path) != info[checksum_key]:
+                    errors.append(f"{manifest['backup_id']}/{info[file_key]} 校验和不匹配")
+        return errors
+
+    # ------------------------------------------------------------------
+    # 备份
+    # ------------------------------------------------------------------
+
+    def backup(self, full=False,
+               progress_callback: Optional[Callable[[int, str], None]] = None) -> BackupResult:
+        """执行备份；存在上一次备份且未要求全量时只备份高水位之后的变化"""
+        previous = self.list_backups()
+        parent = previous[-1] if previous and not full else None
+
+        backup_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        path = os.path.join(self.backup_dir, backup_id)
+        os.makedirs(path, exist_ok=True)
+
+        result = BackupResult(backup_id=backup_id, path=path, full=parent is None)
+        manifest = {
+            'backup_id': backup_id,
+            'created_at': datetime.now().isoformat(),
+            'full': parent is None,
+            'parent': parent['backup_id'] if parent else None,
+            'tables': {},
+        }
+
+        for index, table in enumerate(BACKUP_TABLES):
+            if progress_callback:
+                progress_callback(index * 100 // len(BACKUP_TABLES), table.name)
+
+            hwm_from = None
+            if parent and parent['tables'][table.name]['hwm_column'] == table.hwm_expr:
+                # 高水位表达式变化过（旧版本备份）时，该表重新完整备份
+                hwm_from = parent['tables'][table.name]['hwm']
+            try:
+                manifest['tables'][table.name] = self._backup_table(path, table, hwm_from)
+                result.rows[table.name] = manifest['tables'][table.name]['rows']
+            except Exception as e:
+                result.errors.append(f"备份 {table.name} 失败: {e}")
+                break
+
+        if result.success:
+            # 清单最后写入，没有清单的目录不会被当作有效备份
+            with open(os.path.join(path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            if progress_callback:
+                progress_callback(100, "")
+        return result
+
+    def _backup_table(self, path, table, hwm_from):
+        columns = ', '.join(table.columns)
+        query = f"SELECT {columns}, {table.hwm_expr} AS __hwm FROM {table.name}"
+        params = None
+        since = None
+        if hwm_from is not None:
+            since = (datetime.fromisoformat(hwm_from) - HWM_OVERLAP).isoformat()
+            query += f" WHERE {table.hwm_expr} >= %s"
+            params = (since,)
+        query += " ORDER BY id"
+
+        rows_file = f"{table.name}.jsonl.gz"
+        ids_file = f"{table.name}.ids.gz"
+        row_count = 0
+        hwm = hwm_from
+
+        with gzip.open(os.path.join(path, rows_file), 'wt', encoding='utf-8') as f:
+            for row in self.db_manager.iter_query(query, params, itersize=BATCH_SIZE):
+                row_hwm = row[-1]
+                if row_hwm is not None:
+                    row_hwm = row_hwm.isoformat() if isinstance(row_hwm, datetime) else row_hwm
+                    if hwm is None or row_hwm > hwm:
+                        hwm = row_hwm
+                f.write(json.dumps(list(row[:-1]), ensure_ascii=False, default=_json_default))
+                f.write('\n')
+                row_count += 1
+
+        # 记录当前存在的全部 id，恢复时据此删除备份之后被删掉的行
+        with gzip.open(os.path.join(path, ids_file), 'wt', encoding='utf-8') as f:
+            for batch in _batched(self.db_manager.iter_query(
+                    f"SELECT id FROM {table.name} ORDER BY id", itersize=BATCH_SIZE * 10), BATCH_SIZE * 10):
+                f.write(json.dumps([row[0] for row in batch]))
+                f.write('\n')
+
+        return {
+            'columns': list(table.columns),
+            'file': rows_file,
+            'sha256': file_checksum(os.path.join(path, rows_file)),
+            'ids_file': ids_file,
+            'ids_sha256': file_checksum(os.path.join(path, ids_file)),
+            'rows': row_count,
+            'hwm_column': table.hwm_expr,
+            'hwm_from': since,
+            'hwm': hwm,
+        }
+
+    # ------------------------------------------------------------------
+    # 恢复
+    # ------------------------------------------------------------------
+
+    def restore(self, backup_id=None,
+                progress_callback: Optional[Callable[[int, str], None]] = None) -> RestoreResult:
+        """恢复到指定备份（默认最近一次），先校验整条备份链再写入"""
+        result = RestoreResult()
+        try:
+            chain = self.get_chain(backup_id)
+        except ValueError as e:
+            result.errors.append(str(e))
+            return result
+
+        if not chain:
+            result.errors.append("没有可用的备份")
+            return result
+
+        result.backup_id = chain[-1]['backup_id']
+        result.chain = [manifest['backup_id'] for manifest in chain]
+
+        for manifest in chain:
+            result.errors.extend(self.verify(manifest))
+        if result.errors:
+            return result
+
+        first, *others = BACKUP_TABLES
+        if progress_callback:
+            progress_callback(0, first.name)
+
+        # 其余表都引用 users，先单独恢复 users（暂不删除多余用户）
+        self._restore_into(result, self.db_manager, first, chain, delete_missing=False)
+        if not result.success:
+            return result
+
+        if progress_callback:
+            progress_callback(25, ", ".join(table.name for table in others))
+
+        # 其余表互不依赖，各自使用独立连接并行恢复
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = []
+            for table in others:
+                db_manager = self.db_manager.clone()
+                futures.append((db_manager, executor.submit(
+                    self._restore_into, result, db_manager, table, chain, True
+                )))
+            for db_manager, future in futures:
+                future.result()
+                db_manager.disconnect()
+
+        if result.success:
+            # 引用已清理完毕，最后删除备份中不存在的用户
+            self._delete_missing(result, self.db_manager, first, chain[-1])
+
+        if result.success and UrlDeduplicator(self.db_manager).migrate() is None:
+            # url_hash 不在备份中，恢复后按恢复的网址重新计算
+            result.errors.append("恢复后重建网址索引失败")
+
+        if result.success and not FrecencySchema(self.db_manager).backfill():
+            # 常用度不在备份中，按恢复的访问次数和最后访问时间近似回填
+            result.errors.append("恢复后回填网址常用度失败")
+
+        if progress_callback and result.success:
+            progress_callback(100, "")
+        return result
+
+    def _restore_into(self, result, db_manager, table, chain, delete_missing):
+        try:
+            result.rows[table.name] = self._restore_table(db_manager, table, chain)
+            if delete_missing:
+                self._delete_missing(result, db_manager, table, chain[-1])
+        except Exception as e:
+            result.errors.append(f"恢复 {table.name} 失败: {e}")
+
+    def _conflict_columns(self, db_manager, table):
+        """ON CONFLICT 的目标列须与表上实际的唯一约束一致"""
+        if table.partition_key and table.name == PARENT_TABLE \
+                and LogPartitionManager(db_manager).table_kind() == 'p':
+            return table.conflict_columns + (table.partition_key,)
+        return table.conflict_columns
+
+    def _restore_table(self, db_manager, table, chain):
+        """按备份链顺序覆盖写入一张表，整张表在一个事务内完成"""
+        columns = ', '.join(table.columns)
+        conflict_columns = self._conflict_columns(db_manager, table)
+        updates = ', '.join(
+            f"{column} = EXCLUDED.{column}" for column in table.columns if column not in conflict_columns
+        )
+        query = (
+            f"INSERT INTO {table.name} ({columns}) VALUES %s "
+            f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {updates}"
+        )
+        restored = 0
+
+        def batches():
+            nonlocal restored
+            for manifest in chain:
+                info = manifest['tables'][table.name]
+                if info['columns'] != list(table.columns):
+                    raise ValueError(f"{manifest['backup_id']} 中 {table.name} 的列与当前版本不一致")
+                path = os.path.join(self.backup_dir, manifest['backup_id'], info['file'])
+                for batch in _batched(_read_lines(path), BATCH_SIZE):
+                    yield [tuple(row) for row in batch]
+                    restored += len(batch)
+
+        if not db_manager.execute_batches(query, batches(), page_size=BATCH_SIZE):
+            raise RuntimeError("写入数据失败，已回滚")
+
+        # 恢复的行带有原 id，需要把序列推进到最大 id 之后
+        db_manager.execute_non_query(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+        )
+        return restored
+
+    def _delete_missing(self, result, db_manager, table, manifest):
+        """删除目标备份时已不存在的行：id 列表分批写入临时表，再用反连接删除"""
+        ids_path = os.path.join(self.backup_dir, manifest['backup_id'], manifest['tables'][table.name]['ids_file'])
+        temp_table = f"restore_ids_{table.name}"
+
+        def batches():
+            for chunk in _read_lines(ids_path):
+                yield [(row_id,) for row_id in chunk]
+
+        # 临时表属于当前连接，各表并行恢复时互不影响
+        ok = (
+            db_manager.execute_non_query(f"CREATE TEMP TABLE IF NOT EXISTS {temp_table} (id BIGINT PRIMARY KEY)")
+            and db_manager.execute_non_query(f"TRUNCATE {temp_table}")
+            and db_manager.execute_batches(
+                f"INSERT INTO {temp_table} (id) VALUES %s ON CONFLICT DO NOTHING", batches(), page_size=BATCH_SIZE
+            )
+            and db_manager.execute_non_query(f"ANALYZE {temp_table}")
+            and db_manager.execute_non_query(
+                f"DELETE FROM {table.name} t WHERE NOT EXISTS (SELECT 1 FROM {temp_table} k WHERE k.id = t.id)"
+            )
+        )
+        db_manager.execute_non_query(f"DROP TABLE IF EXISTS {temp_table}")
+        if not ok:
+            result.errors.append(f"清理 {table.name} 中多余的数据失败")
@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+书签批量导入模块
+流式解析 Netscape 书签 HTML、CSV 和 JSON，按规范网址哈希去重，
+在一个事务内批量写入 user_websites
+"""
+
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Callable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from src.core.url_utils import is_valid_url, url_hash
+
+
+SUPPORTED_FORMATS = ('html', 'csv', 'json')
+DEFAULT_CATEGORY = "导入书签"
+DEFAULT_RATING = 5                  # 与添加网站对话框的默认值一致
+DEFAULT_PRIVATE = True
+MAX_NAME_LENGTH = 200
+MAX_CATEGORY_LENGTH = 100
+READ_CHUNK_SIZE = 64 * 1024
+
+# 唯一索引兜底：并发添加的同一网址不会重复写入
+INSERT_QUERY = """
+INSERT INTO user_websites (user_id, name, url, description, category, rating, is_private, created_at, url_hash)
+VALUES %s
+ON CONFLICT (user_id, url_hash) DO NOTHING
+"""
+
+
+@dataclass
+class Bookmark:
+    """解析出的单条书签"""
+    name: str
+    url: str
+    description: str = ""
+    category: str = ""
+
+
+@dataclass
+class ImportResult:
+    """导入结果汇总"""
+    total: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    cancelled: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return not self.errors and not self.cancelled
+
+
+class _ProgressReader(io.RawIOBase):
+    """统计已读取字节数的原始读取器，用于计算导入进度"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        return size
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+class _NetscapeBookmarkParser(HTMLParser):
+    """Netscape 书签格式解析器（浏览器导出的 bookmarks.html）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # 每个打开的 <DL> 对应一项：该层书签所属的文件夹名
+        self.folders = []
+        self.pending = []
+        self._current = None
+        self._in_folder_title = False
+        self._folder_title = None           # 刚解析完、等待 <DL> 的文件夹名
+        self._in_description = False
+        self._last_bookmark = None
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        if tag == 'a':
+            attrs = dict(attrs)
+            self._current = Bookmark(
+                name="",
+                url=(attrs.get('href') or '').strip(),
+                category=self.category
+            )
+        elif tag == 'h3':
+            self._in_folder_title = True
+            self._folder_title = ""
+        elif tag == 'dl':
+            # <H3> 之后紧跟的 <DL> 是该文件夹的内容；标题为空或没有 <H3> 时沿用上一层的文件夹
+            self.folders.append(self._folder_title or self.category)
+            self._folder_title = None
+        elif tag == 'dd':
+            self._in_description = self._last_bookmark is not None
+        elif tag == 'dt':
+            self._in_description = False
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if tag == 'a' and self._current is not None:
+            self._current.name = self._current.name.strip()
+            self.pending.append(self._current)
+            self._last_bookmark = self._current
+            self._current = None
+        elif tag == 'h3' and self._in_folder_title:
+            self._in_folder_title = False
+            self._folder_title = self._folder_title.strip()
+        elif tag == 'dl':
+            # 每个 </DL> 只关闭自己那一层，没有对应 <DL> 的多余 </DL> 直接忽略
+            if self.folders:
+                self.folders.pop()
+            self._in_description = False
+            self._last_bookmark = None
+
+    def handle_data(self, data):
+        if self._current is not None:
+            self._current.name += data
+        elif self._in_folder_title:
+            self._folder_title += data
+        elif self._in_description and self._last_bookmark is not None:
+            self._last_bookmark.description = (self._last_bookmark.description + data).strip()
+
+    @property
+    def category(self):
+        return self.folders[-1] if self.folders else ""
+
+    def drain(self):
+        """取出已解析完成的书签"""
+        items, self.pending = self.pending, []
+        return items
+
+
+def iter_html_bookmarks(stream) -> Iterator[Bookmark]:
+    """流式解析 Netscape 书签 HTML"""
+    parser = _NetscapeBookmarkParser()
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        # 描述在 <A> 之后才出现，最后一条留到下一块再交出
+        items = parser.drain()
+        if items and parser._last_bookmark is items[-1]:
+            parser.pending.append(items.pop())
+        yield from items
+    parser.close()
+    yield from parser.drain()
+
+
+def iter_csv_bookmarks(stream) -> Iterator[Bookmark]:
+    """流式解析 CSV 书签（表头支持 name/title、url/href/link、description、category/folder）"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        yield Bookmark(
+            name=row.get('name') or row.get('title') or "",
+            url=row.get('url') or row.get('href') or row.get('link') or "",
+            description=row.get('description') or "",
+            category=row.get('category') or row.get('folder') or ""
+        )
+
+
+def _bookmark_from_json(item, category=""):
+    return Bookmark(
+        name=str(item.get('name') or item.get('title') or ""),
+        url=str(item.get('url') or item.get('href') or item.get('uri') or ""),
+        description=str(item.get('description') or ""),
+        category=str(item.get('category') or item.get('folder') or category)
+    )
+
+
+def _walk_json_tree(node, category="") -> Iterator[Bookmark]:
+    """遍历 Chrome/Firefox 风格的嵌套书签树"""
+    if isinstance(node, list):
+        for child in node:
+            yield from _walk_json_tree(child, category)
+        return
+    if not isinstance(node, dict):
+        return
+
+    if node.get('url') or node.get('uri') or node.get('href'):
+        yield _bookmark_from_json(node, category)
+
+    folder = node.get('name') or node.get('title') or category
+    for key in ('children', 'roots'):
+        children = node.get(key)
+        if isinstance(children, dict):
+            children = list(children.values())
+        if children:
+            yield from _walk_json_tree(children, folder if key == 'children' else category)
+
+
+def _iter_lines(prefix, stream) -> Iterator[str]:
+    """先交出已读入缓冲区的完整行，缓冲区末尾不完整的一行与流中的下一行拼接，之后逐行读取流"""
+    *lines, partial = prefix.split('\n')
+    for line in lines:
+        yield line + '\n'
+    yield partial + stream.readline()
+    yield from stream
+
+
+def iter_json_bookmarks(stream) -> Iterator[Bookmark]:
+    """解析 JSON 书签：顶层数组与 JSON Lines 流式读取（按第一行是否为完整的值区分），嵌套书签树整体读取"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    while not buffer.strip() and not eof:
+        fill()
+    buffer = buffer.lstrip()
+    if not buffer:
+        return
+
+    if buffer[0] == '{':
+        lines = _iter_lines(buffer, stream)
+        first = next(lines)
+        try:
+            item = json.loads(first)
+        except ValueError:
+            # 第一行不是完整的值：整个文件是一棵多行的书签树，整体解析
+            yield from _walk_json_tree(json.loads(first + ''.join(lines)))
+            return
+
+        # JSON Lines：每行一个书签（或一棵单行的书签树），逐行读取
+        yield from _walk_json_tree(item)
+        for line in lines:
+            if line.strip():
+                yield from _walk_json_tree(json.loads(line))
+        return
+
+    if buffer[0] != '[':
+        raise ValueError("不支持的 JSON 书签格式")
+
+    position = 1
+    while True:
+        # 跳过元素之间的空白和逗号
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            fill()
+
+        if position >= len(buffer) or buffer[position] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if eof:
+                raise
+            fill()
+            continue
+
+        yield from _walk_json_tree(item)
+        buffer = buffer[end:]
+        position = 0
+
+
+PARSERS = {
+    'html': iter_html_bookmarks,
+    'csv': iter_csv_bookmarks,
+    'json': iter_json_bookmarks,
+}
+
+
+def detect_format(file_path):
+    """根据扩展名识别书签文件格式"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.html', '.htm'):
+        return 'html'
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.json', '.jsonl'):
+        return 'json'
+    return None
+
+
+class BookmarkImporter:
+    """书签导入器"""
+
+    def __init__(self, db_manager, user_id, batch_size=500, rating=DEFAULT_RATING, is_private=DEFAULT_PRIVATE):
+        self.db_manager = db_manager
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.rating = max(1, min(5, int(rating)))      # 导入的网站统一使用的评分和可见性
+        self.is_private = bool(is_private)
+
+    def load_existing_hashes(self):
+        """读取用户已有网址的哈希集合（只扫描唯一索引）"""
+        rows = self.db_manager.execute_query(
+            "SELECT url_hash FROM user_websites WHERE user_id = %s", (self.user_id,)
+        )
+        return {row[0] for row in rows}
+
+    def validate(self, bookmark: Bookmark) -> Optional[tuple]:
+        """校验并整理书签，返回待插入的行；不合法时返回 None"""
+        url = bookmark.url.strip()
+        if not is_valid_url(url):
+            return None
+
+        name = bookmark.name.strip() or urlsplit(url).hostname or url
+        category = bookmark.category.strip() or DEFAULT_CATEGORY
+        return (
+            self.user_id,
+            name[:MAX_NAME_LENGTH],
+            url,
+            bookmark.description.strip(),
+            category[:MAX_CATEGORY_LENGTH],
+            self.rating,
+            self.is_private,
+            datetime.now(),
+            url_hash(url)
+        )
+
+    def import_file(self, file_path, file_format=None,
+                    progress_callback: Optional[Callable[[int, ImportResult], None]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None) -> ImportResult:
+        """导入书签文件，progress_callback 接收 0-100 的进度和当前统计"""
+        result = ImportResult()
+        file_format = file_format or detect_format(file_path)
+        if file_format not in PARSERS:
+            result.errors.append("不支持的文件格式，请选择 HTML、CSV 或 JSON 书签文件")
+            return result
+
+        file_size = max(1, os.path.getsize(file_path))
+        seen = self.load_existing_hashes()
+
+        raw = _ProgressReader(open(file_path, 'rb'))
+        stream = io.TextIOWrapper(io.BufferedReader(raw), encoding='utf-8-sig', errors='replace', newline='')
+
+        def batches():
+            batch = []
+            try:
+                for bookmark in PARSERS[file_format](stream):
+                    if is_cancelled and is_cancelled():
+                        result.cancelled = True
+                        # 抛出异常使整个事务回滚
+                        raise InterruptedError("导入已取消")
+
+                    result.total += 1
+                    row = self.validate(bookmark)
+                    if row is None:
+                        result.invalid += 1
+                        continue
+
+                    key = row[-1]
+                    if key in seen:
+                        result.duplicates += 1
+                        continue
+                    seen.add(key)
+
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        result.imported += len(batch)
+                        batch = []
+                        if progress_callback:
+                            progress_callback(min(99, raw.bytes_read * 100 // file_size), result)
+            except (ValueError, csv.Error) as e:
+                result.errors.append(f"解析书签文件失败: {e}")
+                raise
+
+            if batch:
+                yield batch
+                result.imported += len(batch)
+
+        try:
+            written = self.db_manager.execute_batches(INSERT_QUERY, batches(), page_size=self.batch_size)
+        finally:
+            stream.close()
+
+        if not written:
+            result.imported = 0
+            if not result.cancelled and not result.errors:
+                result.errors.append("写入数据库失败，已回滚本次导入")
+
+        if progress_callback and result.success:
+            progress_callback(100, result)
+        return result
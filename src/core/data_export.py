@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据导出模块
+使用服务端具名游标逐批读取数据表，流式写出为压缩的 JSONL、CSV 或 Parquet 文件，
+内存占用与表的大小无关
+"""
+
+import csv
+import gzip
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+DEFAULT_ITERSIZE = 2000
+
+# 可导出的数据表及其列（用户表不导出密码哈希）
+EXPORT_TABLES = {
+    'users': [
+        'id', 'username', 'email', 'display_name', 'avatar_path',
+        'is_admin', 'created_at', 'last_login', 'updated_at'
+    ],
+    'user_websites': [
+        'id', 'user_id', 'name', 'url', 'description', 'category',
+        'rating', 'is_private', 'created_at', 'updated_at'
+    ],
+    'website_stats': [
+        'id', 'website_name', 'website_url', 'user_id', 'visit_count', 'last_visited'
+    ],
+    'system_logs': [
+        'id', 'user_id', 'action', 'details', 'ip_address', 'created_at'
+    ],
+}
+
+EXPORT_FORMATS = {
+    'jsonl': "JSON Lines (gzip 压缩)",
+    'csv': "CSV (gzip 压缩)",
+}
+if PYARROW_AVAILABLE:
+    EXPORT_FORMATS['parquet'] = "Parquet"
+
+FILE_EXTENSIONS = {
+    'jsonl': '.jsonl.gz',
+    'csv': '.csv.gz',
+    'parquet': '.parquet',
+}
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消"""
+
+
+@dataclass
+class ExportResult:
+    """导出结果汇总"""
+    output_dir: str = ""
+    files: Dict[str, str] = field(default_factory=dict)
+    rows: Dict[str, int] = field(default_factory=dict)
+    cancelled: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return not self.errors and not self.cancelled
+
+    @property
+    def total_rows(self):
+        return sum(self.rows.values())
+
+
+def _json_default(value):
+    """JSON 无法直接序列化的数据库类型"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _JsonlWriter:
+    def __init__(self, path, columns):
+        self.columns = columns
+        self.file = gzip.open(path, 'wt', encoding='utf-8', newline='\n')
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False, default=_json_default))
+            self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self.file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows([_csv_value(value) for value in row] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """每批数据写成一个行组，内存中最多保留一批"""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.writer = None
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        data = {
+            column: [row[index] for row in rows]
+            for index, column in enumerate(self.columns)
+        }
+        table = pa.table(data)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression='snappy')
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        else:
+            # 空表也生成只包含列名的文件
+            pq.write_table(pa.table({column: [] for column in self.columns}), self.path)
+
+
+WRITERS = {
+    'jsonl': _JsonlWriter,
+    'csv': _CsvWriter,
+    'parquet': _ParquetWriter,
+}
+
+
+class DataExporter:
+    """数据导出器"""
+
+    def __init__(self, db_manager, output_dir, file_format='jsonl', tables=None,
+                 itersize=DEFAULT_ITERSIZE):
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {file_format}")
+        unknown = [table for table in tables or () if table not in EXPORT_TABLES]
+        if unknown:
+            raise ValueError(f"未知的数据表: {', '.join(unknown)}")
+
+        self.db_manager = db_manager
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.tables = list(tables or EXPORT_TABLES)
+        self.itersize = itersize
+
+    def count_rows(self, table):
+        """统计表的行数，用于计算进度"""
+        rows = self.db_manager.execute_query(f"SELECT COUNT(*) FROM {table}")
+        return rows[0][0] if rows else 0
+
+    def export(self, progress_callback: Optional[Callable[[int, str, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> ExportResult:
+        """导出全部数据表，progress_callback 接收 0-100 的进度、当前表名和已导出行数"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        result = ExportResult(output_dir=os.path.join(self.output_dir, f"export_{timestamp}"))
+        os.makedirs(result.output_dir, exist_ok=True)
+
+        totals = {table: self.count_rows(table) for table in self.tables}
+        grand_total = max(1, sum(totals.values()))
+        exported = 0
+
+        for table in self.tables:
+            columns = EXPORT_TABLES[table]
+            path = os.path.join(result.output_dir, table + FILE_EXTENSIONS[self.file_format])
+            query = f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"
+            writer = WRITERS[self.file_format](path, columns)
+            table_rows = 0
+
+            try:
+                batch = []
+                for row in self.db_manager.iter_query(query, itersize=self.itersize):
+                    batch.append(row)
+                    if len(batch) < self.itersize:
+                        continue
+
+                    writer.write_rows(batch)
+                    table_rows += len(batch)
+                    batch = []
+
+                    if is_cancelled and is_cancelled():
+                        raise ExportCancelled()
+                    if progress_callback:
+                        progress_callback(min(99, (exported + table_rows) * 100 // grand_total), table, table_rows)
+
+                writer.write_rows(batch)
+                table_rows += len(batch)
+            except ExportCancelled:
+                result.cancelled = True
+            except Exception as e:
+                result.errors.append(f"导出 {table} 失败: {e}")
+            finally:
+                writer.close()
+
+            if not result.success:
+                break
+
+            exported += table_rows
+            result.files[table] = path
+            result.rows[table] = table_rows
+
+        if not result.success:
+            # 失败或取消时不保留不完整的导出（包括已写完的其他表）
+            shutil.rmtree(result.output_dir, ignore_errors=True)
+            result.files.clear()
+            result.rows.clear()
+        elif progress_callback:
+            progress_callback(100, "", exported)
+        return result
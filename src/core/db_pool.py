@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库连接池模块
+多个线程共享少量数据库连接：每次调用从池中借出一个 DatabaseManager，执行完归还，
+接口与 DatabaseManager 相同，可直接传给各业务模块
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+except ImportError:
+    TRANSACTION_STATUS_IDLE = 0
+
+from src.core.metrics import DB_POOL_IN_USE, DB_POOL_TIMEOUTS, DB_POOL_WAITS
+
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_ACQUIRE_TIMEOUT = 10.0
+
+
+class PoolTimeout(Exception):
+    """等待空闲连接超时"""
+
+
+class PooledDatabaseManager:
+    """DatabaseManager 连接池（线程安全），连接按需创建，最多 size 条"""
+
+    def __init__(self, template, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        self.template = template            # 提供连接参数的 DatabaseManager，池中的连接由它 clone 出来
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()      # 最近用过的连接优先复用，多余的连接自然空闲
+        self._created = 0
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self.template.clone()
+
+        DB_POOL_WAITS.inc()
+        started = time.perf_counter()
+        try:
+            manager = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            DB_POOL_TIMEOUTS.inc()
+            raise PoolTimeout(f"等待数据库连接超过 {self.timeout:.0f} 秒（连接池大小 {self.size}）")
+        with self._lock:
+            self.waits += 1
+            self.wait_time += time.perf_counter() - started
+        return manager
+
+    def _release(self, manager):
+        """归还前结束未提交的只读事务；连接已断开或状态异常时关闭，下次使用时重新连接"""
+        connection = manager.connection
+        if connection is not None:
+            try:
+                if connection.closed:
+                    manager.disconnect()
+                elif connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception as e:
+                print(f"⚠️ 重置连接状态失败，关闭该连接: {e}")
+                try:
+                    manager.disconnect()
+                except Exception:
+                    manager.connection = None
+        self._idle.put(manager)
+
+    @contextmanager
+    def lease(self):
+        """借出一个连接（同一个 with 块中的多条语句使用同一条连接）"""
+        manager = self._acquire()
+        DB_POOL_IN_USE.inc()
+        try:
+            yield manager
+        finally:
+            DB_POOL_IN_USE.dec()
+            self._release(manager)
+
+    def _call(self, method, failure, *args, **kwargs):
+        try:
+            with self.lease() as manager:
+                return getattr(manager, method)(*args, **kwargs)
+        except PoolTimeout as e:
+            print(f"❌ {e}")
+            return failure
+
+    # ------------------------------------------------------------------
+    # 与 DatabaseManager 相同的接口
+    # ------------------------------------------------------------------
+
+    def execute_query(self, query, params=None):
+        return self._call('execute_query', [], query, params)
+
+    def execute_prepared(self, name, params=None):
+        return self._call('execute_prepared', [], name, params)
+
+    def execute_returning(self, query, params=None):
+        return self._call('execute_returning', [], query, params)
+
+    def execute_non_query(self, query, params=None):
+        return self._call('execute_non_query', False, query, params)
+
+    def execute_batches(self, query, batches, template=None, page_size=500):
+        return self._call('execute_batches', False, query, batches, template=template, page_size=page_size)
+
+    def execute_transaction(self, statements):
+        return self._call('execute_transaction', False, statements)
+
+    def iter_query(self, query, params=None, itersize=2000):
+        """流式读取期间一直占用同一条连接"""
+        with self.lease() as manager:
+            yield from manager.iter_query(query, params, itersize)
+
+    def connect(self):
+        """检查能否建立连接"""
+        try:
+            with self.lease() as manager:
+                return manager.connection is not None or manager.connect()
+        except PoolTimeout as e:
+            print(f"❌ {e}")
+            return False
+
+    def clone(self):
+        """连接池本身是线程安全的，后台线程直接共用"""
+        return self
+
+    def disconnect(self):
+        """关闭所有空闲连接（正在借出的连接归还后仍可继续使用）"""
+        while True:
+            try:
+                manager = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            manager.disconnect()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            created = self._created
+            waits = self.waits
+            wait_time = self.wait_time
+        idle = self._idle.qsize()
+        return {
+            'size': self.size,
+            'open': created,
+            'idle': idle,
+            'in_use': created - idle,
+            'waits': waits,
+            'wait_ms': round(wait_time * 1000, 1),
+        }
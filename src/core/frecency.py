@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网址常用度（frecency）模块
+综合访问频率和按指数衰减的最近访问时间，每个用户的每个网址只保存一个对数形式的分数（website_stats.frecency），
+每次访问 O(1) 更新；所有分数按相同速率衰减，因此按保存的分数排序就是当前时刻的常用度排序
+"""
+
+import math
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.core.popularity import log_add
+from src.core.url_utils import url_hash
+
+
+HALF_LIFE_DAYS = 14
+FRECENCY_EPOCH = datetime(2025, 1, 1)
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)   # 每秒的衰减率
+
+# frecency = ln(Σ exp(λ·(t_i - epoch)))，旧数据按访问次数和最后访问时间近似回填
+SCHEMA_STATEMENTS = [
+    "ALTER TABLE website_stats ADD COLUMN IF NOT EXISTS frecency DOUBLE PRECISION",
+    f"""
+    UPDATE website_stats
+    SET frecency = LN(GREATEST(COALESCE(visit_count, 1), 1))
+        + EXTRACT(EPOCH FROM COALESCE(last_visited, CURRENT_TIMESTAMP) - TIMESTAMP '{FRECENCY_EPOCH.isoformat()}') * {DECAY_RATE!r}
+    WHERE frecency IS NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_website_stats_user_frecency ON website_stats (user_id, frecency DESC)",
+]
+
+# 访问记录 upsert 中更新分数的表达式：对数域相加 ln(e^a + e^b)
+FRECENCY_UPDATE_SQL = (
+    "GREATEST(website_stats.frecency, EXCLUDED.frecency)"
+    " + LN(1 + EXP(-ABS(website_stats.frecency - EXCLUDED.frecency)))"
+)
+
+
+def visit_weight(moment: Optional[datetime] = None) -> float:
+    """一次访问对应的对数分数"""
+    return ((moment or datetime.now()) - FRECENCY_EPOCH).total_seconds() * DECAY_RATE
+
+
+def current_score(frecency: float, now: Optional[datetime] = None) -> float:
+    """把保存的对数分数换算为当前时刻的常用度（约等于最近一个半衰期内的有效访问次数）"""
+    return math.exp(frecency - visit_weight(now))
+
+
+class FrecencySchema:
+    """维护 website_stats.frecency 列及其索引"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def is_ready(self):
+        """website_stats 是否已经有 frecency 列"""
+        rows = self.db_manager.execute_query(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'website_stats' AND column_name = 'frecency'
+            """
+        )
+        return bool(rows)
+
+    def ensure(self):
+        """缺少 frecency 列时添加并回填（启动时调用，已迁移过则只有一次查询）"""
+        if self.is_ready():
+            return True
+        return self.backfill()
+
+    def backfill(self):
+        """添加 frecency 列和索引，并为尚无分数的访问记录回填（可重复执行）"""
+        return self.db_manager.execute_transaction(SCHEMA_STATEMENTS)
+
+
+class FrecencyIndex:
+    """单个用户各网址的常用度（内存副本），访问时 O(1) 更新，用于界面排序"""
+
+    def __init__(self, scores: Optional[Dict[str, float]] = None):
+        self.scores: Dict[str, float] = dict(scores or {})
+
+    @classmethod
+    def load(cls, db_manager, user_id):
+        """读取用户所有网址的常用度（走 (user_id, frecency) 索引）"""
+        rows = db_manager.execute_query(
+            "SELECT url_hash, frecency FROM website_stats "
+            "WHERE user_id = %s AND url_hash IS NOT NULL AND frecency IS NOT NULL",
+            (user_id,)
+        )
+        return cls({item: frecency for item, frecency in rows})
+
+    def record(self, item, moment: Optional[datetime] = None):
+        """记录一次访问"""
+        weight = visit_weight(moment)
+        previous = self.scores.get(item)
+        self.scores[item] = weight if previous is None else log_add(previous, weight)
+
+    def score(self, item) -> Optional[float]:
+        return self.scores.get(item)
+
+    def order(self, websites: Iterable, key: Callable = None) -> List:
+        """按常用度从高到低排列网站，没有访问过的保持原有顺序排在后面"""
+        key = key or (lambda website: url_hash(website['url']))
+        websites = list(websites)
+        if not self.scores:
+            return websites
+        return sorted(websites, key=lambda website: -self.scores.get(key(website), -math.inf))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步 HTTP 客户端模块
+基于 asyncio 的轻量 HTTP/1.1 客户端（仅用标准库），支持连接/整体超时、
+重定向、gzip 解压、响应体大小上限，并按主机限制并发连接数
+"""
+
+import asyncio
+import ssl
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict
+from urllib.parse import urljoin, urlsplit
+
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_PER_HOST_LIMIT = 2
+DEFAULT_MAX_BODY = 2 * 1024 * 1024
+DEFAULT_MAX_REDIRECTS = 5
+USER_AGENT = "URLManageSystem/1.0 (+metadata fetcher)"
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class HttpError(Exception):
+    """请求失败（协议错误、响应不完整、重定向过多等）"""
+
+
+@dataclass
+class HttpResponse:
+    """HTTP 响应"""
+    url: str                                    # 最终地址（跟随重定向之后）
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)   # 键统一为小写
+    body: bytes = b''
+    elapsed: float = 0.0
+    truncated: bool = False                     # 响应体超过上限被截断
+
+    def header(self, name, default=''):
+        return self.headers.get(name.lower(), default)
+
+    @property
+    def content_type(self):
+        return self.header('content-type').split(';')[0].strip().lower()
+
+    def text(self):
+        """按 Content-Type 中的字符集解码响应体"""
+        charset = 'utf-8'
+        for part in self.header('content-type').split(';')[1:]:
+            key, _, value = part.partition('=')
+            if key.strip().lower() == 'charset' and value.strip():
+                charset = value.strip().strip('"\'')
+        try:
+            return self.body.decode(charset, errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+
+class HostLimiter:
+    """按主机限制同时进行的请求数"""
+
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT):
+        self.per_host_limit = per_host_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def slot(self, host) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+
+class AsyncHttpClient:
+    """异步 HTTP 客户端（每个请求使用独立连接，请求结束即关闭）"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, max_body=DEFAULT_MAX_BODY,
+                 max_redirects=DEFAULT_MAX_REDIRECTS, user_agent=USER_AGENT, ssl_context=None):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_body = max_body
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.limiter = HostLimiter(per_host_limit)
+
+    async def get(self, url, headers=None) -> HttpResponse:
+        return await self.request('GET', url, headers)
+
+    async def head(self, url, headers=None) -> HttpResponse:
+        return await self.request('HEAD', url, headers)
+
+    async def request(self, method, url, headers=None) -> HttpResponse:
+        """发送请求并跟随重定向，超时抛出 asyncio.TimeoutError"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        return await asyncio.wait_for(self._follow(method, url, headers or {}, started), self.timeout)
+
+    async def _follow(self, method, url, headers, started) -> HttpResponse:
+        loop = asyncio.get_running_loop()
+        for _ in range(self.max_redirects + 1):
+            host = urlsplit(url).netloc.lower()
+            async with self.limiter.slot(host):
+                response = await self._send(method, url, headers)
+
+            location = response.header('location')
+            if response.status not in REDIRECT_STATUSES or not location:
+                response.elapsed = loop.time() - started
+                return response
+
+            url = urljoin(url, location)
+            if response.status == 303:
+                method = 'GET'
+        raise HttpError(f"重定向次数超过 {self.max_redirects} 次")
+
+    async def _send(self, method, url, headers) -> HttpResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HttpError(f"不支持的网址: {url}")
+
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                parts.hostname, port,
+                ssl=self.ssl_context if secure else None,
+                server_hostname=parts.hostname if secure else None
+            ),
+            self.connect_timeout
+        )
+
+        try:
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            request_headers = {
+                'Host': parts.netloc,
+                'User-Agent': self.user_agent,
+                'Accept': '*/*',
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'close',
+            }
+            request_headers.update(headers)
+            head = f"{method} {path} HTTP/1.1\r\n"
+            head += "".join(f"{name}: {value}\r\n" for name, value in request_headers.items())
+            writer.write((head + "\r\n").encode('latin-1'))
+            await writer.drain()
+
+            status, response_headers = await self._read_head(reader)
+            body, truncated = b'', False
+            if method != 'HEAD' and status >= 200 and status not in (204, 304):
+                body, truncated = await self._read_body(reader, response_headers)
+                body, overflow = self._decode_body(body, response_headers.get('content-encoding', ''))
+                truncated = truncated or overflow
+            return HttpResponse(url, status, response_headers, body, truncated=truncated)
+        except asyncio.IncompleteReadError as e:
+            # 服务器在 Content-Length / 分块长度之前关闭了连接
+            raise HttpError(f"响应不完整: 收到 {len(e.partial)} 字节，预期 {e.expected} 字节") from None
+        except ValueError as e:
+            # 无效的分块长度、超长的响应头行等
+            raise HttpError(f"无效的响应: {e}") from None
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    async def _read_head(self, reader):
+        status_line = (await reader.readline()).decode('latin-1').strip()
+        pieces = status_line.split(' ', 2)
+        if len(pieces) < 2 or not pieces[0].startswith('HTTP/') or not pieces[1].isdigit():
+            raise HttpError(f"无效的响应行: {status_line[:80]}")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            name, value = name.strip().lower(), value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        return int(pieces[1]), headers
+
+    async def _read_body(self, reader, headers):
+        """读取响应体，超过上限时截断（元数据只需要页面开头部分）"""
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks, size = [], 0
+            while size < self.max_body:
+                size_line = (await reader.readline()).split(b';')[0].strip()
+                if not size_line:
+                    break
+                chunk_size = int(size_line, 16)
+                if chunk_size == 0:
+                    break
+                chunk = await reader.readexactly(chunk_size)
+                await reader.readline()
+                chunks.append(chunk)
+                size += chunk_size
+            body = b''.join(chunks)
+            return body[:self.max_body], size > self.max_body
+
+        length = headers.get('content-length', '')
+        if length.isdigit():
+            to_read = min(int(length), self.max_body)
+            return await reader.readexactly(to_read), int(length) > self.max_body
+
+        # 没有长度信息时读到连接关闭为止
+        chunks, size = [], 0
+        while size <= self.max_body:
+            chunk = await reader.read(64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        body = b''.join(chunks)
+        return body[:self.max_body], size > self.max_body
+
+    def _decode_body(self, body, encoding):
+        """解压响应体，返回 (数据, 解压后是否超过上限)；解压结果同样受 max_body 限制"""
+        encoding = encoding.lower().strip()
+        if not body or encoding not in ('gzip', 'x-gzip', 'deflate'):
+            return body, False
+
+        def inflate(wbits):
+            decompressor = zlib.decompressobj(wbits)
+            data = decompressor.decompress(body, self.max_body)
+            # 输出达到上限而压缩流还没结束，说明还有未解出的内容
+            return data, len(data) >= self.max_body and not decompressor.eof
+
+        try:
+            if encoding == 'deflate':
+                try:
+                    return inflate(zlib.MAX_WBITS)
+                except zlib.error:
+                    return inflate(-zlib.MAX_WBITS)
+            # 截断的压缩数据也能解出已收到的部分
+            return inflate(16 + zlib.MAX_WBITS)
+        except zlib.error as e:
+            raise HttpError(f"响应解压失败: {e}")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟统计模块
+数据库查询按语句指纹、界面操作按名称分别记录耗时，
+使用 HDR 风格的对数-线性分桶直方图（记录 O(1)，相对误差约 1.6%），随时读取 p50/p95/p99
+"""
+
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.core.tracing import record_span, slot_adapter
+
+
+SUB_BUCKET_BITS = 7                         # 每个数量级 64 个子桶
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+MAX_FINGERPRINT_LENGTH = 160
+
+KIND_QUERY = 'query'
+KIND_ACTION = 'action'
+
+
+def _bucket_index(micros: int) -> int:
+    """微秒值所在的桶：128 微秒以下逐微秒一个桶，之上每翻一倍分 64 个桶"""
+    if micros < SUB_BUCKET_COUNT:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + ((micros >> shift) - SUB_BUCKET_HALF)
+
+
+def _bucket_value(index: int) -> int:
+    """桶的代表值（桶内最大值，微秒）"""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    sub = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """耗时直方图（只保存非空的桶）"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max', 'errors')
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def record(self, seconds: float, error=False):
+        index = _bucket_index(int(seconds * 1_000_000))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def percentile(self, percent: float) -> float:
+        """第 percent 百分位的耗时（秒）"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(self.count * percent / 100 + 0.5))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(_bucket_value(index) / 1_000_000, self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram'):
+        """并入另一个直方图的记录（各线程分别统计后汇总）"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.errors += other.errors
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def bucket_counts(self, bounds) -> List[int]:
+        """按给定的上界（秒，升序）重新分桶的次数（不累计，超过最大上界的不计入）"""
+        counts = [0] * len(bounds)
+        for index, count in self.buckets.items():
+            value = _bucket_value(index) / 1_000_000
+            for position, bound in enumerate(bounds):
+                if value <= bound:
+                    counts[position] += count
+                    break
+        return counts
+
+
+@dataclass
+class LatencyStats:
+    """某个查询指纹或界面操作的耗时汇总（毫秒）"""
+    kind: str
+    name: str
+    count: int
+    errors: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """把 SQL 归一为指纹：去掉字面量和参数占位符，合并空白，同一语句的不同参数归为一类"""
+    text = re.sub(r'--[^\n]*', ' ', query)
+    text = re.sub(r"'(?:[^']|'')*'", '?', text)
+    text = re.sub(r'%\(\w+\)s|%s|\$\d+', '?', text)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', text)
+    text = re.sub(r'\(\?\)(?:\s*,\s*\(\?\))+', '(?), ...', text)
+    text = ' '.join(text.split())
+    if len(text) > MAX_FINGERPRINT_LENGTH:
+        text = text[:MAX_FINGERPRINT_LENGTH - 1] + '…'
+    return text
+
+
+class LatencyTracker:
+    """按 (类型, 名称) 汇总耗时的线程安全统计器"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, seconds: float, error=False):
+        key = (kind, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds, error)
+
+    def record_query(self, query: str, seconds: float, error=False):
+        self.record(KIND_QUERY, fingerprint(query), seconds, error)
+
+    @contextmanager
+    def timer(self, kind: str, name: str):
+        """计时上下文：代码块抛出异常时同样记录，并计为一次错误"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(kind, name, time.perf_counter() - started, error=True)
+            raise
+        self.record(kind, name, time.perf_counter() - started)
+
+    def snapshot(self, kind: Optional[str] = None, limit: Optional[int] = None) -> List[LatencyStats]:
+        """按累计耗时从高到低返回各项统计"""
+        with self._lock:
+            items = [
+                (key, histogram) for key, histogram in self._histograms.items()
+                if kind is None or key[0] == kind
+            ]
+            stats = [
+                LatencyStats(
+                    kind=key[0],
+                    name=key[1],
+                    count=histogram.count,
+                    errors=histogram.errors,
+                    total_ms=histogram.total * 1000,
+                    mean_ms=histogram.mean * 1000,
+                    p50_ms=histogram.percentile(50) * 1000,
+                    p95_ms=histogram.percentile(95) * 1000,
+                    p99_ms=histogram.percentile(99) * 1000,
+                    max_ms=histogram.max * 1000,
+                )
+                for key, histogram in items
+            ]
+        stats.sort(key=lambda item: item.total_ms, reverse=True)
+        return stats[:limit] if limit else stats
+
+    def summary(self, kind: str = KIND_QUERY) -> Dict[str, float]:
+        """某一类型的总体统计：次数、错误数、平均耗时和 p95（毫秒）"""
+        combined = LatencyHistogram()
+        with self._lock:
+            for (item_kind, _), histogram in self._histograms.items():
+                if item_kind != kind:
+                    continue
+                for index, count in histogram.buckets.items():
+                    combined.buckets[index] = combined.buckets.get(index, 0) + count
+                combined.count += histogram.count
+                combined.total += histogram.total
+                combined.errors += histogram.errors
+                combined.max = max(combined.max, histogram.max)
+        return {
+            'count': combined.count,
+            'errors': combined.errors,
+            'mean_ms': combined.mean * 1000,
+            'p95_ms': combined.percentile(95) * 1000,
+        }
+
+    def bucketed(self, kind: str, bounds) -> List[Tuple[str, List[int], int, float, int]]:
+        """某一类型各项按固定上界重新分桶的结果：(名称, 各桶次数, 总次数, 总耗时秒, 错误数)"""
+        with self._lock:
+            return [
+                (key[1], histogram.bucket_counts(bounds), histogram.count, histogram.total, histogram.errors)
+                for key, histogram in self._histograms.items()
+                if key[0] == kind
+            ]
+
+    @property
+    def uptime(self) -> int:
+        """进程运行时间（秒）"""
+        return int(time.time() - self.started_at)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+_default_tracker = LatencyTracker()
+
+
+def default_tracker() -> LatencyTracker:
+    """进程内共用的延迟统计器"""
+    return _default_tracker
+
+
+def timed_action(name: str):
+    """界面操作计时装饰器（启用追踪时同时记录一个 ui 区间）"""
+    def decorator(func):
+        call = slot_adapter(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = call(*args, **kwargs)
+            except Exception:
+                _record_action(name, started, error=True)
+                raise
+            _record_action(name, started)
+            return result
+        return wrapper
+    return decorator
+
+
+def _record_action(name, started, error=False):
+    elapsed = time.perf_counter() - started
+    _default_tracker.record(KIND_ACTION, name, elapsed, error)
+    record_span(name, 'ui', started, elapsed)
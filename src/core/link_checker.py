@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+链接健康检测模块
+并发检测推荐网站和用户网站的链接是否可以访问：按主机限速，遇到 429 和超时指数退避，
+用 ETag / Last-Modified 发起条件请求；检测结果保存在 link_health 表中，
+增量检测时优先处理从未检测或最久没有检测的链接
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from src.core.http_client import AsyncHttpClient, HttpError
+from src.core.url_utils import is_valid_url, normalize_url
+from src.data.website_data import RECOMMENDED_WEBSITES
+
+
+MAX_CONCURRENCY = 50
+HOST_INTERVAL = 1.0             # 同一主机两次请求之间的最小间隔（秒）
+MAX_BACKOFF = 60.0
+MAX_ATTEMPTS = 3
+CHECK_TIMEOUT = 10.0
+CHECK_BATCH_SIZE = 500
+
+OK_RECHECK = timedelta(days=7)
+FAILED_RECHECK_BASE = timedelta(hours=1)
+FAILED_RECHECK_MAX = timedelta(days=1)
+BROKEN_THRESHOLD = 2            # 连续失败多少次视为失效链接
+
+SOURCE_CATALOG = 'catalog'
+SOURCE_USER = 'user'
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS link_health (
+        url_key VARCHAR(500) PRIMARY KEY,
+        url VARCHAR(500) NOT NULL,
+        source VARCHAR(20) NOT NULL,
+        status_code INTEGER,
+        ok BOOLEAN,
+        error VARCHAR(200),
+        latency_ms INTEGER,
+        etag VARCHAR(200),
+        last_modified VARCHAR(100),
+        consecutive_failures INTEGER NOT NULL DEFAULT 0,
+        last_checked TIMESTAMP,
+        last_ok TIMESTAMP,
+        next_check TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_link_health_next_check ON link_health (next_check)",
+    # 失效链接只占少数，管理界面查询走部分索引
+    "CREATE INDEX IF NOT EXISTS idx_link_health_broken ON link_health (consecutive_failures DESC) WHERE ok = FALSE",
+]
+
+SYNC_TARGETS_SQL = """
+INSERT INTO link_health (url_key, url, source)
+VALUES %s
+ON CONFLICT (url_key) DO UPDATE SET url = EXCLUDED.url, source = EXCLUDED.source
+WHERE link_health.url <> EXCLUDED.url OR link_health.source <> EXCLUDED.source
+"""
+
+# 正常的链接一周后复查；失败的链接按 1 小时起指数递增（最多 1 天）复查以确认是否真的失效
+SAVE_RESULTS_SQL = f"""
+UPDATE link_health AS h SET
+    status_code = v.status_code,
+    ok = v.ok,
+    error = v.error,
+    latency_ms = v.latency_ms,
+    etag = COALESCE(v.etag, h.etag),
+    last_modified = COALESCE(v.last_modified, h.last_modified),
+    consecutive_failures = CASE WHEN v.ok THEN 0 ELSE h.consecutive_failures + 1 END,
+    last_checked = v.checked_at,
+    last_ok = CASE WHEN v.ok THEN v.checked_at ELSE h.last_ok END,
+    next_check = CASE
+        WHEN v.ok THEN v.checked_at + INTERVAL '{int(OK_RECHECK.total_seconds())} seconds'
+        ELSE v.checked_at + LEAST(
+            INTERVAL '{int(FAILED_RECHECK_BASE.total_seconds())} seconds' * POWER(2, LEAST(h.consecutive_failures, 10)),
+            INTERVAL '{int(FAILED_RECHECK_MAX.total_seconds())} seconds'
+        )
+    END
+FROM (VALUES %s) AS v (url_key, status_code, ok, error, latency_ms, etag, last_modified, checked_at)
+WHERE h.url_key = v.url_key
+"""
+
+SAVE_RESULTS_TEMPLATE = (
+    "(%s, %s::integer, %s::boolean, %s::varchar, %s::integer, %s::varchar, %s::varchar, %s::timestamp)"
+)
+
+# 被限流（多次 429）的链接不改变健康状态，只推迟下次检测
+DEFER_SQL = """
+UPDATE link_health SET next_check = %s
+WHERE url_key = ANY(%s)
+"""
+
+
+LINK_SUMMARY_SQL = """
+SELECT COUNT(*),
+       COUNT(*) FILTER (WHERE last_checked IS NOT NULL),
+       COUNT(*) FILTER (WHERE ok = FALSE AND consecutive_failures >= %s),
+       COUNT(*) FILTER (WHERE next_check <= %s)
+FROM link_health
+"""
+
+BROKEN_LINKS_SQL = """
+SELECT url, source, status_code, error, latency_ms, consecutive_failures, last_checked, last_ok
+FROM link_health
+WHERE ok = FALSE AND consecutive_failures >= %s
+ORDER BY consecutive_failures DESC, last_checked DESC
+LIMIT %s
+"""
+
+
+def link_summary_from_rows(rows) -> Dict[str, int]:
+    total, checked, broken, due = rows[0] if rows else (0, 0, 0, 0)
+    return {'total': total, 'checked': checked, 'broken': broken, 'due': due}
+
+
+@dataclass
+class LinkTarget:
+    """待检测的链接"""
+    url_key: str
+    url: str
+    etag: str = ''
+    last_modified: str = ''
+
+
+@dataclass
+class LinkResult:
+    """单个链接的检测结果"""
+    url_key: str
+    url: str
+    status_code: Optional[int] = None
+    ok: bool = False
+    error: str = ''
+    latency_ms: Optional[int] = None
+    etag: str = ''
+    last_modified: str = ''
+    rate_limited: bool = False
+    checked_at: datetime = field(default_factory=datetime.now)
+
+
+@dataclass
+class LinkCheckResult:
+    """一次检测任务的汇总"""
+    checked: int = 0
+    healthy: int = 0
+    broken: int = 0
+    deferred: int = 0
+    cancelled: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return not self.errors and not self.cancelled
+
+
+class HostThrottle:
+    """按主机限速：同一主机的请求至少间隔 interval 秒，出错后按指数退避暂停该主机"""
+
+    def __init__(self, interval=HOST_INTERVAL, max_backoff=MAX_BACKOFF):
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._next_slot: Dict[str, float] = {}
+        self._penalty: Dict[str, int] = {}
+
+    async def wait(self, host):
+        """等待到该主机允许发出下一个请求"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, now))
+        # 先占位再等待，并发的协程会依次排在后面
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def backoff(self, host, retry_after=None) -> float:
+        """主机返回 429 或超时后推迟该主机的后续请求，返回推迟的秒数"""
+        level = self._penalty.get(host, 0) + 1
+        self._penalty[host] = level
+        delay = retry_after if retry_after is not None else self.interval * (2 ** level)
+        delay = min(self.max_backoff, delay) * random.uniform(1.0, 1.25)
+        loop = asyncio.get_running_loop()
+        self._next_slot[host] = max(self._next_slot.get(host, 0), loop.time() + delay)
+        return delay
+
+    def success(self, host):
+        self._penalty.pop(host, None)
+
+
+def _retry_after(value) -> Optional[float]:
+    value = (value or '').strip()
+    return float(value) if value.isdigit() else None
+
+
+class LinkChecker:
+    """异步链接检测器（在事件循环中使用）"""
+
+    def __init__(self, client: AsyncHttpClient = None, throttle: HostThrottle = None,
+                 max_concurrency=MAX_CONCURRENCY, max_attempts=MAX_ATTEMPTS):
+        # 只需要状态码，响应体读取很小一部分即可
+        self.client = client or AsyncHttpClient(timeout=CHECK_TIMEOUT, max_body=64 * 1024)
+        self.throttle = throttle or HostThrottle()
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+
+    async def check(self, target: LinkTarget) -> LinkResult:
+        """检测单个链接：先发 HEAD，服务器不支持时改用 GET"""
+        host = urlsplit(target.url).netloc.lower()
+        headers = {}
+        if target.etag:
+            headers['If-None-Match'] = target.etag
+        if target.last_modified:
+            headers['If-Modified-Since'] = target.last_modified
+
+        result = LinkResult(target.url_key, target.url)
+        method = 'HEAD'
+        for _ in range(self.max_attempts):
+            await self.throttle.wait(host)
+            try:
+                response = await self.client.request(method, target.url, headers)
+            except asyncio.TimeoutError:
+                result.error = "请求超时"
+                # 暂停该主机一段时间后重试（等待在下一轮 throttle.wait 中完成）
+                self.throttle.backoff(host)
+                continue
+            except (HttpError, OSError, UnicodeError, ValueError) as e:
+                result.error = (str(e) or type(e).__name__)[:200]
+                break
+
+            result.status_code = response.status
+            result.latency_ms = int(response.elapsed * 1000)
+            if response.status == 429:
+                result.error = "请求过于频繁 (HTTP 429)"
+                result.rate_limited = True
+                self.throttle.backoff(host, _retry_after(response.header('retry-after')))
+                continue
+            if method == 'HEAD' and response.status in (403, 405, 501):
+                # 部分网站不支持 HEAD，改用 GET 再试一次
+                method = 'GET'
+                continue
+
+            self.throttle.success(host)
+            result.rate_limited = False
+            result.ok = response.status < 400
+            result.error = '' if result.ok else f"HTTP {response.status}"
+            result.etag = response.header('etag')
+            result.last_modified = response.header('last-modified')
+            break
+        else:
+            if result.status_code and not result.error:
+                result.error = f"HTTP {result.status_code}"
+
+        result.checked_at = datetime.now()
+        return result
+
+    async def check_many(self, targets: List[LinkTarget],
+                         callback: Callable[[LinkResult], None] = None,
+                         is_cancelled: Callable[[], bool] = None) -> List[LinkResult]:
+        """并发检测多个链接，返回已完成的结果（取消后未开始的链接不返回结果）"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(target):
+            async with semaphore:
+                if is_cancelled and is_cancelled():
+                    return None
+                result = await self.check(target)
+            if callback:
+                callback(result)
+            return result
+
+        results = await asyncio.gather(*(run(target) for target in targets))
+        return [result for result in results if result is not None]
+
+
+def catalog_urls():
+    """推荐网站中的所有链接"""
+    for websites in RECOMMENDED_WEBSITES.values():
+        for website in websites:
+            yield website['url']
+
+
+class LinkHealthMonitor:
+    """链接健康检测：同步待检测链接、增量检测并保存结果、查询失效链接"""
+
+    def __init__(self, db_manager, batch_size=CHECK_BATCH_SIZE, host_interval=HOST_INTERVAL,
+                 max_concurrency=MAX_CONCURRENCY):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.host_interval = host_interval
+        self.max_concurrency = max_concurrency
+
+    def setup(self):
+        return self.db_manager.execute_transaction(SCHEMA_STATEMENTS)
+
+    def sync_targets(self):
+        """把推荐网站和用户网站的链接登记到检测表（已删除的网址一并移除）"""
+        targets = {}
+        for url in catalog_urls():
+            if is_valid_url(url):
+                targets[normalize_url(url)] = (url, SOURCE_CATALOG)
+
+        try:
+            for (url,) in self.db_manager.iter_query("SELECT DISTINCT url FROM user_websites"):
+                key = normalize_url(url)
+                if is_valid_url(url) and key not in targets:
+                    targets[key] = (url, SOURCE_USER)
+        except Exception as e:
+            print(f"❌ 读取用户网站失败: {e}")
+            return False
+
+        rows = [(key, url, source) for key, (url, source) in targets.items()]
+        return self.db_manager.execute_transaction([
+            ("DELETE FROM link_health WHERE NOT (url_key = ANY(%s))", (list(targets),)),
+        ]) and self.db_manager.execute_batches(SYNC_TARGETS_SQL, [rows])
+
+    def due_targets(self, limit) -> List[LinkTarget]:
+        """取出到期需要检测的链接：从未检测的优先，其次是最久没有检测的"""
+        rows = self.db_manager.execute_query(
+            """
+            SELECT url_key, url, COALESCE(etag, ''), COALESCE(last_modified, '')
+            FROM link_health
+            WHERE next_check <= %s
+            ORDER BY last_checked NULLS FIRST, next_check
+            LIMIT %s
+            """,
+            (datetime.now(), limit)
+        )
+        return [LinkTarget(*row) for row in rows]
+
+    def save_results(self, results: List[LinkResult]):
+        """保存检测结果，被限流的链接只推迟下次检测时间"""
+        checked = [result for result in results if not result.rate_limited]
+        deferred = [result.url_key for result in results if result.rate_limited]
+        ok = True
+
+        if checked:
+            rows = [
+                (r.url_key, r.status_code, r.ok, r.error[:200] or None, r.latency_ms,
+                 r.etag or None, r.last_modified or None, r.checked_at)
+                for r in checked
+            ]
+            ok = self.db_manager.execute_batches(SAVE_RESULTS_SQL, [rows], template=SAVE_RESULTS_TEMPLATE)
+
+        if deferred:
+            ok = self.db_manager.execute_non_query(
+                DEFER_SQL, (datetime.now() + FAILED_RECHECK_BASE, deferred)
+            ) and ok
+        return ok
+
+    def run(self, limit=None, progress_callback: Callable[[int, int], None] = None,
+            is_cancelled: Callable[[], bool] = None) -> LinkCheckResult:
+        """增量检测到期的链接，每检测完一批立即保存
+
+        progress_callback(已检测数, 本次计划检测数)
+        """
+        result = LinkCheckResult()
+        if not self.sync_targets():
+            result.errors.append("同步待检测链接失败")
+            return result
+
+        total = self.pending_count()
+        if limit is not None:
+            total = min(total, limit)
+
+        completed = 0
+
+        def on_result(_link_result):
+            nonlocal completed
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+
+        # 限速状态在各批之间共享；HTTP 客户端绑定事件循环，每批新建
+        throttle = HostThrottle(self.host_interval)
+        while completed < total:
+            if is_cancelled and is_cancelled():
+                result.cancelled = True
+                break
+
+            targets = self.due_targets(min(self.batch_size, total - completed))
+            if not targets:
+                break
+
+            checker = LinkChecker(throttle=throttle, max_concurrency=self.max_concurrency)
+            results = asyncio.run(checker.check_many(targets, on_result, is_cancelled))
+            if not self.save_results(results):
+                result.errors.append("保存检测结果失败")
+                break
+
+            for link_result in results:
+                if link_result.rate_limited:
+                    result.deferred += 1
+                else:
+                    result.checked += 1
+                    if link_result.ok:
+                        result.healthy += 1
+                    else:
+                        result.broken += 1
+
+            if len(results) < len(targets):
+                result.cancelled = True
+                break
+
+        return result
+
+    def pending_count(self):
+        rows = self.db_manager.execute_query(
+            "SELECT COUNT(*) FROM link_health WHERE next_check <= %s", (datetime.now(),)
+        )
+        return rows[0][0] if rows else 0
+
+    def summary(self) -> Dict[str, int]:
+        """检测表的总体情况"""
+        rows = self.db_manager.execute_query(LINK_SUMMARY_SQL, (BROKEN_THRESHOLD, datetime.now()))
+        return link_summary_from_rows(rows)
+
+    def broken_links(self, limit=500):
+        """已确认失效的链接（读取已保存的结果，不触发检测）"""
+        return self.db_manager.execute_query(BROKEN_LINKS_SQL, (BROKEN_THRESHOLD, limit))
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+系统日志分区管理模块
+system_logs 按 created_at 每月一个范围分区，启动时和后台定期提前创建后续月份的分区，
+日志保留通过 DROP / DETACH PARTITION 整月清理，避免逐行删除带来的锁表和膨胀
+"""
+
+import re
+import threading
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional
+
+
+PARENT_TABLE = "system_logs"
+DEFAULT_PARTITION = "system_logs_default"
+PARTITION_PATTERN = re.compile(r'^system_logs_p(\d{4})(\d{2})$')
+MONTHS_AHEAD = 2
+MAINTENANCE_INTERVAL = 6 * 3600     # 后台检查分区的间隔（秒）
+
+CREATE_SEQUENCE_SQL = "CREATE SEQUENCE IF NOT EXISTS system_logs_id_seq"
+
+# 分区表的主键必须包含分区键
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS system_logs (
+    id INTEGER NOT NULL DEFAULT nextval('system_logs_id_seq'),
+    user_id INTEGER REFERENCES users(id),
+    action VARCHAR(100) NOT NULL,
+    details TEXT,
+    ip_address VARCHAR(45),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+
+class LogPartition(NamedTuple):
+    """一个月份分区"""
+    name: str
+    start: date
+    end: date
+
+
+def month_start(value) -> date:
+    """取所在月份的第一天"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """月份加减（结果为当月第一天）"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+class LogPartitionManager:
+    """系统日志分区管理器"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def table_kind(self):
+        """返回 system_logs 的类型：'p' 分区表，'r' 普通表，None 不存在"""
+        rows = self.db_manager.execute_query(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (PARENT_TABLE,)
+        )
+        return rows[0][0] if rows else None
+
+    def setup(self):
+        """创建分区表（已有普通表时迁移数据）并准备好分区"""
+        kind = self.table_kind()
+        if kind == 'r':
+            if not self.convert_existing_table():
+                return False
+        elif kind is None:
+            if not (self.db_manager.execute_non_query(CREATE_SEQUENCE_SQL)
+                    and self.db_manager.execute_non_query(CREATE_TABLE_SQL)
+                    and self.db_manager.execute_non_query(
+                        "ALTER SEQUENCE system_logs_id_seq OWNED BY system_logs.id")):
+                return False
+
+        return self.ensure_partitions()
+
+    def convert_existing_table(self):
+        """把旧的普通 system_logs 表迁移为分区表（在一个事务中完成）"""
+        rows = self.db_manager.execute_query(
+            "SELECT MIN(created_at), MAX(created_at) FROM system_logs"
+        )
+        first, last = rows[0] if rows else (None, None)
+        today = month_start(datetime.now())
+        first = month_start(first) if first else today
+        last = month_start(last) if last else today
+
+        statements = [
+            "ALTER TABLE system_logs RENAME TO system_logs_legacy",
+            "ALTER TABLE system_logs_legacy RENAME CONSTRAINT system_logs_pkey TO system_logs_legacy_pkey",
+            "UPDATE system_logs_legacy SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+            CREATE_TABLE_SQL,
+        ]
+        month = min(first, today)
+        while month <= max(last, add_months(today, MONTHS_AHEAD)):
+            statements.append(self._create_partition_sql(month))
+            month = add_months(month, 1)
+        statements += [
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT",
+            """
+            INSERT INTO system_logs (id, user_id, action, details, ip_address, created_at)
+            SELECT id, user_id, action, details, ip_address, created_at FROM system_logs_legacy
+            """,
+            # 沿用旧表的序列，再删除旧表
+            "ALTER SEQUENCE system_logs_id_seq OWNED BY system_logs.id",
+            "DROP TABLE system_logs_legacy",
+        ]
+
+        success = self.db_manager.execute_transaction(statements)
+        if success:
+            print("✅ system_logs 已迁移为按月分区表")
+        return success
+
+    def _create_partition_sql(self, month: date) -> str:
+        return (
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+
+    def ensure_partitions(self, months_ahead=MONTHS_AHEAD):
+        """确保当前月份及之后若干月份的分区存在，并把落入默认分区的整月日志移到各自的分区
+
+        每个月份单独执行，某个月份失败不影响其余月份
+        """
+        # 默认分区兜底，接住超出已有分区范围的日志
+        success = self.db_manager.execute_non_query(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+        )
+
+        today = month_start(datetime.now())
+        months = {add_months(today, offset) for offset in range(months_ahead + 1)}
+        months.update(self.default_partition_months())
+        existing = {partition.start for partition in self.list_partitions()}
+
+        for month in sorted(months - existing):
+            if not self.create_partition(month):
+                print(f"⚠️ 创建日志分区 {partition_name(month)} 失败")
+                success = False
+        return success
+
+    def default_partition_months(self) -> List[date]:
+        """默认分区中存有日志的月份（进程长时间运行跨月、或停机超过预建月数时产生）"""
+        rows = self.db_manager.execute_query(
+            f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION}"
+        )
+        return [row[0] for row in rows]
+
+    def create_partition(self, month: date):
+        """创建一个月份分区；默认分区已有该月日志时，先分离默认分区，建好分区后移入日志再挂回"""
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        rows = self.db_manager.execute_query(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)",
+            (start, end)
+        )
+        if not rows:
+            return False
+        if not rows[0][0]:
+            return self.db_manager.execute_non_query(self._create_partition_sql(month))
+
+        name = partition_name(month)
+        moved = self.db_manager.execute_transaction([
+            f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}",
+            self._create_partition_sql(month),
+            (f"""
+            INSERT INTO {name} (id, user_id, action, details, ip_address, created_at)
+            SELECT id, user_id, action, details, ip_address, created_at FROM {DEFAULT_PARTITION}
+            WHERE created_at >= %s AND created_at < %s
+            """, (start, end)),
+            (f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s", (start, end)),
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT",
+        ])
+        if moved:
+            print(f"✅ 已把默认分区中 {month.strftime('%Y-%m')} 的日志移入 {name}")
+        return moved
+
+    def list_partitions(self) -> List[LogPartition]:
+        """列出全部月份分区（按时间排序，不含默认分区）"""
+        rows = self.db_manager.execute_query(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            (PARENT_TABLE,)
+        )
+
+        partitions = []
+        for (name,) in rows:
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                start = date(int(match.group(1)), int(match.group(2)), 1)
+                partitions.append(LogPartition(name, start, add_months(start, 1)))
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    def drop_partitions_before(self, cutoff, detach=False):
+        """清理整月都早于 cutoff 的分区，返回被清理的分区名列表
+
+        detach=True 时只从 system_logs 分离，保留为独立的归档表；
+        system_logs 还是普通表时抛出 ValueError（改用 delete_rows_before）
+        """
+        if self.table_kind() != 'p':
+            raise ValueError("system_logs 不是分区表，无法按月清理")
+        cutoff = cutoff.date() if isinstance(cutoff, datetime) else cutoff
+        removed = []
+        for partition in self.list_partitions():
+            if partition.end > cutoff:
+                break
+            if detach:
+                sql = f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}"
+            else:
+                sql = f"DROP TABLE {partition.name}"
+            if not self.db_manager.execute_non_query(sql):
+                break
+            removed.append(partition.name)
+
+        # 默认分区中的旧日志量很小，直接删除
+        self.db_manager.execute_non_query(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < %s", (cutoff,)
+        )
+        return removed
+
+    def delete_rows_before(self, cutoff) -> Optional[int]:
+        """逐行删除 cutoff 之前的日志（尚未迁移为分区表时使用），返回删除的行数，失败时返回 None"""
+        rows = self.db_manager.execute_returning(
+            f"WITH deleted AS (DELETE FROM {PARENT_TABLE} WHERE created_at < %s RETURNING 1) "
+            f"SELECT COUNT(*) FROM deleted",
+            (cutoff,)
+        )
+        return rows[0][0] if rows else None
+
+    def truncate(self):
+        """清空全部日志（TRUNCATE 不逐行删除，也不会留下死元组）"""
+        return self.db_manager.execute_non_query(f"TRUNCATE {PARENT_TABLE}")
+
+
+class PartitionMaintainer:
+    """后台定期执行 ensure_partitions，长时间运行的进程跨月后日志仍写入对应月份的分区"""
+
+    def __init__(self, db_manager, interval=MAINTENANCE_INTERVAL):
+        self.db_manager = db_manager        # 独立连接，只在后台线程中使用
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="log-partitions", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.db_manager.disconnect()
+
+    def _loop(self):
+        manager = LogPartitionManager(self.db_manager)
+        while not self._stop.wait(self.interval):
+            try:
+                manager.ensure_partitions()
+            except Exception as e:
+                print(f"⚠️ 检查日志分区失败: {e}")
+
+
+def start_partition_maintenance(db_manager, interval=MAINTENANCE_INTERVAL) -> Optional[PartitionMaintainer]:
+    """system_logs 是分区表时启动后台分区维护（使用 db_manager 的克隆连接），否则返回 None"""
+    if LogPartitionManager(db_manager).table_kind() != 'p':
+        return None
+    return PartitionMaintainer(db_manager.clone(), interval).start()
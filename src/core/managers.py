@@ -8,6 +8,8 @@ from typing import Dict, List, Any, Optional
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTimer
 
+from src.core.latency import KIND_QUERY, default_tracker
+
 
 class ThemeManager:
     """主题管理器 - 管理应用程序的主题和样式"""
@@ -218,6 +220,7 @@ class StatisticsManager:
             "user_preferences": {},
             "system_performance": {
                 "avg_response_time": 0,
+                "p95_response_time": 0,
                 "error_count": 0,
                 "uptime": 0
             }
@@ -226,6 +229,10 @@ class StatisticsManager:
         self.stats = self.stats_data
         self.load_statistics()
         
+        # 错误数跨会话累计；查询错误计数是整个进程累计的（重新登录时本对象会重建），只累加创建之后新增的部分
+        self.error_count_base = self.stats_data["system_performance"].get("error_count", 0)
+        self.error_count_start = default_tracker().summary(KIND_QUERY)["errors"]
+        
         # 设置定时保存
         try:
             self.save_timer = QTimer()
@@ -248,6 +255,7 @@ class StatisticsManager:
     
     def save_statistics(self):
         """保存统计数据"""
+        self.update_system_performance()
         try:
             os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
             with open(self.stats_file, 'w', encoding='utf-8') as f:
@@ -407,8 +415,20 @@ class StatisticsManager:
             "total_sessions": len(login_times)
         }
     
+    def update_system_performance(self):
+        """用本次会话的数据库查询耗时更新性能指标（平均/p95 响应时间为毫秒，运行时间为秒）"""
+        tracker = default_tracker()
+        summary = tracker.summary(KIND_QUERY)
+        performance = self.stats_data.setdefault("system_performance", {})
+        performance["avg_response_time"] = round(summary["mean_ms"], 2)
+        performance["p95_response_time"] = round(summary["p95_ms"], 2)
+        performance["error_count"] = self.error_count_base + max(0, summary["errors"] - self.error_count_start)
+        performance["uptime"] = tracker.uptime
+        return performance
+    
     def get_system_overview(self) -> Dict[str, Any]:
         """获取系统概览统计"""
+        self.update_system_performance()
         return {
             "total_logins": self.stats_data["login_count"],
             "total_searches": self.stats_data["search_count"],
@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网站元数据获取模块
+异步获取网页标题、描述和网站图标，结果保存在磁盘上的 LRU 缓存中，
+缓存过期后用 ETag / Last-Modified 发起条件请求重新验证
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from src.core.http_client import AsyncHttpClient, HttpError
+from src.core.metrics import record_cache_lookup
+
+
+CACHE_DIR = "cache"
+METADATA_INDEX = "metadata.json"
+FAVICON_DIR = "favicons"
+MAX_CACHE_ENTRIES = 1000
+CACHE_MAX_AGE = 7 * 86400           # 超过这个时间的缓存需要重新验证
+MAX_CONCURRENCY = 8
+MAX_FAVICON_SIZE = 256 * 1024
+MAX_DESCRIPTION_LENGTH = 500
+
+# 常见图标格式的文件头
+FAVICON_SIGNATURES = {
+    b'\x00\x00\x01\x00': 'ico',
+    b'\x89PNG': 'png',
+    b'GIF8': 'gif',
+    b'\xff\xd8\xff': 'jpg',
+}
+
+
+@dataclass
+class WebsiteMetadata:
+    """网站元数据"""
+    url: str
+    final_url: str = ''
+    title: str = ''
+    description: str = ''
+    favicon_path: str = ''          # 本地缓存的图标文件
+    from_cache: bool = False
+    error: str = ''
+
+    @property
+    def success(self):
+        return not self.error
+
+
+class _MetadataParser(HTMLParser):
+    """从 <head> 中提取标题、描述和图标地址"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.og_title = ''
+        self.description = ''
+        self.og_description = ''
+        self.icons: Dict[str, str] = {}
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'body':
+            self.done = True
+            return
+
+        attrs = {name.lower(): (value or '') for name, value in attrs}
+        if tag == 'title' and not self.title:
+            self._in_title = True
+        elif tag == 'meta':
+            key = (attrs.get('name') or attrs.get('property') or '').lower()
+            content = attrs.get('content', '').strip()
+            if key == 'description' and not self.description:
+                self.description = content
+            elif key == 'og:description' and not self.og_description:
+                self.og_description = content
+            elif key == 'og:title' and not self.og_title:
+                self.og_title = content
+        elif tag == 'link' and attrs.get('href'):
+            rel = ' '.join(attrs.get('rel', '').lower().split())
+            if rel in ('icon', 'shortcut icon', 'apple-touch-icon') and rel not in self.icons:
+                self.icons[rel] = attrs['href'].strip()
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ' '.join(''.join(self._title_parts).split())
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    @property
+    def icon_href(self):
+        for rel in ('icon', 'shortcut icon', 'apple-touch-icon'):
+            if rel in self.icons:
+                return self.icons[rel]
+        return ''
+
+
+def parse_metadata(html) -> dict:
+    """解析 HTML，返回 title / description / icon_href"""
+    parser = _MetadataParser()
+    # 逐段喂入，解析到 </head> 即停止
+    for start in range(0, len(html), 8192):
+        parser.feed(html[start:start + 8192])
+        if parser.done:
+            break
+    parser.close()
+    if parser._in_title:
+        parser.title = ' '.join(''.join(parser._title_parts).split())
+
+    description = parser.description or parser.og_description
+    return {
+        'title': parser.title or parser.og_title,
+        'description': ' '.join(description.split())[:MAX_DESCRIPTION_LENGTH],
+        'icon_href': parser.icon_href,
+    }
+
+
+def site_key(url) -> str:
+    """图标按站点（协议+主机）缓存"""
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def _sniff_image(data) -> Optional[str]:
+    for signature, extension in FAVICON_SIGNATURES.items():
+        if data.startswith(signature):
+            return extension
+    head = data[:256].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in data[:1024].lower()):
+        return 'svg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class MetadataCache:
+    """磁盘上的元数据与图标缓存，按最近访问时间淘汰（线程安全）"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_CACHE_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.index_path = os.path.join(cache_dir, METADATA_INDEX)
+        self.favicon_dir = os.path.join(cache_dir, FAVICON_DIR)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._pages: Dict[str, dict] = {}
+        self._icons: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._pages = data.get('pages', {})
+            self._icons = data.get('icons', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 元数据缓存索引损坏，已重置: {e}")
+            self._pages, self._icons = {}, {}
+
+    def save(self):
+        """把索引写回磁盘（只在有修改时写）"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {'pages': self._pages, 'icons': self._icons}
+            self._dirty = False
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+            return True
+        except OSError as e:
+            print(f"❌ 保存元数据缓存失败: {e}")
+            return False
+
+    def get_page(self, url) -> Optional[dict]:
+        with self._lock:
+            entry = self._pages.get(url)
+            record_cache_lookup('metadata', entry is not None)
+            if entry is not None:
+                entry['accessed_at'] = time.time()
+                self._dirty = True
+                return dict(entry)
+            return None
+
+    def put_page(self, url, entry):
+        now = time.time()
+        with self._lock:
+            self._pages[url] = dict(entry, fetched_at=entry.get('fetched_at', now), accessed_at=now)
+            self._dirty = True
+            self._evict()
+
+    def get_icon(self, key) -> Optional[dict]:
+        with self._lock:
+            entry = self._icons.get(key)
+            return dict(entry) if entry is not None else None
+
+    def favicon_path(self, url) -> str:
+        """站点已缓存的图标文件路径，没有时返回空字符串（不发起网络请求）"""
+        with self._lock:
+            entry = self._icons.get(site_key(url))
+        if entry and entry.get('file'):
+            path = os.path.join(self.favicon_dir, entry['file'])
+            if os.path.exists(path):
+                record_cache_lookup('favicon', True)
+                return path
+        record_cache_lookup('favicon', False)
+        return ''
+
+    def put_icon(self, key, data, headers, icon_url):
+        """保存图标文件，data 为 None 表示 304 未修改，只刷新时间"""
+        now = time.time()
+        with self._lock:
+            entry = self._icons.get(key, {})
+        if data is not None:
+            extension = _sniff_image(data)
+            if extension is None:
+                self._remove_icon_file(entry.get('file'))
+                entry = {'file': ''}
+            else:
+                filename = f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.{extension}"
+                os.makedirs(self.favicon_dir, exist_ok=True)
+                path = os.path.join(self.favicon_dir, filename)
+                temp_path = path + ".tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+                self._remove_icon_file(entry.get('file'), keep=filename)
+                entry = {'file': filename}
+            entry.update(etag=headers.get('etag', ''), last_modified=headers.get('last-modified', ''),
+                         icon_url=icon_url)
+        entry['fetched_at'] = now
+        with self._lock:
+            self._icons[key] = entry
+            self._dirty = True
+        return os.path.join(self.favicon_dir, entry['file']) if entry.get('file') else ''
+
+    def _remove_icon_file(self, filename, keep=None):
+        if filename and filename != keep:
+            try:
+                os.remove(os.path.join(self.favicon_dir, filename))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """超过容量时删除最久未访问的页面，以及不再被引用的站点图标"""
+        if len(self._pages) <= self.max_entries:
+            return
+        ordered = sorted(self._pages.items(), key=lambda item: item[1].get('accessed_at', 0))
+        for url, _ in ordered[:len(self._pages) - self.max_entries]:
+            del self._pages[url]
+
+        live_sites = {site_key(url) for url in self._pages}
+        for key in [key for key in self._icons if key not in live_sites]:
+            self._remove_icon_file(self._icons.pop(key).get('file'))
+
+
+def _conditional_headers(entry) -> dict:
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+class MetadataFetcher:
+    """网站元数据获取器（在事件循环中使用）"""
+
+    def __init__(self, cache: MetadataCache = None, client: AsyncHttpClient = None,
+                 max_age=CACHE_MAX_AGE, fetch_favicons=True, max_concurrency=MAX_CONCURRENCY):
+        self.cache = cache or default_cache()
+        self.client = client or AsyncHttpClient()
+        self.max_age = max_age
+        self.fetch_favicons = fetch_favicons
+        self.max_concurrency = max_concurrency
+
+    def _is_fresh(self, entry):
+        return entry is not None and time.time() - entry.get('fetched_at', 0) < self.max_age
+
+    async def fetch(self, url) -> WebsiteMetadata:
+        """获取单个网址的元数据，网络失败时退回到过期的缓存"""
+        entry = self.cache.get_page(url)
+        metadata = WebsiteMetadata(url)
+
+        if self._is_fresh(entry):
+            metadata.from_cache = True
+        else:
+            try:
+                response = await self.client.get(url, _conditional_headers(entry))
+                if response.status == 304 and entry is not None:
+                    entry['fetched_at'] = time.time()
+                    metadata.from_cache = True
+                elif response.status == 200:
+                    parsed = parse_metadata(response.text()) if 'html' in response.content_type else {}
+                    entry = {
+                        'final_url': response.url,
+                        'title': parsed.get('title', ''),
+                        'description': parsed.get('description', ''),
+                        'icon_href': parsed.get('icon_href', ''),
+                        'etag': response.header('etag'),
+                        'last_modified': response.header('last-modified'),
+                    }
+                else:
+                    metadata.error = f"HTTP {response.status}"
+                if not metadata.error:
+                    entry.pop('accessed_at', None)
+                    self.cache.put_page(url, entry)
+            except (HttpError, OSError, asyncio.TimeoutError, UnicodeError) as e:
+                metadata.error = str(e) or type(e).__name__
+
+        if entry is None:
+            return metadata
+
+        metadata.final_url = entry.get('final_url', url)
+        metadata.title = entry.get('title', '')
+        metadata.description = entry.get('description', '')
+        if self.fetch_favicons:
+            metadata.favicon_path = await self.fetch_favicon(url, entry)
+        return metadata
+
+    async def fetch_favicon(self, url, entry=None) -> str:
+        """获取站点图标，返回本地文件路径（失败时返回空字符串）"""
+        key = site_key(url)
+        icon_entry = self.cache.get_icon(key)
+        if self._is_fresh(icon_entry):
+            return self.cache.favicon_path(url)
+
+        base = (entry or {}).get('final_url') or url
+        href = (entry or {}).get('icon_href') or '/favicon.ico'
+        icon_url = urljoin(base, href)
+        try:
+            response = await self.client.get(icon_url, _conditional_headers(icon_entry))
+            if response.status == 304 and icon_entry is not None:
+                self.cache.put_icon(key, None, response.headers, icon_url)
+            elif response.status == 200 and len(response.body) <= MAX_FAVICON_SIZE and not response.truncated:
+                self.cache.put_icon(key, response.body, response.headers, icon_url)
+            else:
+                # 站点没有图标也记下来，过期前不再重复请求
+                self.cache.put_icon(key, b'', {}, icon_url)
+        except (HttpError, OSError, asyncio.TimeoutError) as e:
+            print(f"⚠️ 获取网站图标失败 {icon_url}: {e}")
+        return self.cache.favicon_path(url)
+
+    async def fetch_many(self, urls: Iterable[str],
+                         callback: Callable[[WebsiteMetadata], None] = None,
+                         is_cancelled: Callable[[], bool] = None) -> List[WebsiteMetadata]:
+        """并发获取多个网址（总并发和单主机并发都有上限），每完成一个调用一次 callback"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(url):
+            async with semaphore:
+                if is_cancelled and is_cancelled():
+                    return WebsiteMetadata(url, error="已取消")
+                metadata = await self.fetch(url)
+            if callback:
+                callback(metadata)
+            return metadata
+
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        try:
+            return await asyncio.gather(*(run(url) for url in unique_urls))
+        finally:
+            self.cache.save()
+
+
+_default_cache: Optional[MetadataCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache() -> MetadataCache:
+    """进程内共享的缓存实例（界面线程读图标、后台线程写入）"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MetadataCache()
+        return _default_cache
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行指标模块
+计数器、仪表和直方图的注册表，以 Prometheus 文本格式输出，
+可通过本机 HTTP 端点（/metrics）供抓取，或定期写入 node_exporter 的 textfile 目录
+"""
+
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.latency import KIND_ACTION, KIND_QUERY, default_tracker
+
+
+METRIC_PREFIX = "url_manage_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_HTTP_HOST = "127.0.0.1"
+DEFAULT_TEXTFILE_INTERVAL = 60
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """带标签的指标（标签值按 labelnames 的顺序组成元组）"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, object]]:
+        """(带标签的样本名, 值) 形式的样本行"""
+        with self._lock:
+            return [(self.name + _format_labels(self.labelnames, key), value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """固定分桶的直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, count, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append((self.name + "_bucket" + _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'),
+                              cumulative))
+            lines.append((self.name + "_bucket" + _format_labels(self.labelnames, key, 'le="+Inf"'), count))
+            lines.append((self.name + "_sum" + _format_labels(self.labelnames, key), total))
+            lines.append((self.name + "_count" + _format_labels(self.labelnames, key), count))
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表；collector 在输出时调用，返回需要即时计算的指标"""
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.type_name}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        """登记输出时才计算的指标（collector 返回的指标名称需自带前缀）"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[_Metric]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                print(f"⚠️ 指标采集失败: {e}")
+        return metrics
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self.collect():
+            samples = metric.samples()
+            if not samples:
+                continue
+            documentation = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(f"{name} {_format_value(value)}" for name, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def registry() -> MetricsRegistry:
+    """进程内共用的指标注册表"""
+    return _registry
+
+
+# 各模块直接更新的指标
+DB_CONNECTIONS_OPEN = _registry.gauge("db_connections_open", "当前打开的数据库连接数")
+DB_CONNECTIONS_OPENED = _registry.counter("db_connections_opened_total", "累计打开的数据库连接数")
+DB_CONNECT_FAILURES = _registry.counter("db_connect_failures_total", "数据库连接失败次数")
+CACHE_REQUESTS = _registry.counter("cache_requests_total", "缓存查找次数", ("cache", "result"))
+LOGIN_ATTEMPTS = _registry.counter("login_attempts_total", "登录尝试次数（result: success/failure/locked）", ("result",))
+ACCOUNT_LOCKOUTS = _registry.counter("account_lockouts_total", "因连续登录失败锁定账户的次数")
+DB_POOL_IN_USE = _registry.gauge("db_pool_connections_in_use", "连接池中正在被借用的连接数")
+DB_POOL_WAITS = _registry.counter("db_pool_waits_total", "连接池已满需要等待的借用次数")
+DB_POOL_TIMEOUTS = _registry.counter("db_pool_timeouts_total", "等待空闲连接超时的借用次数")
+API_REQUESTS = _registry.counter("api_requests_total", "API 请求次数", ("route", "status"))
+API_SESSIONS = _registry.gauge("api_sessions", "API 服务器当前的登录会话数")
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def _latency_metrics():
+    """把延迟统计器中的查询和界面操作耗时换算为固定分桶的直方图"""
+    tracker = default_tracker()
+    families = (
+        (KIND_QUERY, "query", "db_query", "数据库语句"),
+        (KIND_ACTION, "action", "ui_action", "界面操作（加载、搜索、重建网格等）"),
+    )
+    metrics = []
+    for kind, label, name, description in families:
+        histogram = Histogram(f"{_registry.prefix}{name}_duration_seconds", f"{description}耗时", (label,))
+        errors = Counter(f"{_registry.prefix}{name}_errors_total", f"{description}出错次数", (label,))
+        for item_name, counts, count, total, error_count in tracker.bucketed(kind, histogram.buckets):
+            histogram._values[(item_name,)] = [counts, count, total]
+            if error_count:
+                errors._values[(item_name,)] = error_count
+        metrics.extend((histogram, errors))
+
+    uptime = Gauge(_registry.prefix + "uptime_seconds", "进程运行时间")
+    uptime._values[()] = tracker.uptime
+    metrics.append(uptime)
+    return metrics
+
+
+_registry.add_collector(_latency_metrics)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = _registry
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """按配置启动 HTTP 端点和/或 textfile 输出"""
+
+    def __init__(self, metrics_registry=None, http_host=DEFAULT_HTTP_HOST, http_port=0,
+                 textfile_path='', textfile_interval=DEFAULT_TEXTFILE_INTERVAL):
+        self.registry = metrics_registry or _registry
+        self.http_host = http_host
+        self.http_port = http_port
+        self.textfile_path = textfile_path
+        self.textfile_interval = textfile_interval
+        self.server = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """启动导出；HTTP 端口被占用时只打印警告"""
+        if self.http_port:
+            try:
+                handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+                self.server = ThreadingHTTPServer((self.http_host, self.http_port), handler)
+                self.server.daemon_threads = True
+                self._spawn(self.server.serve_forever, "metrics-http")
+                print(f"📈 指标端点: http://{self.http_host}:{self.server.server_address[1]}/metrics")
+            except OSError as e:
+                print(f"⚠️ 指标端点启动失败: {e}")
+                self.server = None
+        if self.textfile_path:
+            self._spawn(self._textfile_loop, "metrics-textfile")
+            print(f"📈 指标文件: {self.textfile_path}（每 {self.textfile_interval} 秒更新）")
+        return self
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        """停止导出（退出前写入最后一次 textfile）"""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        if self.textfile_path:
+            self.write_textfile()
+
+    def _textfile_loop(self):
+        while True:
+            self.write_textfile()
+            if self._stop.wait(self.textfile_interval):
+                return
+
+    def write_textfile(self):
+        """原子地写入 textfile（先写临时文件再替换，避免 node_exporter 读到半个文件）"""
+        try:
+            directory = os.path.dirname(self.textfile_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.registry.render())
+            os.replace(temp_path, self.textfile_path)
+            return True
+        except OSError as e:
+            print(f"⚠️ 写入指标文件失败: {e}")
+            return False
+
+
+def configure_metrics_export(config) -> Optional[MetricsExporter]:
+    """按配置文件的 [metrics] 节启动指标导出（http_port 为 0 且 textfile 为空时不启动）
+
+    config 为 configparser.ConfigParser
+    """
+    try:
+        http_port = config.getint('metrics', 'http_port', fallback=0)
+        interval = config.getfloat('metrics', 'textfile_interval', fallback=DEFAULT_TEXTFILE_INTERVAL)
+    except ValueError as e:
+        print(f"⚠️ 指标导出配置无效，已关闭: {e}")
+        return None
+    http_host = config.get('metrics', 'http_host', fallback=DEFAULT_HTTP_HOST)
+    textfile_path = config.get('metrics', 'textfile', fallback='').strip()
+
+    if not http_port and not textfile_path:
+        return None
+    return MetricsExporter(_registry, http_host, http_port, textfile_path, max(interval, 1)).start()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+全站网址热度模块
+按规范化网址汇总所有用户的访问：总访问量、独立用户数和随时间衰减的热度分，
+由访问事件表上的语句级触发器增量维护，热门查询走索引取前 N 条
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import List, NamedTuple
+
+from src.core.url_utils import normalize_url
+
+
+HALF_LIFE_DAYS = 7
+SCORE_EPOCH = datetime(2025, 1, 1)
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)   # 每秒的衰减率
+
+# 热度分以对数形式保存：score = ln(Σ exp(λ·(t_i - epoch)))
+# 排序结果与任意时刻的衰减分一致，因此可以直接在 score 上建索引
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS website_popularity (
+        url_key VARCHAR(500) PRIMARY KEY,
+        website_name VARCHAR(200) NOT NULL,
+        website_url VARCHAR(500) NOT NULL,
+        total_visits BIGINT NOT NULL DEFAULT 0,
+        unique_users INTEGER NOT NULL DEFAULT 0,
+        score DOUBLE PRECISION NOT NULL DEFAULT 0,
+        last_visited TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_website_popularity_score ON website_popularity (score DESC)",
+    """
+    CREATE TABLE IF NOT EXISTS website_popularity_users (
+        url_key VARCHAR(500) NOT NULL,
+        user_id INTEGER NOT NULL,
+        PRIMARY KEY (url_key, user_id)
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION update_website_popularity() RETURNS trigger AS $$
+    BEGIN
+        WITH new_pairs AS (
+            INSERT INTO website_popularity_users (url_key, user_id)
+            SELECT DISTINCT url_key, user_id FROM new_events
+            WHERE url_key IS NOT NULL AND user_id IS NOT NULL
+            ON CONFLICT DO NOTHING
+            RETURNING url_key
+        ), user_delta AS (
+            SELECT url_key, COUNT(*) AS users FROM new_pairs GROUP BY url_key
+        ), weighted AS (
+            SELECT url_key, website_name, website_url, visited_at,
+                   EXTRACT(EPOCH FROM visited_at - TIMESTAMP '{SCORE_EPOCH.isoformat()}') * {DECAY_RATE!r} AS weight
+            FROM new_events
+            WHERE url_key IS NOT NULL
+        ), batch AS (
+            SELECT *, MAX(weight) OVER (PARTITION BY url_key) AS max_weight FROM weighted
+        ), totals AS (
+            SELECT url_key,
+                   (ARRAY_AGG(website_name ORDER BY visited_at DESC))[1] AS website_name,
+                   (ARRAY_AGG(website_url ORDER BY visited_at DESC))[1] AS website_url,
+                   COUNT(*) AS visits,
+                   MAX(max_weight) + LN(SUM(EXP(weight - max_weight))) AS score,
+                   MAX(visited_at) AS last_visited
+            FROM batch
+            GROUP BY url_key
+        )
+        INSERT INTO website_popularity AS p
+            (url_key, website_name, website_url, total_visits, unique_users, score, last_visited)
+        SELECT t.url_key, t.website_name, t.website_url, t.visits, COALESCE(u.users, 0), t.score, t.last_visited
+        FROM totals t LEFT JOIN user_delta u ON u.url_key = t.url_key
+        ON CONFLICT (url_key) DO UPDATE SET
+            website_name = EXCLUDED.website_name,
+            website_url = EXCLUDED.website_url,
+            total_visits = p.total_visits + EXCLUDED.total_visits,
+            unique_users = p.unique_users + EXCLUDED.unique_users,
+            -- 对数域相加：ln(e^a + e^b)
+            score = GREATEST(p.score, EXCLUDED.score) + LN(1 + EXP(-ABS(p.score - EXCLUDED.score))),
+            last_visited = GREATEST(p.last_visited, EXCLUDED.last_visited);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_website_popularity ON website_visit_events",
+    """
+    CREATE TRIGGER trg_website_popularity
+    AFTER INSERT ON website_visit_events
+    REFERENCING NEW TABLE AS new_events
+    FOR EACH STATEMENT EXECUTE FUNCTION update_website_popularity()
+    """,
+]
+
+
+TOP_SITES_SQL = """
+SELECT website_name, website_url, total_visits, unique_users, score, last_visited
+FROM website_popularity
+ORDER BY score DESC
+LIMIT %s
+"""
+
+
+class PopularSite(NamedTuple):
+    """热门网址"""
+    website_name: str
+    website_url: str
+    total_visits: int
+    unique_users: int
+    score: float            # 当前时刻的衰减热度（约等于最近一个半衰期内的有效访问次数）
+    last_visited: datetime
+
+
+def time_weight(moment: datetime) -> float:
+    """访问时刻对应的对数权重"""
+    return (moment - SCORE_EPOCH).total_seconds() * DECAY_RATE
+
+
+def decayed_score(log_score: float, now: datetime = None) -> float:
+    """把对数形式的热度分换算为当前时刻的衰减分"""
+    return math.exp(log_score - time_weight(now or datetime.now()))
+
+
+def log_add(a: float, b: float) -> float:
+    """对数域相加：ln(e^a + e^b)"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def popular_sites_from_rows(rows) -> List[PopularSite]:
+    """把热度表的查询结果换算为当前时刻的衰减热度"""
+    now = datetime.now()
+    return [
+        PopularSite(name, url, total, users, decayed_score(score, now), last_visited)
+        for name, url, total, users, score, last_visited in rows
+    ]
+
+
+class PopularityRanking:
+    """全站热度查询"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def top(self, limit=10) -> List[PopularSite]:
+        """按衰减热度取前 N 个网址（使用 score 索引）"""
+        return popular_sites_from_rows(self.db_manager.execute_query(TOP_SITES_SQL, (limit,)))
+
+    def seed_from_stats(self):
+        """热度表为空时，用旧的 website_stats 数据初始化（按最后访问时间近似计分）"""
+        rows = self.db_manager.execute_query("SELECT 1 FROM website_popularity LIMIT 1")
+        if rows:
+            return True
+
+        stats = self.db_manager.execute_query(
+            "SELECT website_name, website_url, user_id, visit_count, last_visited FROM website_stats"
+        )
+        sites = {}
+        users = defaultdict(set)
+        for name, url, user_id, visit_count, last_visited in stats:
+            key = normalize_url(url)
+            if not key:
+                continue
+            visits = max(1, visit_count or 1)
+            last_visited = last_visited or datetime.now()
+            weight = math.log(visits) + time_weight(last_visited)
+
+            site = sites.get(key)
+            if site is None:
+                sites[key] = [name, url, visits, weight, last_visited]
+            else:
+                site[2] += visits
+                site[3] = log_add(site[3], weight)
+                if last_visited > site[4]:
+                    site[0], site[1], site[4] = name, url, last_visited
+            if user_id is not None:
+                users[key].add(user_id)
+
+        if not sites:
+            return True
+        return self.db_manager.execute_transaction(self._insert_statements(sites, users))
+
+    def rekey(self):
+        """网址规范化规则变化后，按新的规则重新归并已有的热度数据"""
+        rows = self.db_manager.execute_query(
+            "SELECT url_key, website_name, website_url, total_visits, score, last_visited FROM website_popularity"
+        )
+        new_keys = {key: normalize_url(url) or key for key, _, url, _, _, _ in rows}
+        if all(key == new_key for key, new_key in new_keys.items()):
+            return True
+
+        sites = {}
+        for key, name, url, visits, score, last_visited in rows:
+            new_key = new_keys[key]
+            site = sites.get(new_key)
+            if site is None:
+                sites[new_key] = [name, url, visits, score, last_visited]
+                continue
+            site[2] += visits
+            site[3] = log_add(site[3], score)
+            if last_visited and (site[4] is None or last_visited > site[4]):
+                site[0], site[1], site[4] = name, url, last_visited
+
+        users = defaultdict(set)
+        for key, user_id in self.db_manager.execute_query(
+            "SELECT url_key, user_id FROM website_popularity_users"
+        ):
+            users[new_keys.get(key, key)].add(user_id)
+
+        statements = [
+            "DELETE FROM website_popularity_users",
+            "DELETE FROM website_popularity",
+        ] + self._insert_statements(sites, users)
+        return self.db_manager.execute_transaction(statements)
+
+    @staticmethod
+    def _insert_statements(sites, users):
+        """批量写入热度表和用户关联表的语句（sites: 网址键 -> [名称, 网址, 访问量, 对数热度, 最后访问]）"""
+        site_rows = [
+            (key, name, url, visits, len(users[key]), score, last_visited)
+            for key, (name, url, visits, score, last_visited) in sites.items()
+        ]
+        user_rows = [(key, user_id) for key, user_ids in users.items() for user_id in user_ids]
+        statements = [(
+            """
+            INSERT INTO website_popularity
+                (url_key, website_name, website_url, total_visits, unique_users, score, last_visited)
+            SELECT * FROM UNNEST(%s::varchar[], %s::varchar[], %s::varchar[], %s::bigint[],
+                                 %s::integer[], %s::double precision[], %s::timestamp[])
+            """,
+            tuple(list(column) for column in zip(*site_rows))
+        )]
+        if user_rows:
+            statements.append((
+                """
+                INSERT INTO website_popularity_users (url_key, user_id)
+                SELECT * FROM UNNEST(%s::varchar[], %s::integer[])
+                """,
+                tuple(list(column) for column in zip(*user_rows))
+            ))
+        return statements
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询注册表模块
+集中登记热点查询，按连接使用 PREPARE/EXECUTE 复用执行计划，
+并以具名元组返回结果行
+"""
+
+import re
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 预备语句不存在（连接被重置或语句被释放）时的 SQLSTATE
+INVALID_STATEMENT_NAME = '26000'
+
+
+@dataclass(frozen=True)
+class RegisteredQuery:
+    """已登记的查询定义"""
+    name: str
+    sql: str                        # 使用 $1, $2 ... 作为占位符
+    param_types: Tuple[str, ...]    # 与占位符一一对应的 PostgreSQL 类型
+    row_name: str                   # 结果行具名元组的类型名
+
+    @property
+    def statement_name(self) -> str:
+        """数据库端的预备语句名称"""
+        return f"q_{self.name}"
+
+
+QUERY_REGISTRY: Dict[str, RegisteredQuery] = {}
+
+
+def register_query(name: str, sql: str, param_types: Sequence[str] = (),
+                   row_name: Optional[str] = None) -> RegisteredQuery:
+    """登记一条热点查询"""
+    if not re.match(r'^[a-z][a-z0-9_]*$', name):
+        raise ValueError(f"查询名称不合法: {name}")
+
+    placeholders = {int(n) for n in re.findall(r'\$(\d+)', sql)}
+    if placeholders != set(range(1, len(param_types) + 1)):
+        raise ValueError(f"查询 {name} 的占位符与参数类型数量不一致")
+
+    query = RegisteredQuery(
+        name=name,
+        sql=sql.strip(),
+        param_types=tuple(param_types),
+        row_name=row_name or ''.join(part.title() for part in name.split('_')) + 'Row'
+    )
+    QUERY_REGISTRY[name] = query
+    return query
+
+
+def get_query(name: str) -> RegisteredQuery:
+    """获取已登记的查询"""
+    try:
+        return QUERY_REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"未登记的查询: {name}") from None
+
+
+class PreparedStatementSession:
+    """单个数据库连接上的预备语句状态"""
+
+    # 结果行类型只与语句本身有关，所有连接共享
+    _row_types: Dict[str, type] = {}
+
+    def __init__(self):
+        self.prepared = set()
+
+    def reset(self):
+        """连接断开或重建后清空已准备的语句"""
+        self.prepared.clear()
+
+    def prepare(self, cursor, query: RegisteredQuery):
+        """在当前连接上准备语句"""
+        if query.param_types:
+            types = ', '.join(query.param_types)
+            cursor.execute(f"PREPARE {query.statement_name} ({types}) AS {query.sql}")
+        else:
+            cursor.execute(f"PREPARE {query.statement_name} AS {query.sql}")
+        self.prepared.add(query.name)
+
+    def execute(self, connection, name: str, params=None) -> List[tuple]:
+        """执行预备语句，首次使用时自动准备，返回具名元组列表"""
+        query = get_query(name)
+        params = tuple(params or ())
+        if len(params) != len(query.param_types):
+            raise ValueError(f"查询 {name} 需要 {len(query.param_types)} 个参数，实际为 {len(params)}")
+
+        try:
+            return self._execute(connection, query, params)
+        except Exception as e:
+            if getattr(e, 'pgcode', None) != INVALID_STATEMENT_NAME:
+                raise
+            # 服务端已没有该语句（例如连接池重置了会话），重新准备后重试一次
+            connection.rollback()
+            self.prepared.discard(query.name)
+            return self._execute(connection, query, params)
+
+    def _execute(self, connection, query: RegisteredQuery, params: tuple) -> List[tuple]:
+        cursor = connection.cursor()
+        try:
+            if query.name not in self.prepared:
+                self.prepare(cursor, query)
+
+            if params:
+                placeholders = ', '.join(['%s'] * len(params))
+                cursor.execute(f"EXECUTE {query.statement_name} ({placeholders})", params)
+            else:
+                cursor.execute(f"EXECUTE {query.statement_name}")
+
+            if cursor.description is None:
+                return []
+
+            row_type = self._row_type(query, cursor.description)
+            return [row_type._make(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def _row_type(self, query: RegisteredQuery, description) -> type:
+        row_type = self._row_types.get(query.name)
+        if row_type is None:
+            row_type = namedtuple(query.row_name, [column[0] for column in description])
+            self._row_types[query.name] = row_type
+        return row_type
+
+
+# ---------------------------------------------------------------------------
+# 热点查询
+# ---------------------------------------------------------------------------
+
+register_query(
+    'auth_user_by_username',
+    """
+    SELECT id, username, password_hash, email, display_name, avatar_path, is_admin, created_at, last_login
+    FROM users WHERE username = $1
+    """,
+    ('text',),
+    row_name='UserRow'
+)
+
+register_query(
+    'user_websites_with_counts',
+    """
+    SELECT w.id, w.name, w.url, w.description, w.category, w.rating, w.is_private, w.created_at,
+           COUNT(*) OVER () AS total_count,
+           COUNT(*) FILTER (WHERE w.is_private = FALSE) OVER () AS public_count
+    FROM user_websites w
+    LEFT JOIN website_stats s ON s.user_id = w.user_id AND s.url_hash = w.url_hash
+    WHERE w.user_id = $1
+    ORDER BY s.frecency DESC NULLS LAST, w.created_at DESC
+    """,
+    ('integer',),
+    row_name='UserWebsiteRow'
+)
+
+register_query(
+    'user_website_by_url_hash',
+    """
+    SELECT id, name FROM user_websites
+    WHERE user_id = $1 AND url_hash = $2
+    """,
+    ('integer', 'char(32)'),
+    row_name='UserWebsiteHashRow'
+)
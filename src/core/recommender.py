@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网站推荐模块
+基于 website_stats 构建“用户 × 网址”稀疏矩阵，计算网址之间的余弦相似度并保留每个网址最相似的前 K 个；
+后台任务增量刷新相似度，个性化推荐直接查询内存索引
+"""
+
+import heapq
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+TOP_K = 20
+BLOCK_SIZE = 1024                               # 每次计算多少个网址的相似度行
+REFRESH_INTERVAL_MS = 10 * 60 * 1000
+FULL_REBUILD_INTERVAL = timedelta(hours=24)     # 增量刷新是近似的，定期全量重建
+
+STATS_QUERY = """
+SELECT user_id, url_hash, visit_count, last_visited
+FROM website_stats
+WHERE user_id IS NOT NULL AND url_hash IS NOT NULL
+"""
+
+
+def visit_weight(visit_count) -> float:
+    """隐式反馈权重：访问次数取对数，避免个别高频访问主导相似度"""
+    return math.log1p(max(0, visit_count or 0))
+
+
+def _neighbors_vectorized(profiles, targets, top_k) -> Dict[str, List[Tuple[str, float]]]:
+    """用稀疏矩阵乘法按块计算目标网址的前 K 个相似网址"""
+    items = sorted({item for profile in profiles.values() for item in profile})
+    item_index = {item: position for position, item in enumerate(items)}
+
+    rows, cols, values = [], [], []
+    for row, profile in enumerate(profiles.values()):
+        for item, visit_count in profile.items():
+            rows.append(row)
+            cols.append(item_index[item])
+            values.append(visit_weight(visit_count))
+
+    matrix = sparse.csr_matrix((values, (rows, cols)), shape=(len(profiles), len(items)), dtype=np.float64)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = (matrix @ sparse.diags(1.0 / norms)).tocsc()
+    transposed = normalized.T.tocsr()
+
+    target_positions = np.array([item_index[item] for item in targets if item in item_index], dtype=np.int64)
+    result = {}
+    for start in range(0, len(target_positions), BLOCK_SIZE):
+        block = target_positions[start:start + BLOCK_SIZE]
+        similarities = (transposed[block] @ normalized).tocsr()
+        for row, position in enumerate(block):
+            begin, end = similarities.indptr[row], similarities.indptr[row + 1]
+            indices = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            keep = (indices != position) & (scores > 0)
+            indices, scores = indices[keep], scores[keep]
+            if len(scores) > top_k:
+                part = np.argpartition(-scores, top_k)[:top_k]
+                indices, scores = indices[part], scores[part]
+            order = np.argsort(-scores)
+            result[items[position]] = [(items[i], float(s)) for i, s in zip(indices[order], scores[order])]
+    return result
+
+
+def _neighbors_python(profiles, targets, top_k) -> Dict[str, List[Tuple[str, float]]]:
+    """没有 NumPy/SciPy 时的纯 Python 实现（只遍历共同访问过的网址）"""
+    norms = defaultdict(float)
+    item_users = defaultdict(dict)
+    for user_id, profile in profiles.items():
+        for item, visit_count in profile.items():
+            weight = visit_weight(visit_count)
+            norms[item] += weight * weight
+            item_users[item][user_id] = weight
+
+    result = {}
+    for target in targets:
+        if not norms.get(target):
+            continue
+        dots = defaultdict(float)
+        for user_id, weight in item_users[target].items():
+            for other, visit_count in profiles[user_id].items():
+                if other != target:
+                    dots[other] += weight * visit_weight(visit_count)
+        scored = (
+            (other, dot / math.sqrt(norms[target] * norms[other]))
+            for other, dot in dots.items() if dot > 0
+        )
+        result[target] = heapq.nlargest(top_k, scored, key=lambda pair: pair[1])
+    return result
+
+
+def compute_neighbors(profiles, targets, top_k=TOP_K) -> Dict[str, List[Tuple[str, float]]]:
+    """计算目标网址的前 K 个相似网址（有 NumPy/SciPy 时使用向量化实现）"""
+    if NUMPY_AVAILABLE and SCIPY_AVAILABLE:
+        return _neighbors_vectorized(profiles, targets, top_k)
+    return _neighbors_python(profiles, targets, top_k)
+
+
+class RecommendationEngine:
+    """基于网址相似度的个性化推荐（刷新在后台线程进行，查询只读内存索引）"""
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.profiles: Dict[int, Dict[str, int]] = {}            # 用户 -> {网址哈希: 访问次数}
+        self.neighbors: Dict[str, List[Tuple[str, float]]] = {}  # 网址哈希 -> [(相似网址, 相似度)]
+        self.built_at: Optional[datetime] = None
+        self.watermark: Optional[datetime] = None                # 已读取的最大 last_visited
+        self._observed: Dict[int, Dict[str, int]] = {}           # 刷新前本进程新增的访问
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    def refresh(self, db_manager, full=False):
+        """从数据库刷新索引：首次或距上次全量重建超过一天时全量重建，否则只处理变化的访问记录"""
+        if full or self.built_at is None or datetime.now() - self.built_at >= FULL_REBUILD_INTERVAL:
+            return self._rebuild(db_manager)
+        return self._refresh_incremental(db_manager)
+
+    def _rebuild(self, db_manager):
+        started = datetime.now()
+        profiles = defaultdict(dict)
+        watermark = None
+        for user_id, item, visit_count, last_visited in db_manager.iter_query(STATS_QUERY):
+            profiles[user_id][item] = visit_count or 0
+            if last_visited and (watermark is None or last_visited > watermark):
+                watermark = last_visited
+
+        items = {item for profile in profiles.values() for item in profile}
+        neighbors = compute_neighbors(profiles, items, self.top_k)
+
+        with self._lock:
+            self.profiles = dict(profiles)
+            self.neighbors = neighbors
+            self.watermark = watermark
+            self.built_at = started
+            self._observed = {}
+        print(f"✅ 推荐索引已重建: {len(profiles)} 个用户, {len(items)} 个网址")
+        return True
+
+    def _refresh_incremental(self, db_manager):
+        if self.watermark is None:
+            return self._rebuild(db_manager)
+
+        changes = list(db_manager.iter_query(
+            STATS_QUERY + " AND last_visited >= %s", (self.watermark,)
+        ))
+        with self._lock:
+            self._observed = {}
+        if not changes:
+            return True
+
+        with self._lock:
+            profiles = {user_id: dict(profile) for user_id, profile in self.profiles.items()}
+            neighbors = dict(self.neighbors)
+
+        watermark = self.watermark
+        changed_users = set()
+        for user_id, item, visit_count, last_visited in changes:
+            profile = profiles.setdefault(user_id, {})
+            if profile.get(item) != (visit_count or 0):
+                profile[item] = visit_count or 0
+                changed_users.add(user_id)
+            if last_visited and last_visited > watermark:
+                watermark = last_visited
+        if not changed_users:
+            return True
+
+        # 变化用户访问过的网址相似度都会变化；把它们列为近邻的网址也一并重算
+        affected = {item for user_id in changed_users for item in profiles[user_id]}
+        affected |= {
+            item for item, item_neighbors in neighbors.items()
+            if any(other in affected for other, _ in item_neighbors)
+        }
+        neighbors.update(compute_neighbors(profiles, affected, self.top_k))
+
+        with self._lock:
+            self.profiles = profiles
+            self.neighbors = neighbors
+            self.watermark = watermark
+        return True
+
+    def observe(self, user_id, item):
+        """记录一次访问，使推荐立即排除/参考该网址（相似度在下次刷新时更新）"""
+        with self._lock:
+            observed = self._observed.setdefault(user_id, {})
+            observed[item] = observed.get(item, 0) + 1
+
+    def recommend(self, user_id, limit=12, candidates: Optional[Set[str]] = None,
+                  exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """为用户推荐网址，返回 [(网址哈希, 得分)]；没有访问记录时返回空列表
+
+        候选网址默认排除用户已经访问过的，candidates 限定可推荐的范围
+        """
+        with self._lock:
+            profile = dict(self.profiles.get(user_id, {}))
+            for item, visits in self._observed.get(user_id, {}).items():
+                profile[item] = profile.get(item, 0) + visits
+            neighbors = self.neighbors
+        if not profile:
+            return []
+
+        excluded = set(profile) | set(exclude)
+        scores = defaultdict(float)
+        for item, visit_count in profile.items():
+            weight = visit_weight(visit_count)
+            for other, similarity in neighbors.get(item, ()):
+                if other in excluded or (candidates is not None and other not in candidates):
+                    continue
+                scores[other] += weight * similarity
+        return heapq.nlargest(limit, scores.items(), key=lambda pair: pair[1])
@@ -0,0 +1,561 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业务服务层
+登录注册、个人信息、我的网站、访问统计和管理员查询，不依赖界面；
+桌面客户端直接使用（Services），API 服务器在共享连接池上使用同一套服务，
+瘦客户端通过 api_client.RemoteServices 以相同的方法调用
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.core.auth_system import AuthController
+from src.core.avatar_files import AVATAR_DIR, CONTENT_NAME_PATTERN, is_avatar_name, save_avatar_bytes
+from src.core.bookmark_importer import DEFAULT_PRIVATE, DEFAULT_RATING, BookmarkImporter, ImportResult
+from src.core.frecency import FrecencyIndex
+from src.core.link_checker import (
+    BROKEN_LINKS_SQL, BROKEN_THRESHOLD, LINK_SUMMARY_SQL, LinkHealthMonitor, link_summary_from_rows
+)
+from src.core.metrics import record_cache_lookup
+from src.core.popularity import TOP_SITES_SQL, PopularityRanking, popular_sites_from_rows
+from src.core.url_utils import is_valid_url, url_hash
+from src.core.visit_events import (
+    DAILY_TREND_SQL, HOURLY_VISITS_SQL, TOTAL_VISITS_SQL, VisitAnalytics, VisitEventRecorder,
+    day_range, fill_daily_trend, fill_hourly, record_website_stats, trend_start
+)
+
+
+DEFAULT_CACHE_TTL = 30.0            # 共享缓存的有效期（秒），0 表示不缓存
+MAX_LOG_LIMIT = 1000
+
+WEBSITE_FIELDS = ('id', 'name', 'url', 'description', 'category', 'rating', 'is_private', 'created_at')
+STATISTICS_FIELDS = ('total_users', 'active_users', 'admin_users', 'total_websites',
+                     'public_websites', 'private_websites')
+ADMIN_USER_FIELDS = ('id', 'username', 'email', 'is_admin', 'created_at')
+ADMIN_WEBSITE_FIELDS = ('id', 'name', 'username', 'category', 'rating', 'is_private')
+ADMIN_LOG_FIELDS = ('created_at', 'username', 'action', 'details', 'ip_address')
+BROKEN_LINK_FIELDS = ('url', 'source', 'status_code', 'error', 'latency_ms', 'consecutive_failures',
+                      'last_checked', 'last_ok')
+
+# 用户数和网站数一次查询取回
+ADMIN_COUNTS_SQL = """
+SELECT (SELECT COUNT(*) FROM users),
+       (SELECT COUNT(*) FROM users WHERE last_login >= %s),
+       (SELECT COUNT(*) FROM users WHERE is_admin = TRUE),
+       COUNT(*),
+       COUNT(*) FILTER (WHERE is_private = FALSE),
+       COUNT(*) FILTER (WHERE is_private = TRUE)
+FROM user_websites
+"""
+
+ADMIN_USERS_SQL = """
+SELECT id, username, email, is_admin, created_at
+FROM users
+ORDER BY created_at DESC
+"""
+
+ADMIN_WEBSITES_SQL = """
+SELECT uw.id, uw.name, u.username, uw.category, uw.rating, uw.is_private
+FROM user_websites uw
+JOIN users u ON uw.user_id = u.id
+ORDER BY uw.created_at DESC
+"""
+
+ADMIN_LOGS_SQL = """
+SELECT sl.created_at, u.username, sl.action, sl.details, sl.ip_address
+FROM system_logs sl
+LEFT JOIN users u ON sl.user_id = u.id
+ORDER BY sl.created_at DESC
+LIMIT %s
+"""
+
+
+class TTLCache:
+    """带有效期的线程安全缓存，写操作按键前缀失效"""
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        if self.ttl <= 0:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            record_cache_lookup('service', True)
+            return entry[1]
+        record_cache_lookup('service', False)
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, prefix=''):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+def _website(row) -> Dict:
+    return dict(zip(WEBSITE_FIELDS, row[:len(WEBSITE_FIELDS)]))
+
+
+def _validate_website(data) -> str:
+    """检查网站信息，返回错误信息（合法时为空字符串）"""
+    if not data.get('name'):
+        return "请输入网站名称"
+    if not is_valid_url(data.get('url', '')):
+        return "网站地址必须是以 http:// 或 https:// 开头的有效网址"
+    if not data.get('category'):
+        return "请选择或输入网站分类"
+    rating = data.get('rating')
+    if not isinstance(rating, int) or not 1 <= rating <= 5:
+        return "网站评分必须在 1-5 之间"
+    return ""
+
+
+class AuthService:
+    """登录注册和个人信息"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.controller = AuthController(db_manager)
+
+    @property
+    def security_manager(self):
+        return self.controller.security_manager
+
+    def login(self, username, password):
+        """返回 (是否成功, 提示信息, 用户信息)"""
+        return self.controller.login(username, password)
+
+    def register(self, username, password, confirm_password, email=None):
+        """返回 (是否成功, 提示信息)"""
+        return self.controller.register(username, password, confirm_password, email)
+
+    def change_password(self, user_id, old_password, new_password):
+        """验证当前密码后修改，返回 (是否成功, 提示信息)"""
+        valid, message = self.controller.validate_password(new_password)
+        if not valid:
+            return False, message
+
+        rows = self.db_manager.execute_query("SELECT password_hash FROM users WHERE id = %s", (user_id,))
+        if not rows or rows[0][0] != self.controller.hash_password(old_password):
+            return False, "当前密码不正确"
+
+        if self.db_manager.execute_non_query(
+            "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s",
+            (self.controller.hash_password(new_password), datetime.now(), user_id)
+        ):
+            return True, "密码修改成功！"
+        return False, "密码修改失败，请稍后重试"
+
+    def update_profile(self, user_id, username, display_name, email, avatar_path):
+        """修改用户名、显示名称、邮箱和头像，返回 (是否成功, 提示信息)
+
+        头像只能是系统头像或已经保存的按内容哈希命名的头像（原有的旧格式头像可以保持不变）
+        """
+        rows = self.db_manager.execute_query("SELECT username, avatar_path FROM users WHERE id = %s", (user_id,))
+        if not rows:
+            return False, "用户不存在"
+
+        if avatar_path != rows[0][1]:
+            if not is_avatar_name(avatar_path):
+                return False, "无效的头像文件"
+            if CONTENT_NAME_PATTERN.match(avatar_path) and not os.path.exists(os.path.join(AVATAR_DIR, avatar_path)):
+                return False, "头像文件不存在，请重新上传头像"
+
+        if username != rows[0][0]:
+            valid, message = self.controller.validate_username(username)
+            if not valid:
+                return False, message
+            if self.db_manager.execute_query(
+                "SELECT id FROM users WHERE username = %s AND id != %s", (username, user_id)
+            ):
+                return False, "该用户名已被其他用户使用，请选择其他用户名"
+
+        valid, message = self.controller.validate_email(email)
+        if not valid:
+            return False, message
+
+        if self.db_manager.execute_non_query(
+            """
+            UPDATE users SET username = %s, display_name = %s, email = %s, avatar_path = %s, updated_at = %s
+            WHERE id = %s
+            """,
+            (username, display_name, email, avatar_path, datetime.now(), user_id)
+        ):
+            return True, "个人信息保存成功！"
+        return False, "个人信息保存失败，请稍后重试"
+
+    def save_avatar(self, filename, data: bytes):
+        """保存客户端上传的头像（文件名必须与内容哈希一致），返回 (是否成功, 提示信息)"""
+        try:
+            save_avatar_bytes(filename, data)
+        except ValueError as e:
+            return False, str(e)
+        except OSError as e:
+            print(f"❌ 保存头像失败: {e}")
+            return False, "头像保存失败，请稍后重试"
+        return True, "头像上传成功"
+
+    def read_avatar(self, filename) -> Optional[bytes]:
+        """读取头像文件内容，文件名无效或文件不存在时返回 None"""
+        if not is_avatar_name(filename):
+            return None
+        try:
+            with open(os.path.join(AVATAR_DIR, filename), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def upload_avatar(self, user_id, filename):
+        """让服务端可以使用本地处理好的头像；直连数据库时头像已在本地目录中，返回 (是否成功, 提示信息)"""
+        if not is_avatar_name(filename) or not os.path.exists(os.path.join(AVATAR_DIR, filename)):
+            return False, "头像文件不存在"
+        return True, "头像上传成功"
+
+    def fetch_avatar(self, filename) -> bool:
+        """确保头像文件在本地目录中（直连数据库时只检查文件是否存在）"""
+        return bool(filename) and os.path.exists(os.path.join(AVATAR_DIR, os.path.basename(filename)))
+
+
+class UserSiteService:
+    """用户自己的网站：增删改查、访问记录和操作日志（所有操作都限定在该用户的网站内）"""
+
+    def __init__(self, db_manager, cache=None, visit_recorder=None):
+        self.db_manager = db_manager
+        self.cache = cache or TTLCache(0)
+        self.visit_recorder = visit_recorder or VisitEventRecorder(db_manager)
+
+    def clone(self):
+        """后台线程使用的服务（独立的数据库连接，用完后由调用方断开）"""
+        return UserSiteService(self.db_manager.clone(), self.cache)
+
+    def _invalidate(self, user_id=None):
+        self.cache.invalidate(f"sites:{user_id}:" if user_id is not None else "sites:")
+
+    def list_websites(self, user_id) -> Dict:
+        """网站列表和公开/总数（一次查询取回）"""
+        def load():
+            rows = self.db_manager.execute_prepared('user_websites_with_counts', (user_id,))
+            return {
+                'websites': [_website(row) for row in rows],
+                'total': rows[0].total_count if rows else 0,
+                'public': rows[0].public_count if rows else 0,
+            }
+
+        result = self.cache.get_or_load(f"sites:{user_id}:list", load)
+        # 调用方会修改列表，缓存中保留原样
+        return dict(result, websites=[dict(website) for website in result['websites']])
+
+    def search_websites(self, user_id, keyword) -> List[Dict]:
+        """按名称、描述、分类搜索，常用的排在前面"""
+        pattern = f"%{keyword}%"
+        rows = self.db_manager.execute_query(
+            """
+            SELECT w.id, w.name, w.url, w.description, w.category, w.rating, w.is_private, w.created_at
+            FROM user_websites w
+            LEFT JOIN website_stats s ON s.user_id = w.user_id AND s.url_hash = w.url_hash
+            WHERE w.user_id = %s AND (w.name ILIKE %s OR w.description ILIKE %s OR w.category ILIKE %s)
+            ORDER BY s.frecency DESC NULLS LAST, w.created_at DESC
+            """,
+            (user_id, pattern, pattern, pattern)
+        )
+        return [_website(row) for row in rows]
+
+    def get_website(self, user_id, website_id) -> Optional[Dict]:
+        rows = self.db_manager.execute_query(
+            """
+            SELECT id, name, url, description, category, rating, is_private, created_at
+            FROM user_websites WHERE id = %s AND user_id = %s
+            """,
+            (website_id, user_id)
+        )
+        return _website(rows[0]) if rows else None
+
+    def find_duplicate(self, user_id, url, exclude_id=None) -> Optional[str]:
+        """按规范网址哈希查找已添加过的同一网址，返回其名称（走唯一索引）"""
+        rows = self.db_manager.execute_prepared('user_website_by_url_hash', (user_id, url_hash(url)))
+        for row in rows:
+            if row.id != exclude_id:
+                return row.name
+        return None
+
+    def add_website(self, user_id, data):
+        """返回 (是否成功, 提示信息, 新网站)"""
+        message = _validate_website(data)
+        if message:
+            return False, message, None
+
+        duplicate_name = self.find_duplicate(user_id, data['url'])
+        if duplicate_name:
+            return False, f"这个网址已经添加过了: {duplicate_name}", None
+
+        created_at = datetime.now()
+        # 唯一索引防止并发重复添加
+        result = self.db_manager.execute_returning(
+            """
+            INSERT INTO user_websites (user_id, name, url, description, category, rating, is_private, created_at, url_hash)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (user_id, url_hash) DO NOTHING
+            RETURNING id
+            """,
+            (user_id, data['name'], data['url'], data.get('description', ''), data['category'],
+             data['rating'], bool(data.get('is_private')), created_at, url_hash(data['url']))
+        )
+        if not result:
+            return False, "网站添加失败，请稍后重试", None
+
+        self._invalidate(user_id)
+        website = _website((result[0][0], data['name'], data['url'], data.get('description', ''),
+                            data['category'], data['rating'], bool(data.get('is_private')), created_at))
+        return True, "网站添加成功！", website
+
+    def update_website(self, user_id, website_id, data):
+        """返回 (是否成功, 提示信息)"""
+        message = _validate_website(data)
+        if message:
+            return False, message
+
+        duplicate_name = self.find_duplicate(user_id, data['url'], exclude_id=website_id)
+        if duplicate_name:
+            return False, f"已有相同网址的网站: {duplicate_name}"
+
+        rows = self.db_manager.execute_returning(
+            """
+            UPDATE user_websites
+            SET name = %s, url = %s, url_hash = %s, description = %s, category = %s, rating = %s,
+                is_private = %s, updated_at = %s
+            WHERE id = %s AND user_id = %s
+            RETURNING id
+            """,
+            (data['name'], data['url'], url_hash(data['url']), data.get('description', ''), data['category'],
+             data['rating'], bool(data.get('is_private')), datetime.now(), website_id, user_id)
+        )
+        if not rows:
+            return False, "网站信息更新失败，请稍后重试"
+        self._invalidate(user_id)
+        return True, "网站信息更新成功！"
+
+    def delete_website(self, user_id, website_id):
+        """返回 (是否成功, 提示信息)"""
+        rows = self.db_manager.execute_returning(
+            "DELETE FROM user_websites WHERE id = %s AND user_id = %s RETURNING id", (website_id, user_id)
+        )
+        if not rows:
+            return False, "网站删除失败，请稍后重试"
+        self._invalidate(user_id)
+        return True, "网站删除成功！"
+
+    def import_bookmarks(self, user_id, file_path, progress_callback=None, is_cancelled=None,
+                         rating=DEFAULT_RATING, is_private=DEFAULT_PRIVATE) -> ImportResult:
+        """从浏览器导出的书签文件批量导入（导入的网站统一使用 rating 评分和 is_private 可见性）"""
+        try:
+            importer = BookmarkImporter(self.db_manager, user_id, rating=rating, is_private=is_private)
+            result = importer.import_file(
+                file_path, progress_callback=progress_callback, is_cancelled=is_cancelled
+            )
+        except Exception as e:
+            result = ImportResult(errors=[f"导入书签失败: {e}"])
+        self._invalidate(user_id)
+        return result
+
+    def import_bookmark_content(self, user_id, file_name, content,
+                                rating=DEFAULT_RATING, is_private=DEFAULT_PRIVATE) -> ImportResult:
+        """导入上传的书签文件内容（按原文件扩展名识别格式）"""
+        suffix = os.path.splitext(file_name)[1] or '.html'
+        fd, path = tempfile.mkstemp(prefix="bookmarks_", suffix=suffix)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            return self.import_bookmarks(user_id, path, rating=rating, is_private=is_private)
+        finally:
+            os.remove(path)
+
+    def record_visit(self, user_id, website_name, website_url):
+        """记录访问：访问事件攒批写入，访问次数和常用度立即累加"""
+        self.visit_recorder.record(user_id, website_name, website_url)
+        return record_website_stats(self.db_manager, user_id, website_name, website_url)
+
+    def flush_visits(self):
+        """写入缓冲的访问事件"""
+        return self.visit_recorder.flush()
+
+    def log_action(self, user_id, action, details, ip_address=None):
+        """记录系统日志"""
+        return self.db_manager.execute_non_query(
+            """
+            INSERT INTO system_logs (user_id, action, details, ip_address, created_at)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (user_id, action, details, ip_address, datetime.now())
+        )
+
+
+class StatsService:
+    """访问统计（读取汇总表）"""
+
+    def __init__(self, db_manager, cache=None):
+        self.db_manager = db_manager
+        self.cache = cache or TTLCache(0)
+
+    def frecency(self, user_id) -> Dict[str, float]:
+        """用户各网址（按网址哈希）的常用度"""
+        return FrecencyIndex.load(self.db_manager, user_id).scores
+
+    def visit_overview(self, days=7) -> Dict:
+        """总访问量、最近若干天每天的访问量和今天每小时的访问量"""
+        def load():
+            analytics = VisitAnalytics(self.db_manager)
+            return {
+                'total_visits': analytics.total_visits(),
+                'trend': analytics.daily_trend(days),
+                'hourly': analytics.hourly_on(date.today()),
+            }
+        return self.cache.get_or_load(f"stats:visits:{days}", load)
+
+    def popular_sites(self, limit=10) -> List[Dict]:
+        """全站按网址汇总的衰减热度"""
+        return self.cache.get_or_load(
+            f"stats:popular:{limit}",
+            lambda: [site._asdict() for site in PopularityRanking(self.db_manager).top(limit)]
+        )
+
+
+def _records(fields, rows) -> List[Dict]:
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _log_limit(limit) -> int:
+    return max(1, min(int(limit), MAX_LOG_LIMIT))
+
+
+def _active_since() -> datetime:
+    """活跃用户：最近 7 天内登录过"""
+    return datetime.now() - timedelta(days=7)
+
+
+def build_statistics(counts_row, visits, popular) -> Dict:
+    """管理员面板的统计数据（同步和异步两种查询方式返回相同的结构）"""
+    return dict(
+        zip(STATISTICS_FIELDS, counts_row or (0,) * len(STATISTICS_FIELDS)),
+        visits=visits,
+        popular=popular[0]._asdict() if popular else None,
+    )
+
+
+class AdminService:
+    """管理员面板的查询和删除操作"""
+
+    def __init__(self, db_manager, cache=None, stats=None):
+        self.db_manager = db_manager
+        self.cache = cache or TTLCache(0)
+        self.stats = stats or StatsService(db_manager, self.cache)
+
+    def statistics(self) -> Dict:
+        """用户、网站数量，访问趋势和最热门的网站"""
+        def load():
+            rows = self.db_manager.execute_query(ADMIN_COUNTS_SQL, (_active_since(),))
+            return build_statistics(rows[0] if rows else None, self.stats.visit_overview(7),
+                                    PopularityRanking(self.db_manager).top(1))
+        return self.cache.get_or_load("admin:statistics", load)
+
+    def users(self) -> List[Dict]:
+        return _records(ADMIN_USER_FIELDS, self.db_manager.execute_query(ADMIN_USERS_SQL))
+
+    def websites(self) -> List[Dict]:
+        return _records(ADMIN_WEBSITE_FIELDS, self.db_manager.execute_query(ADMIN_WEBSITES_SQL))
+
+    def logs(self, limit=100) -> List[Dict]:
+        return _records(ADMIN_LOG_FIELDS, self.db_manager.execute_query(ADMIN_LOGS_SQL, (_log_limit(limit),)))
+
+    def link_health(self, limit=500) -> Dict:
+        """已保存的链接检测结果（不触发检测）"""
+        monitor = LinkHealthMonitor(self.db_manager)
+        return {
+            'summary': monitor.summary(),
+            'broken': _records(BROKEN_LINK_FIELDS, monitor.broken_links(limit)),
+        }
+
+    def delete_user(self, user_id):
+        if not self.db_manager.execute_non_query("DELETE FROM users WHERE id = %s", (user_id,)):
+            return False
+        self.cache.invalidate("admin:")
+        self.cache.invalidate(f"sites:{user_id}:")
+        return True
+
+    def delete_website(self, website_id):
+        if not self.db_manager.execute_non_query("DELETE FROM user_websites WHERE id = %s", (website_id,)):
+            return False
+        self.cache.invalidate("admin:")
+        self.cache.invalidate("sites:")
+        return True
+
+
+class AsyncAdminService:
+    """管理员面板数据的并发查询（async_db.AsyncDatabaseManager），各查询同时在不同连接上执行"""
+
+    def __init__(self, async_db):
+        self.db = async_db
+
+    async def snapshot(self, log_limit=100, link_limit=500) -> Dict:
+        """面板首次显示需要的全部数据：总耗时约等于最慢的一条查询，而不是所有查询之和"""
+        db = self.db
+        start = trend_start(7)
+        results = await db.gather(
+            counts=db.execute_query(ADMIN_COUNTS_SQL, (_active_since(),)),
+            total_visits=db.execute_query(TOTAL_VISITS_SQL),
+            trend=db.execute_query(DAILY_TREND_SQL, (start,)),
+            hourly=db.execute_query(HOURLY_VISITS_SQL, day_range(date.today())),
+            popular=db.execute_query(TOP_SITES_SQL, (1,)),
+            users=db.execute_query(ADMIN_USERS_SQL),
+            websites=db.execute_query(ADMIN_WEBSITES_SQL),
+            logs=db.execute_query(ADMIN_LOGS_SQL, (_log_limit(log_limit),)),
+            link_summary=db.execute_query(LINK_SUMMARY_SQL, (BROKEN_THRESHOLD, datetime.now())),
+            broken_links=db.execute_query(BROKEN_LINKS_SQL, (BROKEN_THRESHOLD, link_limit)),
+        )
+        visits = {
+            'total_visits': results['total_visits'][0][0] if results['total_visits'] else 0,
+            'trend': fill_daily_trend(results['trend'], start, 7),
+            'hourly': fill_hourly(results['hourly']),
+        }
+        return {
+            'statistics': build_statistics(results['counts'][0] if results['counts'] else None, visits,
+                                           popular_sites_from_rows(results['popular'])),
+            'users': _records(ADMIN_USER_FIELDS, results['users']),
+            'websites': _records(ADMIN_WEBSITE_FIELDS, results['websites']),
+            'logs': _records(ADMIN_LOG_FIELDS, results['logs']),
+            'links': {
+                'summary': link_summary_from_rows(results['link_summary']),
+                'broken': _records(BROKEN_LINK_FIELDS, results['broken_links']),
+            },
+        }
+
+
+class Services:
+    """同一个数据库管理器（单连接或连接池）上的全部服务"""
+
+    remote = False
+
+    def __init__(self, db_manager, cache_ttl=0, visit_batch_size=None):
+        self.db_manager = db_manager
+        self.cache = TTLCache(cache_ttl)
+        recorder = VisitEventRecorder(db_manager, visit_batch_size) if visit_batch_size else None
+        self.auth = AuthService(db_manager)
+        self.stats = StatsService(db_manager, self.cache)
+        self.sites = UserSiteService(db_manager, self.cache, recorder)
+        self.admin = AdminService(db_manager, self.cache, self.stats)
+
+    def close(self):
+        """写入缓冲的访问事件"""
+        self.sites.flush_visits()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+慢查询日志模块
+超过阈值的语句记录归一化 SQL、参数形态、耗时和调用位置（JSON Lines 文件），
+可选地在独立连接上补充执行计划：只读语句使用 EXPLAIN (ANALYZE, BUFFERS)，写语句只取估算计划
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.core.latency import fingerprint
+
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_LOG_PATH = "logs/slow_queries.jsonl"
+MAX_LOG_BYTES = 5 * 1024 * 1024           # 超过后轮换为 .1 文件
+EXPLAIN_INTERVAL = 600                    # 同一指纹两次采集执行计划的最小间隔（秒）
+EXPLAIN_TIMEOUT_MS = 30000
+CALLER_DEPTH = 2
+
+# 调用位置跳过数据库层自身的栈帧（连接池、异步访问层、预备语句和数据服务）
+_INTERNAL_FILES = (
+    'auth_system.py', 'db_pool.py', 'async_db.py', 'query_registry.py', 'services.py',
+    'slow_query.py', 'latency.py', 'contextlib.py',
+)
+
+_READ_ONLY_PATTERN = re.compile(r'^\s*(SELECT|WITH|VALUES|TABLE)\b', re.IGNORECASE)
+_WRITE_PATTERN = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+
+def params_shape(params) -> str:
+    """参数形态：只记录类型和长度，不记录参数值"""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {_value_shape(value)}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(_value_shape(value) for value in params) + ")"
+
+
+def _value_shape(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple, str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def caller_location(depth=CALLER_DEPTH) -> str:
+    """数据库层之外最近的调用位置，如 "UserWebsitesWindow.search_websites (user_websites_window.py:685)" """
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in _INTERNAL_FILES:
+            owner = frame.f_locals.get('self')
+            function = frame.f_code.co_name
+            if owner is not None:
+                function = f"{type(owner).__name__}.{function}"
+            frames.append(f"{function} ({filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return " ← ".join(frames) or "unknown"
+
+
+def is_read_only(query: str) -> bool:
+    """语句是否只读（只读语句才执行 EXPLAIN ANALYZE，避免重复产生写入）"""
+    return bool(_READ_ONLY_PATTERN.match(query)) and not _WRITE_PATTERN.search(query)
+
+
+def to_pyformat(sql: str, params):
+    """把 $1, $2 ... 占位符的语句转换为 psycopg2 的 %s 形式（用于对预备语句采集执行计划）"""
+    ordered = []
+
+    def replace(match):
+        ordered.append(params[int(match.group(1)) - 1])
+        return '%s'
+
+    return re.sub(r'\$(\d+)', replace, sql.replace('%', '%%')), tuple(ordered)
+
+
+class SlowQueryLog:
+    """记录超过阈值的数据库语句"""
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS, log_path=DEFAULT_LOG_PATH, explain=False):
+        self.threshold = threshold_ms / 1000
+        self.log_path = log_path
+        self.explain = explain
+        self._explained_at: Dict[str, float] = {}
+        self._explaining = False
+        self._lock = threading.Lock()
+
+    def check(self, db_manager, query, params, seconds, error=False, name=None):
+        """语句耗时超过阈值时记录；name 为预备语句名称（query 此时为登记的 SQL）"""
+        if seconds < self.threshold:
+            return False
+
+        normalized = fingerprint(query)
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration_ms': round(seconds * 1000, 1),
+            'query': normalized,
+            'params': params_shape(params),
+            'caller': caller_location(),
+        }
+        if name:
+            entry['prepared'] = name
+        if error:
+            entry['error'] = True
+        self.write(entry)
+        print(f"🐢 慢查询 {entry['duration_ms']} ms [{entry['caller']}]: {normalized}")
+
+        if self.explain and not error and self._should_explain(normalized):
+            try:
+                if name:
+                    query, params = to_pyformat(query, params or ())
+                threading.Thread(
+                    target=self._capture_plan, args=(db_manager.clone(), query, params, normalized), daemon=True
+                ).start()
+            except Exception as e:
+                # 采集线程没有启动，由这里清除标记，否则之后不会再采集任何执行计划
+                print(f"⚠️ 采集执行计划失败: {e}")
+                with self._lock:
+                    self._explaining = False
+        return True
+
+    def _should_explain(self, normalized):
+        """同一指纹在间隔内只采集一次，且同时最多一个采集任务"""
+        now = time.monotonic()
+        with self._lock:
+            if self._explaining:
+                return False
+            last = self._explained_at.get(normalized)
+            if last is not None and now - last < EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[normalized] = now
+            self._explaining = True
+            return True
+
+    def _capture_plan(self, db_manager, query, params, normalized):
+        """在独立连接上采集执行计划，完成后回滚，不影响原连接的事务"""
+        analyze = is_read_only(query)
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        try:
+            if not db_manager.connect():
+                return
+            cursor = db_manager.connection.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            cursor.execute(f"EXPLAIN ({options}) {query}", params or None)
+            plan = cursor.fetchone()[0]
+            cursor.close()
+            self.write({
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'query': normalized,
+                'analyze': analyze,
+                'plan': plan,
+            })
+        except Exception as e:
+            print(f"⚠️ 采集执行计划失败: {e}")
+        finally:
+            if db_manager.connection:
+                db_manager.connection.rollback()
+            db_manager.disconnect()
+            with self._lock:
+                self._explaining = False
+
+    def write(self, entry):
+        """追加一条日志（文件过大时先轮换）"""
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                    os.replace(self.log_path, self.log_path + '.1')
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"⚠️ 写入慢查询日志失败: {e}")
+
+
+_active_log: Optional[SlowQueryLog] = None
+
+
+def active_slow_query_log() -> Optional[SlowQueryLog]:
+    """当前启用的慢查询日志，未启用时为 None"""
+    return _active_log
+
+
+def configure_slow_query_log(config) -> Optional[SlowQueryLog]:
+    """按配置文件的 [performance] 节启用慢查询日志（slow_query_ms 为 0 时关闭）
+
+    config 为 configparser.ConfigParser
+    """
+    global _active_log
+    try:
+        threshold_ms = config.getfloat('performance', 'slow_query_ms', fallback=DEFAULT_THRESHOLD_MS)
+        explain = config.getboolean('performance', 'explain_slow_queries', fallback=False)
+    except ValueError as e:
+        print(f"⚠️ 慢查询配置无效，使用默认值: {e}")
+        threshold_ms, explain = DEFAULT_THRESHOLD_MS, False
+    log_path = config.get('performance', 'slow_query_log', fallback=DEFAULT_LOG_PATH)
+
+    _active_log = SlowQueryLog(threshold_ms, log_path, explain) if threshold_ms > 0 else None
+    return _active_log
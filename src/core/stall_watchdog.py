@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+界面卡顿检测模块
+界面线程上的心跳定时器定期打点，监控线程发现心跳超过阈值未更新时，
+用 sys._current_frames 采样界面线程的 Python 调用栈，按调用位置汇总卡顿次数和时长
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QTimer
+
+
+DEFAULT_THRESHOLD_MS = 200
+HEARTBEAT_MS = 50
+DEFAULT_LOG_PATH = "logs/stalls.jsonl"
+SITE_DEPTH = 2                      # 调用位置取最内层的两个项目栈帧
+
+MODULE_FILE = os.path.abspath(__file__)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(MODULE_FILE)))
+
+
+@dataclass
+class StallSite:
+    """同一调用位置的卡顿汇总"""
+    site: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: List[str] = field(default_factory=list)      # 最长一次卡顿时的调用栈
+
+
+def _project_frames(stack) -> List[traceback.FrameSummary]:
+    """调用栈中属于本项目的栈帧（由内向外），不含本模块"""
+    return [
+        frame for frame in reversed(stack)
+        if frame.filename.startswith(PROJECT_ROOT) and frame.filename != MODULE_FILE
+    ]
+
+
+def call_site(stack) -> str:
+    """卡顿的调用位置，如 "execute_query (auth_system.py) ← load_statistics (admin_window.py)" """
+    frames = _project_frames(stack)[:SITE_DEPTH]
+    if not frames:
+        return "Qt 事件循环"
+    return " ← ".join(f"{frame.name} ({os.path.basename(frame.filename)})" for frame in frames)
+
+
+class StallWatchdog:
+    """界面线程卡顿检测器（start 必须在界面线程调用）"""
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS, heartbeat_ms=HEARTBEAT_MS,
+                 log_path=DEFAULT_LOG_PATH, verbose=False):
+        self.threshold = threshold_ms / 1000
+        self.heartbeat = heartbeat_ms / 1000
+        self.log_path = log_path
+        self.verbose = verbose
+        self.sites: Dict[str, StallSite] = {}
+        self.timer = None
+        self._main_ident = None
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._main_ident = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._beat)
+        self.timer.start(int(self.heartbeat * 1000))
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.timer is not None:
+            self.timer.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+
+    def _monitor(self):
+        """轮询心跳；卡顿期间持续采样调用栈，心跳恢复后按出现最多的调用位置记录一次卡顿"""
+        poll_interval = min(self.heartbeat, self.threshold / 4)
+        stalled_since = None            # 卡顿前最后一次心跳的时间
+        samples = Counter()
+        stacks = {}
+
+        while not self._stop.wait(poll_interval):
+            last_beat = self._last_beat
+            if stalled_since is not None and last_beat != stalled_since:
+                self._record(last_beat - stalled_since - self.heartbeat, samples, stacks)
+                stalled_since = None
+
+            if time.monotonic() - last_beat - self.heartbeat < self.threshold:
+                continue
+            if stalled_since is None:
+                stalled_since = last_beat
+                samples, stacks = Counter(), {}
+
+            frame = sys._current_frames().get(self._main_ident)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            site = call_site(stack)
+            samples[site] += 1
+            stacks.setdefault(site, stack)
+
+    def _record(self, seconds, samples, stacks):
+        if not samples:
+            return
+        site = samples.most_common(1)[0][0]
+        duration_ms = seconds * 1000
+        stack = [f"{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+                 for frame in _project_frames(stacks[site])]
+
+        with self._lock:
+            summary = self.sites.get(site)
+            if summary is None:
+                summary = self.sites[site] = StallSite(site)
+            summary.count += 1
+            summary.total_ms += duration_ms
+            if duration_ms > summary.max_ms:
+                summary.max_ms = duration_ms
+                summary.stack = stack
+
+        self._write({
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration_ms': round(duration_ms, 1),
+            'site': site,
+            'stack': stack,
+        })
+        if self.verbose:
+            print(f"🧊 界面卡顿 {duration_ms:.0f} ms: {site}")
+
+    def _write(self, entry):
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ 写入卡顿日志失败: {e}")
+
+    def report(self, limit: Optional[int] = None) -> List[StallSite]:
+        """按累计卡顿时长从高到低返回各调用位置"""
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda site: site.total_ms, reverse=True)
+        return sites[:limit] if limit else sites
+
+    def print_report(self, limit=10):
+        """在控制台输出卡顿汇总"""
+        sites = self.report(limit)
+        if not sites:
+            print("✅ 未检测到界面卡顿")
+            return
+        print(f"🧊 界面卡顿汇总（阈值 {self.threshold * 1000:.0f} ms）:")
+        for site in sites:
+            print(f"   {site.count:>4} 次  累计 {site.total_ms:>8.0f} ms  最长 {site.max_ms:>6.0f} ms  {site.site}")
+
+
+_active_watchdog: Optional[StallWatchdog] = None
+
+
+def active_stall_watchdog() -> Optional[StallWatchdog]:
+    """当前运行的卡顿检测器，未启用时为 None"""
+    return _active_watchdog
+
+
+def start_stall_watchdog(threshold_ms=DEFAULT_THRESHOLD_MS, log_path=DEFAULT_LOG_PATH, verbose=False):
+    """在界面线程启动卡顿检测"""
+    global _active_watchdog
+    if _active_watchdog is None:
+        _active_watchdog = StallWatchdog(threshold_ms, log_path=log_path, verbose=verbose)
+        _active_watchdog.start()
+    return _active_watchdog
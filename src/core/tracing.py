@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+操作追踪模块
+用上下文管理器/装饰器记录耗时区间，导出为 Chrome trace-event JSON（可在 Perfetto 或 about:tracing 打开）；
+未启用时每个区间只多一次布尔判断
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+MAX_EVENTS = 500000                 # 超过后丢弃新的事件，避免长时间追踪占用过多内存
+
+
+class Tracer:
+    """追踪事件收集器"""
+
+    def __init__(self):
+        self.enabled = False
+        self.output_path: Optional[str] = None
+        self.dropped = 0
+        self._events: List[dict] = []
+        self._thread_names: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def start(self, output_path):
+        """开始收集（清空之前的事件）"""
+        self._events = []
+        self._thread_names = {}
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self.output_path = output_path
+        self.enabled = True
+
+    def stop(self):
+        """停止收集并写入文件，返回文件路径；未启用或写入失败时返回 None"""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        return self.save(self.output_path)
+
+    def complete(self, name, category, started, elapsed, args=None):
+        """记录一个已结束的区间（started 为 time.perf_counter() 的值，单位秒）"""
+        if len(self._events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        thread_id = threading.get_ident()
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = threading.current_thread().name
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((started - self._origin) * 1_000_000, 1),
+            'dur': round(elapsed * 1_000_000, 1),
+            'pid': self._pid,
+            'tid': thread_id,
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+
+    def instant(self, name, category, args=None):
+        """记录一个时间点（如信号发出）"""
+        if len(self._events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'i',
+            's': 't',
+            'ts': round((time.perf_counter() - self._origin) * 1_000_000, 1),
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+
+    def save(self, output_path):
+        """写入 Chrome trace-event 格式的 JSON 文件"""
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread_id, 'args': {'name': name}}
+            for thread_id, name in list(self._thread_names.items())
+        ]
+        try:
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': metadata + list(self._events), 'displayTimeUnit': 'ms'},
+                          f, ensure_ascii=False, default=str)
+        except OSError as e:
+            print(f"❌ 写入追踪文件失败: {e}")
+            return None
+        if self.dropped:
+            print(f"⚠️ 追踪事件过多，已丢弃 {self.dropped} 个")
+        return output_path
+
+
+class _Span:
+    """启用追踪时的区间上下文"""
+
+    __slots__ = ('name', 'category', 'args', 'started')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        _tracer.complete(self.name, self.category, self.started, time.perf_counter() - self.started, args)
+        return False
+
+
+class _NullSpan:
+    """未启用追踪时共用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_tracer = Tracer()
+_NULL_SPAN = _NullSpan()
+
+
+def tracer() -> Tracer:
+    """进程内共用的追踪器"""
+    return _tracer
+
+
+def span(name, category='app', **args):
+    """记录代码块耗时的上下文管理器"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args or None)
+
+
+def record_span(name, category, started, elapsed, args=None):
+    """记录已经计时的区间（用于本身已有计时的代码，如数据库调用）"""
+    if _tracer.enabled:
+        _tracer.complete(name, category, started, elapsed, args)
+
+
+def instant(name, category='app', **args):
+    """记录一个时间点"""
+    if _tracer.enabled:
+        _tracer.instant(name, category, args or None)
+
+
+def slot_adapter(func):
+    """返回按 func 的参数个数截断多余位置参数的调用函数
+
+    Qt 信号会把额外参数（如 clicked 的 checked）传给槽函数，
+    装饰器用它保持与未装饰时相同的调用方式
+    """
+    code = func.__code__
+    if code.co_flags & inspect.CO_VARARGS:
+        return func
+    argcount = code.co_argcount
+
+    def call(*args, **kwargs):
+        return func(*args[:argcount], **kwargs)
+    return call
+
+
+def traced(name=None, category='app'):
+    """记录函数耗时的装饰器（名称默认为函数的限定名）"""
+    def decorator(func):
+        call = slot_adapter(func)
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return call(*args, **kwargs)
+            with _Span(span_name, category, None):
+                return call(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网址去重模块
+user_websites 和 website_stats 增加规范网址哈希列 url_hash，
+并建立 (user_id, url_hash) 唯一索引：添加、导入和记录访问时的重复判断都走索引；
+迁移时合并已有的重复数据
+"""
+
+from collections import OrderedDict
+from typing import Dict
+
+from src.core.url_utils import url_hash
+
+
+SCHEMA_STATEMENTS = [
+    "ALTER TABLE user_websites ADD COLUMN IF NOT EXISTS url_hash CHAR(32)",
+    "ALTER TABLE website_stats ADD COLUMN IF NOT EXISTS url_hash CHAR(32)",
+]
+
+INDEX_STATEMENTS = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_user_websites_user_url_hash ON user_websites (user_id, url_hash)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_website_stats_user_url_hash ON website_stats (user_id, url_hash)",
+]
+
+DROP_INDEX_STATEMENTS = [
+    "DROP INDEX IF EXISTS idx_user_websites_user_url_hash",
+    "DROP INDEX IF EXISTS idx_website_stats_user_url_hash",
+]
+
+
+class UrlDeduplicator:
+    """回填 url_hash、合并重复数据并维护唯一索引"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def is_ready(self):
+        """唯一索引是否已经建立"""
+        rows = self.db_manager.execute_query(
+            "SELECT COUNT(*) FROM pg_indexes WHERE indexname IN (%s, %s)",
+            ('idx_user_websites_user_url_hash', 'idx_website_stats_user_url_hash')
+        )
+        return bool(rows) and rows[0][0] == 2
+
+    def ensure(self):
+        """索引不存在时执行迁移（启动时调用，已迁移过则只有一次查询）"""
+        if self.is_ready():
+            return True
+        return self.migrate() is not None
+
+    def migrate(self) -> Dict[str, int]:
+        """回填或修正 url_hash，合并重复行后建立唯一索引，返回处理数量；失败返回 None
+
+        user_websites 中同一用户的重复网址保留最早添加的一条；
+        website_stats 中的重复记录合并访问次数和最后访问时间
+        """
+        if not self.db_manager.execute_transaction(SCHEMA_STATEMENTS):
+            print("❌ 添加 url_hash 列失败")
+            return None
+
+        try:
+            website_changes = self._plan_user_websites()
+            stats_changes = self._plan_website_stats()
+        except Exception as e:
+            print(f"❌ 读取网址数据失败: {e}")
+            return None
+
+        summary = {
+            'websites_rehashed': len(website_changes['rehash']),
+            'websites_removed': len(website_changes['remove']),
+            'stats_rehashed': len(stats_changes['rehash']),
+            'stats_merged': len(stats_changes['remove']),
+        }
+
+        statements = []
+        if any(summary.values()):
+            # 更新过程中哈希可能暂时重复，先删除唯一索引，最后重建
+            statements.extend(DROP_INDEX_STATEMENTS)
+            statements.extend(self._statements('user_websites', website_changes))
+            statements.extend(self._statements('website_stats', stats_changes))
+        statements.extend(INDEX_STATEMENTS)
+
+        if not self.db_manager.execute_transaction(statements):
+            print("❌ 网址去重迁移失败，已回滚")
+            return None
+
+        if summary['websites_removed'] or summary['stats_merged']:
+            print(f"🔁 已合并重复网址 {summary['websites_removed']} 个、重复访问记录 {summary['stats_merged']} 条")
+        return summary
+
+    def _plan_user_websites(self):
+        keepers = {}
+        rehash, remove = [], []
+        rows = self.db_manager.iter_query("SELECT id, user_id, url, url_hash FROM user_websites ORDER BY id")
+        for website_id, user_id, url, current_hash in rows:
+            digest = url_hash(url)
+            key = (user_id, digest)
+            if key in keepers:
+                remove.append(website_id)
+                continue
+            keepers[key] = website_id
+            if current_hash != digest:
+                rehash.append((website_id, digest))
+        return {'rehash': rehash, 'remove': remove, 'merge': []}
+
+    def _plan_website_stats(self):
+        keepers: Dict[tuple, list] = OrderedDict()
+        remove = []
+        rows = self.db_manager.iter_query(
+            "SELECT id, user_id, website_url, url_hash, visit_count, last_visited FROM website_stats ORDER BY id"
+        )
+        for stats_id, user_id, url, current_hash, visit_count, last_visited in rows:
+            digest = url_hash(url)
+            key = (user_id, digest)
+            keeper = keepers.get(key)
+            if keeper is None:
+                keepers[key] = [stats_id, digest, current_hash != digest, visit_count or 0, last_visited, False]
+                continue
+            remove.append(stats_id)
+            keeper[3] += visit_count or 0
+            if last_visited and (keeper[4] is None or last_visited > keeper[4]):
+                keeper[4] = last_visited
+            keeper[5] = True
+
+        rehash = [(keeper[0], keeper[1]) for keeper in keepers.values() if keeper[2] and not keeper[5]]
+        merge = [(keeper[0], keeper[1], keeper[3], keeper[4]) for keeper in keepers.values() if keeper[5]]
+        return {'rehash': rehash, 'remove': remove, 'merge': merge}
+
+    @staticmethod
+    def _statements(table, changes):
+        statements = []
+        if changes['remove']:
+            statements.append((f"DELETE FROM {table} WHERE id = ANY(%s)", (changes['remove'],)))
+        if changes['rehash']:
+            ids, hashes = zip(*changes['rehash'])
+            statements.append((
+                f"""
+                UPDATE {table} AS t SET url_hash = v.url_hash
+                FROM UNNEST(%s::integer[], %s::char(32)[]) AS v (id, url_hash)
+                WHERE t.id = v.id
+                """,
+                (list(ids), list(hashes))
+            ))
+        if changes['merge']:
+            ids, hashes, counts, last_visited = zip(*changes['merge'])
+            statements.append((
+                f"""
+                UPDATE {table} AS t SET url_hash = v.url_hash, visit_count = v.visit_count,
+                    last_visited = v.last_visited
+                FROM UNNEST(%s::integer[], %s::char(32)[], %s::integer[], %s::timestamp[])
+                    AS v (id, url_hash, visit_count, last_visited)
+                WHERE t.id = v.id
+                """,
+                (list(ids), list(hashes), list(counts), list(last_visited))
+            ))
+        return statements
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网址工具模块
+提供网址校验、规范化和规范网址哈希功能
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+MAX_URL_LENGTH = 500
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 不影响页面内容的跟踪参数（utm_ 开头的参数另外按前缀判断）
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid',
+    'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'spm', 'ref_src',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+
+def is_valid_url(url):
+    """检查网址是否为可访问的 http/https 地址"""
+    if not url or len(url) > MAX_URL_LENGTH:
+        return False
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return parts.scheme.lower() in ('http', 'https') and bool(parts.hostname)
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """把网址整理为规范形式，指向同一页面的不同写法得到相同结果
+
+    - 缺少协议时按 http 处理，http 与 https 统一为 https
+    - 主机名转小写（国际化域名转为 punycode），去掉默认端口
+    - 合并路径中重复的斜杠并去掉末尾斜杠
+    - 去掉 utm_* 等跟踪参数，其余参数按名称排序
+    - 去掉 # 之后的片段
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'http://' + url.lstrip('/')
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    original_scheme = parts.scheme.lower()
+    scheme = 'https' if original_scheme == 'http' else original_scheme
+
+    host = (parts.hostname or '').rstrip('.')
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+    if ':' in host:
+        host = f"[{host}]"              # IPv6 地址
+    if port and port != DEFAULT_PORTS.get(original_scheme):
+        host = f"{host}:{port}"
+    userinfo, at, _ = parts.netloc.rpartition('@')
+    netloc = f"{userinfo}@{host}" if at else host
+
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+
+    params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+              if not _is_tracking_param(name)]
+    query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def normalize_url(url):
+    """规范化网址，用于去重比较（与 canonicalize_url 相同）"""
+    return canonicalize_url(url)
+
+
+def url_hash(url):
+    """规范网址的哈希（32 位十六进制），用于 (user_id, url_hash) 唯一索引"""
+    return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()[:32]
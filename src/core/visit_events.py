@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网站访问事件模块
+每次访问追加一条事件（内存中攒批后批量写入），
+同一事务内增量更新按小时、按天汇总的访问量表
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from src.core.frecency import FRECENCY_UPDATE_SQL, visit_weight
+from src.core.url_utils import normalize_url, url_hash
+
+
+DEFAULT_BATCH_SIZE = 50
+FLUSH_INTERVAL_MS = 5000
+MAX_PENDING_EVENTS = 5000           # 数据库长时间不可写时缓冲区的上限，超出后丢弃最早的事件
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS website_visit_events (
+        id BIGSERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        website_name VARCHAR(200) NOT NULL,
+        website_url VARCHAR(500) NOT NULL,
+        url_key VARCHAR(500),
+        visited_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 规范化网址，供全站热度等按网址聚合的统计使用
+    "ALTER TABLE website_visit_events ADD COLUMN IF NOT EXISTS url_key VARCHAR(500)",
+    "CREATE INDEX IF NOT EXISTS idx_visit_events_visited_at ON website_visit_events (visited_at)",
+    """
+    CREATE TABLE IF NOT EXISTS website_visits_hourly (
+        bucket TIMESTAMP PRIMARY KEY,
+        visits INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS website_visits_daily (
+        day DATE PRIMARY KEY,
+        visits INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+# 旧版本只有 website_stats，首次建表时按最后访问日期粗略回填日汇总
+SEED_DAILY_SQL = """
+INSERT INTO website_visits_daily (day, visits)
+SELECT last_visited::date, SUM(visit_count)
+FROM website_stats
+WHERE last_visited IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM website_visits_daily)
+GROUP BY last_visited::date
+"""
+
+# 事件写入和两级汇总在同一条语句（同一事务）中完成
+INSERT_EVENTS_SQL = """
+WITH inserted AS (
+    INSERT INTO website_visit_events (user_id, website_name, website_url, url_key, visited_at)
+    VALUES %s
+    RETURNING visited_at
+), hourly AS (
+    INSERT INTO website_visits_hourly (bucket, visits)
+    SELECT date_trunc('hour', visited_at), COUNT(*) FROM inserted GROUP BY 1
+    ON CONFLICT (bucket) DO UPDATE SET visits = website_visits_hourly.visits + EXCLUDED.visits
+)
+INSERT INTO website_visits_daily (day, visits)
+SELECT visited_at::date, COUNT(*) FROM inserted GROUP BY 1
+ON CONFLICT (day) DO UPDATE SET visits = website_visits_daily.visits + EXCLUDED.visits
+"""
+
+
+# 同一用户的同一规范网址只有一条访问记录，按 (user_id, url_hash) 唯一索引累加访问次数和常用度
+UPSERT_STATS_SQL = f"""
+INSERT INTO website_stats (website_name, website_url, url_hash, user_id, visit_count, last_visited, frecency)
+VALUES (%s, %s, %s, %s, 1, %s, %s)
+ON CONFLICT (user_id, url_hash) DO UPDATE SET
+    website_name = EXCLUDED.website_name,
+    website_url = EXCLUDED.website_url,
+    visit_count = website_stats.visit_count + 1,
+    last_visited = EXCLUDED.last_visited,
+    frecency = COALESCE({FRECENCY_UPDATE_SQL}, EXCLUDED.frecency)
+"""
+
+
+TOTAL_VISITS_SQL = "SELECT COALESCE(SUM(visits), 0) FROM website_visits_daily"
+DAILY_TREND_SQL = "SELECT day, visits FROM website_visits_daily WHERE day >= %s ORDER BY day"
+HOURLY_VISITS_SQL = "SELECT bucket, visits FROM website_visits_hourly WHERE bucket >= %s AND bucket < %s"
+
+
+def trend_start(days: int) -> date:
+    """最近若干天（含今天）的第一天"""
+    return date.today() - timedelta(days=days - 1)
+
+
+def day_range(day: date) -> Tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def fill_daily_trend(rows, start: date, days: int) -> List[Tuple[date, int]]:
+    """把按天汇总的查询结果补全为连续日期，没有访问的日期补 0"""
+    counts: Dict[date, int] = {day: visits for day, visits in rows}
+    return [(start + timedelta(days=offset), counts.get(start + timedelta(days=offset), 0))
+            for offset in range(days)]
+
+
+def fill_hourly(rows) -> List[Tuple[int, int]]:
+    """把按小时汇总的查询结果补全为 0-23 点"""
+    counts = {bucket.hour: visits for bucket, visits in rows}
+    return [(hour, counts.get(hour, 0)) for hour in range(24)]
+
+
+class VisitSchema:
+    """访问事件表和汇总表的创建"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def is_ready(self):
+        """事件表和两张汇总表是否都已存在"""
+        rows = self.db_manager.execute_query(
+            """
+            SELECT COUNT(*) FROM information_schema.tables
+            WHERE table_name IN ('website_visit_events', 'website_visits_hourly', 'website_visits_daily')
+            """
+        )
+        return bool(rows) and rows[0][0] == 3
+
+    def ensure(self):
+        """表不存在时创建（启动时调用，已创建过则只有一次查询）"""
+        if self.is_ready():
+            return True
+        return self.create()
+
+    def create(self):
+        """创建事件表和汇总表，首次建表时按 website_stats 回填日汇总（可重复执行）"""
+        return self.db_manager.execute_transaction(SCHEMA_STATEMENTS + [SEED_DAILY_SQL])
+
+
+def record_website_stats(db_manager, user_id, website_name, website_url, visited_at=None):
+    """累加用户对某个网址的访问次数和常用度"""
+    visited_at = visited_at or datetime.now()
+    return db_manager.execute_non_query(UPSERT_STATS_SQL, (
+        website_name, website_url, url_hash(website_url), user_id, visited_at, visit_weight(visited_at)
+    ))
+
+
+class VisitEventRecorder:
+    """访问事件记录器：缓冲访问事件并批量写入"""
+
+    def __init__(self, db_manager, batch_size=DEFAULT_BATCH_SIZE, max_pending=MAX_PENDING_EVENTS):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def record(self, user_id, website_name, website_url, visited_at=None):
+        """记录一次访问，缓冲区满时立即写入"""
+        with self._lock:
+            self._pending.append((
+                user_id, website_name, website_url, normalize_url(website_url), visited_at or datetime.now()
+            ))
+            should_flush = len(self._pending) >= self.batch_size
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的事件写入数据库，失败时保留在缓冲区等待下次重试（最多保留 max_pending 条）"""
+        with self._lock:
+            events, self._pending = self._pending, []
+
+        if not events:
+            return True
+
+        if self.db_manager.execute_batches(INSERT_EVENTS_SQL, [events], page_size=len(events)):
+            return True
+
+        with self._lock:
+            self._pending = events + self._pending
+            dropped = len(self._pending) - self.max_pending
+            if dropped > 0:
+                del self._pending[:dropped]
+            pending = len(self._pending)
+        if dropped > 0:
+            print(f"⚠️ 写入访问事件失败，丢弃最早的 {dropped} 条事件，{pending} 条等待重试")
+        else:
+            print(f"⚠️ 写入访问事件失败，{pending} 条事件等待重试")
+        return False
+
+
+class VisitAnalytics:
+    """基于汇总表的访问统计查询"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def total_visits(self):
+        rows = self.db_manager.execute_query(TOTAL_VISITS_SQL)
+        return rows[0][0] if rows else 0
+
+    def visits_on(self, day: date):
+        rows = self.db_manager.execute_query(
+            "SELECT visits FROM website_visits_daily WHERE day = %s", (day,)
+        )
+        return rows[0][0] if rows else 0
+
+    def daily_trend(self, days=7) -> List[Tuple[date, int]]:
+        """最近若干天（含今天）每天的访问量，没有访问的日期补 0"""
+        start = trend_start(days)
+        rows = self.db_manager.execute_query(DAILY_TREND_SQL, (start,))
+        return fill_daily_trend(rows, start, days)
+
+    def hourly_on(self, day: date) -> List[Tuple[int, int]]:
+        """指定日期每小时的访问量（0-23 点）"""
+        rows = self.db_manager.execute_query(HOURLY_VISITS_SQL, day_range(day))
+        return fill_hourly(rows)
@@ -6,6 +6,8 @@
 管理推荐网站的数据
 """
 
+from src.core.tracing import traced
+
 # 推荐网站数据
 RECOMMENDED_WEBSITES = {
     "学习教育": [
@@ -164,10 +166,12 @@ def get_all_categories():
     """获取所有分类"""
     return list(RECOMMENDED_WEBSITES.keys())
 
+@traced(category='catalog')
 def get_websites_by_category(category):
     """根据分类获取网站"""
     return RECOMMENDED_WEBSITES.get(category, [])
 
+@traced(category='catalog')
 def get_all_websites():
     """获取所有网站"""
     all_websites = []
@@ -178,6 +182,7 @@ def get_all_websites():
             all_websites.append(website_copy)
     return all_websites
 
+@traced(category='catalog')
 def search_websites(keyword):
     """搜索网站"""
     results = []
@@ -194,6 +199,7 @@ def search_websites(keyword):
     
     return results
 
+@traced(category='catalog')
 def get_top_rated_websites(limit=10):
     """获取评分最高的网站"""
     all_websites = get_all_websites()
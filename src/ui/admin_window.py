@@ -8,25 +8,143 @@
 
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QTableWidget, QTableWidgetItem, QTabWidget, QGroupBox,
     QLineEdit, QTextEdit, QComboBox, QMessageBox, QHeaderView,
-    QScrollArea, QFrame, QFormLayout, QSpinBox, QCheckBox
+    QScrollArea, QFrame, QFormLayout, QSpinBox, QCheckBox, QFileDialog,
+    QInputDialog, QProgressDialog
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread
 from PyQt6.QtGui import QFont, QPixmap, QIcon
 
+from src.core.async_db import PSYCOPG_AVAILABLE, AsyncDatabaseManager
+from src.core.data_export import DataExporter, ExportResult, EXPORT_FORMATS
+from src.core.latency import KIND_ACTION, KIND_QUERY, default_tracker, timed_action
+from src.core.backup_manager import BackupManager, BackupResult, RestoreResult
+from src.core.log_partitions import LogPartitionManager
+from src.core.services import AsyncAdminService, Services
+from src.core.avatar_store import collect_orphan_avatars
+from src.core.link_checker import LinkHealthMonitor, LinkCheckResult
+from src.core.tracing import record_span
+from src.ui.async_tasks import AsyncTask, submit
+
+
+class DataExportWorker(QThread):
+    """后台数据导出线程，使用独立的数据库连接"""
+    
+    progress = pyqtSignal(int, str, int)     # 进度百分比, 当前表, 当前表已导出行数
+    finished_export = pyqtSignal(object)     # ExportResult
+    
+    def __init__(self, db_manager, output_dir, file_format, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self._cancelled = False
+    
+    def cancel(self):
+        """请求取消导出"""
+        self._cancelled = True
+    
+    def run(self):
+        exporter = DataExporter(self.db_manager, self.output_dir, self.file_format)
+        try:
+            result = exporter.export(
+                progress_callback=self.progress.emit,
+                is_cancelled=lambda: self._cancelled
+            )
+        except Exception as e:
+            result = ExportResult(errors=[f"导出数据失败: {e}"])
+        finally:
+            self.db_manager.disconnect()
+        
+        self.finished_export.emit(result)
+
+
+class BackupWorker(QThread):
+    """后台备份/恢复线程，使用独立的数据库连接"""
+    
+    progress = pyqtSignal(int, str)          # 进度百分比, 当前处理的数据表
+    finished_task = pyqtSignal(object)       # BackupResult / RestoreResult
+    
+    def __init__(self, db_manager, mode, backup_id=None, full=False, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.mode = mode
+        self.backup_id = backup_id
+        self.full = full
+    
+    def run(self):
+        manager = BackupManager(self.db_manager)
+        try:
+            if self.mode == 'restore':
+                result = manager.restore(self.backup_id, progress_callback=self.progress.emit)
+            else:
+                result = manager.backup(full=self.full, progress_callback=self.progress.emit)
+        except Exception as e:
+            result_type = RestoreResult if self.mode == 'restore' else BackupResult
+            result = result_type(errors=[f"操作失败: {e}"])
+        finally:
+            self.db_manager.disconnect()
+        
+        self.finished_task.emit(result)
+
+
+class LinkCheckWorker(QThread):
+    """后台链接检测线程，使用独立的数据库连接"""
+    
+    progress = pyqtSignal(int, int)          # 已检测数, 本次计划检测数
+    finished_check = pyqtSignal(object)      # LinkCheckResult
+    
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self._cancelled = False
+    
+    def cancel(self):
+        """请求取消检测（已完成的批次会保留）"""
+        self._cancelled = True
+    
+    def run(self):
+        monitor = LinkHealthMonitor(self.db_manager)
+        try:
+            if monitor.setup():
+                result = monitor.run(
+                    progress_callback=self.progress.emit,
+                    is_cancelled=lambda: self._cancelled
+                )
+            else:
+                result = LinkCheckResult(errors=["创建链接检测表失败"])
+        except Exception as e:
+            result = LinkCheckResult(errors=[f"链接检测失败: {e}"])
+        finally:
+            self.db_manager.disconnect()
+        
+        self.finished_check.emit(result)
+
+
 class AdminWindow(QWidget):
     """管理员主窗口"""
     
-    def __init__(self, user_info, db_manager):
+    def __init__(self, user_info, db_manager=None, services=None):
         super().__init__()
         self.user_info = user_info
-        self.db_manager = db_manager
+        self.db_manager = db_manager        # 备份、导出、链接检测等维护工具直接使用数据库，瘦客户端模式下为 None
+        self.services = services or Services(db_manager)
+        self.async_db = self.create_async_db(db_manager)
+        self.snapshot_task = None
         self.init_ui()
-        self.load_statistics()
+        if self.async_db is None:
+            self.load_statistics()
+    
+    def create_async_db(self, db_manager):
+        """直连 PostgreSQL 且安装了 psycopg 时，首次显示的各项查询并发执行"""
+        if not PSYCOPG_AVAILABLE or getattr(db_manager, 'host', None) is None:
+            return None
+        return AsyncDatabaseManager.from_manager(db_manager)
     
     def init_ui(self):
         """初始化界面"""
@@ -57,6 +175,10 @@ class AdminWindow(QWidget):
         website_management_tab = self.create_website_management_tab()
         tab_widget.addTab(website_management_tab, "🌐 网站管理")
         
+        # 链接检测选项卡
+        link_health_tab = self.create_link_health_tab()
+        tab_widget.addTab(link_health_tab, "🔗 链接检测")
+        
         # 系统日志选项卡
         logs_tab = self.create_logs_tab()
         tab_widget.addTab(logs_tab, "📋 系统日志")
@@ -229,6 +351,37 @@ class AdminWindow(QWidget):
         
         layout.addLayout(stats_layout)
         
+        # 访问趋势（来自按天/按小时汇总表）
+        trend_group = QGroupBox("📈 近7天访问趋势")
+        trend_layout = QVBoxLayout()
+        
+        self.visit_trend_label = QLabel("加载中...")
+        self.visit_trend_label.setFont(QFont("Consolas", 10))
+        self.peak_hour_label = QLabel("今日高峰时段: 加载中...")
+        
+        trend_layout.addWidget(self.visit_trend_label)
+        trend_layout.addWidget(self.peak_hour_label)
+        trend_group.setLayout(trend_layout)
+        layout.addWidget(trend_group)
+        
+        # 查询耗时（本次运行按语句指纹汇总）
+        latency_group = QGroupBox("⏱️ 查询耗时（按累计耗时排序，毫秒）")
+        latency_layout = QVBoxLayout()
+        
+        self.latency_summary_label = QLabel("加载中...")
+        self.latency_table = QTableWidget()
+        self.latency_table.setColumnCount(7)
+        self.latency_table.setHorizontalHeaderLabels(["查询", "次数", "错误", "p50", "p95", "p99", "最大"])
+        self.latency_table.verticalHeader().setVisible(False)
+        self.latency_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.latency_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.latency_table.setMaximumHeight(200)
+        
+        latency_layout.addWidget(self.latency_summary_label)
+        latency_layout.addWidget(self.latency_table)
+        latency_group.setLayout(latency_layout)
+        layout.addWidget(latency_group)
+        
         # 快速操作区域
         actions_group = QGroupBox("⚡ 快速操作")
         actions_layout = QHBoxLayout()
@@ -240,13 +393,28 @@ class AdminWindow(QWidget):
         backup_btn.clicked.connect(self.backup_data)
         backup_btn.setStyleSheet("background-color: #2196F3;")
         
+        restore_btn = QPushButton("♻️ 数据恢复")
+        restore_btn.clicked.connect(self.restore_data)
+        restore_btn.setStyleSheet("background-color: #9C27B0;")
+        
+        export_btn = QPushButton("📤 导出数据")
+        export_btn.clicked.connect(self.export_data)
+        export_btn.setStyleSheet("background-color: #4CAF50;")
+        
         cleanup_btn = QPushButton("🧹 清理日志")
         cleanup_btn.clicked.connect(self.cleanup_logs)
         cleanup_btn.setStyleSheet("background-color: #FF9800;")
         
+        avatar_cleanup_btn = QPushButton("🖼️ 清理头像")
+        avatar_cleanup_btn.clicked.connect(self.cleanup_avatars)
+        avatar_cleanup_btn.setStyleSheet("background-color: #795548;")
+        
         actions_layout.addWidget(refresh_btn)
         actions_layout.addWidget(backup_btn)
+        actions_layout.addWidget(restore_btn)
+        actions_layout.addWidget(export_btn)
         actions_layout.addWidget(cleanup_btn)
+        actions_layout.addWidget(avatar_cleanup_btn)
         actions_layout.addStretch()
         
         actions_group.setLayout(actions_layout)
@@ -349,6 +517,48 @@ class AdminWindow(QWidget):
         widget.setLayout(layout)
         return widget
     
+    def create_link_health_tab(self):
+        """创建链接检测选项卡"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        # 工具栏
+        toolbar_layout = QHBoxLayout()
+        
+        self.link_summary_label = QLabel("")
+        
+        refresh_links_btn = QPushButton("🔄 刷新")
+        refresh_links_btn.clicked.connect(self.load_broken_links)
+        
+        check_links_btn = QPushButton("🔍 检测链接")
+        check_links_btn.setToolTip("检测从未检测过或已到复查时间的链接")
+        check_links_btn.clicked.connect(self.check_links)
+        
+        toolbar_layout.addWidget(QLabel("🔗 失效链接"))
+        toolbar_layout.addWidget(self.link_summary_label)
+        toolbar_layout.addStretch()
+        toolbar_layout.addWidget(refresh_links_btn)
+        toolbar_layout.addWidget(check_links_btn)
+        
+        layout.addLayout(toolbar_layout)
+        
+        # 失效链接表格
+        self.links_table = QTableWidget()
+        self.links_table.setColumnCount(7)
+        self.links_table.setHorizontalHeaderLabels([
+            "网址", "来源", "状态", "错误", "连续失败", "最后检测", "最后正常"
+        ])
+        
+        header = self.links_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.links_table.verticalHeader().setVisible(False)
+        
+        layout.addWidget(self.links_table)
+        
+        widget.setLayout(layout)
+        return widget
+    
     def create_logs_tab(self):
         """创建系统日志选项卡"""
         widget = QWidget()
@@ -392,228 +602,312 @@ class AdminWindow(QWidget):
         widget.setLayout(layout)
         return widget
     
+    @timed_action('admin.load_statistics')
     def load_statistics(self):
         """加载统计数据"""
         try:
-            # 用户统计
-            total_users_query = "SELECT COUNT(*) FROM users"
-            total_users = self.db_manager.execute_query(total_users_query)
-            self.total_users_label.setText(f"总用户数: {total_users[0][0] if total_users else 0}")
-            
-            # 活跃用户（最近7天登录）
-            active_users_query = """
-            SELECT COUNT(*) FROM users 
-            WHERE last_login >= %s
-            """
-            week_ago = datetime.now() - timedelta(days=7)
-            active_users = self.db_manager.execute_query(active_users_query, (week_ago,))
-            self.active_users_label.setText(f"活跃用户: {active_users[0][0] if active_users else 0}")
-            
-            # 管理员数量
-            admin_users_query = "SELECT COUNT(*) FROM users WHERE is_admin = TRUE"
-            admin_users = self.db_manager.execute_query(admin_users_query)
-            self.admin_users_label.setText(f"管理员数: {admin_users[0][0] if admin_users else 0}")
-            
-            # 网站统计
-            total_websites_query = "SELECT COUNT(*) FROM user_websites"
-            total_websites = self.db_manager.execute_query(total_websites_query)
-            self.total_websites_label.setText(f"用户网站: {total_websites[0][0] if total_websites else 0}")
-            
-            public_websites_query = "SELECT COUNT(*) FROM user_websites WHERE is_private = FALSE"
-            public_websites = self.db_manager.execute_query(public_websites_query)
-            self.public_websites_label.setText(f"公开网站: {public_websites[0][0] if public_websites else 0}")
-            
-            private_websites_query = "SELECT COUNT(*) FROM user_websites WHERE is_private = TRUE"
-            private_websites = self.db_manager.execute_query(private_websites_query)
-            self.private_websites_label.setText(f"私有网站: {private_websites[0][0] if private_websites else 0}")
-            
-            # 访问统计
-            total_visits_query = "SELECT SUM(visit_count) FROM website_stats"
-            total_visits = self.db_manager.execute_query(total_visits_query)
-            total_count = total_visits[0][0] if total_visits and total_visits[0][0] else 0
-            self.total_visits_label.setText(f"总访问量: {total_count}")
-            
-            # 今日访问
-            today_visits_query = """
-            SELECT COUNT(*) FROM website_stats 
-            WHERE DATE(last_visited) = CURRENT_DATE
-            """
-            today_visits = self.db_manager.execute_query(today_visits_query)
-            self.today_visits_label.setText(f"今日访问: {today_visits[0][0] if today_visits else 0}")
-            
-            # 热门网站
-            popular_query = """
-            SELECT website_name FROM website_stats 
-            ORDER BY visit_count DESC LIMIT 1
-            """
-            popular = self.db_manager.execute_query(popular_query)
-            popular_name = popular[0][0] if popular else "暂无数据"
-            self.popular_website_label.setText(f"热门网站: {popular_name}")
-            
+            self.populate_statistics(self.services.admin.statistics())
         except Exception as e:
             print(f"❌ 加载统计数据失败: {e}")
             QMessageBox.warning(self, "错误", f"加载统计数据失败: {str(e)}")
     
+    def populate_statistics(self, stats):
+        """显示统计数据"""
+        # 用户统计（活跃用户为最近7天登录）
+        self.total_users_label.setText(f"总用户数: {stats['total_users']}")
+        self.active_users_label.setText(f"活跃用户: {stats['active_users']}")
+        self.admin_users_label.setText(f"管理员数: {stats['admin_users']}")
+        
+        # 网站统计
+        self.total_websites_label.setText(f"用户网站: {stats['total_websites']}")
+        self.public_websites_label.setText(f"公开网站: {stats['public_websites']}")
+        self.private_websites_label.setText(f"私有网站: {stats['private_websites']}")
+        
+        # 访问统计（读取汇总表，不扫描访问明细）
+        visits = stats['visits']
+        self.total_visits_label.setText(f"总访问量: {visits['total_visits']}")
+        
+        trend = visits['trend']
+        today_count = trend[-1][1] if trend else 0
+        self.today_visits_label.setText(f"今日访问: {today_count}")
+        self.update_visit_trend(trend, visits['hourly'])
+        
+        # 热门网站（全站按网址汇总的衰减热度）
+        site = stats['popular']
+        if site:
+            self.popular_website_label.setText(
+                f"热门网站: {site['website_name']}（{site['total_visits']} 次 / {site['unique_users']} 人）"
+            )
+        else:
+            self.popular_website_label.setText("热门网站: 暂无数据")
+        
+        self.update_latency_table()
+    
+    def update_latency_table(self, limit=10):
+        """显示累计耗时最高的查询及其 p50/p95/p99"""
+        tracker = default_tracker()
+        summary = tracker.summary(KIND_QUERY)
+        self.latency_summary_label.setText(
+            f"共 {summary['count']} 次查询，平均 {summary['mean_ms']:.1f} ms，"
+            f"p95 {summary['p95_ms']:.1f} ms，错误 {summary['errors']} 次"
+        )
+        
+        stats = tracker.snapshot(KIND_QUERY, limit=limit)
+        self.latency_table.setRowCount(len(stats))
+        for row, item in enumerate(stats):
+            query_item = QTableWidgetItem(item.name)
+            query_item.setToolTip(item.name)
+            self.latency_table.setItem(row, 0, query_item)
+            values = [str(item.count), str(item.errors)] + [
+                f"{value:.1f}" for value in (item.p50_ms, item.p95_ms, item.p99_ms, item.max_ms)
+            ]
+            for column, text in enumerate(values, 1):
+                cell = QTableWidgetItem(text)
+                cell.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.latency_table.setItem(row, column, cell)
+    
+    def update_visit_trend(self, trend, hourly):
+        """以文本柱状图显示访问趋势"""
+        max_visits = max((visits for _, visits in trend), default=0)
+        lines = []
+        for day, visits in trend:
+            bar_length = round(visits * 30 / max_visits) if max_visits else 0
+            lines.append(f"{day.strftime('%m-%d')}  {'█' * bar_length:<30}  {visits}")
+        self.visit_trend_label.setText("\n".join(lines) if lines else "暂无数据")
+        
+        peak_hour, peak_visits = max(hourly, key=lambda item: item[1], default=(0, 0))
+        if peak_visits:
+            self.peak_hour_label.setText(f"今日高峰时段: {peak_hour:02d}:00-{peak_hour + 1:02d}:00（{peak_visits} 次访问）")
+        else:
+            self.peak_hour_label.setText("今日高峰时段: 暂无访问")
+    
+    @timed_action('admin.load_users')
     def load_users(self):
         """加载用户列表"""
         try:
-            query = """
-            SELECT id, username, email, is_admin, created_at 
-            FROM users 
-            ORDER BY created_at DESC
-            """
-            users = self.db_manager.execute_query(query)
-            
-            self.users_table.setRowCount(len(users))
-            
-            for row, user in enumerate(users):
-                user_id, username, email, is_admin, created_at = user
-                
-                self.users_table.setItem(row, 0, QTableWidgetItem(str(user_id)))
-                self.users_table.setItem(row, 1, QTableWidgetItem(username))
-                self.users_table.setItem(row, 2, QTableWidgetItem(email or "未设置"))
-                
-                user_type = "👑 管理员" if is_admin else "👤 普通用户"
-                self.users_table.setItem(row, 3, QTableWidgetItem(user_type))
-                
-                created_time = str(created_at).split('.')[0] if created_at else "未知"
-                self.users_table.setItem(row, 4, QTableWidgetItem(created_time))
-                
-                # 操作按钮
-                action_widget = QWidget()
-                action_layout = QHBoxLayout()
-                action_layout.setContentsMargins(8, 5, 8, 5)
-                action_layout.setSpacing(5)
-                
-                edit_btn = QPushButton("✏️ 编辑")
-                edit_btn.setFixedSize(60, 35)
-                edit_btn.clicked.connect(lambda checked, uid=user_id: self.edit_user(uid))
-                edit_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #4CAF50;
-                        border: none;
-                        border-radius: 5px;
-                        color: white;
-                        font-size: 12px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #45a049;
-                    }
-                """)
-                
-                delete_btn = QPushButton("🗑️ 删除")
-                delete_btn.setFixedSize(60, 35)
-                delete_btn.clicked.connect(lambda checked, uid=user_id: self.delete_user(uid))
-                delete_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #f44336;
-                        border: none;
-                        border-radius: 5px;
-                        color: white;
-                        font-size: 12px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #da190b;
-                    }
-                """)
-                
-                action_layout.addWidget(edit_btn)
-                action_layout.addWidget(delete_btn)
-                action_widget.setLayout(action_layout)
-                
-                self.users_table.setCellWidget(row, 5, action_widget)
-                
+            self.populate_users(self.services.admin.users())
         except Exception as e:
             print(f"❌ 加载用户列表失败: {e}")
             QMessageBox.warning(self, "错误", f"加载用户列表失败: {str(e)}")
     
+    def populate_users(self, users):
+        """显示用户列表"""
+        self.users_table.setRowCount(len(users))
+        
+        for row, user in enumerate(users):
+            user_id, username, email, is_admin, created_at = (
+                user['id'], user['username'], user['email'], user['is_admin'], user['created_at']
+            )
+        
+            self.users_table.setItem(row, 0, QTableWidgetItem(str(user_id)))
+            self.users_table.setItem(row, 1, QTableWidgetItem(username))
+            self.users_table.setItem(row, 2, QTableWidgetItem(email or "未设置"))
+        
+            user_type = "👑 管理员" if is_admin else "👤 普通用户"
+            self.users_table.setItem(row, 3, QTableWidgetItem(user_type))
+        
+            created_time = str(created_at).split('.')[0] if created_at else "未知"
+            self.users_table.setItem(row, 4, QTableWidgetItem(created_time))
+        
+            # 操作按钮
+            action_widget = QWidget()
+            action_layout = QHBoxLayout()
+            action_layout.setContentsMargins(8, 5, 8, 5)
+            action_layout.setSpacing(5)
+        
+            edit_btn = QPushButton("✏️ 编辑")
+            edit_btn.setFixedSize(60, 35)
+            edit_btn.clicked.connect(lambda checked, uid=user_id: self.edit_user(uid))
+            edit_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #4CAF50;
+                    border: none;
+                    border-radius: 5px;
+                    color: white;
+                    font-size: 12px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #45a049;
+                }
+            """)
+        
+            delete_btn = QPushButton("🗑️ 删除")
+            delete_btn.setFixedSize(60, 35)
+            delete_btn.clicked.connect(lambda checked, uid=user_id: self.delete_user(uid))
+            delete_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #f44336;
+                    border: none;
+                    border-radius: 5px;
+                    color: white;
+                    font-size: 12px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #da190b;
+                }
+            """)
+        
+            action_layout.addWidget(edit_btn)
+            action_layout.addWidget(delete_btn)
+            action_widget.setLayout(action_layout)
+        
+            self.users_table.setCellWidget(row, 5, action_widget)
+    
+    @timed_action('admin.load_websites')
     def load_websites(self):
         """加载网站列表"""
         try:
-            query = """
-            SELECT uw.id, uw.name, u.username, uw.category, uw.rating, uw.is_private
-            FROM user_websites uw
-            JOIN users u ON uw.user_id = u.id
-            ORDER BY uw.created_at DESC
-            """
-            websites = self.db_manager.execute_query(query)
-            
-            self.websites_table.setRowCount(len(websites))
-            
-            for row, website in enumerate(websites):
-                website_id, name, username, category, rating, is_private = website
-                
-                self.websites_table.setItem(row, 0, QTableWidgetItem(str(website_id)))
-                self.websites_table.setItem(row, 1, QTableWidgetItem(name))
-                self.websites_table.setItem(row, 2, QTableWidgetItem(username))
-                self.websites_table.setItem(row, 3, QTableWidgetItem(category))
-                self.websites_table.setItem(row, 4, QTableWidgetItem("⭐" * rating))
-                
-                privacy_text = "🔒 私有" if is_private else "🌐 公开"
-                self.websites_table.setItem(row, 5, QTableWidgetItem(privacy_text))
-                
-                # 操作按钮
-                action_widget = QWidget()
-                action_layout = QHBoxLayout()
-                action_layout.setContentsMargins(8, 5, 8, 5)
-                action_layout.setSpacing(5)
-                
-                delete_btn = QPushButton("🗑️ 删除")
-                delete_btn.setFixedSize(80, 35)
-                delete_btn.clicked.connect(lambda checked, wid=website_id: self.delete_website(wid))
-                delete_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #f44336;
-                        border: none;
-                        border-radius: 5px;
-                        color: white;
-                        font-size: 12px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #da190b;
-                    }
-                """)
-                
-                action_layout.addWidget(delete_btn)
-                action_widget.setLayout(action_layout)
-                
-                self.websites_table.setCellWidget(row, 6, action_widget)
-                
+            self.populate_websites(self.services.admin.websites())
         except Exception as e:
             print(f"❌ 加载网站列表失败: {e}")
             QMessageBox.warning(self, "错误", f"加载网站列表失败: {str(e)}")
     
+    def populate_websites(self, websites):
+        """显示网站列表"""
+        self.websites_table.setRowCount(len(websites))
+        
+        for row, website in enumerate(websites):
+            website_id, name, username, category, rating, is_private = (
+                website['id'], website['name'], website['username'], website['category'],
+                website['rating'], website['is_private']
+            )
+        
+            self.websites_table.setItem(row, 0, QTableWidgetItem(str(website_id)))
+            self.websites_table.setItem(row, 1, QTableWidgetItem(name))
+            self.websites_table.setItem(row, 2, QTableWidgetItem(username))
+            self.websites_table.setItem(row, 3, QTableWidgetItem(category))
+            self.websites_table.setItem(row, 4, QTableWidgetItem("⭐" * rating))
+        
+            privacy_text = "🔒 私有" if is_private else "🌐 公开"
+            self.websites_table.setItem(row, 5, QTableWidgetItem(privacy_text))
+        
+            # 操作按钮
+            action_widget = QWidget()
+            action_layout = QHBoxLayout()
+            action_layout.setContentsMargins(8, 5, 8, 5)
+            action_layout.setSpacing(5)
+        
+            delete_btn = QPushButton("🗑️ 删除")
+            delete_btn.setFixedSize(80, 35)
+            delete_btn.clicked.connect(lambda checked, wid=website_id: self.delete_website(wid))
+            delete_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #f44336;
+                    border: none;
+                    border-radius: 5px;
+                    color: white;
+                    font-size: 12px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #da190b;
+                }
+            """)
+        
+            action_layout.addWidget(delete_btn)
+            action_widget.setLayout(action_layout)
+        
+            self.websites_table.setCellWidget(row, 6, action_widget)
+    
+    @timed_action('admin.load_broken_links')
+    def load_broken_links(self):
+        """加载已保存的链接检测结果（不重新检测）"""
+        self.populate_broken_links(self.services.admin.link_health())
+    
+    def populate_broken_links(self, health):
+        """显示链接检测结果"""
+        summary = health['summary']
+        self.link_summary_label.setText(
+            f"共 {summary['total']} 个链接，已检测 {summary['checked']}，"
+            f"失效 {summary['broken']}，待检测 {summary['due']}"
+        )
+        
+        links = health['broken']
+        self.links_table.setRowCount(len(links))
+        for row, link in enumerate(links):
+            url, source, status_code, error = link['url'], link['source'], link['status_code'], link['error']
+            failures, last_checked, last_ok = link['consecutive_failures'], link['last_checked'], link['last_ok']
+            
+            self.links_table.setItem(row, 0, QTableWidgetItem(url))
+            self.links_table.setItem(row, 1, QTableWidgetItem("推荐网站" if source == 'catalog' else "用户网站"))
+            self.links_table.setItem(row, 2, QTableWidgetItem(str(status_code) if status_code else "-"))
+            self.links_table.setItem(row, 3, QTableWidgetItem(error or ""))
+            self.links_table.setItem(row, 4, QTableWidgetItem(str(failures)))
+            self.links_table.setItem(row, 5, QTableWidgetItem(str(last_checked).split('.')[0] if last_checked else "-"))
+            self.links_table.setItem(row, 6, QTableWidgetItem(str(last_ok).split('.')[0] if last_ok else "从未"))
+    
+    def check_links(self):
+        """在后台增量检测链接"""
+        if not self.require_database():
+            return
+        if getattr(self, 'link_worker', None) and self.link_worker.isRunning():
+            QMessageBox.information(self, "提示", "链接检测正在进行中，请稍候")
+            return
+        
+        self.link_progress = QProgressDialog("正在检测链接...", "取消", 0, 100, self)
+        self.link_progress.setWindowTitle("🔍 检测链接")
+        self.link_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.link_progress.setMinimumDuration(0)
+        self.link_progress.setValue(0)
+        
+        self.link_worker = LinkCheckWorker(self.db_manager.clone(), self)
+        self.link_worker.progress.connect(self.on_link_check_progress)
+        self.link_worker.finished_check.connect(self.on_link_check_finished)
+        self.link_progress.canceled.connect(self.link_worker.cancel)
+        self.link_worker.start()
+    
+    def on_link_check_progress(self, checked, total):
+        """更新链接检测进度"""
+        if self.link_progress.wasCanceled() or not total:
+            return
+        self.link_progress.setValue(int(checked * 100 / total))
+        self.link_progress.setLabelText(f"正在检测链接... {checked}/{total}")
+    
+    def on_link_check_finished(self, result):
+        """链接检测完成"""
+        self.link_progress.reset()
+        self.load_broken_links()
+        
+        if result.errors:
+            QMessageBox.critical(self, "失败", "\n".join(result.errors))
+            return
+        
+        title = "检测已取消" if result.cancelled else "检测完成"
+        QMessageBox.information(
+            self, title,
+            f"本次检测 {result.checked} 个链接\n"
+            f"✅ 正常: {result.healthy}\n"
+            f"❌ 异常: {result.broken}\n"
+            f"⏳ 被限流延后: {result.deferred}"
+        )
+    
+    @timed_action('admin.load_logs')
     def load_logs(self):
         """加载系统日志"""
         try:
-            query = """
-            SELECT sl.created_at, u.username, sl.action, sl.details, sl.ip_address
-            FROM system_logs sl
-            LEFT JOIN users u ON sl.user_id = u.id
-            ORDER BY sl.created_at DESC
-            LIMIT 100
-            """
-            logs = self.db_manager.execute_query(query)
-            
-            self.logs_table.setRowCount(len(logs))
-            
-            for row, log in enumerate(logs):
-                created_at, username, action, details, ip_address = log
-                
-                log_time = str(created_at).split('.')[0] if created_at else "未知"
-                self.logs_table.setItem(row, 0, QTableWidgetItem(log_time))
-                self.logs_table.setItem(row, 1, QTableWidgetItem(username or "系统"))
-                self.logs_table.setItem(row, 2, QTableWidgetItem(action))
-                self.logs_table.setItem(row, 3, QTableWidgetItem(details or ""))
-                self.logs_table.setItem(row, 4, QTableWidgetItem(ip_address or ""))
-                
+            self.populate_logs(self.services.admin.logs(100))
         except Exception as e:
             print(f"❌ 加载系统日志失败: {e}")
             QMessageBox.warning(self, "错误", f"加载系统日志失败: {str(e)}")
     
+    def populate_logs(self, logs):
+        """显示系统日志"""
+        self.logs_table.setRowCount(len(logs))
+        
+        for row, log in enumerate(logs):
+            created_at, username, action, details, ip_address = (
+                log['created_at'], log['username'], log['action'], log['details'], log['ip_address']
+            )
+        
+            log_time = str(created_at).split('.')[0] if created_at else "未知"
+            self.logs_table.setItem(row, 0, QTableWidgetItem(log_time))
+            self.logs_table.setItem(row, 1, QTableWidgetItem(username or "系统"))
+            self.logs_table.setItem(row, 2, QTableWidgetItem(action))
+            self.logs_table.setItem(row, 3, QTableWidgetItem(details or ""))
+            self.logs_table.setItem(row, 4, QTableWidgetItem(ip_address or ""))
+    
     def add_user(self):
         """添加用户"""
         QMessageBox.information(self, "功能开发中", "添加用户功能正在开发中...")
@@ -633,8 +927,7 @@ class AdminWindow(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                delete_query = "DELETE FROM users WHERE id = %s"
-                if self.db_manager.execute_non_query(delete_query, (user_id,)):
+                if self.services.admin.delete_user(user_id):
                     QMessageBox.information(self, "成功", "用户删除成功！")
                     self.load_users()
                     self.load_statistics()
@@ -654,8 +947,7 @@ class AdminWindow(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                delete_query = "DELETE FROM user_websites WHERE id = %s"
-                if self.db_manager.execute_non_query(delete_query, (website_id,)):
+                if self.services.admin.delete_website(website_id):
                     QMessageBox.information(self, "成功", "网站删除成功！")
                     self.load_websites()
                     self.load_statistics()
@@ -665,14 +957,165 @@ class AdminWindow(QWidget):
                 QMessageBox.critical(self, "错误", f"删除网站失败: {str(e)}")
     
     def backup_data(self):
-        """数据备份"""
-        QMessageBox.information(self, "功能开发中", "数据备份功能正在开发中...")
+        """数据备份（已有备份时只备份变化的数据）"""
+        if not self.require_database():
+            return
+        backups = BackupManager(self.db_manager).list_backups()
+        full = False
+        if backups:
+            reply = QMessageBox.question(
+                self, "数据备份",
+                f"已有 {len(backups)} 个备份，最近一次: {backups[-1]['backup_id']}\n"
+                "是否只备份之后变化的数据？\n选择“否”将进行全量备份。",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.Cancel:
+                return
+            full = reply == QMessageBox.StandardButton.No
+        
+        self.start_backup_task('backup', full=full)
+    
+    def restore_data(self):
+        """从备份恢复数据"""
+        if not self.require_database():
+            return
+        backups = BackupManager(self.db_manager).list_backups()
+        if not backups:
+            QMessageBox.information(self, "提示", "还没有任何备份")
+            return
+        
+        labels = [
+            f"{backup['backup_id']} ({'全量' if backup['full'] else '增量'})"
+            for backup in reversed(backups)
+        ]
+        label, ok = QInputDialog.getItem(self, "数据恢复", "请选择要恢复到的备份:", labels, 0, False)
+        if not ok:
+            return
+        backup_id = label.split(' ')[0]
+        
+        reply = QMessageBox.question(
+            self, "确认恢复",
+            f"确定要将数据库恢复到备份 {backup_id} 吗？\n备份之后新增和修改的数据将被覆盖！",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.start_backup_task('restore', backup_id=backup_id)
+    
+    def start_backup_task(self, mode, backup_id=None, full=False):
+        """在后台线程中执行备份或恢复"""
+        if getattr(self, 'backup_worker', None) and self.backup_worker.isRunning():
+            QMessageBox.information(self, "提示", "备份或恢复正在进行中，请稍候")
+            return
+        
+        title = "♻️ 数据恢复" if mode == 'restore' else "💾 数据备份"
+        self.backup_progress = QProgressDialog(f"{title}...", None, 0, 100, self)
+        self.backup_progress.setWindowTitle(title)
+        self.backup_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.backup_progress.setMinimumDuration(0)
+        self.backup_progress.setValue(0)
+        
+        self.backup_worker = BackupWorker(self.db_manager.clone(), mode, backup_id, full, self)
+        self.backup_worker.progress.connect(self.on_backup_progress)
+        self.backup_worker.finished_task.connect(self.on_backup_finished)
+        self.backup_worker.start()
+    
+    def on_backup_progress(self, percent, table):
+        """更新备份/恢复进度"""
+        self.backup_progress.setValue(percent)
+        if table:
+            self.backup_progress.setLabelText(f"正在处理 {table}...")
+    
+    def on_backup_finished(self, result):
+        """备份/恢复完成"""
+        self.backup_progress.reset()
+        
+        if not result.success:
+            QMessageBox.critical(self, "失败", "\n".join(result.errors))
+            return
+        
+        details = "\n".join(f"{table}: {rows} 行" for table, rows in result.rows.items())
+        if isinstance(result, RestoreResult):
+            QMessageBox.information(
+                self, "恢复完成",
+                f"已恢复到备份 {result.backup_id}\n使用备份: {' → '.join(result.chain)}\n\n{details}"
+            )
+            self.load_statistics()
+            self.load_users()
+            self.load_websites()
+            self.load_logs()
+        else:
+            kind = "全量" if result.full else "增量"
+            QMessageBox.information(
+                self, "备份完成",
+                f"{kind}备份完成: {result.backup_id}\n\n{details}\n\n保存位置: {result.path}"
+            )
+    
+    def export_data(self):
+        """导出用户、网站、访问统计和日志数据"""
+        if not self.require_database():
+            return
+        if getattr(self, 'export_worker', None) and self.export_worker.isRunning():
+            QMessageBox.information(self, "提示", "数据正在导出中，请稍候")
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "选择导出目录", os.getcwd())
+        if not output_dir:
+            return
+        
+        format_names = list(EXPORT_FORMATS.values())
+        format_name, ok = QInputDialog.getItem(self, "导出格式", "请选择导出格式:", format_names, 0, False)
+        if not ok:
+            return
+        file_format = list(EXPORT_FORMATS)[format_names.index(format_name)]
+        
+        self.export_progress = QProgressDialog("正在导出数据...", "取消", 0, 100, self)
+        self.export_progress.setWindowTitle("📤 导出数据")
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setValue(0)
+        
+        # 导出在后台线程中进行，使用独立连接避免阻塞界面
+        self.export_worker = DataExportWorker(self.db_manager.clone(), output_dir, file_format, self)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished_export.connect(self.on_export_finished)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.start()
+    
+    def on_export_progress(self, percent, table, rows):
+        """更新导出进度"""
+        if self.export_progress.wasCanceled():
+            return
+        self.export_progress.setValue(percent)
+        if table:
+            self.export_progress.setLabelText(f"正在导出 {table}... 已导出 {rows} 行")
+    
+    def on_export_finished(self, result):
+        """导出完成"""
+        self.export_progress.reset()
+        
+        if result.cancelled:
+            QMessageBox.information(self, "已取消", "数据导出已取消")
+            return
+        
+        if not result.success:
+            QMessageBox.critical(self, "失败", "\n".join(result.errors))
+            return
+        
+        details = "\n".join(f"{table}: {rows} 行" for table, rows in result.rows.items())
+        QMessageBox.information(
+            self, "导出完成",
+            f"共导出 {result.total_rows} 行数据\n{details}\n\n保存位置: {result.output_dir}"
+        )
     
     def cleanup_logs(self):
         """清理日志"""
+        if not self.require_database():
+            return
         reply = QMessageBox.question(
             self, "确认清理", 
-            "确定要清理30天前的系统日志吗？",
+            "确定要清理30天前的系统日志吗？\n日志按月分区，整月早于30天前的分区会被删除。",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
@@ -680,17 +1123,54 @@ class AdminWindow(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 cleanup_date = datetime.now() - timedelta(days=30)
-                cleanup_query = "DELETE FROM system_logs WHERE created_at < %s"
-                if self.db_manager.execute_non_query(cleanup_query, (cleanup_date,)):
-                    QMessageBox.information(self, "成功", "日志清理完成！")
+                partition_manager = LogPartitionManager(self.db_manager)
+                if partition_manager.table_kind() != 'p':
+                    # 尚未迁移为分区表：逐行删除
+                    deleted = partition_manager.delete_rows_before(cleanup_date)
+                    if deleted is None:
+                        QMessageBox.critical(self, "失败", "清理日志失败")
+                    else:
+                        QMessageBox.information(
+                            self, "成功",
+                            f"日志清理完成！已删除 {deleted} 条日志\n"
+                            "system_logs 仍是普通表，运行 scripts/init_database_enhanced.py 迁移为分区表后可整月清理"
+                        )
                     self.load_logs()
+                    return
+                
+                removed = partition_manager.drop_partitions_before(cleanup_date)
+                partition_manager.ensure_partitions()
+                
+                if removed:
+                    QMessageBox.information(self, "成功", f"日志清理完成！\n已删除分区: {', '.join(removed)}")
                 else:
-                    QMessageBox.critical(self, "失败", "日志清理失败")
+                    QMessageBox.information(self, "成功", "没有需要清理的整月日志")
+                self.load_logs()
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"清理日志失败: {str(e)}")
     
+    def cleanup_avatars(self):
+        """清理不再被任何用户使用的头像文件"""
+        if not self.require_database():
+            return
+        reply = QMessageBox.question(
+            self, "确认清理",
+            "确定要删除没有被任何用户使用的头像文件和缩略图吗？\n最近一小时内上传的头像会保留。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                removed = collect_orphan_avatars(self.db_manager)
+                QMessageBox.information(self, "成功", f"头像清理完成！共删除 {len(removed)} 个文件")
+            except Exception as e:
+                QMessageBox.critical(self, "错误", f"清理头像失败: {str(e)}")
+    
     def clear_logs(self):
         """清空所有日志"""
+        if not self.require_database():
+            return
         reply = QMessageBox.question(
             self, "确认清空", 
             "确定要清空所有系统日志吗？\n此操作不可恢复！",
@@ -700,8 +1180,7 @@ class AdminWindow(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                clear_query = "DELETE FROM system_logs"
-                if self.db_manager.execute_non_query(clear_query):
+                if LogPartitionManager(self.db_manager).truncate():
                     QMessageBox.information(self, "成功", "所有日志已清空！")
                     self.load_logs()
                 else:
@@ -709,13 +1188,81 @@ class AdminWindow(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"清空日志失败: {str(e)}")
     
+    def require_database(self):
+        """维护工具需要直接连接数据库，瘦客户端模式下提示在服务器端执行"""
+        if self.db_manager is not None:
+            return True
+        QMessageBox.information(
+            self, "提示",
+            "当前连接的是 API 服务器，备份、导出、链接检测和日志清理请在服务器所在机器上使用桌面端或命令行工具"
+        )
+        return False
+    
     def showEvent(self, event):
         """窗口显示事件"""
         super().showEvent(event)
+        if self.async_db is not None:
+            self.load_snapshot()
+            return
         # 加载数据
         self.load_users()
         self.load_websites()
+        self.load_broken_links()
         self.load_logs()
+    
+    def load_snapshot(self):
+        """并发查询统计、用户、网站、链接和日志，全部返回后一次性填充（耗时约为最慢的一条查询）"""
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+        
+        self.snapshot_started = time.perf_counter()
+        self.snapshot_task = AsyncTask(AsyncAdminService(self.async_db).snapshot(), self)
+        self.snapshot_task.finished.connect(self.on_snapshot_loaded)
+        self.snapshot_task.failed.connect(self.on_snapshot_failed)
+        self.snapshot_task.start()
+    
+    def record_snapshot_timing(self, error=False):
+        elapsed = time.perf_counter() - self.snapshot_started
+        default_tracker().record(KIND_ACTION, 'admin.load_snapshot', elapsed, error)
+        record_span('admin.load_snapshot', 'ui', self.snapshot_started, elapsed)
+    
+    def on_snapshot_loaded(self, snapshot):
+        """并发查询完成"""
+        if self.sender() is not self.snapshot_task:
+            return
+        
+        try:
+            self.populate_statistics(snapshot['statistics'])
+            self.populate_users(snapshot['users'])
+            self.populate_websites(snapshot['websites'])
+            self.populate_broken_links(snapshot['links'])
+            self.populate_logs(snapshot['logs'])
+            self.record_snapshot_timing()
+        except Exception as e:
+            print(f"❌ 显示管理数据失败: {e}")
+            QMessageBox.warning(self, "错误", f"显示管理数据失败: {str(e)}")
+    
+    def on_snapshot_failed(self, message):
+        """并发查询失败时改为逐项同步加载"""
+        if self.sender() is not self.snapshot_task:
+            return
+        
+        self.record_snapshot_timing(error=True)
+        print(f"⚠️ 并发加载管理数据失败，改为逐项加载: {message}")
+        self.load_statistics()
+        self.load_users()
+        self.load_websites()
+        self.load_broken_links()
+        self.load_logs()
+    
+    def closeEvent(self, event):
+        """关闭窗口时取消未完成的查询并关闭异步连接池"""
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+        if self.async_db is not None:
+            submit(self.async_db.close())
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
@@ -737,6 +1284,15 @@ if __name__ == "__main__":
         
         def execute_non_query(self, query, params=None):
             return True
+        
+        def iter_query(self, query, params=None, itersize=2000):
+            return iter([])
+        
+        def clone(self):
+            return self
+        
+        def disconnect(self):
+            pass
     
     window = AdminWindow(test_admin, MockDBManager())
     window.show()
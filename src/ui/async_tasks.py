@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步任务模块
+界面线程之外运行一个共用的 asyncio 事件循环，协程在其中执行，
+结果通过 Qt 信号排队回到界面线程（用法与 QThread 后台线程相同：连接信号后 start）
+"""
+
+import asyncio
+import sys
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _new_event_loop():
+    """创建事件循环：Windows 默认的 ProactorEventLoop 不能用于 psycopg 3 的异步连接，改用 SelectorEventLoop"""
+    if sys.platform == 'win32':
+        return asyncio.SelectorEventLoop()
+    return asyncio.new_event_loop()
+
+
+def event_loop():
+    """进程内共用的事件循环（首次使用时在后台线程中启动）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = _new_event_loop()
+            threading.Thread(target=loop.run_forever, name="asyncio-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def submit(coroutine):
+    """把协程交给事件循环执行，返回 concurrent.futures.Future（不需要结果时可直接忽略）"""
+    return asyncio.run_coroutine_threadsafe(coroutine, event_loop())
+
+
+class AsyncTask(QObject):
+    """在事件循环中执行一个协程，完成后在界面线程发出信号"""
+
+    finished = pyqtSignal(object)            # 协程的返回值
+    failed = pyqtSignal(str)                 # 错误信息
+
+    def __init__(self, coroutine, parent=None):
+        super().__init__(parent)
+        self.coroutine = coroutine
+        self.future = None
+
+    def start(self):
+        self.future = submit(self.coroutine)
+        self.future.add_done_callback(self._on_done)
+
+    def cancel(self):
+        """取消任务：正在执行的查询会被中止，不再发出信号"""
+        if self.future is None:
+            self.coroutine.close()
+        else:
+            self.future.cancel()
+
+    def isRunning(self):
+        return self.future is not None and not self.future.done()
+
+    def _on_done(self, future):
+        # 在事件循环线程中调用，信号跨线程排队到界面线程
+        if future.cancelled():
+            return
+        try:
+            error = future.exception()
+            if error is not None:
+                self.failed.emit(str(error))
+            else:
+                self.finished.emit(future.result())
+        except RuntimeError:
+            # 窗口已关闭，对象已被销毁
+            pass
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+旧版登录界面
+现在启动使用 modern_login_window，保留该窗口供旧的启动方式使用
+"""
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
+    QPushButton, QCheckBox, QMessageBox, QTabWidget, QFormLayout
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+
+from src.core.auth_system import AuthController
+
+
+class LoginWindow(QWidget):
+    """登录窗口"""
+    
+    def __init__(self, db_manager, config):
+        super().__init__()
+        self.db_manager = db_manager
+        self.config = config
+        self.auth_controller = AuthController(db_manager)
+        self.init_ui()
+    
+    def init_ui(self):
+        """初始化界面"""
+        self.setWindowTitle("🎨 网站推荐系统 - 用户登录")
+        # 设置响应式布局，支持最小和最大尺寸
+        self.setMinimumSize(800, 500)
+        self.setMaximumSize(1200, 800)
+        self.resize(1000, 650)
+        self.center_window()
+        
+        # 主布局 - 水平分割，支持响应式
+        main_layout = QHBoxLayout()
+        main_layout.setSpacing(0)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        
+        # 左侧欢迎区域 - 使用比例而非固定宽度
+        welcome_widget = self.create_welcome_section()
+        welcome_widget.setMinimumWidth(350)
+        welcome_widget.setMaximumWidth(500)
+        
+        # 右侧表单区域 - 使用比例而非固定宽度
+        form_widget = self.create_form_section()
+        form_widget.setMinimumWidth(450)
+        form_widget.setMaximumWidth(700)
+        
+        # 添加到布局，设置拉伸比例
+        main_layout.addWidget(welcome_widget, 2)  # 左侧占2份
+        main_layout.addWidget(form_widget, 3)     # 右侧占3份
+        
+        self.setLayout(main_layout)
+        
+        # 现代化样式
+        self.setStyleSheet("""
+            QWidget {
+                font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif;
+            }
+            
+            #welcome_section {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #4facfe, stop:0.5 #00f2fe, stop:1 #43e97b);
+                border-top-left-radius: 20px;
+                border-bottom-left-radius: 20px;
+            }
+            
+            #form_section {
+                background-color: white;
+                border-top-right-radius: 20px;
+                border-bottom-right-radius: 20px;
+            }
+            
+            #welcome_title {
+                color: white;
+                font-size: 36px;
+                font-weight: bold;
+                margin-bottom: 20px;
+            }
+            
+            #welcome_subtitle {
+                color: rgba(255, 255, 255, 0.9);
+                font-size: 18px;
+                line-height: 1.6;
+            }
+            
+            #form_title {
+                color: #333;
+                font-size: 28px;
+                font-weight: bold;
+                margin-bottom: 40px;
+            }
+            
+            QLineEdit {
+                padding: 1.2em 1em;
+                border: 2px solid #e1e5e9;
+                border-radius: 0.6em;
+                font-size: 1em;
+                background-color: white;
+                color: #333;
+                margin-bottom: 1.2em;
+                min-height: 1.5em;
+            }
+            
+            QLineEdit:focus {
+                border-color: #4facfe;
+                outline: none;
+            }
+            
+            QLineEdit::placeholder {
+                color: #999;
+            }
+            
+            QPushButton {
+                padding: 1.2em 1.5em;
+                border: none;
+                border-radius: 0.6em;
+                font-size: 1.1em;
+                font-weight: bold;
+                color: white;
+                background-color: #333;
+                margin-top: 1em;
+                min-height: 1.8em;
+            }
+            
+            QPushButton:hover {
+                background-color: #555;
+            }
+            
+            QPushButton:pressed {
+                background-color: #222;
+            }
+            
+            QTabWidget::pane {
+                border: none;
+                background: transparent;
+            }
+            
+            QTabBar::tab {
+                background: transparent;
+                color: #666;
+                padding: 15px 25px;
+                margin-right: 15px;
+                border: none;
+                font-size: 18px;
+                font-weight: bold;
+            }
+            
+            QTabBar::tab:selected {
+                color: #333;
+                border-bottom: 3px solid #4facfe;
+            }
+            
+            QTabBar::tab:hover {
+                color: #4facfe;
+            }
+            
+            QLabel {
+                color: #333;
+                font-size: 16px;
+                margin-bottom: 8px;
+                font-weight: bold;
+            }
+            
+            #close_btn {
+                background: transparent;
+                color: #666;
+                font-size: 24px;
+                padding: 8px;
+                border: none;
+                border-radius: 20px;
+                width: 40px;
+                height: 40px;
+            }
+            
+            #close_btn:hover {
+                background-color: rgba(0, 0, 0, 0.1);
+                color: #333;
+            }
+            
+            #status_label {
+                color: rgba(255, 255, 255, 0.8);
+                font-size: 14px;
+                margin-top: 20px;
+            }
+        """)
+    
+    def create_welcome_section(self):
+        """创建左侧欢迎区域"""
+        welcome_widget = QWidget()
+        welcome_widget.setObjectName("welcome_section")
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(60, 100, 60, 100)
+        layout.setSpacing(40)
+        
+        # 欢迎标题
+        title_label = QLabel("网站推荐系统")
+        title_label.setObjectName("welcome_title")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        
+        # 欢迎副标题
+        subtitle_label = QLabel("发现精彩网站\n开启数字世界之旅")
+        subtitle_label.setObjectName("welcome_subtitle")
+        subtitle_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        subtitle_label.setWordWrap(True)
+        
+        # 数据库状态指示
+        db_connected = self.db_manager.connection is not None
+        db_status = "✅ 数据库已连接" if db_connected else "⚠️ 数据库未连接"
+        status_label = QLabel(db_status)
+        status_label.setObjectName("status_label")
+        status_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        
+        layout.addWidget(title_label)
+        layout.addWidget(subtitle_label)
+        layout.addStretch()
+        layout.addWidget(status_label)
+        
+        welcome_widget.setLayout(layout)
+        return welcome_widget
+    
+    def create_form_section(self):
+        """创建右侧表单区域"""
+        form_widget = QWidget()
+        form_widget.setObjectName("form_section")
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(60, 60, 60, 60)
+        layout.setSpacing(30)
+        
+        # 顶部关闭按钮
+        top_layout = QHBoxLayout()
+        top_layout.addStretch()
+        close_btn = QPushButton("×")
+        close_btn.setObjectName("close_btn")
+        close_btn.clicked.connect(self.close)
+        top_layout.addWidget(close_btn)
+        
+        # 功能选项卡
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setTabPosition(QTabWidget.TabPosition.North)
+        
+        # 登录选项卡
+        login_tab = self.create_login_tab()
+        self.tab_widget.addTab(login_tab, "登录")
+        
+        # 注册选项卡
+        register_tab = self.create_register_tab()
+        self.tab_widget.addTab(register_tab, "注册")
+        
+        layout.addLayout(top_layout)
+        layout.addWidget(self.tab_widget)
+        layout.addStretch()
+        
+        form_widget.setLayout(layout)
+        return form_widget
+    
+    def create_login_tab(self):
+        """创建登录选项卡"""
+        login_widget = QWidget()
+        layout = QVBoxLayout()
+        layout.setSpacing(25)
+        layout.setContentsMargins(0, 30, 0, 30)
+        
+        # 用户名输入
+        username_label = QLabel("账号：")
+        self.username_input = QLineEdit()
+        self.username_input.setPlaceholderText("请输入用户名")
+        
+        # 密码输入
+        password_label = QLabel("密码：")
+        self.password_input = QLineEdit()
+        self.password_input.setPlaceholderText("请输入密码")
+        self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
+        
+        # 登录按钮
+        login_button = QPushButton("登录")
+        login_button.clicked.connect(self.handle_login)
+        
+        # 回车键登录
+        self.username_input.returnPressed.connect(self.handle_login)
+        self.password_input.returnPressed.connect(self.handle_login)
+        
+        # 添加到布局
+        layout.addWidget(username_label)
+        layout.addWidget(self.username_input)
+        layout.addWidget(password_label)
+        layout.addWidget(self.password_input)
+        layout.addWidget(login_button)
+        layout.addStretch()
+        
+        login_widget.setLayout(layout)
+        return login_widget
+    
+    def create_register_tab(self):
+        """创建注册选项卡"""
+        register_widget = QWidget()
+        layout = QVBoxLayout()
+        layout.setSpacing(20)
+        layout.setContentsMargins(0, 30, 0, 30)
+        
+        # 用户名输入
+        username_label = QLabel("账号：")
+        self.reg_username_input = QLineEdit()
+        self.reg_username_input.setPlaceholderText("3-50个字符，支持中文、字母、数字、下划线")
+        
+        # 邮箱输入
+        email_label = QLabel("邮箱：")
+        self.reg_email_input = QLineEdit()
+        self.reg_email_input.setPlaceholderText("请输入邮箱地址（可选）")
+        
+        # 密码输入
+        password_label = QLabel("密码：")
+        self.reg_password_input = QLineEdit()
+        self.reg_password_input.setPlaceholderText("至少6位字符")
+        self.reg_password_input.setEchoMode(QLineEdit.EchoMode.Password)
+        
+        # 确认密码输入
+        confirm_password_label = QLabel("确认密码：")
+        self.reg_confirm_password_input = QLineEdit()
+        self.reg_confirm_password_input.setPlaceholderText("请再次输入密码")
+        self.reg_confirm_password_input.setEchoMode(QLineEdit.EchoMode.Password)
+        
+        # 注册按钮
+        register_button = QPushButton("注册")
+        register_button.clicked.connect(self.handle_register)
+        
+        # 添加到布局
+        layout.addWidget(username_label)
+        layout.addWidget(self.reg_username_input)
+        layout.addWidget(email_label)
+        layout.addWidget(self.reg_email_input)
+        layout.addWidget(password_label)
+        layout.addWidget(self.reg_password_input)
+        layout.addWidget(confirm_password_label)
+        layout.addWidget(self.reg_confirm_password_input)
+        layout.addWidget(register_button)
+        layout.addStretch()
+        
+        register_widget.setLayout(layout)
+        return register_widget
+    
+    def center_window(self):
+        """窗口居中显示"""
+        screen = self.screen().availableGeometry()
+        size = self.geometry()
+        self.move(
+            (screen.width() - size.width()) // 2,
+            (screen.height() - size.height()) // 2
+        )
+    
+    def handle_login(self):
+        """处理登录"""
+        username = self.username_input.text().strip()
+        password = self.password_input.text()
+        
+        if not username or not password:
+            self.show_message("输入错误", "请输入用户名和密码", QMessageBox.Icon.Warning)
+            return
+        
+        # 执行登录
+        success, message, user = self.auth_controller.login(username, password)
+        
+        if success:
+            print(f"🎉 用户 {user['username']} 登录成功！")
+            print(f"📧 邮箱: {user.get('email', '未设置')}")
+            print(f"📅 注册时间: {user['created_at']}")
+            
+            # 隐藏登录窗口
+            self.hide()
+            
+            # 打开主窗口
+            self.open_main_window(user)
+        else:
+            self.show_message("登录失败", message, QMessageBox.Icon.Critical)
+    
+    def open_main_window(self, user_info):
+        """打开主窗口"""
+        try:
+            from src.ui.main_window import MainWindow
+            
+            self.main_window = MainWindow(user_info)
+            # 检查是否有logout_requested信号
+            if hasattr(self.main_window, 'logout_requested'):
+                self.main_window.logout_requested.connect(self.handle_logout_from_main)
+            self.main_window.show()
+            
+            print("🏠 主窗口已打开")
+            
+        except ImportError as e:
+            print(f"❌ 导入主窗口失败: {e}")
+            self.show_message("错误", "无法打开主窗口，请检查main_window.py文件", QMessageBox.Icon.Critical)
+            self.show()
+        except Exception as e:
+            print(f"❌ 打开主窗口失败: {e}")
+            self.show_message("错误", f"打开主窗口时发生错误: {str(e)}", QMessageBox.Icon.Critical)
+            self.show()
+    
+    def handle_logout_from_main(self):
+        """处理从主窗口发出的登出请求"""
+        print("🔄 用户请求登出，返回登录界面")
+        
+        # 关闭主窗口
+        if hasattr(self, 'main_window'):
+            try:
+                self.main_window.hide()
+                self.main_window.close()
+                self.main_window.deleteLater()
+                delattr(self, 'main_window')
+            except Exception as e:
+                print(f"⚠️ 关闭主窗口时出现问题: {e}")
+        
+        # 清空登录表单
+        self.username_input.clear()
+        self.password_input.clear()
+        
+        # 重新显示登录窗口
+        self.show()
+        self.raise_()
+        self.activateWindow()
+    
+    def handle_register(self):
+        """处理注册"""
+        username = self.reg_username_input.text().strip()
+        email = self.reg_email_input.text().strip()
+        password = self.reg_password_input.text()
+        confirm_password = self.reg_confirm_password_input.text()
+        
+        # 执行注册
+        success, message = self.auth_controller.register(
+            username, password, confirm_password, email if email else None
+        )
+        
+        if success:
+            self.show_message("注册成功", message, QMessageBox.Icon.Information)
+            # 清空注册表单
+            self.reg_username_input.clear()
+            self.reg_email_input.clear()
+            self.reg_password_input.clear()
+            self.reg_confirm_password_input.clear()
+            # 切换到登录选项卡
+            self.tab_widget.setCurrentIndex(0)
+            print(f"🎉 新用户 {username} 注册成功！")
+        else:
+            self.show_message("注册失败", message, QMessageBox.Icon.Critical)
+    
+    def show_message(self, title, message, icon):
+        """显示消息框"""
+        msg_box = QMessageBox()
+        msg_box.setWindowTitle(title)
+        msg_box.setText(message)
+        msg_box.setIcon(icon)
+        
+        # 设置消息框样式
+        msg_box.setStyleSheet("""
+            QMessageBox {
+                background-color: #2c3e50;
+                color: white;
+                font-family: 'Microsoft YaHei';
+            }
+            QMessageBox QPushButton {
+                background-color: #3498db;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QMessageBox QPushButton:hover {
+                background-color: #2980b9;
+            }
+        """)
+        
+        msg_box.exec()
+    
+    def closeEvent(self, event):
+        """窗口关闭事件"""
+        event.accept()
\ No newline at end of file
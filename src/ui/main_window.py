@@ -15,10 +15,10 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QScrollArea, QFrame, QLineEdit, QComboBox, QMessageBox,
     QGridLayout, QTextEdit, QSplitter, QProgressBar, QTabWidget,
-    QDialog, QDialogButtonBox, QSlider, QCheckBox
+    QDialog, QDialogButtonBox, QSlider, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QFont, QPixmap, QIcon, QPainter, QPainterPath, QColor
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread, QPropertyAnimation, QEasingCurve
+from PyQt6.QtGui import QFont, QPixmap, QIcon, QColor
 
 # 添加项目根目录到路径
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,6 +29,16 @@ from src.data.website_data import (
     get_all_websites, search_websites, get_top_rated_websites
 )
 from src.core.managers import ThemeManager, StatisticsManager
+from src.core.avatar_cache import get_avatar_pixmap
+from src.core.frecency import FrecencyIndex
+from src.core.latency import KIND_ACTION, KIND_QUERY, default_tracker, timed_action
+from src.core.stall_watchdog import active_stall_watchdog
+from src.core.tracing import traced
+from src.core.metadata_fetcher import default_cache
+from src.core.recommender import RecommendationEngine, REFRESH_INTERVAL_MS
+from src.core.url_utils import url_hash
+from src.core.visit_events import VisitEventRecorder, FLUSH_INTERVAL_MS, record_website_stats
+from src.ui.user_websites_window import MetadataFetchWorker
 
 
 class ThemeSettingsDialog(QDialog):
@@ -118,12 +128,21 @@ class WebsiteCard(QFrame):
         layout.setSpacing(8)
         layout.setContentsMargins(15, 15, 15, 15)
         
-        # 网站名称
+        # 网站图标和名称
+        name_layout = QHBoxLayout()
+        name_layout.setSpacing(8)
+        self.favicon_label = QLabel()
+        self.favicon_label.setFixedSize(20, 20)
+        self.favicon_label.hide()
+        
         name_label = QLabel(self.website_data['name'])
         name_font = QFont("Microsoft YaHei", 12, QFont.Weight.Bold)
         name_label.setFont(name_font)
         name_label.setWordWrap(True)
         
+        name_layout.addWidget(self.favicon_label)
+        name_layout.addWidget(name_label, 1)
+        
         # 网站描述
         desc_label = QLabel(self.website_data['description'])
         desc_font = QFont("Microsoft YaHei", 10)
@@ -145,7 +164,7 @@ class WebsiteCard(QFrame):
         visit_button = QPushButton("🌐 访问网站")
         visit_button.clicked.connect(self.visit_website)
         
-        layout.addWidget(name_label)
+        layout.addLayout(name_layout)
         layout.addWidget(desc_label)
         layout.addLayout(info_layout)
         layout.addWidget(visit_button)
@@ -182,6 +201,16 @@ class WebsiteCard(QFrame):
             }
         """)
     
+    def set_favicon(self, path):
+        """显示网站图标（本地缓存文件）"""
+        pixmap = QPixmap(path) if path else QPixmap()
+        if pixmap.isNull():
+            return
+        self.favicon_label.setPixmap(pixmap.scaled(
+            20, 20, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+        ))
+        self.favicon_label.show()
+    
     def visit_website(self):
         """访问网站"""
         try:
@@ -189,11 +218,9 @@ class WebsiteCard(QFrame):
             print(f"🌐 正在打开网站: {self.website_data['name']}")
             
             # 记录网站访问统计
-            if hasattr(self.parent(), 'stats_manager'):
-                category = self.website_data.get('category', '未分类')
-                self.parent().stats_manager.record_website_visit(
-                    self.website_data['name'], category
-                )
+            window = self.window()
+            if hasattr(window, 'record_website_visit'):
+                window.record_website_visit(self.website_data)
         except Exception as e:
             print(f"❌ 打开网站失败: {e}")
     
@@ -229,6 +256,23 @@ class WebsiteCard(QFrame):
         """)
 
 
+class RecommendationRefreshWorker(QThread):
+    """后台刷新推荐索引的线程，使用独立的数据库连接"""
+    
+    def __init__(self, recommender, db_manager, parent=None):
+        super().__init__(parent)
+        self.recommender = recommender
+        self.db_manager = db_manager
+    
+    def run(self):
+        try:
+            self.recommender.refresh(self.db_manager)
+        except Exception as e:
+            print(f"❌ 刷新推荐索引失败: {e}")
+        finally:
+            self.db_manager.disconnect()
+
+
 class MainWindow(QWidget):
     """主窗口类"""
     
@@ -238,6 +282,9 @@ class MainWindow(QWidget):
         super().__init__()
         self.user_info = user_info
         self.current_websites = []
+        self.website_cards = {}
+        self.favicon_cache = default_cache()
+        self.favicon_requested = set()
         self.theme_manager = ThemeManager()
         self.stats_manager = StatisticsManager()
         self.session_start_time = datetime.now()
@@ -247,9 +294,30 @@ class MainWindow(QWidget):
         self.session_timer.timeout.connect(self.update_session_time)
         self.session_timer.start(60000)  # 每分钟更新一次
         
+        # 数据库连接在首次需要时建立，连接失败时首页只显示静态推荐
+        self.db_manager = None
+        self.visit_recorder = None
+        
+        # 个性化推荐：相似度索引在后台定时刷新
+        self.recommender = RecommendationEngine()
+        self.recommendation_worker = None
+        self.recommendation_timer = QTimer()
+        self.recommendation_timer.timeout.connect(self.refresh_recommendations)
+        self.recommendation_timer.start(REFRESH_INTERVAL_MS)
+        
+        # 访问事件攒批写入
+        self.visit_flush_timer = QTimer()
+        self.visit_flush_timer.timeout.connect(self.flush_visit_events)
+        self.visit_flush_timer.start(FLUSH_INTERVAL_MS)
+        
+        # 常用度：首页网站按用户最常访问的排在前面
+        self.frecency = FrecencyIndex()
+        self.load_frecency()
+        
         self.init_ui()
         self.apply_current_theme()
         self.load_all_websites()
+        self.refresh_recommendations()
         
     def load_user_avatar(self):
         """加载用户头像"""
@@ -257,10 +325,9 @@ class MainWindow(QWidget):
             avatar_path = self.user_info.get('avatar_path', 'default_avatar.png')
             full_path = f"assets/avatars/{avatar_path}"
             
-            if os.path.exists(full_path):
-                pixmap = QPixmap(full_path)
-                # 创建圆形头像
-                rounded_pixmap = self.create_rounded_avatar(pixmap)
+            # 读取预生成的圆形缩略图（内存缓存优先）
+            rounded_pixmap = get_avatar_pixmap(full_path, 32)
+            if rounded_pixmap is not None:
                 self.user_avatar.setPixmap(rounded_pixmap)
             else:
                 # 设置默认头像
@@ -276,30 +343,7 @@ class MainWindow(QWidget):
         except Exception as e:
             print(f"❌ 加载用户头像失败: {e}")
             
-    def create_rounded_avatar(self, pixmap):
-        """创建圆形头像"""
-        if pixmap.isNull():
-            return pixmap
-            
-        size = min(32, 32)
-        rounded = QPixmap(size, size)
-        rounded.fill(Qt.GlobalColor.transparent)
-        
-        painter = QPainter(rounded)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 创建圆形路径
-        path = QPainterPath()
-        path.addEllipse(0, 0, size, size)
-        painter.setClipPath(path)
-        
-        # 绘制缩放后的图片
-        scaled_pixmap = pixmap.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-        painter.drawPixmap(0, 0, scaled_pixmap)
-        painter.end()
-        
-        return rounded
-    
+    @traced('main_window.init_ui', 'ui')
     def init_ui(self):
         """初始化界面"""
         self.setWindowTitle(f"🌐 网站推荐系统 - 欢迎 {self.user_info['username']}")
@@ -546,19 +590,70 @@ class MainWindow(QWidget):
         
         return scroll_area
     
+    @timed_action('main_window.load_all_websites')
     def load_all_websites(self):
-        """加载所有网站"""
-        self.current_websites = get_all_websites()
+        """加载所有网站（按常用度排序）"""
+        self.current_websites = self.frecency.order(get_all_websites())
         self.update_website_display("🌐 所有推荐网站")
     
+    @timed_action('main_window.load_top_websites')
     def load_top_websites(self):
-        """加载热门网站"""
-        self.current_websites = get_top_rated_websites(12)
-        self.update_website_display("🔥 热门推荐网站")
+        """加载推荐网站：有访问记录时按相似网址个性化推荐，不足的用评分最高的网站补齐"""
+        limit = 12
+        catalog = {url_hash(website['url']): website for website in get_all_websites()}
+        recommended = self.recommender.recommend(self.user_info['id'], limit, candidates=set(catalog))
+        
+        self.current_websites = [catalog[item] for item, _ in recommended]
+        chosen = {item for item, _ in recommended}
+        for website in get_top_rated_websites(len(catalog)):
+            if len(self.current_websites) >= limit:
+                break
+            if url_hash(website['url']) not in chosen:
+                self.current_websites.append(website)
+        
+        self.update_website_display("✨ 为你推荐" if recommended else "🔥 热门推荐网站")
     
+    def refresh_recommendations(self):
+        """在后台刷新推荐索引（上一次刷新尚未完成时跳过）"""
+        if self.recommendation_worker is not None and self.recommendation_worker.isRunning():
+            return
+        db_manager = self.get_database_manager()
+        if db_manager is None:
+            return
+        self.recommendation_worker = RecommendationRefreshWorker(self.recommender, db_manager.clone(), self)
+        self.recommendation_worker.start()
+    
+    @timed_action('main_window.record_website_visit')
+    def record_website_visit(self, website_data):
+        """记录首页网站的访问：本地统计、访问记录和推荐索引"""
+        name, url = website_data['name'], website_data['url']
+        self.stats_manager.record_website_visit(name, website_data.get('category', '未分类'))
+        
+        # 只更新分数，不立即重排，避免卡片在点击后跳动
+        user_id = self.user_info['id']
+        item = url_hash(url)
+        self.frecency.record(item)
+        self.recommender.observe(user_id, item)
+        if self.get_database_manager() is None:
+            return
+        record_website_stats(self.db_manager, user_id, name, url)
+        self.visit_recorder.record(user_id, name, url)
+    
+    def load_frecency(self):
+        """读取当前用户各网址的常用度"""
+        db_manager = self.get_database_manager()
+        if db_manager is not None:
+            self.frecency = FrecencyIndex.load(db_manager, self.user_info['id'])
+    
+    def flush_visit_events(self):
+        """定时写入缓冲的访问事件"""
+        if self.visit_recorder is not None:
+            self.visit_recorder.flush()
+    
+    @timed_action('main_window.load_category_websites')
     def load_category_websites(self, category):
-        """加载分类网站"""
-        websites = get_websites_by_category(category)
+        """加载分类网站（按常用度排序）"""
+        websites = self.frecency.order(get_websites_by_category(category))
         self.current_websites = []
         for website in websites:
             website_copy = website.copy()
@@ -566,6 +661,7 @@ class MainWindow(QWidget):
             self.current_websites.append(website_copy)
         self.update_website_display(f"📁 {category}")
     
+    @timed_action('main_window.search_websites')
     def search_websites(self):
         """搜索网站"""
         keyword = self.search_input.text().strip()
@@ -575,9 +671,11 @@ class MainWindow(QWidget):
         else:
             self.load_all_websites()
     
+    @timed_action('main_window.update_website_display')
     def update_website_display(self, title):
         """更新网站显示"""
         # 清空现有内容
+        self.website_cards = {}
         for i in reversed(range(self.website_layout.count())):
             child = self.website_layout.itemAt(i).widget()
             if child:
@@ -606,20 +704,46 @@ class MainWindow(QWidget):
         else:
             row = 1
             col = 0
+            missing_favicons = []
             for website in self.current_websites:
                 card = WebsiteCard(website)
                 self.website_layout.addWidget(card, row, col)
+                self.website_cards.setdefault(website['url'], []).append(card)
+                
+                # 已缓存的图标直接显示，其余在后台获取
+                favicon_path = self.favicon_cache.favicon_path(website['url'])
+                if favicon_path:
+                    card.set_favicon(favicon_path)
+                elif website['url'] not in self.favicon_requested:
+                    missing_favicons.append(website['url'])
                 
                 col += 1
                 if col >= cols_per_row:  # 根据窗口宽度自适应
                     col = 0
                     row += 1
         
+            self.fetch_favicons(missing_favicons)
+        
         # 添加底部间距
         spacer_label = QLabel("")
         spacer_label.setMinimumHeight(50)
         self.website_layout.addWidget(spacer_label, row + 1, 0, 1, cols_per_row)
     
+    def fetch_favicons(self, urls):
+        """后台获取网站卡片缺少的图标"""
+        if not urls:
+            return
+        self.favicon_requested.update(urls)
+        worker = MetadataFetchWorker(urls)
+        worker.fetched.connect(self.on_favicon_fetched)
+        worker.start()
+    
+    def on_favicon_fetched(self, metadata):
+        """图标获取完成后更新当前显示的卡片"""
+        if metadata.favicon_path:
+            for card in self.website_cards.get(metadata.url, []):
+                card.set_favicon(metadata.favicon_path)
+    
     def handle_logout(self):
         """处理登出"""
         reply = QMessageBox.question(
@@ -680,6 +804,17 @@ class MainWindow(QWidget):
         except Exception as e:
             raise Exception(f"创建数据库管理器失败: {str(e)}")
     
+    def get_database_manager(self):
+        """获取主窗口共用的数据库连接，连接失败时返回 None"""
+        if self.db_manager is None:
+            try:
+                self.db_manager = self.create_database_manager()
+            except Exception as e:
+                print(f"⚠️ {e}")
+                return None
+            self.visit_recorder = VisitEventRecorder(self.db_manager)
+        return self.db_manager
+    
     def open_profile(self):
         """打开个人信息界面"""
         try:
@@ -800,10 +935,10 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QScrollArea, QFrame, QLineEdit, QComboBox, QMessageBox,
     QGridLayout, QTextEdit, QSplitter, QProgressBar, QTabWidget,
-    QDialog, QDialogButtonBox, QSlider, QCheckBox
+    QDialog, QDialogButtonBox, QSlider, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QFont, QPixmap, QIcon, QPainter, QPainterPath, QColor
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread, QPropertyAnimation, QEasingCurve
+from PyQt6.QtGui import QFont, QPixmap, QIcon, QColor
 
 # 添加项目根目录到路径
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -814,6 +949,16 @@ from src.data.website_data import (
     get_all_websites, search_websites, get_top_rated_websites
 )
 from src.core.managers import ThemeManager, StatisticsManager
+from src.core.avatar_cache import get_avatar_pixmap
+from src.core.frecency import FrecencyIndex
+from src.core.latency import KIND_ACTION, KIND_QUERY, default_tracker, timed_action
+from src.core.stall_watchdog import active_stall_watchdog
+from src.core.tracing import traced
+from src.core.metadata_fetcher import default_cache
+from src.core.recommender import RecommendationEngine, REFRESH_INTERVAL_MS
+from src.core.url_utils import url_hash
+from src.core.visit_events import VisitEventRecorder, FLUSH_INTERVAL_MS, record_website_stats
+from src.ui.user_websites_window import MetadataFetchWorker
 
 
 class ThemeSettingsDialog(QDialog):
@@ -903,12 +1048,21 @@ class WebsiteCard(QFrame):
         layout.setSpacing(8)
         layout.setContentsMargins(15, 15, 15, 15)
         
-        # 网站名称
+        # 网站图标和名称
+        name_layout = QHBoxLayout()
+        name_layout.setSpacing(8)
+        self.favicon_label = QLabel()
+        self.favicon_label.setFixedSize(20, 20)
+        self.favicon_label.hide()
+        
         name_label = QLabel(self.website_data['name'])
         name_font = QFont("Microsoft YaHei", 12, QFont.Weight.Bold)
         name_label.setFont(name_font)
         name_label.setWordWrap(True)
         
+        name_layout.addWidget(self.favicon_label)
+        name_layout.addWidget(name_label, 1)
+        
         # 网站描述
         desc_label = QLabel(self.website_data['description'])
         desc_font = QFont("Microsoft YaHei", 10)
@@ -930,7 +1084,7 @@ class WebsiteCard(QFrame):
         visit_button = QPushButton("🌐 访问网站")
         visit_button.clicked.connect(self.visit_website)
         
-        layout.addWidget(name_label)
+        layout.addLayout(name_layout)
         layout.addWidget(desc_label)
         layout.addLayout(info_layout)
         layout.addWidget(visit_button)
@@ -967,6 +1121,16 @@ class WebsiteCard(QFrame):
             }
         """)
     
+    def set_favicon(self, path):
+        """显示网站图标（本地缓存文件）"""
+        pixmap = QPixmap(path) if path else QPixmap()
+        if pixmap.isNull():
+            return
+        self.favicon_label.setPixmap(pixmap.scaled(
+            20, 20, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+        ))
+        self.favicon_label.show()
+    
     def visit_website(self):
         """访问网站"""
         try:
@@ -974,11 +1138,9 @@ class WebsiteCard(QFrame):
             print(f"🌐 正在打开网站: {self.website_data['name']}")
             
             # 记录网站访问统计
-            if hasattr(self.parent(), 'stats_manager'):
-                category = self.website_data.get('category', '未分类')
-                self.parent().stats_manager.record_website_visit(
-                    self.website_data['name'], category
-                )
+            window = self.window()
+            if hasattr(window, 'record_website_visit'):
+                window.record_website_visit(self.website_data)
         except Exception as e:
             print(f"❌ 打开网站失败: {e}")
     
@@ -1014,15 +1176,36 @@ class WebsiteCard(QFrame):
         """)
 
 
+class RecommendationRefreshWorker(QThread):
+    """后台刷新推荐索引的线程，使用独立的数据库连接"""
+    
+    def __init__(self, recommender, db_manager, parent=None):
+        super().__init__(parent)
+        self.recommender = recommender
+        self.db_manager = db_manager
+    
+    def run(self):
+        try:
+            self.recommender.refresh(self.db_manager)
+        except Exception as e:
+            print(f"❌ 刷新推荐索引失败: {e}")
+        finally:
+            self.db_manager.disconnect()
+
+
 class MainWindow(QWidget):
     """主窗口类"""
     
     logout_requested = pyqtSignal()
     
-    def __init__(self, user_info):
+    def __init__(self, user_info, services=None):
         super().__init__()
         self.user_info = user_info
+        self.services = services            # 瘦客户端模式下的远程服务（api_client.RemoteServices）
         self.current_websites = []
+        self.website_cards = {}
+        self.favicon_cache = default_cache()
+        self.favicon_requested = set()
         self.theme_manager = ThemeManager()
         self.stats_manager = StatisticsManager()
         self.session_start_time = datetime.now()
@@ -1032,9 +1215,30 @@ class MainWindow(QWidget):
         self.session_timer.timeout.connect(self.update_session_time)
         self.session_timer.start(60000)  # 每分钟更新一次
         
+        # 数据库连接在首次需要时建立，连接失败时首页只显示静态推荐
+        self.db_manager = None
+        self.visit_recorder = None
+        
+        # 个性化推荐：相似度索引在后台定时刷新
+        self.recommender = RecommendationEngine()
+        self.recommendation_worker = None
+        self.recommendation_timer = QTimer()
+        self.recommendation_timer.timeout.connect(self.refresh_recommendations)
+        self.recommendation_timer.start(REFRESH_INTERVAL_MS)
+        
+        # 访问事件攒批写入
+        self.visit_flush_timer = QTimer()
+        self.visit_flush_timer.timeout.connect(self.flush_visit_events)
+        self.visit_flush_timer.start(FLUSH_INTERVAL_MS)
+        
+        # 常用度：首页网站按用户最常访问的排在前面
+        self.frecency = FrecencyIndex()
+        self.load_frecency()
+        
         self.init_ui()
         self.apply_current_theme()
         self.load_all_websites()
+        self.refresh_recommendations()
         
     def load_user_avatar(self):
         """加载用户头像"""
@@ -1042,10 +1246,9 @@ class MainWindow(QWidget):
             avatar_path = self.user_info.get('avatar_path', 'default_avatar.png')
             full_path = f"assets/avatars/{avatar_path}"
             
-            if os.path.exists(full_path):
-                pixmap = QPixmap(full_path)
-                # 创建圆形头像
-                rounded_pixmap = self.create_rounded_avatar(pixmap)
+            # 读取预生成的圆形缩略图（内存缓存优先）
+            rounded_pixmap = get_avatar_pixmap(full_path, 32)
+            if rounded_pixmap is not None:
                 self.user_avatar.setPixmap(rounded_pixmap)
             else:
                 # 设置默认头像
@@ -1061,30 +1264,7 @@ class MainWindow(QWidget):
         except Exception as e:
             print(f"❌ 加载用户头像失败: {e}")
             
-    def create_rounded_avatar(self, pixmap):
-        """创建圆形头像"""
-        if pixmap.isNull():
-            return pixmap
-            
-        size = min(32, 32)
-        rounded = QPixmap(size, size)
-        rounded.fill(Qt.GlobalColor.transparent)
-        
-        painter = QPainter(rounded)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 创建圆形路径
-        path = QPainterPath()
-        path.addEllipse(0, 0, size, size)
-        painter.setClipPath(path)
-        
-        # 绘制缩放后的图片
-        scaled_pixmap = pixmap.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-        painter.drawPixmap(0, 0, scaled_pixmap)
-        painter.end()
-        
-        return rounded
-    
+    @traced('main_window.init_ui', 'ui')
     def init_ui(self):
         """初始化界面"""
         self.setWindowTitle(f"🌐 网站推荐系统 - 欢迎 {self.user_info['username']}")
@@ -1331,19 +1511,79 @@ class MainWindow(QWidget):
         
         return scroll_area
     
+    @timed_action('main_window.load_all_websites')
     def load_all_websites(self):
-        """加载所有网站"""
-        self.current_websites = get_all_websites()
+        """加载所有网站（按常用度排序）"""
+        self.current_websites = self.frecency.order(get_all_websites())
         self.update_website_display("🌐 所有推荐网站")
     
+    @timed_action('main_window.load_top_websites')
     def load_top_websites(self):
-        """加载热门网站"""
-        self.current_websites = get_top_rated_websites(12)
-        self.update_website_display("🔥 热门推荐网站")
+        """加载推荐网站：有访问记录时按相似网址个性化推荐，不足的用评分最高的网站补齐"""
+        limit = 12
+        catalog = {url_hash(website['url']): website for website in get_all_websites()}
+        recommended = self.recommender.recommend(self.user_info['id'], limit, candidates=set(catalog))
+        
+        self.current_websites = [catalog[item] for item, _ in recommended]
+        chosen = {item for item, _ in recommended}
+        for website in get_top_rated_websites(len(catalog)):
+            if len(self.current_websites) >= limit:
+                break
+            if url_hash(website['url']) not in chosen:
+                self.current_websites.append(website)
+        
+        self.update_website_display("✨ 为你推荐" if recommended else "🔥 热门推荐网站")
     
+    def refresh_recommendations(self):
+        """在后台刷新推荐索引（上一次刷新尚未完成时跳过）"""
+        if self.recommendation_worker is not None and self.recommendation_worker.isRunning():
+            return
+        if self.services is not None:
+            # 瘦客户端不直接连接数据库，推荐只使用本次会话中的访问
+            return
+        db_manager = self.get_database_manager()
+        if db_manager is None:
+            return
+        self.recommendation_worker = RecommendationRefreshWorker(self.recommender, db_manager.clone(), self)
+        self.recommendation_worker.start()
+    
+    @timed_action('main_window.record_website_visit')
+    def record_website_visit(self, website_data):
+        """记录首页网站的访问：本地统计、访问记录和推荐索引"""
+        name, url = website_data['name'], website_data['url']
+        self.stats_manager.record_website_visit(name, website_data.get('category', '未分类'))
+        
+        # 只更新分数，不立即重排，避免卡片在点击后跳动
+        user_id = self.user_info['id']
+        item = url_hash(url)
+        self.frecency.record(item)
+        self.recommender.observe(user_id, item)
+        if self.services is not None:
+            self.services.sites.record_visit(user_id, name, url)
+            return
+        if self.get_database_manager() is None:
+            return
+        record_website_stats(self.db_manager, user_id, name, url)
+        self.visit_recorder.record(user_id, name, url)
+    
+    def load_frecency(self):
+        """读取当前用户各网址的常用度"""
+        if self.services is not None:
+            self.frecency = FrecencyIndex(self.services.stats.frecency(self.user_info['id']))
+            return
+        db_manager = self.get_database_manager()
+        if db_manager is not None:
+            self.frecency = FrecencyIndex.load(db_manager, self.user_info['id'])
+    
+    def flush_visit_events(self):
+        """定时写入缓冲的访问事件"""
+        if self.visit_recorder is not None:
+            self.visit_recorder.flush()
+    
+    @timed_action('main_window.load_category_websites')
     def load_category_websites(self, category):
-        """加载分类网站"""
-        websites = get_websites_by_category(category)
+        """加载分类网站（按常用度排序）"""
+        websites = self.frecency.order(get_websites_by_category(category))
         self.current_websites = []
         for website in websites:
             website_copy = website.copy()
@@ -1351,6 +1591,7 @@ class MainWindow(QWidget):
             self.current_websites.append(website_copy)
         self.update_website_display(f"📁 {category}")
     
+    @timed_action('main_window.search_websites')
     def search_websites(self):
         """搜索网站"""
         keyword = self.search_input.text().strip()
@@ -1360,9 +1601,11 @@ class MainWindow(QWidget):
         else:
             self.load_all_websites()
     
+    @timed_action('main_window.update_website_display')
     def update_website_display(self, title):
         """更新网站显示"""
         # 清空现有内容
+        self.website_cards = {}
         for i in reversed(range(self.website_layout.count())):
             child = self.website_layout.itemAt(i).widget()
             if child:
@@ -1391,20 +1634,46 @@ class MainWindow(QWidget):
         else:
             row = 1
             col = 0
+            missing_favicons = []
             for website in self.current_websites:
                 card = WebsiteCard(website)
                 self.website_layout.addWidget(card, row, col)
+                self.website_cards.setdefault(website['url'], []).append(card)
+                
+                # 已缓存的图标直接显示，其余在后台获取
+                favicon_path = self.favicon_cache.favicon_path(website['url'])
+                if favicon_path:
+                    card.set_favicon(favicon_path)
+                elif website['url'] not in self.favicon_requested:
+                    missing_favicons.append(website['url'])
                 
                 col += 1
                 if col >= cols_per_row:  # 根据窗口宽度自适应
                     col = 0
                     row += 1
         
+            self.fetch_favicons(missing_favicons)
+        
         # 添加底部间距
         spacer_label = QLabel("")
         spacer_label.setMinimumHeight(50)
         self.website_layout.addWidget(spacer_label, row + 1, 0, 1, cols_per_row)
     
+    def fetch_favicons(self, urls):
+        """后台获取网站卡片缺少的图标"""
+        if not urls:
+            return
+        self.favicon_requested.update(urls)
+        worker = MetadataFetchWorker(urls)
+        worker.fetched.connect(self.on_favicon_fetched)
+        worker.start()
+    
+    def on_favicon_fetched(self, metadata):
+        """图标获取完成后更新当前显示的卡片"""
+        if metadata.favicon_path:
+            for card in self.website_cards.get(metadata.url, []):
+                card.set_favicon(metadata.favicon_path)
+    
     def handle_logout(self):
         """处理登出"""
         reply = QMessageBox.question(
@@ -1465,16 +1734,30 @@ class MainWindow(QWidget):
         except Exception as e:
             raise Exception(f"创建数据库管理器失败: {str(e)}")
     
+    def child_window_arguments(self):
+        """子窗口的数据来源：瘦客户端模式下共用远程服务，否则各自使用新的数据库连接"""
+        if self.services is not None:
+            return {'services': self.services}
+        return {'db_manager': self.create_database_manager()}
+    
+    def get_database_manager(self):
+        """获取主窗口共用的数据库连接，连接失败时返回 None"""
+        if self.db_manager is None:
+            try:
+                self.db_manager = self.create_database_manager()
+            except Exception as e:
+                print(f"⚠️ {e}")
+                return None
+            self.visit_recorder = VisitEventRecorder(self.db_manager)
+        return self.db_manager
+    
     def open_profile(self):
         """打开个人信息界面"""
         try:
             from src.ui.profile_window import ProfileWindow
             
-            # 创建数据库管理器
-            db_manager = self.create_database_manager()
-            
             # 创建个人信息窗口
-            self.profile_window = ProfileWindow(self.user_info, db_manager)
+            self.profile_window = ProfileWindow(self.user_info, **self.child_window_arguments())
             self.profile_window.profile_updated.connect(self.on_profile_updated)
             self.profile_window.show()
             
@@ -1489,11 +1772,8 @@ class MainWindow(QWidget):
         try:
             from src.ui.user_websites_window import UserWebsitesWindow
             
-            # 创建数据库管理器
-            db_manager = self.create_database_manager()
-            
             # 创建用户网站管理窗口
-            self.user_websites_window = UserWebsitesWindow(self.user_info, db_manager)
+            self.user_websites_window = UserWebsitesWindow(self.user_info, **self.child_window_arguments())
             self.user_websites_window.show()
             
             print("🌐 用户网站管理窗口已打开")
@@ -1511,11 +1791,8 @@ class MainWindow(QWidget):
         try:
             from src.ui.admin_window import AdminWindow
             
-            # 创建数据库管理器
-            db_manager = self.create_database_manager()
-            
             # 创建管理员窗口
-            self.admin_window = AdminWindow(self.user_info, db_manager)
+            self.admin_window = AdminWindow(self.user_info, **self.child_window_arguments())
             self.admin_window.show()
             
             print("👑 管理员面板已打开")
@@ -1571,9 +1848,18 @@ class MainWindow(QWidget):
         self.stats_manager.stats_data['session_time'] += 1  # 每分钟增加1分钟
         self.stats_manager.save_statistics()
     
+    def stop_background_tasks(self):
+        """停止定时任务，写入剩余的访问事件并等待推荐刷新结束"""
+        self.recommendation_timer.stop()
+        self.visit_flush_timer.stop()
+        self.flush_visit_events()
+        if self.recommendation_worker is not None:
+            self.recommendation_worker.wait()
+    
     def closeEvent(self, event):
         """窗口关闭事件"""
         if hasattr(self, '_logout_confirmed') and self._logout_confirmed:
+            self.stop_background_tasks()
             event.accept()
         else:
             reply = QMessageBox.question(
@@ -1586,6 +1872,7 @@ class MainWindow(QWidget):
             if reply == QMessageBox.StandardButton.Yes:
                 print(f"👋 用户 {self.user_info['username']} 已退出系统")
                 self.logout_requested.emit()
+                self.stop_background_tasks()
                 event.accept()
             else:
                 event.ignore()
@@ -1602,7 +1889,7 @@ class StatisticsDialog(QDialog):
     def init_ui(self):
         """初始化界面"""
         self.setWindowTitle("📊 使用统计")
-        self.setFixedSize(600, 500)
+        self.setFixedSize(720, 520)
         
         layout = QVBoxLayout()
         
@@ -1625,6 +1912,10 @@ class StatisticsDialog(QDialog):
         activity_tab = self.create_activity_tab()
         tab_widget.addTab(activity_tab, "📅 活动趋势")
         
+        # 响应时间选项卡
+        performance_tab = self.create_performance_tab()
+        tab_widget.addTab(performance_tab, "⏱️ 响应时间")
+        
         layout.addWidget(tab_widget)
         
         # 关闭按钮
@@ -1841,6 +2132,87 @@ class StatisticsDialog(QDialog):
         layout.addStretch()
         widget.setLayout(layout)
         return widget
+    
+    def create_performance_tab(self):
+        """创建响应时间选项卡（本次运行的查询和界面操作耗时分布）"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        performance = self.stats_manager.update_system_performance()
+        summary_label = QLabel(
+            f"🗄️ 查询平均耗时: {performance['avg_response_time']} ms    "
+            f"p95: {performance['p95_response_time']} ms    "
+            f"累计错误: {performance['error_count']}    "
+            f"运行时间: {performance['uptime'] // 60} 分钟"
+        )
+        summary_label.setFont(QFont("Microsoft YaHei", 11))
+        layout.addWidget(summary_label)
+        
+        tracker = default_tracker()
+        for title, kind in (("🗄️ 数据库查询（按累计耗时）", KIND_QUERY), ("🖱️ 界面操作", KIND_ACTION)):
+            title_label = QLabel(title)
+            title_label.setFont(QFont("Microsoft YaHei", 12, QFont.Weight.Bold))
+            layout.addWidget(title_label)
+            layout.addWidget(self.create_latency_table(tracker.snapshot(kind, limit=20)))
+        
+        # 界面卡顿（调试模式下启用检测时显示）
+        watchdog = active_stall_watchdog()
+        if watchdog is not None:
+            title_label = QLabel(f"🧊 界面卡顿（超过 {watchdog.threshold * 1000:.0f} ms）")
+            title_label.setFont(QFont("Microsoft YaHei", 12, QFont.Weight.Bold))
+            layout.addWidget(title_label)
+            layout.addWidget(self.create_stall_table(watchdog.report(limit=20)))
+        
+        widget.setLayout(layout)
+        return widget
+    
+    def create_stall_table(self, sites):
+        """界面卡顿统计表格，悬停显示最长一次卡顿的调用栈"""
+        headers = ["调用位置", "次数", "累计 ms", "最长 ms"]
+        table = QTableWidget(max(1, len(sites)), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        
+        if not sites:
+            table.setItem(0, 0, QTableWidgetItem("暂未检测到卡顿"))
+            return table
+        
+        for row, site in enumerate(sites):
+            site_item = QTableWidgetItem(site.site)
+            site_item.setToolTip("\n".join(site.stack) or site.site)
+            table.setItem(row, 0, site_item)
+            for column, text in enumerate((str(site.count), f"{site.total_ms:.0f}", f"{site.max_ms:.0f}"), 1):
+                cell = QTableWidgetItem(text)
+                cell.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, cell)
+        return table
+    
+    def create_latency_table(self, stats):
+        """耗时统计表格（毫秒）"""
+        headers = ["名称", "次数", "错误", "p50", "p95", "p99", "最大"]
+        table = QTableWidget(len(stats), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        
+        for row, item in enumerate(stats):
+            name_item = QTableWidgetItem(item.name)
+            name_item.setToolTip(item.name)
+            table.setItem(row, 0, name_item)
+            values = [item.count, item.errors, item.p50_ms, item.p95_ms, item.p99_ms, item.max_ms]
+            for column, value in enumerate(values, 1):
+                text = str(value) if isinstance(value, int) else f"{value:.1f}"
+                cell = QTableWidgetItem(text)
+                cell.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, cell)
+        
+        if not stats:
+            table.setRowCount(1)
+            table.setItem(0, 0, QTableWidgetItem("暂无数据"))
+        return table
 
 
 if __name__ == "__main__":
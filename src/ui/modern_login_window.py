@@ -24,6 +24,7 @@ from PyQt6.QtGui import (
 )
 
 from src.core.auth_system import AuthController
+from src.core.tracing import traced
 
 
 class FluidCard(QFrame):
@@ -378,11 +379,12 @@ class ModernLoginWindow(QWidget):
     # 信号定义
     login_success = pyqtSignal(dict)
     
-    def __init__(self, db_manager, config):
+    def __init__(self, db_manager, config, services=None):
         super().__init__()
-        self.db_manager = db_manager
+        self.db_manager = db_manager        # 瘦客户端模式下为 None，登录注册通过 API 服务器
         self.config = config
-        self.auth_controller = AuthController(db_manager)
+        # 与 AuthController 相同的 login / register / security_manager 接口
+        self.auth_controller = services.auth if services else AuthController(db_manager)
         self.current_page = "login"
         
         self.init_ui()
@@ -871,6 +873,7 @@ class ModernLoginWindow(QWidget):
         self.opacity_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
         self.opacity_animation.start()
     
+    @traced('login.handle_login', 'ui')
     def handle_login(self):
         """处理登录"""
         username = self.username_input.text().strip()
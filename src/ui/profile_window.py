@@ -8,15 +8,43 @@
 
 import sys
 import os
-import hashlib
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QLineEdit, QTextEdit, QFileDialog, QMessageBox, QFormLayout,
     QGroupBox, QScrollArea, QFrame
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont, QPixmap, QPainter, QPainterPath
+from PyQt6.QtCore import Qt, pyqtSignal, QThread
+from PyQt6.QtGui import QFont
+
+from src.core.avatar_cache import AVATAR_DIR, get_avatar_pixmap
+from src.core.avatar_store import process_avatar
+from src.core.services import Services
+
+
+class AvatarProcessWorker(QThread):
+    """后台头像处理线程（解码、方向校正、缩小、重新编码、生成缩略图，瘦客户端模式下再上传到服务器）"""
+    
+    processed = pyqtSignal(str)     # 保存后的文件名
+    failed = pyqtSignal(str)        # 错误信息
+    
+    def __init__(self, source_path, services, user_id, parent=None):
+        super().__init__(parent)
+        self.source_path = source_path
+        self.services = services
+        self.user_id = user_id
+    
+    def run(self):
+        try:
+            filename = process_avatar(self.source_path)
+            success, message = self.services.auth.upload_avatar(self.user_id, filename)
+            if success:
+                self.processed.emit(filename)
+            else:
+                self.failed.emit(message)
+        except Exception as e:
+            self.failed.emit(str(e))
+
 
 class AvatarWidget(QLabel):
     """头像显示组件"""
@@ -57,37 +85,14 @@ class AvatarWidget(QLabel):
             """)
     
     def load_avatar(self, image_path):
-        """加载头像图片"""
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                # 创建圆形头像
-                rounded_pixmap = self.create_rounded_pixmap(pixmap)
-                self.setPixmap(rounded_pixmap)
-                return True
+        """加载头像图片（使用预生成的圆形缩略图）"""
+        # 减去边框宽度
+        rounded_pixmap = get_avatar_pixmap(image_path, self.size, self.size - 6)
+        if rounded_pixmap is not None:
+            self.setPixmap(rounded_pixmap)
+            return True
         return False
     
-    def create_rounded_pixmap(self, pixmap):
-        """创建圆形头像"""
-        size = self.size - 6  # 减去边框宽度
-        rounded = QPixmap(size, size)
-        rounded.fill(Qt.GlobalColor.transparent)
-        
-        painter = QPainter(rounded)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 创建圆形路径
-        path = QPainterPath()
-        path.addEllipse(0, 0, size, size)
-        painter.setClipPath(path)
-        
-        # 绘制缩放后的图片
-        scaled_pixmap = pixmap.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-        painter.drawPixmap(0, 0, scaled_pixmap)
-        painter.end()
-        
-        return rounded
-    
     def mousePressEvent(self, event):
         """鼠标点击事件"""
         if event.button() == Qt.MouseButton.LeftButton:
@@ -100,10 +105,11 @@ class ProfileWindow(QWidget):
     
     profile_updated = pyqtSignal(dict)  # 个人信息更新信号
     
-    def __init__(self, user_info, db_manager):
+    def __init__(self, user_info, db_manager=None, services=None):
         super().__init__()
         self.user_info = user_info
         self.db_manager = db_manager
+        self.services = services or Services(db_manager)
         self.init_ui()
         self.load_user_data()
     
@@ -406,35 +412,38 @@ class ProfileWindow(QWidget):
         )
         
         if file_path:
-            # 检查文件大小（限制2MB）
             # 检查文件大小（限制5MB）
             file_size = os.path.getsize(file_path)
             if file_size > 5 * 1024 * 1024:
                 QMessageBox.warning(self, "文件过大", "头像文件大小不能超过5MB")
                 return
             
-            # 生成新的文件名
-            file_ext = os.path.splitext(file_path)[1]
-            new_filename = f"user_{self.user_info['id']}_{int(datetime.now().timestamp())}{file_ext}"
-            new_path = f"assets/avatars/{new_filename}"
-            
-            # 确保目录存在
-            os.makedirs("assets/avatars", exist_ok=True)
+            if getattr(self, 'avatar_worker', None) and self.avatar_worker.isRunning():
+                QMessageBox.information(self, "提示", "头像正在处理中，请稍候")
+                return
             
-            # 复制文件
-            try:
-                import shutil
-                shutil.copy2(file_path, new_path)
-                
-                # 更新头像显示
-                if self.avatar_widget.load_avatar(new_path):
-                    self.user_info['avatar_path'] = new_filename
-                    QMessageBox.information(self, "成功", "头像更换成功！请点击保存信息以确认更改。")
-                else:
-                    QMessageBox.warning(self, "失败", "头像加载失败，请检查图片格式")
-                    
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"头像保存失败: {str(e)}")
+            # 图片处理在后台线程中进行
+            self.avatar_widget.setEnabled(False)
+            self.avatar_worker = AvatarProcessWorker(file_path, self.services, self.user_info['id'], self)
+            self.avatar_worker.processed.connect(self.on_avatar_processed)
+            self.avatar_worker.failed.connect(self.on_avatar_failed)
+            self.avatar_worker.start()
+    
+    def on_avatar_processed(self, filename):
+        """头像处理完成"""
+        self.avatar_widget.setEnabled(True)
+        
+        # 更新头像显示
+        if self.avatar_widget.load_avatar(os.path.join(AVATAR_DIR, filename)):
+            self.user_info['avatar_path'] = filename
+            QMessageBox.information(self, "成功", "头像更换成功！请点击保存信息以确认更改。")
+        else:
+            QMessageBox.warning(self, "失败", "头像加载失败，请检查图片格式")
+    
+    def on_avatar_failed(self, message):
+        """头像处理失败"""
+        self.avatar_widget.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"头像保存失败: {message}")
     
     def reset_avatar(self):
         """重置头像"""
@@ -469,27 +478,16 @@ class ProfileWindow(QWidget):
             QMessageBox.warning(self, "密码不匹配", "两次输入的新密码不一致")
             return
         
-        # 验证当前密码
-        old_password_hash = hashlib.sha256(old_password.encode('utf-8')).hexdigest()
-        query = "SELECT password_hash FROM users WHERE id = %s"
-        result = self.db_manager.execute_query(query, (self.user_info['id'],))
-        
-        if not result or result[0][0] != old_password_hash:
-            QMessageBox.warning(self, "密码错误", "当前密码不正确")
-            return
-        
-        # 更新密码
-        new_password_hash = hashlib.sha256(new_password.encode('utf-8')).hexdigest()
-        update_query = "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s"
-        
-        if self.db_manager.execute_non_query(update_query, (new_password_hash, datetime.now(), self.user_info['id'])):
-            QMessageBox.information(self, "成功", "密码修改成功！")
+        # 验证当前密码并更新
+        success, message = self.services.auth.change_password(self.user_info['id'], old_password, new_password)
+        if success:
+            QMessageBox.information(self, "成功", message)
             # 清空密码输入框
             self.old_password_input.clear()
             self.new_password_input.clear()
             self.confirm_password_input.clear()
         else:
-            QMessageBox.critical(self, "失败", "密码修改失败，请稍后重试")
+            QMessageBox.warning(self, "失败", message)
     
     def save_profile(self):
         """保存个人信息"""
@@ -498,41 +496,11 @@ class ProfileWindow(QWidget):
         email = self.email_input.text().strip()
         avatar_path = self.user_info.get('avatar_path', 'default_avatar.png')
         
-        # 验证用户名
-        if username != self.user_info['username']:
-            # 验证用户名格式
-            if not username or len(username) < 3 or len(username) > 50:
-                QMessageBox.warning(self, "格式错误", "用户名长度必须在3-50个字符之间")
-                return
-            
-            if not re.match(r'^[a-zA-Z0-9_\u4e00-\u9fa5]+$', username):
-                QMessageBox.warning(self, "格式错误", "用户名只能包含字母、数字、下划线和中文")
-                return
-            
-            # 检查用户名是否已存在
-            query = "SELECT id FROM users WHERE username = %s AND id != %s"
-            result = self.db_manager.execute_query(query, (username, self.user_info['id']))
-            if result:
-                QMessageBox.warning(self, "用户名已存在", "该用户名已被其他用户使用，请选择其他用户名")
-                return
-        
-        # 验证邮箱格式
-        if email:
-            import re
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, email):
-                QMessageBox.warning(self, "格式错误", "邮箱格式不正确")
-                return
-        
-        # 更新数据库
-        update_query = """
-        UPDATE users SET username = %s, display_name = %s, email = %s, avatar_path = %s, updated_at = %s 
-        WHERE id = %s
-        """
-        
-        if self.db_manager.execute_non_query(update_query, (
-            username, display_name, email, avatar_path, datetime.now(), self.user_info['id']
-        )):
+        # 用户名格式和是否已被使用、邮箱格式由服务检查
+        success, message = self.services.auth.update_profile(
+            self.user_info['id'], username, display_name, email, avatar_path
+        )
+        if success:
             # 更新用户信息
             self.user_info['username'] = username
             self.user_info['display_name'] = display_name
@@ -542,10 +510,10 @@ class ProfileWindow(QWidget):
             # 更新窗口标题
             self.setWindowTitle(f"👤 个人信息 - {username}")
             
-            QMessageBox.information(self, "成功", "个人信息保存成功！")
+            QMessageBox.information(self, "成功", message)
             self.profile_updated.emit(self.user_info)
         else:
-            QMessageBox.critical(self, "失败", "个人信息保存失败，请稍后重试")
+            QMessageBox.warning(self, "失败", message)
     
     def show_message(self, title, message, icon):
         """显示消息框"""
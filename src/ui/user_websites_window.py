@@ -9,27 +9,41 @@
 import sys
 import os
 import webbrowser
-from datetime import datetime
+import asyncio
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QLineEdit, QTextEdit, QComboBox, QMessageBox, QTableWidget,
     QTableWidgetItem, QHeaderView, QDialog, QFormLayout, QSpinBox,
-    QGroupBox, QScrollArea, QFrame, QCheckBox
+    QGroupBox, QScrollArea, QFrame, QCheckBox, QFileDialog, QProgressDialog
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QTimer
+from PyQt6.QtGui import QFont, QIcon
+
+from src.core.bookmark_importer import DEFAULT_PRIVATE, DEFAULT_RATING
+from src.core.latency import timed_action
+from src.core.metadata_fetcher import MetadataFetcher, default_cache
+from src.core.services import Services, WEBSITE_FIELDS
+from src.core.url_utils import is_valid_url
+from src.core.visit_events import FLUSH_INTERVAL_MS
+
+
+def website_row(website):
+    """服务返回的网站字典转为表格使用的元组"""
+    return tuple(website[field] for field in WEBSITE_FIELDS)
+
 
 class AddWebsiteDialog(QDialog):
     """添加网站对话框"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._fetching_url = None
         self.init_ui()
     
     def init_ui(self):
         """初始化界面"""
         self.setWindowTitle("➕ 添加推荐网站")
-        self.setFixedSize(500, 400)
+        self.setFixedSize(560, 440)
         self.setModal(True)
         
         layout = QVBoxLayout()
@@ -48,7 +62,17 @@ class AddWebsiteDialog(QDialog):
         # 网站URL
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("https://example.com")
-        form_layout.addRow("🔗 网站地址:", self.url_input)
+        self.url_input.editingFinished.connect(self.auto_fetch_metadata)
+        
+        self.fetch_button = QPushButton("🔍 获取信息")
+        self.fetch_button.setToolTip("根据网址自动填写网站名称和描述")
+        self.fetch_button.clicked.connect(self.fetch_metadata)
+        self.fetch_button.setStyleSheet("QPushButton { background-color: #2196F3; padding: 8px 12px; }")
+        
+        url_layout = QHBoxLayout()
+        url_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.fetch_button)
+        form_layout.addRow("🔗 网站地址:", url_layout)
         
         # 网站描述
         self.description_input = QTextEdit()
@@ -79,6 +103,11 @@ class AddWebsiteDialog(QDialog):
         
         layout.addLayout(form_layout)
         
+        # 网站信息获取状态
+        self.fetch_status_label = QLabel("")
+        self.fetch_status_label.setStyleSheet("font-size: 12px; color: rgba(255, 255, 255, 0.7);")
+        layout.addWidget(self.fetch_status_label)
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         
@@ -158,6 +187,52 @@ class AddWebsiteDialog(QDialog):
             }
         """)
     
+    def auto_fetch_metadata(self):
+        """输入网址后，名称或描述还没填写时自动获取"""
+        if not self.name_input.text().strip() or not self.description_input.toPlainText().strip():
+            if is_valid_url(self.url_input.text().strip()):
+                self.fetch_metadata()
+    
+    def fetch_metadata(self):
+        """在后台获取网页标题和描述，不阻塞对话框"""
+        url = self.url_input.text().strip()
+        if not is_valid_url(url):
+            self.fetch_status_label.setText("⚠️ 请先输入以 http:// 或 https:// 开头的网址")
+            return
+        if url == self._fetching_url:
+            return
+        
+        self._fetching_url = url
+        self.fetch_button.setEnabled(False)
+        self.fetch_status_label.setText("⏳ 正在获取网站信息...")
+        
+        worker = MetadataFetchWorker([url])
+        worker.fetched.connect(self.on_metadata_fetched)
+        worker.start()
+    
+    def on_metadata_fetched(self, metadata):
+        """填入获取到的信息（只填写用户还没输入的字段）"""
+        if metadata.url != self._fetching_url:
+            return
+        self._fetching_url = None
+        self.fetch_button.setEnabled(True)
+        
+        if metadata.url != self.url_input.text().strip():
+            # 获取期间网址已被修改
+            self.fetch_status_label.setText("")
+            return
+        
+        if not metadata.title and not metadata.description:
+            reason = metadata.error or "页面没有标题和描述"
+            self.fetch_status_label.setText(f"❌ 未能获取网站信息: {reason}")
+            return
+        
+        if metadata.title and not self.name_input.text().strip():
+            self.name_input.setText(metadata.title[:200])
+        if metadata.description and not self.description_input.toPlainText().strip():
+            self.description_input.setPlainText(metadata.description)
+        self.fetch_status_label.setText("✅ 已自动填写网站信息，可以继续修改")
+    
     def get_website_data(self):
         """获取网站数据"""
         return {
@@ -202,13 +277,143 @@ class AddWebsiteDialog(QDialog):
             super().accept()
 
 
+class BookmarkImportOptionsDialog(QDialog):
+    """书签导入选项对话框（导入的网站统一使用的评分和可见性）"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📥 导入选项")
+        self.setModal(True)
+        
+        layout = QVBoxLayout()
+        layout.setSpacing(20)
+        layout.setContentsMargins(30, 30, 30, 30)
+        
+        form_layout = QFormLayout()
+        form_layout.setSpacing(15)
+        
+        self.rating_input = QSpinBox()
+        self.rating_input.setRange(1, 5)
+        self.rating_input.setValue(DEFAULT_RATING)
+        self.rating_input.setSuffix(" ⭐")
+        form_layout.addRow("⭐ 网站评分:", self.rating_input)
+        
+        self.is_private_checkbox = QCheckBox("仅自己可见")
+        self.is_private_checkbox.setChecked(DEFAULT_PRIVATE)
+        form_layout.addRow("🔒 隐私设置:", self.is_private_checkbox)
+        
+        layout.addLayout(form_layout)
+        
+        button_layout = QHBoxLayout()
+        
+        import_btn = QPushButton("📥 导入")
+        import_btn.clicked.connect(self.accept)
+        import_btn.setStyleSheet("QPushButton { background-color: #4CAF50; }")
+        
+        cancel_btn = QPushButton("❌ 取消")
+        cancel_btn.clicked.connect(self.reject)
+        cancel_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
+        
+        button_layout.addStretch()
+        button_layout.addWidget(import_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def get_options(self):
+        """获取导入选项"""
+        return {
+            'rating': self.rating_input.value(),
+            'is_private': self.is_private_checkbox.isChecked()
+        }
+
+
+class BookmarkImportWorker(QThread):
+    """后台书签导入线程，使用独立的数据库连接（瘦客户端模式下上传到服务器导入）"""
+    
+    progress = pyqtSignal(int, int)          # 进度百分比, 已解析条数
+    finished_import = pyqtSignal(object)     # ImportResult
+    
+    def __init__(self, sites, user_id, file_path, options=None, parent=None):
+        super().__init__(parent)
+        self.sites = sites
+        self.user_id = user_id
+        self.file_path = file_path
+        self.options = options or {}        # rating / is_private
+        self._cancelled = False
+    
+    def cancel(self):
+        """请求取消导入（已写入的批次会整体回滚）"""
+        self._cancelled = True
+    
+    def run(self):
+        try:
+            result = self.sites.import_bookmarks(
+                self.user_id, self.file_path,
+                progress_callback=lambda percent, stats: self.progress.emit(percent, stats.total),
+                is_cancelled=lambda: self._cancelled,
+                **self.options
+            )
+        finally:
+            db_manager = getattr(self.sites, 'db_manager', None)
+            if db_manager is not None:
+                db_manager.disconnect()
+        
+        self.finished_import.emit(result)
+
+
+class MetadataFetchWorker(QThread):
+    """后台获取网站标题、描述和图标的线程"""
+    
+    fetched = pyqtSignal(object)        # WebsiteMetadata，每完成一个网址发出一次
+    
+    # 运行中的线程保持引用，发起获取的窗口先关闭也不会回收正在运行的线程
+    _running = set()
+    
+    def __init__(self, urls, fetch_favicons=True):
+        super().__init__()
+        self.urls = list(urls)
+        self.fetch_favicons = fetch_favicons
+        self._cancelled = False
+        MetadataFetchWorker._running.add(self)
+        self.finished.connect(lambda: MetadataFetchWorker._running.discard(self))
+    
+    def cancel(self):
+        """请求取消尚未开始的网址"""
+        self._cancelled = True
+    
+    def run(self):
+        fetcher = MetadataFetcher(fetch_favicons=self.fetch_favicons)
+        try:
+            asyncio.run(fetcher.fetch_many(
+                self.urls, callback=self.fetched.emit, is_cancelled=lambda: self._cancelled
+            ))
+        except Exception as e:
+            print(f"❌ 获取网站信息失败: {e}")
+
+
 class UserWebsitesWindow(QWidget):
     """用户自定义网站管理窗口"""
     
-    def __init__(self, user_info, db_manager):
+    def __init__(self, user_info, db_manager=None, services=None):
         super().__init__()
         self.user_info = user_info
         self.db_manager = db_manager
+        self.services = services or Services(db_manager)
+        self.websites = []
+        self.website_counts = {'total': 0, 'public': 0}
+        
+        # 网站图标：已缓存的直接显示，缺少的在后台获取
+        self.favicon_cache = default_cache()
+        self.favicon_requested = set()
+        self.favicon_worker = None
+        
+        # 访问事件攒批写入
+        self.visit_flush_timer = QTimer(self)
+        self.visit_flush_timer.timeout.connect(self.services.sites.flush_visits)
+        self.visit_flush_timer.start(FLUSH_INTERVAL_MS)
+        
         self.init_ui()
         self.load_user_websites()
     
@@ -352,6 +557,11 @@ class UserWebsitesWindow(QWidget):
         add_btn.clicked.connect(self.add_website)
         add_btn.setStyleSheet("QPushButton { background-color: #4CAF50; }")
         
+        # 导入书签按钮
+        import_btn = QPushButton("📥 导入书签")
+        import_btn.clicked.connect(self.import_bookmarks)
+        import_btn.setStyleSheet("QPushButton { background-color: #FF9800; }")
+        
         # 刷新按钮
         refresh_btn = QPushButton("🔄 刷新")
         refresh_btn.clicked.connect(self.load_user_websites)
@@ -366,30 +576,42 @@ class UserWebsitesWindow(QWidget):
         toolbar_layout.addStretch()
         toolbar_layout.addWidget(self.search_input)
         toolbar_layout.addWidget(add_btn)
+        toolbar_layout.addWidget(import_btn)
         toolbar_layout.addWidget(refresh_btn)
         toolbar_layout.addWidget(close_btn)
         
         return toolbar_layout
     
+    @timed_action('user_websites.load_user_websites')
     def load_user_websites(self):
-        """加载用户网站"""
-        query = """
-        SELECT id, name, url, description, category, rating, is_private, created_at
-        FROM user_websites 
-        WHERE user_id = %s 
-        ORDER BY created_at DESC
-        """
+        """加载用户网站（列表与统计数量一次查询取回）"""
+        result = self.services.sites.list_websites(self.user_info['id'])
+        self.website_counts = {'total': result['total'], 'public': result['public']}
         
-        websites = self.db_manager.execute_query(query, (self.user_info['id'],))
+        self.websites = [website_row(website) for website in result['websites']]
+        self.populate_table(self.websites)
         
+        # 更新统计信息
+        self.update_stats()
+    
+    @timed_action('user_websites.populate_table')
+    def populate_table(self, websites):
+        """填充网站表格"""
         self.websites_table.setRowCount(len(websites))
+        missing_favicons = []
         
         for row, website in enumerate(websites):
-            website_id, name, url, description, category, rating, is_private, created_at = website
+            website_id, name, url, description, category, rating, is_private, created_at = website[:8]
             
             # 网站名称（可点击）
             name_item = QTableWidgetItem(name)
             name_item.setToolTip(f"描述: {description}\n地址: {url}")
+            name_item.setData(Qt.ItemDataRole.UserRole, url)
+            favicon_path = self.favicon_cache.favicon_path(url)
+            if favicon_path:
+                name_item.setIcon(QIcon(favicon_path))
+            elif url not in self.favicon_requested:
+                missing_favicons.append(url)
             self.websites_table.setItem(row, 0, name_item)
             
             # 分类
@@ -441,50 +663,75 @@ class UserWebsitesWindow(QWidget):
             
             self.websites_table.setCellWidget(row, 6, action_widget)
         
-        # 更新统计信息
+        self.fetch_favicons(missing_favicons)
+    
+    def fetch_favicons(self, urls):
+        """后台获取缺少的网站图标，获取到后再更新表格"""
+        urls = [url for url in urls if is_valid_url(url)]
+        if not urls or (self.favicon_worker and self.favicon_worker.isRunning()):
+            return
+        
+        self.favicon_requested.update(urls)
+        self.favicon_worker = MetadataFetchWorker(urls)
+        self.favicon_worker.fetched.connect(self.on_favicon_fetched)
+        self.favicon_worker.finished.connect(self.on_favicon_worker_finished)
+        self.favicon_worker.start()
+    
+    def on_favicon_fetched(self, metadata):
+        """把获取到的图标设置到对应的行"""
+        if not metadata.favicon_path:
+            return
+        icon = QIcon(metadata.favicon_path)
+        for row in range(self.websites_table.rowCount()):
+            item = self.websites_table.item(row, 0)
+            if item and item.data(Qt.ItemDataRole.UserRole) == metadata.url:
+                item.setIcon(icon)
+    
+    def on_favicon_worker_finished(self):
+        """获取期间新出现的网站（搜索、导入等）再补一轮"""
+        if not self.isVisible():
+            return
+        pending = []
+        for row in range(self.websites_table.rowCount()):
+            item = self.websites_table.item(row, 0)
+            url = item.data(Qt.ItemDataRole.UserRole) if item else None
+            if url and url not in self.favicon_requested:
+                pending.append(url)
+        self.fetch_favicons(pending)
+    
+    def refresh_view(self):
+        """根据内存中的数据刷新表格（不访问数据库）"""
+        if self.search_input.text().strip():
+            self.search_websites()
+        else:
+            self.populate_table(self.websites)
         self.update_stats()
     
     def update_stats(self):
         """更新统计信息"""
-        # 总网站数
-        total_query = "SELECT COUNT(*) FROM user_websites WHERE user_id = %s"
-        total_result = self.db_manager.execute_query(total_query, (self.user_info['id'],))
-        total_websites = total_result[0][0] if total_result else 0
-        
-        # 公开网站数
-        public_query = "SELECT COUNT(*) FROM user_websites WHERE user_id = %s AND is_private = FALSE"
-        public_result = self.db_manager.execute_query(public_query, (self.user_info['id'],))
-        public_websites = public_result[0][0] if public_result else 0
-        
-        # 私有网站数
+        total_websites = self.website_counts['total']
+        public_websites = self.website_counts['public']
         private_websites = total_websites - public_websites
         
         self.total_websites_label.setText(f"我的网站: {total_websites}")
         self.public_websites_label.setText(f"公开: {public_websites}")
         self.private_websites_label.setText(f"私有: {private_websites}")
     
+    def adjust_counts(self, total_delta, public_delta):
+        """增量维护统计数量"""
+        self.website_counts['total'] += total_delta
+        self.website_counts['public'] += public_delta
+    
+    @timed_action('user_websites.search_websites')
     def search_websites(self):
         """搜索网站"""
         keyword = self.search_input.text().strip()
         if not keyword:
-            self.load_user_websites()
+            self.populate_table(self.websites)
             return
         
-        query = """
-        SELECT id, name, url, description, category, rating, is_private, created_at
-        FROM user_websites 
-        WHERE user_id = %s AND (name ILIKE %s OR description ILIKE %s OR category ILIKE %s)
-        ORDER BY created_at DESC
-        """
-        
-        search_pattern = f"%{keyword}%"
-        websites = self.db_manager.execute_query(query, (
-            self.user_info['id'], search_pattern, search_pattern, search_pattern
-        ))
-        
-        # 更新表格显示（逻辑与load_user_websites相同）
-        self.websites_table.setRowCount(len(websites))
-        # ... 填充表格的代码 ...
+        websites = self.services.sites.search_websites(self.user_info['id'], keyword)
+        self.populate_table([website_row(website) for website in websites])
     
     def add_website(self):
         """添加网站"""
@@ -492,93 +739,144 @@ class UserWebsitesWindow(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             website_data = dialog.get_website_data()
             
-            # 插入数据库
-            insert_query = """
-            INSERT INTO user_websites (user_id, name, url, description, category, rating, is_private, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            if self.db_manager.execute_non_query(insert_query, (
-                self.user_info['id'],
-                website_data['name'],
-                website_data['url'],
-                website_data['description'],
-                website_data['category'],
-                website_data['rating'],
-                website_data['is_private'],
-                datetime.now()
-            )):
-                QMessageBox.information(self, "成功", "网站添加成功！")
-                self.load_user_websites()
+            success, message, website = self.services.sites.add_website(self.user_info['id'], website_data)
+            if success:
+                self.websites.insert(0, website_row(website))
+                self.adjust_counts(1, 0 if website_data['is_private'] else 1)
+                self.refresh_view()
+                QMessageBox.information(self, "成功", message)
                 
                 # 记录系统日志
                 self.log_action("添加网站", f"添加了网站: {website_data['name']}")
             else:
-                QMessageBox.critical(self, "失败", "网站添加失败，请稍后重试")
+                QMessageBox.warning(self, "提示", message)
+    
+    def import_bookmarks(self):
+        """从浏览器导出的书签文件批量导入网站"""
+        if getattr(self, 'import_worker', None) and self.import_worker.isRunning():
+            QMessageBox.information(self, "提示", "书签正在导入中，请稍候")
+            return
+        
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择书签文件", "",
+            "书签文件 (*.html *.htm *.csv *.json *.jsonl);;HTML 书签 (*.html *.htm);;CSV 文件 (*.csv);;JSON 文件 (*.json *.jsonl)"
+        )
+        if not file_path:
+            return
+        
+        options_dialog = BookmarkImportOptionsDialog(self)
+        if options_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        
+        self.import_progress = QProgressDialog("正在导入书签...", "取消", 0, 100, self)
+        self.import_progress.setWindowTitle("📥 导入书签")
+        self.import_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.import_progress.setMinimumDuration(0)
+        self.import_progress.setValue(0)
+        
+        # 导入在后台线程中进行，使用独立连接避免阻塞界面
+        self.import_worker = BookmarkImportWorker(
+            self.services.sites.clone(), self.user_info['id'], file_path, options_dialog.get_options(), self
+        )
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished_import.connect(self.on_import_finished)
+        self.import_progress.canceled.connect(self.import_worker.cancel)
+        self.import_worker.start()
+    
+    def on_import_progress(self, percent, parsed):
+        """更新导入进度"""
+        if self.import_progress.wasCanceled():
+            return
+        self.import_progress.setValue(percent)
+        self.import_progress.setLabelText(f"正在导入书签... 已解析 {parsed} 条")
+    
+    def on_import_finished(self, result):
+        """导入完成"""
+        self.import_progress.reset()
+        
+        if result.cancelled:
+            QMessageBox.information(self, "已取消", "书签导入已取消，未写入任何数据")
+            return
+        
+        if not result.success:
+            QMessageBox.critical(self, "失败", "\n".join(result.errors))
+            return
+        
+        self.load_user_websites()
+        QMessageBox.information(
+            self, "导入完成",
+            f"共解析 {result.total} 条书签\n"
+            f"✅ 成功导入: {result.imported}\n"
+            f"🔁 重复跳过: {result.duplicates}\n"
+            f"⚠️ 无效网址: {result.invalid}"
+        )
+        
+        # 记录系统日志
+        self.log_action("导入书签", f"导入了 {result.imported} 个网站")
     
     def edit_website(self, website_id):
         """编辑网站"""
         # 获取网站信息
-        query = "SELECT name, url, description, category, rating, is_private FROM user_websites WHERE id = %s"
-        result = self.db_manager.execute_query(query, (website_id,))
+        website_info = self.services.sites.get_website(self.user_info['id'], website_id)
         
-        if not result:
+        if not website_info:
             QMessageBox.warning(self, "错误", "网站信息不存在")
             return
         
-        website_info = result[0]
+        was_private = website_info['is_private']
         
         # 创建编辑对话框
         dialog = AddWebsiteDialog(self)
         dialog.setWindowTitle("✏️ 编辑推荐网站")
         
         # 填充现有数据
-        dialog.name_input.setText(website_info[0])
-        dialog.url_input.setText(website_info[1])
-        dialog.description_input.setPlainText(website_info[2])
-        dialog.category_input.setCurrentText(website_info[3])
-        dialog.rating_input.setValue(website_info[4])
-        dialog.is_private_checkbox.setChecked(website_info[5])
+        dialog.name_input.setText(website_info['name'])
+        dialog.url_input.setText(website_info['url'])
+        dialog.description_input.setPlainText(website_info['description'])
+        dialog.category_input.setCurrentText(website_info['category'])
+        dialog.rating_input.setValue(website_info['rating'])
+        dialog.is_private_checkbox.setChecked(website_info['is_private'])
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
             website_data = dialog.get_website_data()
             
-            # 更新数据库
-            update_query = """
-            UPDATE user_websites 
-            SET name = %s, url = %s, description = %s, category = %s, rating = %s, is_private = %s, updated_at = %s
-            WHERE id = %s
-            """
-            
-            if self.db_manager.execute_non_query(update_query, (
-                website_data['name'],
-                website_data['url'],
-                website_data['description'],
-                website_data['category'],
-                website_data['rating'],
-                website_data['is_private'],
-                datetime.now(),
-                website_id
-            )):
-                QMessageBox.information(self, "成功", "网站信息更新成功！")
-                self.load_user_websites()
+            success, message = self.services.sites.update_website(self.user_info['id'], website_id, website_data)
+            if success:
+                for index, website in enumerate(self.websites):
+                    if website[0] == website_id:
+                        self.websites[index] = (
+                            website_id,
+                            website_data['name'],
+                            website_data['url'],
+                            website_data['description'],
+                            website_data['category'],
+                            website_data['rating'],
+                            website_data['is_private'],
+                            website[7]
+                        )
+                        break
+                
+                # 隐私设置变化时调整公开数量
+                if was_private != website_data['is_private']:
+                    self.adjust_counts(0, 1 if was_private else -1)
+                self.refresh_view()
+                QMessageBox.information(self, "成功", message)
                 
                 # 记录系统日志
                 self.log_action("编辑网站", f"编辑了网站: {website_data['name']}")
             else:
-                QMessageBox.critical(self, "失败", "网站信息更新失败，请稍后重试")
+                QMessageBox.warning(self, "失败", message)
     
     def delete_website(self, website_id):
         """删除网站"""
         # 获取网站名称
-        query = "SELECT name FROM user_websites WHERE id = %s"
-        result = self.db_manager.execute_query(query, (website_id,))
+        website_info = self.services.sites.get_website(self.user_info['id'], website_id)
         
-        if not result:
+        if not website_info:
             QMessageBox.warning(self, "错误", "网站信息不存在")
             return
         
-        website_name = result[0][0]
+        website_name, was_private = website_info['name'], website_info['is_private']
         
         reply = QMessageBox.question(
             self, "确认删除", 
@@ -588,15 +886,17 @@ class UserWebsitesWindow(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            delete_query = "DELETE FROM user_websites WHERE id = %s"
-            if self.db_manager.execute_non_query(delete_query, (website_id,)):
-                QMessageBox.information(self, "成功", "网站删除成功！")
-                self.load_user_websites()
+            success, message = self.services.sites.delete_website(self.user_info['id'], website_id)
+            if success:
+                self.websites = [website for website in self.websites if website[0] != website_id]
+                self.adjust_counts(-1, 0 if was_private else -1)
+                self.refresh_view()
+                QMessageBox.information(self, "成功", message)
                 
                 # 记录系统日志
                 self.log_action("删除网站", f"删除了网站: {website_name}")
             else:
-                QMessageBox.critical(self, "失败", "网站删除失败，请稍后重试")
+                QMessageBox.critical(self, "失败", message)
     
     def visit_website(self, url, name):
         """访问网站"""
@@ -614,45 +914,22 @@ class UserWebsitesWindow(QWidget):
             print(f"❌ 打开网站失败: {e}")
             QMessageBox.warning(self, "错误", f"无法打开网站: {str(e)}")
     
+    @timed_action('user_websites.record_visit')
     def record_visit(self, website_name, website_url):
-        """记录网站访问"""
-        # 检查是否已有访问记录
-        check_query = """
-        SELECT id, visit_count FROM website_stats 
-        WHERE website_name = %s AND website_url = %s AND user_id = %s
-        """
-        
-        result = self.db_manager.execute_query(check_query, (website_name, website_url, self.user_info['id']))
-        
-        if result:
-            # 更新访问次数
-            stats_id, visit_count = result[0]
-            update_query = """
-            UPDATE website_stats 
-            SET visit_count = %s, last_visited = %s 
-            WHERE id = %s
-            """
-            self.db_manager.execute_non_query(update_query, (visit_count + 1, datetime.now(), stats_id))
-        else:
-            # 创建新的访问记录
-            insert_query = """
-            INSERT INTO website_stats (website_name, website_url, user_id, visit_count, last_visited)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            self.db_manager.execute_non_query(insert_query, (
-                website_name, website_url, self.user_info['id'], 1, datetime.now()
-            ))
+        """记录网站访问（访问事件攒批写入，访问次数立即累加）"""
+        self.services.sites.record_visit(self.user_info['id'], website_name, website_url)
+    
+    def closeEvent(self, event):
+        """关闭窗口前写入尚未提交的访问事件"""
+        self.visit_flush_timer.stop()
+        self.services.sites.flush_visits()
+        if self.favicon_worker:
+            self.favicon_worker.cancel()
+        super().closeEvent(event)
     
     def log_action(self, action, details):
         """记录系统日志"""
-        log_query = """
-        INSERT INTO system_logs (user_id, action, details, created_at)
-        VALUES (%s, %s, %s, %s)
-        """
-        
-        self.db_manager.execute_non_query(log_query, (
-            self.user_info['id'], action, details, datetime.now()
-        ))
+        self.services.sites.log_action(self.user_info['id'], action, details)
 
 
 if __name__ == "__main__":
@@ -671,8 +948,25 @@ if __name__ == "__main__":
         def execute_query(self, query, params=None):
             return []
         
+        def execute_prepared(self, name, params=None):
+            return []
+        
+        def execute_returning(self, query, params=None):
+            return []
+        
         def execute_non_query(self, query, params=None):
             return True
+        
+        def execute_batches(self, query, batches, template=None, page_size=500):
+            for _ in batches:
+                pass
+            return True
+        
+        def clone(self):
+            return self
+        
+        def disconnect(self):
+            pass
     
     window = UserWebsitesWindow(test_user, MockDBManager())
     window.show()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试用的本地 HTTP 服务
+asyncio.start_server 在后台线程的事件循环中运行，按路径返回预设的原始响应，
+同步测试（内部自己调用 asyncio.run）和异步测试都可以使用
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+REASONS = {
+    200: 'OK', 301: 'Moved Permanently', 302: 'Found', 304: 'Not Modified',
+    404: 'Not Found', 405: 'Method Not Allowed', 429: 'Too Many Requests',
+    500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+
+@dataclass
+class StubRequest:
+    """服务端收到的请求（头部名称为小写）"""
+    method: str
+    path: str
+    headers: Dict[str, str]
+
+
+def response(status, body=b'', headers=None, content_length=True) -> bytes:
+    """组装原始 HTTP 响应"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    head = f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+    headers = dict(headers or {})
+    if content_length and 'Content-Length' not in headers:
+        headers['Content-Length'] = str(len(body))
+    headers.setdefault('Connection', 'close')
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return (head + "\r\n").encode('latin-1') + body
+
+
+class StubServer:
+    """本地 HTTP 服务，routes 把路径映射到 async handler(request) -> 原始响应字节"""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.port = None
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._tasks = set()
+
+    def route(self, path, handler):
+        self.routes[path] = handler
+
+    def url(self, path='/'):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, '127.0.0.1', 0), self._loop
+        ).result(5)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc_info):
+        async def shutdown():
+            self._server.close()
+            # 还在处理中的慢请求（超时测试）直接取消
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._server.wait_closed()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            if len(request_line) < 2:
+                return
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1')
+                if line in ('\r\n', '\n', ''):
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            request = StubRequest(request_line[0], request_line[1], headers)
+            self.requests.append(request)
+            handler = self.routes.get(request.path.split('?')[0])
+
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                data = await handler(request) if handler else response(404)
+            finally:
+                self.active -= 1
+            writer.write(data)
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._tasks.discard(task)
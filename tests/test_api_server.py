@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API 服务器测试：会话、路由、权限、请求体上限、长连接和头像上传（业务服务和数据库用替身）
+"""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from src.core import api_server
+from src.core import api_client
+from src.core.api_client import RemoteServices
+from src.core.api_server import ApiServer, HttpError, Request, SessionStore, is_loopback
+from src.core.avatar_files import avatar_filename
+from src.core.services import AuthService
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'avatar-bytes'
+
+
+class FakeUsersDb:
+    """users 表替身：只支持个人信息相关的查询"""
+
+    def __init__(self, username='alice', avatar_path='user_1_1700000000.png'):
+        self.row = (username, avatar_path)
+        self.updates = []
+
+    def execute_query(self, query, params=None):
+        if 'username = %s AND id != %s' in query:
+            return []
+        return [self.row]
+
+    def execute_non_query(self, query, params=None):
+        self.updates.append(params)
+        return True
+
+
+class StubSites:
+    def list_websites(self, user_id):
+        return {'websites': [], 'total': 0, 'public': 0}
+
+    def flush_visits(self):
+        return True
+
+
+class StubStats:
+    def popular_sites(self, limit=10):
+        return []
+
+
+class StubAdmin:
+    def users(self):
+        return [{'id': 1, 'username': 'alice'}]
+
+    def websites(self):
+        raise RuntimeError("数据库不可用")
+
+
+class StubServices:
+    db_manager = None
+
+    def __init__(self):
+        self.db = FakeUsersDb()
+        self.auth = AuthService(self.db)
+        self.sites = StubSites()
+        self.stats = StubStats()
+        self.admin = StubAdmin()
+
+    def close(self):
+        pass
+
+
+USER = {'id': 1, 'username': 'alice', 'is_admin': False, 'avatar_path': 'user_1_1700000000.png'}
+ADMIN = {'id': 2, 'username': 'root', 'is_admin': True}
+
+
+# ---------------------------------------------------------------------------
+# 会话
+# ---------------------------------------------------------------------------
+
+def test_sessions_expire_unless_used():
+    sessions = SessionStore(ttl=0.2)
+    token = sessions.create(USER)
+
+    for _ in range(3):
+        time.sleep(0.1)
+        assert sessions.get(token) is USER       # 每次使用后顺延
+
+    time.sleep(0.3)
+    assert sessions.get(token) is None
+    assert len(sessions) == 0
+
+
+def test_remove_user_drops_all_of_their_sessions():
+    sessions = SessionStore()
+    tokens = [sessions.create(USER), sessions.create(dict(USER))]
+    admin_token = sessions.create(ADMIN)
+
+    sessions.remove_user(USER['id'])
+
+    assert [sessions.get(token) for token in tokens] == [None, None]
+    assert sessions.get(admin_token) is ADMIN
+
+
+def test_purge_removes_expired_sessions():
+    sessions = SessionStore(ttl=0.05)
+    sessions.create(USER)
+    time.sleep(0.1)
+    sessions.purge()
+    assert len(sessions) == 0
+
+
+# ---------------------------------------------------------------------------
+# 路由和权限
+# ---------------------------------------------------------------------------
+
+def dispatch(server, method, target, token=None, body=None):
+    headers = {'authorization': f"Bearer {token}"} if token else {}
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    return asyncio.run(server.dispatch(Request(method, target, headers, payload, '127.0.0.1')))
+
+
+@pytest.fixture
+def server():
+    server = ApiServer(StubServices(), workers=2)
+    yield server
+    server.executor.shutdown(wait=True)
+
+
+def test_unknown_path_and_method(server):
+    assert dispatch(server, 'GET', '/api/missing')[0] == 404
+    assert dispatch(server, 'GET', '/api/sites/abc')[0] == 404
+    assert dispatch(server, 'PATCH', '/api/sites')[0] == 405
+    assert dispatch(server, 'GET', '/api/health')[0] == 200
+
+
+def test_routes_require_login_and_admin(server):
+    user_token = server.sessions.create(USER)
+    admin_token = server.sessions.create(ADMIN)
+
+    assert dispatch(server, 'GET', '/api/sites')[0] == 401
+    assert dispatch(server, 'GET', '/api/sites', token='forged')[0] == 401
+    assert dispatch(server, 'GET', '/api/sites', token=user_token) == (
+        200, {'websites': [], 'total': 0, 'public': 0}
+    )
+    assert dispatch(server, 'GET', '/api/admin/users', token=user_token)[0] == 403
+    assert dispatch(server, 'GET', '/api/admin/users', token=admin_token)[0] == 200
+
+
+def test_logout_ends_the_session(server):
+    token = server.sessions.create(USER)
+    assert dispatch(server, 'POST', '/api/auth/logout', token=token)[0] == 200
+    assert dispatch(server, 'GET', '/api/sites', token=token)[0] == 401
+
+
+def test_handler_errors_become_json_errors(server):
+    token = server.sessions.create(USER)
+    status, payload = dispatch(server, 'GET', '/api/stats/popular?limit=x', token=token)
+    assert (status, payload) == (400, {'error': "参数 limit 必须是整数"})
+    assert dispatch(server, 'GET', '/api/admin/websites', token=server.sessions.create(ADMIN)) == (
+        500, {'error': "服务器内部错误"}
+    )
+
+    with pytest.raises(HttpError):
+        Request('POST', '/', {}, b'[1]', None).json()
+
+
+# ---------------------------------------------------------------------------
+# 头像
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def avatar_server(server, tmp_path, monkeypatch):
+    # 头像保存在相对路径 assets/avatars
+    monkeypatch.chdir(tmp_path)
+    return server
+
+
+def test_profile_rejects_avatar_paths_outside_the_avatar_dir(avatar_server):
+    token = avatar_server.sessions.create(dict(USER))
+    for avatar_path in ('../../config.ini', '/etc/passwd', 'README.md', avatar_filename(PNG, 'png')):
+        status, payload = dispatch(avatar_server, 'PUT', '/api/profile', token=token,
+                                   body={'avatar_path': avatar_path})
+        assert status == 200 and not payload['success'], avatar_path
+    assert dispatch(avatar_server, 'PUT', '/api/profile', token=token, body={'avatar_path': 1})[0] == 400
+    assert avatar_server.services.db.updates == []
+
+    # 原有的旧格式头像保持不变时可以保存
+    status, payload = dispatch(avatar_server, 'PUT', '/api/profile', token=token, body={'display_name': 'A'})
+    assert payload['success']
+
+
+def test_uploaded_avatar_can_be_used_and_downloaded(avatar_server, tmp_path):
+    token = avatar_server.sessions.create(dict(USER))
+    filename = avatar_filename(PNG, 'png')
+    content = base64.b64encode(PNG).decode('ascii')
+
+    status, payload = dispatch(avatar_server, 'POST', '/api/profile/avatar', token=token,
+                               body={'filename': filename, 'content': content})
+    assert (status, payload['success']) == (200, True)
+    assert (tmp_path / "assets" / "avatars" / filename).read_bytes() == PNG
+
+    status, payload = dispatch(avatar_server, 'PUT', '/api/profile', token=token, body={'avatar_path': filename})
+    assert payload['success']
+    assert avatar_server.services.db.updates[-1][3] == filename
+
+    assert dispatch(avatar_server, 'GET', f'/api/avatar?name={filename}', token=token) == (
+        200, {'filename': filename, 'content': content}
+    )
+    assert dispatch(avatar_server, 'GET', '/api/avatar?name=../config.ini', token=token)[0] == 404
+
+
+def test_avatar_upload_must_match_its_name(avatar_server):
+    token = avatar_server.sessions.create(dict(USER))
+    upload = {'filename': avatar_filename(b'other', 'png'), 'content': base64.b64encode(PNG).decode('ascii')}
+
+    assert dispatch(avatar_server, 'POST', '/api/profile/avatar', token=token, body=upload)[0] == 400
+    upload = {'filename': '../evil.png', 'content': base64.b64encode(PNG).decode('ascii')}
+    assert dispatch(avatar_server, 'POST', '/api/profile/avatar', token=token, body=upload)[0] == 400
+    upload = {'filename': avatar_filename(PNG, 'png'), 'content': 'not base64!'}
+    assert dispatch(avatar_server, 'POST', '/api/profile/avatar', token=token, body=upload)[0] == 400
+
+
+# ---------------------------------------------------------------------------
+# HTTP 连接
+# ---------------------------------------------------------------------------
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        return None
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, json.loads(body)
+
+
+def run_connection(requests):
+    """在真实的服务器上用一条连接依次发送原始请求，返回各响应和连接是否已被关闭"""
+    async def main():
+        server = await ApiServer(StubServices(), port=0, workers=2, flush_interval=3600).start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            responses = []
+            for raw in requests:
+                writer.write(raw)
+                await writer.drain()
+                responses.append(await read_response(reader))
+            closed = await asyncio.wait_for(reader.read(1), 0.5) == b''
+            writer.close()
+            return responses, closed
+        except asyncio.TimeoutError:
+            writer.close()
+            return responses, False
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_keep_alive_serves_several_requests_on_one_connection():
+    health = b"GET /api/health HTTP/1.1\r\nHost: x\r\n\r\n"
+    responses, closed = run_connection([health, health])
+
+    assert [(status, headers['connection']) for status, headers, _ in responses] == \
+        [(200, 'keep-alive'), (200, 'keep-alive')]
+    assert not closed
+
+
+def test_connection_close_and_http10_end_the_connection():
+    for raw in (b"GET /api/health HTTP/1.1\r\nConnection: close\r\n\r\n", b"GET /api/health HTTP/1.0\r\n\r\n"):
+        ((status, headers, _),), closed = run_connection([raw])
+        assert (status, headers['connection'], closed) == (200, 'close', True)
+
+
+def test_oversized_body_is_rejected_before_reading_it(monkeypatch):
+    monkeypatch.setattr(api_server, 'MAX_BODY_BYTES', 1024)
+    raw = b"POST /api/auth/login HTTP/1.1\r\nContent-Length: 1025\r\n\r\n"
+
+    ((status, headers, payload),), closed = run_connection([raw])
+
+    assert status == 413 and headers['connection'] == 'close' and closed
+    assert 'error' in payload
+
+
+def test_plain_http_is_only_for_loopback_hosts():
+    assert is_loopback('127.0.0.1') and is_loopback('localhost') and is_loopback('::1')
+    assert not is_loopback('0.0.0.0') and not is_loopback('192.168.1.10')
+
+
+# ---------------------------------------------------------------------------
+# 瘦客户端
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def running_server(tmp_path, monkeypatch):
+    """在后台线程的事件循环中运行服务器，供同步的 RemoteServices 调用"""
+    monkeypatch.chdir(tmp_path)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = ApiServer(StubServices(), port=0, workers=2, flush_interval=3600)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    yield server
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_thin_client_uploads_and_downloads_avatars(running_server, tmp_path, monkeypatch):
+    # 客户端使用自己的头像目录，服务器保存在工作目录下的 assets/avatars
+    client_dir = tmp_path / "client"
+    monkeypatch.setattr(api_client, 'AVATAR_DIR', str(client_dir))
+    remote = RemoteServices(f"http://127.0.0.1:{running_server.port}")
+    remote.client.token = running_server.sessions.create(dict(USER))
+    filename = avatar_filename(PNG, 'png')
+    client_dir.mkdir()
+    (client_dir / filename).write_bytes(PNG)
+
+    try:
+        assert remote.auth.upload_avatar(1, filename) == (True, "头像上传成功")
+        assert (tmp_path / "assets" / "avatars" / filename).read_bytes() == PNG
+        assert remote.auth.update_profile(1, 'alice', '', '', filename)[0]
+
+        # 另一台电脑本地没有该头像，登录后下载
+        (client_dir / filename).unlink()
+        assert remote.auth.fetch_avatar(filename)
+        assert (client_dir / filename).read_bytes() == PNG
+        assert not remote.auth.fetch_avatar('../config.ini')
+    finally:
+        remote.client.close()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步数据库访问测试：在事件循环外创建、并发查询、等待超时、归还时回滚和取消时关闭连接
+（psycopg 的异步连接用替身）
+"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+
+from src.core import async_db
+from src.core.async_db import AsyncDatabaseManager, _values_query
+
+IDLE, IN_TRANSACTION = 0, 2
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        connection = self.connection
+        connection.executed.append((query, params))
+        connection.info.transaction_status = IN_TRANSACTION
+        connection.server.running += 1
+        connection.server.peak = max(connection.server.peak, connection.server.running)
+        try:
+            await asyncio.sleep(connection.server.delay)
+        finally:
+            connection.server.running -= 1
+        self.description = [('number',)]
+
+    async def fetchall(self):
+        return [(self.connection.number,)]
+
+
+class FakeConnection:
+    def __init__(self, server, number):
+        self.server = server
+        self.number = number
+        self.closed = False
+        self.info = types.SimpleNamespace(transaction_status=IDLE)
+        self.executed = []
+        self.rollbacks = 0
+        self.cancels = 0
+
+    def cursor(self, name=None):
+        return FakeCursor(self)
+
+    async def commit(self):
+        self.info.transaction_status = IDLE
+
+    async def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = IDLE
+
+    async def cancel_safe(self):
+        self.cancels += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    """替代 psycopg 模块，记录建立的连接和同时执行的语句数"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.connections = []
+        self.running = 0
+        self.peak = 0
+        self.AsyncConnection = types.SimpleNamespace(connect=self.connect)
+
+    async def connect(self, **kwargs):
+        connection = FakeConnection(self, len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeServer()
+    monkeypatch.setattr(async_db, 'PSYCOPG_AVAILABLE', True)
+    monkeypatch.setattr(async_db, 'psycopg', fake, raising=False)
+    monkeypatch.setattr(async_db, 'TransactionStatus', types.SimpleNamespace(IDLE=IDLE), raising=False)
+    return fake
+
+
+def make_manager(size=2, timeout=5):
+    return AsyncDatabaseManager('localhost', 'db', 'user', 'secret', size=size, timeout=timeout)
+
+
+def test_manager_created_outside_event_loop(server):
+    # 在没有运行中的事件循环时创建（界面线程），之后在事件循环线程中使用
+    db = make_manager()
+    assert db.stats()['idle'] == 0
+
+    assert asyncio.run(db.execute_query("SELECT 1")) == [(0,)]
+    assert db.stats() == {'size': 2, 'open': 1, 'idle': 1, 'in_use': 0, 'waits': 0, 'wait_ms': 0.0}
+
+    asyncio.run(db.close())
+    assert server.connections[0].closed
+    assert db.stats()['open'] == 0
+
+
+def test_gather_runs_queries_on_separate_connections(server):
+    server.delay = 0.05
+    db = make_manager(size=3)
+
+    async def run():
+        return await db.gather(
+            first=db.execute_query("SELECT 1"),
+            second=db.execute_query("SELECT 2"),
+            third=db.execute_query("SELECT 3"),
+        )
+
+    results = asyncio.run(run())
+    assert sorted(results) == ['first', 'second', 'third']
+    assert sorted(row[0][0] for row in results.values()) == [0, 1, 2]
+    assert server.peak == 3
+
+
+def test_acquire_times_out_when_pool_is_exhausted(server, capsys):
+    db = make_manager(size=1, timeout=0.05)
+
+    async def run():
+        async with db.lease():
+            return await db.execute_query("SELECT 1"), await db.execute_non_query("UPDATE t SET a = 1")
+
+    assert asyncio.run(run()) == ([], False)
+    assert "等待数据库连接超过" in capsys.readouterr().out
+    assert db.stats()['in_use'] == 0
+
+
+def test_waiting_task_gets_released_connection(server):
+    db = make_manager(size=1)
+
+    async def run():
+        async with db.lease() as held:
+            waiter = asyncio.ensure_future(db.execute_query("SELECT 1"))
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+        assert await waiter == [(held.connection.number,)]
+
+    asyncio.run(run())
+    assert len(server.connections) == 1
+    assert db.stats()['waits'] == 1
+
+
+def test_release_rolls_back_open_transaction(server):
+    db = make_manager()
+
+    async def run():
+        async with db.lease() as pooled:
+            async with pooled.connection.cursor() as cursor:
+                await cursor.execute("SELECT 1")
+        return pooled.connection
+
+    connection = asyncio.run(run())
+    assert connection.rollbacks == 1
+    assert connection.info.transaction_status == IDLE
+    assert not connection.closed
+
+
+def test_cancelled_query_closes_connection(server):
+    server.delay = 10
+    db = make_manager(size=1)
+
+    async def run():
+        task = asyncio.ensure_future(db.execute_query("SELECT pg_sleep(10)"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # 被取消的连接不再复用，下一条查询重新连接
+        server.delay = 0
+        return await db.execute_query("SELECT 1")
+
+    assert asyncio.run(run()) == [(1,)]
+    first, second = server.connections
+    assert first.cancels == 1 and first.closed
+    assert not second.closed
+
+
+def test_values_query_expands_rows():
+    query, params = _values_query("INSERT INTO t (a, b) VALUES %s", None, [(1, 2), (3, 4)])
+    assert query == "INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)"
+    assert params == [1, 2, 3, 4]
+
+
+def test_event_loop_uses_selector_loop_on_windows(monkeypatch):
+    pytest.importorskip('PyQt6')
+    from src.ui import async_tasks
+
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    loop = async_tasks._new_event_loop()
+    try:
+        assert isinstance(loop, asyncio.SelectorEventLoop)
+    finally:
+        loop.close()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+头像缩略图测试（需要 PyQt6，只使用 QImage，不需要显示设备）
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from PyQt6.QtGui import QColor, QImage
+
+from src.core import avatar_cache
+from src.core.avatar_cache import file_digest, generate_thumbnails, render_rounded, thumbnail_path
+
+
+def save_image(path, width, height, color='#3366cc'):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(color))
+    assert image.save(str(path), "PNG")
+    return str(path)
+
+
+def test_file_digest_is_cached_by_mtime_and_size(tmp_path, monkeypatch):
+    path = save_image(tmp_path / "a.png", 10, 10)
+    digest = file_digest(path)
+    assert len(digest) == 32
+
+    calls = []
+    original = avatar_cache.hashlib.sha256
+    monkeypatch.setattr(avatar_cache.hashlib, 'sha256', lambda: calls.append(1) or original())
+    assert file_digest(path) == digest
+    assert calls == []
+
+    save_image(path, 12, 10, '#ff0000')
+    assert file_digest(path) != digest
+    assert calls == [1]
+
+
+def test_render_rounded_clips_corners():
+    image = QImage(80, 40, QImage.Format.Format_RGB32)
+    image.fill(QColor('#00ff00'))
+
+    rounded = render_rounded(image, 32)
+
+    assert (rounded.width(), rounded.height()) == (32, 32)
+    assert rounded.pixelColor(0, 0).alpha() == 0
+    assert rounded.pixelColor(16, 16).alpha() == 255
+    assert rounded.pixelColor(16, 16).green() == 255
+
+
+def test_generate_thumbnails_writes_each_size_once(tmp_path):
+    source = save_image(tmp_path / "avatar.png", 600, 400)
+    thumbs = str(tmp_path / "thumbs")
+
+    paths = generate_thumbnails(source, sizes=(32, 120), thumbnail_dir=thumbs)
+
+    digest = file_digest(source)
+    assert paths == {size: thumbnail_path(digest, size, thumbs) for size in (32, 120)}
+    for size, path in paths.items():
+        image = QImage(path)
+        assert (image.width(), image.height()) == (size, size)
+
+    # 已存在的缩略图不会重新生成
+    mtimes = {path: os.path.getmtime(path) for path in paths.values()}
+    generate_thumbnails(source, sizes=(32, 120), thumbnail_dir=thumbs)
+    assert {path: os.path.getmtime(path) for path in paths.values()} == mtimes
+
+
+def test_unreadable_source_is_rejected(tmp_path):
+    source = tmp_path / "broken.png"
+    source.write_bytes(b"not an image")
+    with pytest.raises(ValueError):
+        generate_thumbnails(str(source), thumbnail_dir=str(tmp_path / "thumbs"))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+头像存储测试：按内容哈希保存、缩小尺寸和孤立文件清理（需要 PyQt6，数据库用替身）
+"""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from PyQt6.QtGui import QColor, QImage
+
+from src.core.avatar_cache import THUMBNAIL_SIZES, file_digest
+from src.core.avatar_store import CONTENT_NAME_PATTERN, collect_orphan_avatars, process_avatar
+
+
+def save_image(path, width, height, image_format=QImage.Format.Format_RGB32):
+    image = QImage(width, height, image_format)
+    image.fill(QColor(0, 0, 255, 128))
+    assert image.save(str(path), "PNG")
+    return str(path)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # process_avatar 把缩略图写到相对路径 assets/avatars/thumbs
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_process_avatar_is_content_addressed_and_downscaled(workdir):
+    source = save_image(workdir / "upload.png", 2000, 1000)
+    avatar_dir = str(workdir / "avatars")
+
+    name = process_avatar(source, avatar_dir)
+    again = process_avatar(source, avatar_dir)
+
+    match = CONTENT_NAME_PATTERN.match(name)
+    assert match and match.group(2) == 'jpg'
+    assert again == name
+    assert os.listdir(avatar_dir) == [name]
+
+    image = QImage(os.path.join(avatar_dir, name))
+    assert (image.width(), image.height()) == (512, 256)
+    for size in THUMBNAIL_SIZES:
+        assert os.path.exists(os.path.join("assets", "avatars", "thumbs", f"{match.group(1)}_{size}.png"))
+
+
+def test_transparent_avatar_is_saved_as_png(workdir):
+    source = save_image(workdir / "upload.png", 64, 64, QImage.Format.Format_ARGB32)
+    assert process_avatar(source, str(workdir / "avatars")).endswith('.png')
+
+
+def test_unreadable_upload_is_rejected(workdir):
+    source = workdir / "upload.png"
+    source.write_bytes(b"not an image")
+    with pytest.raises(ValueError):
+        process_avatar(str(source), str(workdir / "avatars"))
+
+
+class FakeDbManager:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute_query(self, query, params=None):
+        return self.rows
+
+
+def touch(path, age=0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(path.name.encode())
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_collect_orphan_avatars(tmp_path):
+    avatars = tmp_path / "avatars"
+    thumbs = tmp_path / "thumbs"
+    kept, orphan = 'a' * 32, 'b' * 32
+    old = 2 * 3600
+
+    touch(avatars / f"avatar_{kept}.png", old)
+    touch(avatars / f"avatar_{orphan}.jpg", old)
+    touch(avatars / f"avatar_{'c' * 32}.png")                 # 刚上传，尚未保存资料
+    touch(avatars / "default_avatar.png", old)
+    touch(avatars / "notes.txt", old)
+    legacy = touch(avatars / "user_1_1700000000.png", old)
+    orphan_legacy = touch(avatars / "user_2_1700000000.png", old)
+    touch(thumbs / f"{kept}_32.png", old)
+    touch(thumbs / f"{orphan}_32.png", old)
+    orphan_legacy_digest = file_digest(str(orphan_legacy))
+    touch(thumbs / f"{file_digest(str(legacy))}_120.png", old)
+    touch(thumbs / f"{orphan_legacy_digest}_120.png", old)
+
+    db = FakeDbManager([(f"assets/avatars/avatar_{kept}.png",), ("user_1_1700000000.png",)])
+    removed = collect_orphan_avatars(db, str(avatars), str(thumbs), grace_seconds=3600)
+
+    assert sorted(removed) == sorted([
+        f"avatar_{orphan}.jpg",
+        "user_2_1700000000.png",
+        f"thumbs/{orphan}_32.png",
+        f"thumbs/{orphan_legacy_digest}_120.png",
+    ])
+    assert sorted(os.listdir(avatars)) == sorted([
+        f"avatar_{kept}.png", f"avatar_{'c' * 32}.png", "default_avatar.png", "notes.txt", "user_1_1700000000.png"
+    ])
+
+
+def test_collect_is_skipped_without_references(tmp_path):
+    avatars = tmp_path / "avatars"
+    touch(avatars / f"avatar_{'b' * 32}.png", 2 * 3600)
+
+    assert collect_orphan_avatars(FakeDbManager([]), str(avatars), str(tmp_path / "thumbs")) == []
+    assert os.listdir(avatars) == [f"avatar_{'b' * 32}.png"]
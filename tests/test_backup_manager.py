@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+备份与恢复测试
+备份清单、增量高水位、备份链和校验和用数据库替身测试；
+完整的备份 → 增量 → 恢复流程需要本地 PostgreSQL：设置 TEST_DB_NAME（以及可选的
+TEST_DB_HOST / TEST_DB_PORT / TEST_DB_USER / TEST_DB_PASSWORD）后运行，
+测试会删除并重建相关数据表，请使用专用的测试库
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.backup_manager import HWM_OVERLAP, MANIFEST_NAME, TABLES_BY_NAME, BackupManager
+
+
+# ---------------------------------------------------------------------------
+# 数据库替身
+# ---------------------------------------------------------------------------
+
+class FakeBackupDb:
+    """按表保存 (行, 高水位) 的替身，记录增量查询的起点"""
+
+    def __init__(self, relkind='p'):
+        now = datetime(2026, 3, 1, 12, 0)
+        self.relkind = relkind
+        self.tables = {name: [] for name in TABLES_BY_NAME}
+        self.tables['users'] = [((1, 'alice', 'x', None, None, None, False, now, now, now), now)]
+        self.tables['system_logs'] = [((1, 1, 'login', '', '127.0.0.1', now), now)]
+        self.since = {}
+        self.writes = []
+
+    def iter_query(self, query, params=None, itersize=None):
+        table = query.split(' FROM ')[1].split()[0]
+        if '__hwm' not in query:
+            for row, _ in self.tables[table]:
+                yield (row[0],)
+            return
+        since = datetime.fromisoformat(params[0]) if params else None
+        self.since[table] = since
+        for row, hwm in self.tables[table]:
+            if since is None or hwm >= since:
+                yield row + (hwm,)
+
+    def execute_query(self, query, params=None):
+        return [(self.relkind,)]
+
+    def execute_batches(self, query, batches, template=None, page_size=500):
+        self.writes.append(query)
+        return True
+
+
+def make_backups(tmp_path, db):
+    manager = BackupManager(db, str(tmp_path / "backups"))
+    full = manager.backup(full=True)
+
+    # 时间戳早于上次高水位、但在重叠窗口内提交的行
+    late = datetime(2026, 3, 1, 11, 55)
+    db.tables['system_logs'].append(((2, 1, 'logout', '', '127.0.0.1', late), late))
+    incremental = manager.backup()
+    return manager, full, incremental
+
+
+def test_incremental_backup_rereads_the_overlap_window(tmp_path):
+    db = FakeBackupDb()
+    manager, full, incremental = make_backups(tmp_path, db)
+
+    assert full.success and incremental.success
+    assert not incremental.full
+    parent_hwm = datetime.fromisoformat(manager.get_backup(full.backup_id)['tables']['system_logs']['hwm'])
+    assert db.since['system_logs'] == parent_hwm - HWM_OVERLAP
+    assert incremental.rows['system_logs'] == 2
+
+
+def test_chain_starts_at_the_latest_full_backup(tmp_path):
+    manager, full, incremental = make_backups(tmp_path, FakeBackupDb())
+    newer_full = manager.backup(full=True)
+
+    assert [m['backup_id'] for m in manager.get_chain(incremental.backup_id)] == \
+        [full.backup_id, incremental.backup_id]
+    assert [m['backup_id'] for m in manager.get_chain()] == [newer_full.backup_id]
+
+
+def test_restore_rejects_broken_chain(tmp_path):
+    manager, full, incremental = make_backups(tmp_path, FakeBackupDb())
+    shutil.rmtree(full.path)
+
+    result = manager.restore(incremental.backup_id)
+
+    assert not result.success
+    assert "备份链不完整" in result.errors[0]
+
+
+def test_restore_rejects_corrupted_file_before_writing(tmp_path):
+    db = FakeBackupDb()
+    manager, full, incremental = make_backups(tmp_path, db)
+    with open(os.path.join(full.path, 'users.jsonl.gz'), 'ab') as f:
+        f.write(b'garbage')
+
+    result = manager.restore()
+
+    assert not result.success
+    assert any("users.jsonl.gz 校验和不匹配" in error for error in result.errors)
+    assert db.writes == []
+
+
+def test_manifest_is_written_last(tmp_path):
+    db = FakeBackupDb()
+    manager = BackupManager(db, str(tmp_path / "backups"))
+    result = manager.backup()
+
+    with open(os.path.join(result.path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['full']
+    assert manager.verify(manifest) == []
+
+
+@pytest.mark.parametrize('relkind, expected', [('p', 'ON CONFLICT (id, created_at)'), ('r', 'ON CONFLICT (id)')])
+def test_system_logs_conflict_target_follows_table_kind(relkind, expected):
+    manager = BackupManager(FakeBackupDb(relkind))
+    columns = manager._conflict_columns(manager.db_manager, TABLES_BY_NAME['system_logs'])
+    assert f"ON CONFLICT ({', '.join(columns)})" == expected
+    assert manager._conflict_columns(manager.db_manager, TABLES_BY_NAME['users']) == ('id',)
+
+
+# ---------------------------------------------------------------------------
+# 本地 PostgreSQL
+# ---------------------------------------------------------------------------
+
+PLAIN_SYSTEM_LOGS_SQL = """
+CREATE TABLE system_logs (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    action VARCHAR(100) NOT NULL,
+    details TEXT,
+    ip_address VARCHAR(45),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@pytest.fixture(params=['partitioned', 'plain'])
+def pg_db(request):
+    pytest.importorskip('psycopg2')
+    if not os.environ.get('TEST_DB_NAME'):
+        pytest.skip("未配置测试数据库（TEST_DB_NAME）")
+
+    from scripts.init_database_enhanced import create_enhanced_tables
+    from src.core.auth_system import DatabaseManager
+    from src.core.log_partitions import LogPartitionManager
+
+    db = DatabaseManager(
+        os.environ.get('TEST_DB_HOST', 'localhost'), os.environ['TEST_DB_NAME'],
+        os.environ.get('TEST_DB_USER', 'postgres'), os.environ.get('TEST_DB_PASSWORD', ''),
+        int(os.environ.get('TEST_DB_PORT', '5432'))
+    )
+    if not db.connect():
+        pytest.skip("无法连接测试数据库")
+
+    assert db.execute_non_query("DROP TABLE IF EXISTS system_logs, website_stats, user_websites, users CASCADE")
+    assert db.execute_non_query("DROP SEQUENCE IF EXISTS system_logs_id_seq")
+    assert create_enhanced_tables(db.connection)
+    if request.param == 'partitioned':
+        assert LogPartitionManager(db).setup()
+    else:
+        assert db.execute_non_query(PLAIN_SYSTEM_LOGS_SQL)
+
+    now = datetime.now()
+    db.execute_non_query(
+        "INSERT INTO users (id, username, password_hash, updated_at) VALUES (1, 'alice', 'x', %s), "
+        "(2, 'bob', 'x', %s)", (now, now)
+    )
+    db.execute_non_query(
+        "INSERT INTO user_websites (id, user_id, name, url, updated_at) VALUES "
+        "(10, 1, 'A', 'https://a.example/', %s), (11, 2, 'B', 'https://b.example/', %s)", (now, now)
+    )
+    db.execute_non_query(
+        "INSERT INTO website_stats (id, website_name, website_url, user_id, visit_count, last_visited) "
+        "VALUES (1, 'A', 'https://a.example/', 1, 3, %s)", (now,)
+    )
+    db.execute_non_query(
+        "INSERT INTO system_logs (id, user_id, action, created_at) VALUES (1, 1, 'login', %s)", (now,)
+    )
+    yield db
+    db.disconnect()
+
+
+def snapshot(db):
+    return {
+        'users': db.execute_query("SELECT id, username FROM users ORDER BY id"),
+        'user_websites': db.execute_query("SELECT id, user_id, name, url FROM user_websites ORDER BY id"),
+        'website_stats': db.execute_query("SELECT id, visit_count FROM website_stats ORDER BY id"),
+        'system_logs': db.execute_query("SELECT id, action FROM system_logs ORDER BY id"),
+    }
+
+
+def test_full_incremental_restore_round_trip(pg_db, tmp_path):
+    manager = BackupManager(pg_db, str(tmp_path / "backups"))
+    assert manager.backup(full=True).success
+
+    now = datetime.now() + timedelta(seconds=1)
+    pg_db.execute_non_query("UPDATE user_websites SET name = 'A2', updated_at = %s WHERE id = 10", (now,))
+    pg_db.execute_non_query(
+        "INSERT INTO user_websites (id, user_id, name, url, updated_at) VALUES (12, 1, 'C', 'https://c.example/', %s)",
+        (now,)
+    )
+    pg_db.execute_non_query("DELETE FROM user_websites WHERE id = 11")
+    pg_db.execute_non_query(
+        "INSERT INTO system_logs (id, user_id, action, created_at) VALUES (2, 1, 'logout', %s)", (now,)
+    )
+    incremental = manager.backup()
+    assert incremental.success and not incremental.full
+    expected = snapshot(pg_db)
+
+    pg_db.execute_non_query("UPDATE user_websites SET name = 'broken' WHERE id = 10")
+    pg_db.execute_non_query("DELETE FROM system_logs WHERE id = 2")
+    pg_db.execute_non_query("UPDATE website_stats SET visit_count = 0")
+
+    result = manager.restore()
+
+    assert result.success, result.errors
+    assert result.chain[-1] == incremental.backup_id and len(result.chain) == 2
+    assert snapshot(pg_db) == expected
+
+
+def test_restore_removes_rows_created_after_the_backup(pg_db, tmp_path):
+    manager = BackupManager(pg_db, str(tmp_path / "backups"))
+    assert manager.backup(full=True).success
+    expected = snapshot(pg_db)
+
+    pg_db.execute_non_query("INSERT INTO users (id, username, password_hash) VALUES (3, 'carol', 'x')")
+    pg_db.execute_non_query(
+        "INSERT INTO user_websites (id, user_id, name, url) VALUES (13, 3, 'D', 'https://d.example/')"
+    )
+    pg_db.execute_non_query("INSERT INTO system_logs (id, user_id, action) VALUES (3, 3, 'login')")
+
+    result = manager.restore()
+
+    assert result.success, result.errors
+    assert snapshot(pg_db) == expected
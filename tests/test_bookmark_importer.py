@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+书签导入测试：HTML / CSV / JSON / JSON Lines 解析和导入统计（数据库用替身）
+"""
+
+import io
+import json
+
+import pytest
+
+from src.core import bookmark_importer
+from src.core.bookmark_importer import (
+    DEFAULT_CATEGORY, Bookmark, BookmarkImporter, iter_csv_bookmarks, iter_html_bookmarks,
+    iter_json_bookmarks
+)
+from src.core.url_utils import url_hash
+
+NETSCAPE_HTML = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<DL><p>
+    <DT><A HREF="https://top.example/">顶层</A>
+    <DT><H3>开发</H3>
+    <DL><p>
+        <DT><A HREF="https://python.org/">Python</A>
+        <DD>编程语言
+        <DT><H3>数据库</H3>
+        <DL><p>
+            <DT><A HREF="https://postgresql.org/">PostgreSQL</A>
+        </DL><p>
+        <DT><A HREF="https://docs.python.org/">文档</A>
+    </DL><p>
+    <DT><A HREF="https://after.example/">之后</A>
+</DL><p>
+"""
+
+
+def parse(iterator, text):
+    return [(b.name, b.url, b.category, b.description) for b in iterator(io.StringIO(text))]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # 小块读取，覆盖跨块边界的情况
+    monkeypatch.setattr(bookmark_importer, 'READ_CHUNK_SIZE', 7)
+
+
+def test_html_nested_folders_and_descriptions(small_chunks):
+    assert parse(iter_html_bookmarks, NETSCAPE_HTML) == [
+        ('顶层', 'https://top.example/', '', ''),
+        ('Python', 'https://python.org/', '开发', '编程语言'),
+        ('PostgreSQL', 'https://postgresql.org/', '数据库', ''),
+        ('文档', 'https://docs.python.org/', '开发', ''),
+        ('之后', 'https://after.example/', '', ''),
+    ]
+
+
+def test_html_empty_folder_title_keeps_parent_folder():
+    html = """<DL><DT><H3>工具</H3><DL>
+        <DT><H3></H3><DL><DT><A HREF="https://a.example/">A</A></DL>
+        <DT><A HREF="https://b.example/">B</A>
+    </DL></DL>"""
+    assert [(name, category) for name, _, category, _ in parse(iter_html_bookmarks, html)] == [
+        ('A', '工具'), ('B', '工具')
+    ]
+
+
+def test_html_closing_dl_only_closes_its_own_level():
+    html = """</DL><DL><DT><H3>工具</H3><DL>
+        <DL><DT><A HREF="https://a.example/">A</A></DL>
+        <DT><A HREF="https://b.example/">B</A>
+    </DL></DL></DL><DT><A HREF="https://c.example/">C</A>"""
+    assert [(name, category) for name, _, category, _ in parse(iter_html_bookmarks, html)] == [
+        ('A', '工具'), ('B', '工具'), ('C', '')
+    ]
+
+
+def test_csv_header_aliases():
+    text = "Title,HREF,Description,Folder\n示例,https://a.example/, 说明 ,工作\n,https://b.example/,,\n"
+    assert parse(iter_csv_bookmarks, text) == [
+        ('示例', 'https://a.example/', '工作', '说明'),
+        ('', 'https://b.example/', '', ''),
+    ]
+
+
+def test_json_array_streams_across_chunks(small_chunks):
+    text = json.dumps([{'title': 'A', 'url': 'https://a.example/'},
+                       {'name': 'B', 'href': 'https://b.example/', 'folder': 'F'}], ensure_ascii=False)
+    assert parse(iter_json_bookmarks, "  " + text) == [
+        ('A', 'https://a.example/', '', ''),
+        ('B', 'https://b.example/', 'F', ''),
+    ]
+
+
+def test_json_lines(small_chunks):
+    text = '{"title": "A", "url": "https://a.example/"}\n\n{"title": "B", "uri": "https://b.example/"}\n'
+    assert parse(iter_json_bookmarks, text) == [
+        ('A', 'https://a.example/', '', ''),
+        ('B', 'https://b.example/', '', ''),
+    ]
+
+
+def test_json_nested_tree(small_chunks):
+    tree = {'roots': {'bookmark_bar': {'name': '书签栏', 'children': [
+        {'name': 'A', 'url': 'https://a.example/'},
+        {'name': '子目录', 'children': [{'name': 'B', 'url': 'https://b.example/'}]},
+    ]}}}
+    assert parse(iter_json_bookmarks, json.dumps(tree, ensure_ascii=False, indent=2)) == [
+        ('A', 'https://a.example/', '书签栏', ''),
+        ('B', 'https://b.example/', '子目录', ''),
+    ]
+
+
+def test_json_rejects_other_values():
+    with pytest.raises(ValueError):
+        list(iter_json_bookmarks(io.StringIO('"just a string"')))
+
+
+class FakeDbManager:
+    def __init__(self, existing=()):
+        self.existing = [(key,) for key in existing]
+        self.rows = []
+
+    def execute_query(self, query, params=None):
+        return self.existing
+
+    def execute_batches(self, query, batches, page_size=None, template=None):
+        for batch in batches:
+            self.rows.extend(batch)
+        return True
+
+
+def test_import_counts_duplicates_invalid_and_applies_options(tmp_path):
+    path = tmp_path / "bookmarks.csv"
+    path.write_text("name,url\nA,https://a.example/\nA2,https://A.example\nbad,ftp://x\nB,https://b.example/\n",
+                    encoding='utf-8')
+    db = FakeDbManager(existing=[url_hash('https://b.example/')])
+
+    result = BookmarkImporter(db, 1, rating=3, is_private=False).import_file(str(path))
+
+    assert (result.total, result.imported, result.duplicates, result.invalid) == (4, 1, 2, 1)
+    assert result.success
+    (row,) = db.rows
+    assert row[:3] == (1, 'A', 'https://a.example/')
+    assert row[4:7] == (DEFAULT_CATEGORY, 3, False)
+
+
+def test_validate_falls_back_to_host_name():
+    row = BookmarkImporter(FakeDbManager(), 1).validate(Bookmark(name=" ", url="https://host.example/x"))
+    assert row[1] == 'host.example'
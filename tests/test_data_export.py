@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据导出测试（数据库用替身，按表返回预设的行）
+"""
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from src.core.data_export import DataExporter
+
+
+class FakeDbManager:
+    def __init__(self, tables, fail_table=None):
+        self.tables = tables
+        self.fail_table = fail_table
+
+    def execute_query(self, query, params=None):
+        table = query.rsplit(' ', 1)[-1]
+        return [(len(self.tables.get(table, [])),)]
+
+    def iter_query(self, query, itersize=None):
+        table = query.split(' FROM ')[1].split()[0]
+        for index, row in enumerate(self.tables.get(table, [])):
+            if table == self.fail_table and index == 1:
+                raise RuntimeError("连接中断")
+            yield row
+
+
+USERS = [
+    (1, 'alice', 'a@example.com', '爱丽丝', None, True, datetime(2026, 1, 1), None, None),
+    (2, 'bob', None, None, None, False, datetime(2026, 1, 2), None, None),
+    (3, 'carol', None, None, None, False, datetime(2026, 1, 3), None, None),
+]
+LOGS = [
+    (1, 1, 'login', '', '127.0.0.1', datetime(2026, 1, 1)),
+    (2, 1, 'logout', '', '127.0.0.1', datetime(2026, 1, 1)),
+]
+
+
+def test_exports_jsonl_in_batches(tmp_path):
+    exporter = DataExporter(FakeDbManager({'users': USERS}), str(tmp_path), tables=['users'], itersize=2)
+    progress = []
+
+    result = exporter.export(lambda percent, table, rows: progress.append(percent))
+
+    assert result.success
+    assert result.rows == {'users': 3}
+    with gzip.open(result.files['users'], 'rt', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['username'] for row in rows] == ['alice', 'bob', 'carol']
+    assert rows[0]['created_at'] == '2026-01-01T00:00:00'
+    assert 'password_hash' not in rows[0]
+    assert progress[-1] == 100
+
+
+def test_exports_csv_with_header(tmp_path):
+    exporter = DataExporter(FakeDbManager({'system_logs': LOGS}), str(tmp_path), 'csv', tables=['system_logs'])
+
+    result = exporter.export()
+
+    with gzip.open(result.files['system_logs'], 'rt', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'user_id', 'action', 'details', 'ip_address', 'created_at']
+    assert rows[2][2] == 'logout'
+
+
+def test_unknown_table_or_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DataExporter(FakeDbManager({}), str(tmp_path), tables=['users', 'users; DROP TABLE users'])
+    with pytest.raises(ValueError):
+        DataExporter(FakeDbManager({}), str(tmp_path), 'xml')
+    assert os.listdir(tmp_path) == []
+
+
+def test_failure_removes_the_whole_export(tmp_path):
+    db = FakeDbManager({'users': USERS, 'system_logs': LOGS}, fail_table='system_logs')
+    exporter = DataExporter(db, str(tmp_path), tables=['users', 'system_logs'])
+
+    result = exporter.export()
+
+    assert not result.success
+    assert "连接中断" in result.errors[0]
+    assert result.files == {}
+    assert os.listdir(tmp_path) == []
+
+
+def test_cancel_removes_the_whole_export(tmp_path):
+    exporter = DataExporter(FakeDbManager({'users': USERS}), str(tmp_path), tables=['users'], itersize=1)
+
+    result = exporter.export(is_cancelled=lambda: True)
+
+    assert result.cancelled
+    assert os.listdir(tmp_path) == []
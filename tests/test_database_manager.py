@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库管理器测试（连接用替身，不需要 PostgreSQL）
+"""
+
+from src.core.auth_system import DatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def execute(self, sql, params=None):
+        if self.connection.error:
+            raise RuntimeError(self.connection.error)
+        self.connection.statements.append((sql, params))
+        if 'RETURNING' in sql or sql.startswith('EXECUTE'):
+            self.description = [(name,) for name in self.connection.columns]
+
+    def fetchall(self):
+        return list(self.connection.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=(), columns=('id',), error=None):
+        self.rows = rows
+        self.columns = columns
+        self.error = error
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def make_manager(connection):
+    manager = DatabaseManager('localhost', 'test', 'test', 'test')
+    manager.connection = connection
+    return manager
+
+
+def test_execute_returning_commits_and_returns_new_id():
+    connection = FakeConnection(rows=[(42,)])
+    manager = make_manager(connection)
+
+    result = manager.execute_returning("INSERT INTO user_websites (name) VALUES (%s) RETURNING id", ('a',))
+
+    assert result == [(42,)]
+    assert connection.commits == 1
+    assert connection.rollbacks == 0
+
+
+def test_execute_returning_rolls_back_on_error():
+    connection = FakeConnection(error="duplicate key")
+    manager = make_manager(connection)
+
+    assert manager.execute_returning("INSERT INTO t VALUES (1) RETURNING id") == []
+    assert connection.rollbacks == 1
+    assert connection.commits == 0
+
+
+def test_list_query_carries_counts_on_every_row():
+    columns = ('id', 'name', 'url', 'description', 'category', 'rating', 'is_private', 'created_at',
+               'total_count', 'public_count')
+    rows = [(1, 'a', 'https://a', '', 'x', 5, False, None, 2, 1),
+            (2, 'b', 'https://b', '', 'x', 5, True, None, 2, 1)]
+    manager = make_manager(FakeConnection(rows=rows, columns=columns))
+
+    result = manager.execute_prepared('user_websites_with_counts', (7,))
+
+    assert [(row.total_count, row.public_count) for row in result] == [(2, 1), (2, 1)]
+    assert tuple(result[1][:8]) == rows[1][:8]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库连接池测试：按需创建、复用、等待超时和归还时重置连接状态（DatabaseManager 用替身）
+"""
+
+import threading
+
+import pytest
+
+from src.core.db_pool import TRANSACTION_STATUS_IDLE, PooledDatabaseManager, PoolTimeout
+
+IN_TRANSACTION = 2
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+
+class FakeManager:
+    def __init__(self, number):
+        self.number = number
+        self.connection = FakeConnection()
+        self.disconnects = 0
+
+    def execute_query(self, query, params=None):
+        return [(self.number,)]
+
+    def disconnect(self):
+        self.disconnects += 1
+        self.connection = None
+
+
+class FakeTemplate:
+    def __init__(self):
+        self.clones = []
+
+    def clone(self):
+        manager = FakeManager(len(self.clones))
+        self.clones.append(manager)
+        return manager
+
+
+def test_connections_are_created_on_demand_and_reused():
+    template = FakeTemplate()
+    pool = PooledDatabaseManager(template, size=3)
+
+    assert pool.execute_query("SELECT 1") == [(0,)]
+    assert pool.execute_query("SELECT 1") == [(0,)]
+    with pool.lease() as first, pool.lease() as second:
+        assert (first.number, second.number) == (0, 1)
+        assert pool.stats()['in_use'] == 2
+
+    assert len(template.clones) == 2
+    assert pool.stats() == {'size': 3, 'open': 2, 'idle': 2, 'in_use': 0, 'waits': 0, 'wait_ms': 0.0}
+
+
+def test_acquire_times_out_when_pool_is_exhausted(capsys):
+    pool = PooledDatabaseManager(FakeTemplate(), size=1, timeout=0.05)
+
+    with pool.lease():
+        with pytest.raises(PoolTimeout):
+            with pool.lease():
+                pass
+        # 通过连接池调用的方法超时后返回失败值
+        assert pool.execute_query("SELECT 1") == []
+        assert pool.execute_non_query("UPDATE t SET a = 1") is False
+
+    assert "等待数据库连接超过" in capsys.readouterr().out
+    assert pool.execute_query("SELECT 1") == [(0,)]
+
+
+def test_waiting_caller_gets_the_released_connection():
+    pool = PooledDatabaseManager(FakeTemplate(), size=1, timeout=5)
+    leased = threading.Event()
+    results = []
+
+    def hold():
+        with pool.lease():
+            leased.set()
+            threading.Event().wait(0.1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    leased.wait()
+    results.append(pool.execute_query("SELECT 1"))
+    holder.join()
+
+    assert results == [[(0,)]]
+    assert pool.stats()['waits'] == 1
+
+
+def test_release_rolls_back_open_transactions_and_drops_broken_connections():
+    template = FakeTemplate()
+    pool = PooledDatabaseManager(template, size=2)
+
+    with pool.lease() as manager:
+        manager.connection.status = IN_TRANSACTION
+    assert manager.connection.rollbacks == 1
+
+    with pool.lease() as manager:
+        manager.connection.closed = 1
+    assert manager.connection is None and manager.disconnects == 1
+
+    # 断开后的连接仍回到池中，下次使用时由 DatabaseManager 重新连接
+    with pool.lease() as again:
+        assert again is manager
+    assert len(template.clones) == 1
+
+
+def test_disconnect_closes_idle_connections():
+    template = FakeTemplate()
+    pool = PooledDatabaseManager(template, size=2)
+    with pool.lease(), pool.lease():
+        pass
+
+    pool.disconnect()
+
+    assert [manager.disconnects for manager in template.clones] == [1, 1]
+    assert pool.stats()['open'] == 0
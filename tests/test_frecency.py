@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网址常用度测试：对数分数的衰减、O(1) 累加、排序和启动迁移（数据库用替身）
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.frecency import (
+    FRECENCY_EPOCH, HALF_LIFE_DAYS, SCHEMA_STATEMENTS, FrecencyIndex, FrecencySchema, current_score, visit_weight
+)
+from src.core.url_utils import url_hash
+
+
+def test_visit_weight_grows_one_half_life_per_ln2():
+    assert visit_weight(FRECENCY_EPOCH) == 0
+    later = FRECENCY_EPOCH + timedelta(days=HALF_LIFE_DAYS)
+    assert visit_weight(later) == pytest.approx(math.log(2))
+
+
+def test_current_score_decays_with_half_life():
+    now = datetime(2026, 3, 1)
+    assert current_score(visit_weight(now), now) == pytest.approx(1.0)
+    assert current_score(visit_weight(now), now + timedelta(days=2 * HALF_LIFE_DAYS)) == pytest.approx(0.25)
+
+
+def test_record_accumulates_in_log_domain():
+    now = datetime(2026, 3, 1)
+    index = FrecencyIndex()
+    for days in (0, HALF_LIFE_DAYS, 2 * HALF_LIFE_DAYS):
+        index.record('a', now - timedelta(days=days))
+
+    assert current_score(index.score('a'), now) == pytest.approx(1 + 0.5 + 0.25)
+    assert index.score('missing') is None
+
+
+def test_order_puts_frequent_recent_sites_first():
+    now = datetime(2026, 3, 1)
+    websites = [{'url': f'https://{name}.example/'} for name in ('old', 'never', 'often', 'recent')]
+    index = FrecencyIndex()
+    index.record(url_hash('https://old.example/'), now - timedelta(days=60))
+    index.record(url_hash('https://recent.example/'), now)
+    for hours in range(3):
+        index.record(url_hash('https://often.example/'), now - timedelta(days=7, hours=hours))
+
+    ordered = [website['url'] for website in index.order(websites)]
+    assert ordered == [
+        'https://often.example/', 'https://recent.example/', 'https://old.example/', 'https://never.example/'
+    ]
+    assert FrecencyIndex().order(websites) == websites
+
+
+class FakeDbManager:
+    def __init__(self, ready):
+        self.ready = ready
+        self.transactions = []
+
+    def execute_query(self, query, params=None):
+        if 'information_schema' in query:
+            return [(1,)] if self.ready else []
+        return [('h1', 1.5), ('h2', 0.5)]
+
+    def execute_transaction(self, statements):
+        self.transactions.append(statements)
+        return True
+
+
+def test_schema_is_migrated_only_once():
+    ready = FakeDbManager(ready=True)
+    assert FrecencySchema(ready).ensure()
+    assert ready.transactions == []
+
+    missing = FakeDbManager(ready=False)
+    assert FrecencySchema(missing).ensure()
+    assert missing.transactions == [SCHEMA_STATEMENTS]
+
+
+def test_index_is_loaded_from_database():
+    index = FrecencyIndex.load(FakeDbManager(ready=True), 1)
+    assert index.scores == {'h1': 1.5, 'h2': 0.5}
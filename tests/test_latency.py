@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟统计测试：对数-线性分桶、百分位、SQL 指纹和错误计数
+"""
+
+import pytest
+
+from src.core.latency import (
+    KIND_ACTION, KIND_QUERY, MAX_FINGERPRINT_LENGTH, SUB_BUCKET_COUNT, LatencyHistogram, LatencyTracker,
+    _bucket_index, _bucket_value, fingerprint
+)
+
+
+def test_bucket_index_is_exact_below_sub_bucket_count():
+    for micros in range(SUB_BUCKET_COUNT):
+        assert _bucket_index(micros) == micros
+        assert _bucket_value(micros) == micros
+
+
+def test_bucket_value_bounds_relative_error():
+    previous = -1
+    for micros in list(range(SUB_BUCKET_COUNT, 70_000)) + [10 ** 6, 123_456_789, 2 ** 40 + 1]:
+        index = _bucket_index(micros)
+        assert index >= previous
+        previous = index
+        value = _bucket_value(index)
+        assert micros <= value <= micros * (1 + 2 / SUB_BUCKET_COUNT)
+        assert _bucket_index(value) == index
+
+
+def test_histogram_percentiles_and_merge():
+    fast, slow = LatencyHistogram(), LatencyHistogram()
+    for _ in range(95):
+        fast.record(0.001)
+    for _ in range(5):
+        slow.record(0.5, error=True)
+    fast.merge(slow)
+
+    assert fast.count == 100 and fast.errors == 5
+    assert fast.percentile(50) == pytest.approx(0.001, rel=0.02)
+    assert fast.percentile(99) == pytest.approx(0.5, rel=0.02)
+    assert fast.percentile(100) == 0.5
+    assert LatencyHistogram().percentile(95) == 0.0
+
+
+def test_fingerprint_normalizes_literals_and_lists():
+    assert fingerprint(
+        "SELECT * FROM users  -- 注释\nWHERE id IN (1, 2, 3) AND name = 'o''brien' AND age > %s"
+    ) == "SELECT * FROM users WHERE id IN (?) AND name = ? AND age > ?"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)") == \
+        "INSERT INTO t (a, b) VALUES (?), ..."
+    assert fingerprint("SELECT $1, %(name)s, 1.5") == "SELECT ?, ?, ?"
+    assert fingerprint("SELECT user2_id FROM t2") == "SELECT user2_id FROM t2"
+
+    long = fingerprint("SELECT " + ", ".join(f"column_{i}" for i in range(100)))
+    assert len(long) == MAX_FINGERPRINT_LENGTH and long.endswith('…')
+
+
+def test_tracker_groups_queries_by_fingerprint():
+    tracker = LatencyTracker()
+    tracker.record_query("SELECT * FROM t WHERE id = 1", 0.002)
+    tracker.record_query("SELECT * FROM t WHERE id = 2", 0.004, error=True)
+    with pytest.raises(RuntimeError):
+        with tracker.timer(KIND_ACTION, "load"):
+            raise RuntimeError
+
+    (query,) = tracker.snapshot(KIND_QUERY)
+    assert (query.name, query.count, query.errors) == ("SELECT * FROM t WHERE id = ?", 2, 1)
+    assert query.mean_ms == pytest.approx(3.0)
+    assert tracker.summary(KIND_QUERY)['errors'] == 1
+    assert tracker.summary(KIND_ACTION) == pytest.approx({'count': 1, 'errors': 1, 'mean_ms': 0, 'p95_ms': 0}, abs=5)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+链接健康检测测试（本地 HTTP 服务替代真实网站，数据库用记录调用的替身）
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from http_stub import StubServer, response
+from src.core.http_client import AsyncHttpClient
+from src.core.link_checker import (
+    DEFER_SQL, SAVE_RESULTS_SQL, SAVE_RESULTS_TEMPLATE, HostThrottle, LinkChecker,
+    LinkHealthMonitor, LinkResult, LinkTarget
+)
+
+
+@pytest.fixture
+def server():
+    with StubServer() as stub:
+        yield stub
+
+
+def make_checker(timeout=5, max_attempts=3):
+    return LinkChecker(AsyncHttpClient(timeout=timeout), HostThrottle(interval=0.01),
+                       max_attempts=max_attempts)
+
+
+def target(server, path, **kwargs):
+    return LinkTarget(path, server.url(path), **kwargs)
+
+
+class FakeDbManager:
+    """按顺序记录调用的数据库替身，due_batches 依次作为到期链接返回"""
+
+    def __init__(self, due_batches=()):
+        self.due_batches = list(due_batches)
+        self.calls = []
+
+    def iter_query(self, query, params=None):
+        return iter([])
+
+    def execute_query(self, query, params=None):
+        self.calls.append(('query', query, params))
+        if 'COUNT(*)' in query:
+            return [(sum(len(batch) for batch in self.due_batches),)]
+        batch = self.due_batches.pop(0) if self.due_batches else []
+        return [(t.url_key, t.url, t.etag, t.last_modified) for t in batch]
+
+    def execute_transaction(self, statements):
+        self.calls.append(('transaction', statements, None))
+        return True
+
+    def execute_batches(self, query, batches, template=None):
+        self.calls.append(('batches', query, {'batches': batches, 'template': template}))
+        return True
+
+    def execute_non_query(self, query, params=None):
+        self.calls.append(('non_query', query, params))
+        return True
+
+
+def test_429_waits_for_retry_after(server):
+    attempts = []
+
+    async def limited(request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return response(429, headers={'Retry-After': '1'})
+        return response(200)
+
+    server.route('/limited', limited)
+    result = asyncio.run(make_checker().check(target(server, '/limited')))
+
+    assert result.ok
+    assert not result.rate_limited
+    assert result.status_code == 200
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 1.0
+
+
+def test_persistent_429_marks_rate_limited(server):
+    async def limited(request):
+        return response(429, headers={'Retry-After': '0'})
+
+    server.route('/limited', limited)
+    result = asyncio.run(make_checker().check(target(server, '/limited')))
+
+    assert result.rate_limited
+    assert not result.ok
+    assert len(server.requests) == 3
+
+
+def test_head_falls_back_to_get_on_405(server):
+    async def no_head(request):
+        if request.method == 'HEAD':
+            return response(405)
+        return response(200, b'ok', {'ETag': '"abc"'})
+
+    server.route('/page', no_head)
+    result = asyncio.run(make_checker().check(target(server, '/page')))
+
+    assert result.ok
+    assert result.etag == '"abc"'
+    assert [request.method for request in server.requests] == ['HEAD', 'GET']
+
+
+def test_not_modified_counts_as_healthy(server):
+    async def page(request):
+        if request.headers.get('if-none-match') == '"v1"':
+            return response(304, headers={'ETag': '"v1"'})
+        return response(200)
+
+    server.route('/page', page)
+    result = asyncio.run(make_checker().check(target(server, '/page', etag='"v1"')))
+
+    assert result.ok
+    assert result.status_code == 304
+    assert result.etag == '"v1"'
+
+
+def test_timeout_is_retried_then_reported(server):
+    async def slow(request):
+        await asyncio.sleep(1)
+        return response(200)
+
+    server.route('/slow', slow)
+    result = asyncio.run(make_checker(timeout=0.2, max_attempts=2).check(target(server, '/slow')))
+
+    assert not result.ok
+    assert result.error == "请求超时"
+    assert len(server.requests) == 2
+
+
+def test_truncated_response_does_not_abort_scan(server):
+    async def truncated(request):
+        # 拒绝 HEAD，让检测改用 GET 读到截断的响应体
+        if request.method == 'HEAD':
+            return response(405)
+        return response(200, b'partial', {'Content-Length': '1000'})
+
+    async def page(request):
+        return response(200)
+
+    server.route('/truncated', truncated)
+    server.route('/page', page)
+    targets = [target(server, '/truncated'), target(server, '/page')]
+
+    broken, ok = asyncio.run(make_checker().check_many(targets))
+
+    assert ok.ok
+    assert not broken.ok
+    assert '响应不完整' in broken.error
+
+
+def test_save_results_splits_checked_and_rate_limited():
+    checked_at = datetime(2026, 1, 1, 12, 0)
+    db = FakeDbManager()
+    monitor = LinkHealthMonitor(db)
+    results = [
+        LinkResult('a', 'http://a.example/', 200, True, latency_ms=12, etag='"e"', checked_at=checked_at),
+        LinkResult('b', 'http://b.example/', 500, False, error='HTTP 500', checked_at=checked_at),
+        LinkResult('c', 'http://c.example/', 429, False, error='HTTP 429', rate_limited=True),
+    ]
+
+    assert monitor.save_results(results)
+
+    (kind, query, args), (defer_kind, defer_query, defer_params) = db.calls
+    assert (kind, query, args['template']) == ('batches', SAVE_RESULTS_SQL, SAVE_RESULTS_TEMPLATE)
+    assert args['batches'] == [[
+        ('a', 200, True, None, 12, '"e"', None, checked_at),
+        ('b', 500, False, 'HTTP 500', None, None, None, checked_at),
+    ]]
+    assert (defer_kind, defer_query) == ('non_query', DEFER_SQL)
+    assert defer_params[1] == ['c']
+    assert defer_params[0] > datetime.now()
+
+
+def test_due_targets_prefers_never_checked_links():
+    db = FakeDbManager([[LinkTarget('a', 'http://a.example/', '"e"', '')]])
+    targets = LinkHealthMonitor(db).due_targets(10)
+
+    _, query, params = db.calls[0]
+    assert ' '.join(query.split()).endswith("ORDER BY last_checked NULLS FIRST, next_check LIMIT %s")
+    assert params[1] == 10
+    assert targets == [LinkTarget('a', 'http://a.example/', '"e"', '')]
+
+
+def test_run_saves_each_batch_before_fetching_the_next(server):
+    async def page(request):
+        return response(200)
+
+    server.route('/one', page)
+    server.route('/two', page)
+    db = FakeDbManager([[target(server, '/one')], [target(server, '/two')]])
+    monitor = LinkHealthMonitor(db, batch_size=1, host_interval=0)
+
+    result = monitor.run()
+
+    assert (result.checked, result.healthy, result.broken) == (2, 2, 0)
+    steps = [kind for kind, query, _ in db.calls
+             if (kind == 'query' and 'ORDER BY' in query) or query == SAVE_RESULTS_SQL]
+    assert steps == ['query', 'batches', 'query', 'batches']
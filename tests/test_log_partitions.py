@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+系统日志分区测试（月份计算，以及用替身记录分区管理发出的语句）
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from src.core.log_partitions import (
+    DEFAULT_PARTITION, LogPartitionManager, add_months, month_start, partition_name
+)
+
+
+class FakeDbManager:
+    """system_logs 分区表替身：partitions 为已有月份，default_months 为默认分区中有日志的月份"""
+
+    def __init__(self, partitions=(), default_months=(), kind='p'):
+        self.partitions = set(partitions)
+        self.default_months = list(default_months)
+        self.kind = kind
+        self.statements = []
+        self.transactions = []
+
+    def execute_query(self, query, params=None):
+        if 'relkind' in query:
+            return [(self.kind,)] if self.kind else []
+        if 'pg_inherits' in query:
+            return [(partition_name(month),) for month in self.partitions] + [(DEFAULT_PARTITION,)]
+        if 'DISTINCT date_trunc' in query:
+            return [(month,) for month in self.default_months]
+        if 'SELECT EXISTS' in query:
+            start = date.fromisoformat(params[0])
+            return [(start in self.default_months,)]
+        raise AssertionError(query)
+
+    def execute_non_query(self, query, params=None):
+        self.statements.append(query)
+        return True
+
+    def execute_transaction(self, statements):
+        self.transactions.append(statements)
+        return True
+
+
+def test_month_arithmetic():
+    assert month_start(datetime(2026, 3, 31, 23, 59)) == date(2026, 3, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert partition_name(date(2026, 4, 1)) == 'system_logs_p202604'
+
+
+def test_list_partitions_is_sorted_and_skips_default():
+    db = FakeDbManager(partitions=[date(2026, 3, 1), date(2025, 12, 1)])
+    partitions = LogPartitionManager(db).list_partitions()
+    assert [(p.name, p.end) for p in partitions] == [
+        ('system_logs_p202512', date(2026, 1, 1)),
+        ('system_logs_p202603', date(2026, 4, 1)),
+    ]
+
+
+def test_ensure_partitions_creates_only_missing_months():
+    today = month_start(datetime.now())
+    db = FakeDbManager(partitions=[today])
+
+    assert LogPartitionManager(db).ensure_partitions(months_ahead=2)
+
+    created = [sql.split()[5] for sql in db.statements if 'FOR VALUES' in sql]
+    assert created == [partition_name(add_months(today, 1)), partition_name(add_months(today, 2))]
+    assert 'DEFAULT' in db.statements[0]
+
+
+def test_rows_in_default_partition_are_moved_into_new_partition():
+    stray = add_months(month_start(datetime.now()), -5)
+    db = FakeDbManager(partitions=[add_months(month_start(datetime.now()), n) for n in range(3)],
+                       default_months=[stray])
+
+    assert LogPartitionManager(db).ensure_partitions()
+
+    (statements,) = db.transactions
+    assert statements[0].endswith(f"DETACH PARTITION {DEFAULT_PARTITION}")
+    assert partition_name(stray) in statements[1]
+    assert statements[-1].endswith(f"ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+
+def test_drop_partitions_before_cutoff():
+    months = [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)]
+    db = FakeDbManager(partitions=months)
+
+    removed = LogPartitionManager(db).drop_partitions_before(datetime(2026, 3, 15))
+
+    # 3 月分区还有 cutoff 之后的日志，不能整月删除
+    assert removed == ['system_logs_p202601', 'system_logs_p202602']
+    assert db.statements[-1].startswith(f"DELETE FROM {DEFAULT_PARTITION}")
+
+
+def test_drop_partitions_on_plain_table_is_refused():
+    with pytest.raises(ValueError):
+        LogPartitionManager(FakeDbManager(kind='r')).drop_partitions_before(date(2026, 1, 1))
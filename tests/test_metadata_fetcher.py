@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网站元数据获取测试（本地 HTTP 服务替代真实网站）
+"""
+
+import asyncio
+import gzip
+import os
+
+import pytest
+
+from http_stub import StubServer, response
+from src.core import metadata_fetcher
+from src.core.http_client import AsyncHttpClient, HttpError
+from src.core.metadata_fetcher import MetadataCache, MetadataFetcher
+
+PNG_ICON = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<title>
+  示例   站点
+</title>
+<meta name="description" content="  一个用于测试的
+  页面 ">
+<link rel="icon" href="/static/icon.png">
+</head><body><title>正文中的标题</title></body></html>
+"""
+
+
+def html_response(body, headers=None):
+    return response(200, body, dict({'Content-Type': 'text/html; charset=utf-8'}, **(headers or {})))
+
+
+@pytest.fixture
+def server():
+    with StubServer() as stub:
+        yield stub
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return MetadataCache(cache_dir=str(tmp_path), max_entries=100)
+
+
+class FakeClock:
+    """可控的时钟，保证访问时间严格递增"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+def test_parses_title_description_and_icon(server, cache):
+    async def page(request):
+        return html_response(PAGE)
+
+    async def icon(request):
+        return response(200, PNG_ICON, {'Content-Type': 'image/png'})
+
+    server.route('/', page)
+    server.route('/static/icon.png', icon)
+
+    fetcher = MetadataFetcher(cache, AsyncHttpClient(timeout=5))
+    metadata = asyncio.run(fetcher.fetch(server.url('/')))
+
+    assert metadata.success
+    assert metadata.title == '示例 站点'
+    assert metadata.description == '一个用于测试的 页面'
+    assert metadata.favicon_path.endswith('.png')
+    with open(metadata.favicon_path, 'rb') as f:
+        assert f.read() == PNG_ICON
+
+
+def test_per_host_limit(server, cache):
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return html_response(f"<title>{request.path}</title>")
+
+    server.route('/slow', slow)
+    client = AsyncHttpClient(timeout=5, per_host_limit=2)
+    fetcher = MetadataFetcher(cache, client, fetch_favicons=False, max_concurrency=8)
+    urls = [server.url(f'/slow?page={i}') for i in range(6)]
+
+    results = asyncio.run(fetcher.fetch_many(urls))
+
+    assert [metadata.title for metadata in results] == [f'/slow?page={i}' for i in range(6)]
+    assert server.max_active == 2
+
+
+def test_etag_revalidation(server, cache):
+    async def page(request):
+        if request.headers.get('if-none-match') == '"v1"':
+            return response(304, headers={'ETag': '"v1"'})
+        return html_response("<title>第一版</title>", {'ETag': '"v1"'})
+
+    server.route('/', page)
+    fetcher = MetadataFetcher(cache, AsyncHttpClient(timeout=5), max_age=0, fetch_favicons=False)
+
+    first = asyncio.run(fetcher.fetch(server.url('/')))
+    second = asyncio.run(fetcher.fetch(server.url('/')))
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.title == '第一版'
+    assert 'if-none-match' not in server.requests[0].headers
+    assert server.requests[1].headers['if-none-match'] == '"v1"'
+
+
+def test_lru_eviction_removes_orphaned_icons(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_fetcher, 'time', FakeClock())
+    cache = MetadataCache(cache_dir=str(tmp_path), max_entries=2)
+
+    cache.put_page('http://a.example/', {'title': 'A'})
+    cache.put_page('http://b.example/', {'title': 'B'})
+    icon_a = cache.put_icon('http://a.example', PNG_ICON, {}, 'http://a.example/favicon.ico')
+    icon_b = cache.put_icon('http://b.example', PNG_ICON, {}, 'http://b.example/favicon.ico')
+
+    # 访问 a 之后，b 成为最久未访问的页面
+    assert cache.get_page('http://a.example/')['title'] == 'A'
+    cache.put_page('http://c.example/', {'title': 'C'})
+
+    assert cache.get_page('http://b.example/') is None
+    assert cache.get_page('http://a.example/') is not None
+    assert cache.get_page('http://c.example/') is not None
+    assert os.path.exists(icon_a)
+    assert not os.path.exists(icon_b)
+    assert cache.get_icon('http://b.example') is None
+
+
+def test_truncated_response_fails_only_that_url(server, cache):
+    async def page(request):
+        return html_response("<title>正常</title>")
+
+    async def truncated(request):
+        return response(200, b'<title>', {'Content-Length': '1000'})
+
+    server.route('/ok', page)
+    server.route('/truncated', truncated)
+    fetcher = MetadataFetcher(cache, AsyncHttpClient(timeout=5), fetch_favicons=False)
+
+    ok, broken = asyncio.run(fetcher.fetch_many([server.url('/ok'), server.url('/truncated')]))
+
+    assert ok.title == '正常'
+    assert not broken.success
+    assert '响应不完整' in broken.error
+
+
+def test_decompressed_body_is_capped(server):
+    async def bomb(request):
+        return response(200, gzip.compress(b'\0' * (1024 * 1024)), {'Content-Encoding': 'gzip'})
+
+    async def small(request):
+        return response(200, gzip.compress(b'hello'), {'Content-Encoding': 'gzip'})
+
+    server.route('/bomb', bomb)
+    server.route('/small', small)
+    client = AsyncHttpClient(timeout=5, max_body=64 * 1024)
+
+    async def run():
+        return await client.get(server.url('/bomb')), await client.get(server.url('/small'))
+
+    capped, plain = asyncio.run(run())
+
+    assert len(capped.body) == 64 * 1024
+    assert capped.truncated
+    assert plain.body == b'hello'
+    assert not plain.truncated
+
+
+def test_malformed_chunk_raises_http_error(server):
+    async def bad_chunk(request):
+        return response(200, b'zz\r\nhello\r\n0\r\n\r\n', {'Transfer-Encoding': 'chunked'},
+                        content_length=False)
+
+    server.route('/', bad_chunk)
+    client = AsyncHttpClient(timeout=5)
+
+    with pytest.raises(HttpError, match='无效的响应'):
+        asyncio.run(client.get(server.url('/')))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行指标测试：Prometheus 文本格式输出、标签转义、直方图累计分桶和导出端点
+"""
+
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.core.latency import LatencyTracker
+from src.core import metrics
+from src.core.metrics import MetricsExporter, MetricsRegistry
+
+
+def test_render_counters_and_gauges():
+    registry = MetricsRegistry(prefix="app_")
+    requests = registry.counter("requests_total", "请求次数\n按路由", ("route",))
+    requests.inc(route='/b')
+    requests.inc(2, route='/a')
+    registry.gauge("sessions", "当前会话数").set(1.5)
+    registry.counter("unused_total", "没有样本的指标不输出")
+
+    assert registry.render() == (
+        '# HELP app_requests_total 请求次数\\n按路由\n'
+        '# TYPE app_requests_total counter\n'
+        'app_requests_total{route="/a"} 2\n'
+        'app_requests_total{route="/b"} 1\n'
+        '# HELP app_sessions 当前会话数\n'
+        '# TYPE app_sessions gauge\n'
+        'app_sessions 1.5\n'
+    )
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry(prefix="")
+    registry.counter("errors_total", "错误", ("message",)).inc(message='say "hi"\\\n')
+    assert 'errors_total{message="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(prefix="")
+    histogram = registry.histogram("latency_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, route='/')
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/",le="0.1"} 1',
+        'latency_seconds_bucket{route="/",le="1"} 3',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/"} 4.25',
+        'latency_seconds_count{route="/"} 4',
+    ]
+
+
+def test_registration_checks_type_and_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total", "命中", ("cache",))
+    assert registry.counter("hits_total", "命中", ("cache",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total", "命中")
+    with pytest.raises(ValueError):
+        counter.inc(result='hit')
+
+
+def test_failing_collector_does_not_break_render():
+    registry = MetricsRegistry(prefix="")
+    registry.gauge("up", "在线").set(1)
+    registry.add_collector(lambda: 1 / 0)
+    assert registry.render() == '# HELP up 在线\n# TYPE up gauge\nup 1\n'
+
+
+def test_latency_tracker_is_exported_as_histograms(monkeypatch):
+    tracker = LatencyTracker()
+    tracker.record_query("SELECT * FROM t WHERE id = 1", 0.003, error=True)
+    monkeypatch.setattr(metrics, 'default_tracker', lambda: tracker)
+
+    text = metrics.registry().render()
+
+    assert 'url_manage_db_query_duration_seconds_bucket{query="SELECT * FROM t WHERE id = ?",le="0.005"} 1' in text
+    assert 'url_manage_db_query_errors_total{query="SELECT * FROM t WHERE id = ?"} 1' in text
+    assert '# TYPE url_manage_uptime_seconds gauge' in text
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_exporter_serves_http_and_writes_textfile(tmp_path):
+    registry = MetricsRegistry(prefix="")
+    registry.gauge("up", "在线").set(1)
+    textfile = tmp_path / "metrics" / "app.prom"
+    exporter = MetricsExporter(registry, http_port=free_port(), textfile_path=str(textfile)).start()
+    try:
+        url = f"http://127.0.0.1:{exporter.server.server_address[1]}"
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            assert response.read().decode('utf-8').endswith("up 1\n")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other", timeout=5)
+    finally:
+        exporter.stop()
+
+    assert textfile.read_text(encoding='utf-8').endswith("up 1\n")
+    assert list(textfile.parent.iterdir()) == [textfile]
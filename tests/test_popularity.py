@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+全站热度测试：对数域计分和从旧访问记录初始化（数据库用替身）
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.popularity import (
+    HALF_LIFE_DAYS, PopularityRanking, decayed_score, log_add, popular_sites_from_rows, time_weight
+)
+
+
+def test_log_add_matches_direct_sum():
+    for a, b in [(0.0, 0.0), (1.5, -2.0), (700.0, 699.0), (-3.0, 5.0)]:
+        assert log_add(a, b) == pytest.approx(math.log(math.exp(a) + math.exp(b)))
+    # 很大的对数分直接求 exp 会溢出，log_add 仍然有限
+    assert log_add(5000.0, 5000.0) == pytest.approx(5000.0 + math.log(2))
+
+
+def test_decayed_score_halves_every_half_life():
+    now = datetime(2026, 3, 1)
+    visit = now - timedelta(days=HALF_LIFE_DAYS)
+    assert decayed_score(time_weight(now), now) == pytest.approx(1.0)
+    assert decayed_score(time_weight(visit), now) == pytest.approx(0.5)
+    # 两次访问在对数域相加后仍按各自的时间衰减
+    assert decayed_score(log_add(time_weight(now), time_weight(visit)), now) == pytest.approx(1.5)
+
+
+def test_rows_are_converted_to_current_scores():
+    now = datetime.now()
+    (site,) = popular_sites_from_rows([('A', 'https://a.example', 3, 2, time_weight(now), now)])
+    assert site.website_name == 'A'
+    assert site.score == pytest.approx(1.0, rel=1e-3)
+
+
+class FakeDbManager:
+    def __init__(self, stats, populated=False):
+        self.stats = stats
+        self.populated = populated
+        self.transactions = []
+
+    def execute_query(self, query, params=None):
+        if 'FROM website_popularity' in query:
+            return [(1,)] if self.populated else []
+        return self.stats
+
+    def execute_transaction(self, statements):
+        self.transactions.append(statements)
+        return True
+
+
+def test_seed_merges_stats_by_canonical_url():
+    now = datetime(2026, 3, 1)
+    earlier = now - timedelta(days=1)
+    db = FakeDbManager([
+        ('A', 'https://a.example/', 1, 4, earlier),
+        ('A 新名称', 'http://A.example', 2, 1, now),
+        ('B', 'https://b.example/', 1, None, None),
+    ])
+
+    assert PopularityRanking(db).seed_from_stats()
+
+    (statements,) = db.transactions
+    sites_sql, sites_params = statements[0]
+    rows = {key: row for key, *row in zip(*sites_params)}
+    name, url, visits, users, score, last_visited = rows['https://a.example']
+    assert (name, visits, users, last_visited) == ('A 新名称', 5, 2, now)
+    assert score == pytest.approx(log_add(math.log(4) + time_weight(earlier), time_weight(now)))
+    assert rows['https://b.example'][2] == 1
+
+
+def test_seed_is_skipped_when_table_has_data():
+    db = FakeDbManager([('A', 'https://a.example/', 1, 1, None)], populated=True)
+    assert PopularityRanking(db).seed_from_stats()
+    assert db.transactions == []
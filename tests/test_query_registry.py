@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询注册表测试（连接和游标用记录语句的替身）
+"""
+
+import pytest
+
+from src.core import query_registry
+from src.core.query_registry import PreparedStatementSession, get_query, register_query
+
+
+class StatementMissing(Exception):
+    pgcode = query_registry.INVALID_STATEMENT_NAME
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def execute(self, sql, params=None):
+        if sql.startswith('EXECUTE') and self.connection.fail_next:
+            self.connection.fail_next = False
+            raise StatementMissing("prepared statement does not exist")
+        self.connection.statements.append(sql)
+        if sql.startswith('EXECUTE'):
+            self.description = [('id',), ('name',)]
+
+    def fetchall(self):
+        return [(1, 'a'), (2, 'b')]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.rollbacks = 0
+        self.fail_next = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def sample_query(monkeypatch):
+    monkeypatch.setattr(query_registry, 'QUERY_REGISTRY', dict(query_registry.QUERY_REGISTRY))
+    return register_query('sample_rows', "SELECT id, name FROM t WHERE id > $1", ('integer',))
+
+
+def test_register_rejects_mismatched_placeholders(monkeypatch):
+    monkeypatch.setattr(query_registry, 'QUERY_REGISTRY', {})
+    with pytest.raises(ValueError):
+        register_query('bad_query', "SELECT $1, $2", ('integer',))
+    with pytest.raises(ValueError):
+        register_query('Bad-Name', "SELECT 1")
+    with pytest.raises(KeyError):
+        get_query('bad_query')
+
+
+def test_prepares_once_per_connection_and_returns_named_rows(sample_query):
+    assert sample_query.row_name == 'SampleRowsRow'
+    connection = FakeConnection()
+    session = PreparedStatementSession()
+
+    first = session.execute(connection, 'sample_rows', (0,))
+    session.execute(connection, 'sample_rows', (1,))
+
+    assert [row.name for row in first] == ['a', 'b']
+    assert first[0] == (1, 'a')
+    assert connection.statements == [
+        "PREPARE q_sample_rows (integer) AS SELECT id, name FROM t WHERE id > $1",
+        "EXECUTE q_sample_rows (%s)",
+        "EXECUTE q_sample_rows (%s)",
+    ]
+
+
+def test_reprepares_when_server_dropped_the_statement(sample_query):
+    connection = FakeConnection()
+    session = PreparedStatementSession()
+    session.execute(connection, 'sample_rows', (0,))
+
+    connection.fail_next = True
+    rows = session.execute(connection, 'sample_rows', (0,))
+
+    assert len(rows) == 2
+    assert connection.rollbacks == 1
+    assert connection.statements.count("PREPARE q_sample_rows (integer) AS SELECT id, name FROM t WHERE id > $1") == 2
+
+
+def test_wrong_parameter_count_is_rejected(sample_query):
+    with pytest.raises(ValueError):
+        PreparedStatementSession().execute(FakeConnection(), 'sample_rows', ())
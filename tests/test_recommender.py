@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+推荐索引测试：向量化与纯 Python 近邻计算一致，增量刷新与全量重建一致（数据库用替身）
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core import recommender
+from src.core.recommender import RecommendationEngine, _neighbors_python
+
+
+def random_profiles(seed=7, users=30, items=40):
+    rng = random.Random(seed)
+    profiles = {}
+    for user_id in range(users):
+        visited = rng.sample(range(items), rng.randint(1, 8))
+        profiles[user_id] = {f"url{item}": rng.randint(1, 50) for item in visited}
+    return profiles
+
+
+def as_scores(neighbors):
+    return {item: {other: pytest.approx(score) for other, score in pairs} for item, pairs in neighbors.items()}
+
+
+def test_vectorized_neighbors_match_python(monkeypatch):
+    pytest.importorskip('numpy')
+    pytest.importorskip('scipy')
+    monkeypatch.setattr(recommender, 'BLOCK_SIZE', 7)
+    profiles = random_profiles()
+    targets = {item for profile in profiles.values() for item in profile}
+
+    vectorized = recommender._neighbors_vectorized(profiles, targets, 100)
+    assert vectorized.keys() == targets
+    assert as_scores(vectorized) == as_scores(_neighbors_python(profiles, targets, 100))
+
+    # 截断到前 K 个时并列的网址可能不同，只比较得分序列
+    top = recommender._neighbors_vectorized(profiles, targets, 5)
+    expected = _neighbors_python(profiles, targets, 5)
+    for item in targets:
+        assert [score for _, score in top[item]] == pytest.approx([score for _, score in expected[item]])
+
+
+def test_python_neighbors_are_cosine_similarities():
+    profiles = {1: {'a': 1, 'b': 1}, 2: {'a': 1, 'c': 3}, 3: {'b': 5}}
+    neighbors = _neighbors_python(profiles, ['a'], 10)['a']
+    assert [other for other, _ in neighbors] == ['c', 'b']
+    assert dict(neighbors)['c'] == pytest.approx(1 / 2 ** 0.5)
+
+
+class FakeDbManager:
+    def __init__(self):
+        self.rows = {}
+
+    def set(self, user_id, item, visit_count, last_visited):
+        self.rows[(user_id, item)] = (visit_count, last_visited)
+
+    def iter_query(self, query, params=None, itersize=None):
+        for (user_id, item), (visit_count, last_visited) in self.rows.items():
+            if params is None or last_visited >= params[0]:
+                yield user_id, item, visit_count, last_visited
+
+
+def test_incremental_refresh_matches_full_rebuild():
+    start = datetime(2026, 3, 1)
+    db = FakeDbManager()
+    for user_id, profile in random_profiles().items():
+        for item, visit_count in profile.items():
+            db.set(user_id, item, visit_count, start)
+
+    engine = RecommendationEngine(top_k=100)
+    assert engine.refresh(db)
+
+    later = start + timedelta(hours=1)
+    db.set(3, 'url1', 80, later)        # 已有访问的次数变化
+    db.set(3, 'url39', 2, later)        # 已有用户访问了新网址
+    db.set(99, 'url5', 4, later)        # 新用户
+    db.set(99, 'url100', 1, later)      # 新网址
+    assert engine.refresh(db)
+    assert engine.watermark == later
+
+    rebuilt = RecommendationEngine(top_k=100)
+    rebuilt.refresh(db, full=True)
+    assert engine.profiles == rebuilt.profiles
+    assert as_scores(engine.neighbors) == as_scores(rebuilt.neighbors)
+
+
+def test_recommend_excludes_visited_and_uses_observed_visits():
+    db = FakeDbManager()
+    now = datetime(2026, 3, 1)
+    for user_id, item in [(1, 'a'), (1, 'b'), (2, 'a'), (2, 'c'), (3, 'd')]:
+        db.set(user_id, item, 1, now)
+    engine = RecommendationEngine()
+    engine.refresh(db)
+
+    assert [item for item, _ in engine.recommend(1)] == ['c']
+    assert engine.recommend(4) == []
+
+    engine.observe(4, 'c')
+    assert [item for item, _ in engine.recommend(4)] == ['a']
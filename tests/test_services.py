@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业务服务测试：共享缓存的有效期与失效，个人信息的头像检查（数据库用替身）
+"""
+
+import time
+
+from src.core.avatar_files import avatar_filename
+from src.core.services import AuthService, TTLCache
+
+
+def counting_loader(values):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+    return load, calls
+
+
+def test_cache_reuses_value_until_it_expires():
+    cache = TTLCache(ttl=0.1)
+    load, calls = counting_loader(['a', 'b'])
+
+    assert cache.get_or_load('stats', load) == 'a'
+    assert cache.get_or_load('stats', load) == 'a'
+    time.sleep(0.15)
+    assert cache.get_or_load('stats', load) == 'b'
+    assert len(calls) == 2
+
+
+def test_invalidate_by_prefix():
+    cache = TTLCache(ttl=60)
+    cache.get_or_load('sites:1', lambda: 'user 1')
+    cache.get_or_load('sites:2', lambda: 'user 2')
+    cache.get_or_load('admin:statistics', lambda: 'stats')
+
+    cache.invalidate('sites:1')
+    assert cache.get_or_load('sites:1', lambda: 'reloaded') == 'reloaded'
+    assert cache.get_or_load('sites:2', lambda: 'reloaded') == 'user 2'
+
+    cache.invalidate()
+    assert cache.get_or_load('admin:statistics', lambda: 'reloaded') == 'reloaded'
+
+
+def test_zero_ttl_disables_caching():
+    cache = TTLCache(ttl=0)
+    load, calls = counting_loader(['a', 'b'])
+    assert [cache.get_or_load('k', load), cache.get_or_load('k', load)] == ['a', 'b']
+
+
+class FakeUsersDb:
+    def __init__(self, avatar_path='default_avatar.png'):
+        self.avatar_path = avatar_path
+        self.updates = []
+
+    def execute_query(self, query, params=None):
+        return [('alice', self.avatar_path)]
+
+    def execute_non_query(self, query, params=None):
+        self.updates.append(params)
+        return True
+
+
+def test_profile_avatar_must_be_a_known_avatar_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = FakeUsersDb()
+    auth = AuthService(db)
+    png = b'\x89PNG\r\n\x1a\n' + b'data'
+    filename = avatar_filename(png, 'png')
+
+    assert auth.update_profile(1, 'alice', '', '', '../secret.png') == (False, "无效的头像文件")
+    assert not auth.update_profile(1, 'alice', '', '', filename)[0]     # 尚未上传
+    assert auth.save_avatar(filename, png)[0]
+    assert auth.update_profile(1, 'alice', '', '', filename)[0]
+    assert auth.update_profile(1, 'alice', '', '', 'admin_avatar.png')[0]
+    assert [params[3] for params in db.updates] == [filename, 'admin_avatar.png']
+
+    assert auth.save_avatar(avatar_filename(png, 'jpg'), png) == (False, "头像不是有效的 PNG/JPEG 图片")
+    assert auth.read_avatar(filename) == png
+    assert auth.read_avatar('../secret.png') is None
+    assert auth.fetch_avatar(filename) and not auth.fetch_avatar('missing.png')
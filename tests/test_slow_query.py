@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+慢查询日志测试：参数形态、占位符转换、日志写入和执行计划采集（数据库用替身）
+"""
+
+import json
+import time
+
+from src.core.slow_query import SlowQueryLog, is_read_only, params_shape, to_pyformat
+
+
+def test_params_shape_hides_values():
+    assert params_shape(None) == "()"
+    assert params_shape((1, 'secret', None, [1, 2])) == "(int, str[6], null, list[2])"
+    assert params_shape({'name': 'x'}) == "{name: str[1]}"
+
+
+def test_to_pyformat_reorders_numbered_params():
+    assert to_pyformat("SELECT $2, $1 WHERE name LIKE 'a%'", ('a', 'b')) == \
+        ("SELECT %s, %s WHERE name LIKE 'a%%'", ('b', 'a'))
+
+
+def test_only_plain_reads_are_analyzed():
+    assert is_read_only("  with t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_only("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d")
+    assert not is_read_only("UPDATE t SET a = 1")
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_fast_queries_are_not_logged(tmp_path):
+    log = SlowQueryLog(threshold_ms=100, log_path=str(tmp_path / "slow.jsonl"))
+    assert not log.check(None, "SELECT 1", None, 0.05)
+    assert log.check(None, "SELECT * FROM t WHERE id = %s", (5,), 0.2, name='t_by_id')
+
+    (entry,) = read_log(tmp_path / "slow.jsonl")
+    assert entry['query'] == "SELECT * FROM t WHERE id = ?"
+    assert entry['params'] == "(int)"
+    assert entry['prepared'] == 't_by_id'
+    assert entry['duration_ms'] == 200.0
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return [{'Plan': {}}]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class FakeDbManager:
+    def __init__(self, fail_clone=False):
+        self.fail_clone = fail_clone
+        self.connection = None
+        self.clones = []
+
+    def clone(self):
+        if self.fail_clone:
+            raise RuntimeError("连接参数无效")
+        clone = FakeDbManager()
+        self.clones.append(clone)
+        return clone
+
+    def connect(self):
+        self.connection = FakeConnection()
+        self.last_connection = self.connection
+        return True
+
+    def disconnect(self):
+        self.connection = None
+
+
+def wait_for_capture(log):
+    deadline = time.monotonic() + 5
+    while log._explaining and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not log._explaining
+
+
+def test_plan_is_captured_on_a_separate_connection(tmp_path):
+    log = SlowQueryLog(threshold_ms=0, log_path=str(tmp_path / "slow.jsonl"), explain=True)
+    db = FakeDbManager()
+
+    log.check(db, "SELECT * FROM t WHERE id = $1", (7,), 1.0, name='t_by_id')
+    wait_for_capture(log)
+
+    (clone,) = db.clones
+    assert clone.last_connection.executed[-1] == ("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM t WHERE id = %s", (7,))
+    assert clone.last_connection.rolled_back
+    assert read_log(tmp_path / "slow.jsonl")[-1]['plan'] == {'Plan': {}}
+
+    # 同一指纹在间隔内不会重复采集
+    log.check(db, "SELECT * FROM t WHERE id = $1", (8,), 1.0, name='t_by_id')
+    assert len(db.clones) == 1
+
+
+def test_failed_capture_start_does_not_block_later_plans(tmp_path):
+    log = SlowQueryLog(threshold_ms=0, log_path=str(tmp_path / "slow.jsonl"), explain=True)
+
+    assert log.check(FakeDbManager(fail_clone=True), "SELECT 1", None, 1.0)
+    assert not log._explaining
+
+    db = FakeDbManager()
+    log.check(db, "SELECT 2 FROM t", None, 1.0)
+    wait_for_capture(log)
+    assert len(db.clones) == 1
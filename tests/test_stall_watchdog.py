@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+界面卡顿检测测试：调用位置归类、卡顿汇总，以及用普通线程模拟界面线程的端到端检测（需要 PyQt6）
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from collections import Counter
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from src.core.stall_watchdog import PROJECT_ROOT, StallWatchdog, call_site
+
+
+def frame(filename, name):
+    return traceback.FrameSummary(filename, 1, name)
+
+
+def test_call_site_uses_innermost_project_frames():
+    stack = [
+        frame(os.path.join(PROJECT_ROOT, "modern_app.py"), "main"),
+        frame(os.path.join(PROJECT_ROOT, "src", "ui", "admin_window.py"), "load_statistics"),
+        frame(os.path.join(PROJECT_ROOT, "src", "core", "auth_system.py"), "execute_query"),
+        frame("/usr/lib/python3/site-packages/psycopg2/extras.py", "execute"),
+    ]
+    assert call_site(stack) == "execute_query (auth_system.py) ← load_statistics (admin_window.py)"
+    assert call_site(stack[3:]) == "Qt 事件循环"
+
+
+def test_stalls_are_summarized_per_site(tmp_path):
+    watchdog = StallWatchdog(log_path=str(tmp_path / "stalls.jsonl"))
+    db_stack = [frame(os.path.join(PROJECT_ROOT, "src", "core", "auth_system.py"), "execute_query")]
+    io_stack = [frame(os.path.join(PROJECT_ROOT, "src", "core", "managers.py"), "save_statistics")]
+
+    watchdog._record(0.3, Counter(db=2, io=1), {"db": db_stack, "io": io_stack})
+    watchdog._record(0.5, Counter(db=1), {"db": db_stack})
+    watchdog._record(0.9, Counter(io=3), {"io": io_stack})
+    watchdog._record(1.0, Counter(), {})
+
+    assert [(site.site, site.count) for site in watchdog.report()] == [("io", 1), ("db", 2)]
+    db = watchdog.sites["db"]
+    assert db.total_ms == pytest.approx(800) and db.max_ms == pytest.approx(500)
+    assert db.stack == [f"{os.path.join('src', 'core', 'auth_system.py')}:1 execute_query"]
+    with open(tmp_path / "stalls.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)['site'] for line in f] == ["db", "db", "io"]
+
+
+def slow_handler():
+    time.sleep(0.4)
+
+
+def test_monitor_samples_the_stalled_thread(tmp_path):
+    watchdog = StallWatchdog(threshold_ms=100, heartbeat_ms=10, log_path=str(tmp_path / "stalls.jsonl"))
+    start, finished = threading.Event(), threading.Event()
+
+    def ui_thread():
+        start.wait()
+        slow_handler()
+        finished.set()
+
+    worker = threading.Thread(target=ui_thread, daemon=True)
+    worker.start()
+    # 由测试线程代替 QTimer 打心跳，worker 线程扮演被采样的界面线程
+    watchdog._main_ident = worker.ident
+    watchdog._thread = threading.Thread(target=watchdog._monitor, daemon=True)
+    watchdog._beat()
+    watchdog._thread.start()
+
+    def beat_for(seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            watchdog._beat()
+            time.sleep(0.01)
+
+    beat_for(0.1)
+    start.set()
+    finished.wait(5)
+    beat_for(0.1)
+    watchdog.stop()
+
+    (site,) = watchdog.report()
+    assert site.site == "slow_handler (test_stall_watchdog.py) ← ui_thread (test_stall_watchdog.py)"
+    assert site.count == 1
+    assert 250 < site.total_ms < 1000
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+统计管理器测试：跨会话累计的错误数在重新登录（重建管理器）后不重复计算（需要 PyQt6）
+"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from src.core.latency import default_tracker
+from src.core.managers import StatisticsManager
+
+
+def test_error_count_only_adds_errors_since_construction(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("config")
+    with open("config/statistics.json", "w", encoding="utf-8") as f:
+        json.dump({"system_performance": {"error_count": 10}}, f)
+
+    tracker = default_tracker()
+    tracker.record_query("SELECT 1", 0.001, error=True)     # 本进程之前的会话产生的错误
+
+    first = StatisticsManager()
+    tracker.record_query("SELECT 1", 0.001, error=True)
+    tracker.record_query("SELECT 1", 0.001, error=True)
+    first.save_statistics()
+    assert first.stats_data["system_performance"]["error_count"] == 12
+
+    # 注销后重新登录会重建管理器，已保存的错误不能再加一遍
+    second = StatisticsManager()
+    assert second.update_system_performance()["error_count"] == 12
+    tracker.record_query("SELECT 1", 0.001, error=True)
+    assert second.update_system_performance()["error_count"] == 13
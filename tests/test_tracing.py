@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+操作追踪测试：区间记录、Chrome trace-event 导出、事件上限和槽函数参数截断
+"""
+
+import json
+
+import pytest
+
+from src.core import tracing
+from src.core.tracing import instant, record_span, slot_adapter, span, traced, tracer
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = str(tmp_path / "trace.json")
+    tracer().start(path)
+    yield path
+    tracer().enabled = False
+
+
+def load_events(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['traceEvents']
+
+
+def test_slot_adapter_drops_extra_signal_arguments():
+    def on_clicked(self):
+        return self
+
+    def on_toggled(self, checked=False):
+        return checked
+
+    def on_anything(*args):
+        return args
+
+    assert slot_adapter(on_clicked)('window', True) == 'window'
+    assert slot_adapter(on_toggled)('window', True, 'extra') is True
+    assert slot_adapter(on_anything) is on_anything
+
+
+def test_traced_method_keeps_slot_signature(trace_file):
+    class Window:
+        @traced(category='ui')
+        def refresh(self):
+            return 'ok'
+
+    # clicked 信号会多传一个 checked 参数
+    assert Window().refresh(False) == 'ok'
+    assert Window.refresh.__name__ == 'refresh'
+
+    tracer().stop()
+    (event,) = [e for e in load_events(trace_file) if e['ph'] == 'X']
+    assert (event['name'], event['cat']) == ('test_traced_method_keeps_slot_signature.<locals>.Window.refresh', 'ui')
+
+
+def test_spans_are_exported_with_thread_names(trace_file):
+    with span('load', rows=3):
+        instant('signal', 'qt')
+    with pytest.raises(KeyError):
+        with span('fail'):
+            raise KeyError('x')
+    record_span('query', 'db', 0.0, 0.25)
+
+    assert tracer().stop() == trace_file
+    events = load_events(trace_file)
+    by_name = {event['name']: event for event in events}
+    assert by_name['load']['args'] == {'rows': 3}
+    assert by_name['fail']['args'] == {'error': 'KeyError'}
+    assert by_name['signal']['ph'] == 'i'
+    assert by_name['query']['dur'] == 250000.0
+    assert by_name['thread_name']['args'] == {'name': 'MainThread'}
+
+
+def test_disabled_tracer_records_nothing():
+    assert span('idle') is span('other')
+    record_span('query', 'db', 0.0, 1.0)
+    instant('signal')
+    assert tracer().stop() is None
+
+
+def test_events_over_limit_are_dropped(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, 'MAX_EVENTS', 2)
+    for index in range(5):
+        record_span(f'query{index}', 'db', 0.0, 0.001)
+
+    assert tracer().dropped == 3
+    tracer().stop()
+    assert [e['name'] for e in load_events(trace_file) if e['ph'] == 'X'] == ['query0', 'query1']
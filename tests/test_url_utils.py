@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网址规范化测试
+"""
+
+from src.core.url_utils import canonicalize_url, url_hash
+
+
+def test_strips_tracking_params_and_sorts_the_rest():
+    assert canonicalize_url('Example.com//a/?utm_source=x&UTM_Medium=y&gclid=1&b=2&a=1#top') == \
+        'https://example.com/a?a=1&b=2'
+
+
+def test_keeps_params_that_only_start_with_utm():
+    assert canonicalize_url('https://example.com/?utmost=1&utm=2') == 'https://example.com?utm=2&utmost=1'
+
+
+def test_equivalent_urls_share_a_hash():
+    assert url_hash('http://EXAMPLE.com:80/a/') == url_hash('https://example.com/a?utm_campaign=z')
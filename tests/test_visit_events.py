@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+访问事件测试：攒批写入、失败重试的缓冲上限、建表和汇总结果补全（数据库用替身）
+"""
+
+from datetime import date, datetime
+
+from src.core.visit_events import (
+    INSERT_EVENTS_SQL, SCHEMA_STATEMENTS, VisitEventRecorder, VisitSchema, fill_daily_trend, fill_hourly
+)
+
+
+class FakeDbManager:
+    def __init__(self, writable=True, tables=3):
+        self.writable = writable
+        self.tables = tables
+        self.written = []
+        self.transactions = []
+
+    def execute_batches(self, query, batches, page_size=None, template=None):
+        assert query == INSERT_EVENTS_SQL
+        if not self.writable:
+            return False
+        for batch in batches:
+            self.written.extend(batch)
+        return True
+
+    def execute_query(self, query, params=None):
+        return [(self.tables,)]
+
+    def execute_transaction(self, statements):
+        self.transactions.append(statements)
+        return True
+
+
+def test_flushes_when_batch_is_full():
+    db = FakeDbManager()
+    recorder = VisitEventRecorder(db, batch_size=2)
+
+    recorder.record(1, 'A', 'https://A.example/?utm_source=x')
+    assert db.written == []
+    recorder.record(1, 'B', 'https://b.example/')
+
+    assert [event[3] for event in db.written] == ['https://a.example', 'https://b.example']
+    assert recorder.pending_count == 0
+
+
+def test_failed_flush_keeps_events_in_order():
+    db = FakeDbManager(writable=False)
+    recorder = VisitEventRecorder(db, batch_size=100)
+    recorder.record(1, 'A', 'https://a.example/')
+
+    assert not recorder.flush()
+    recorder.record(1, 'B', 'https://b.example/')
+    db.writable = True
+    assert recorder.flush()
+
+    assert [event[1] for event in db.written] == ['A', 'B']
+
+
+def test_pending_events_are_capped_while_database_is_unavailable():
+    db = FakeDbManager(writable=False)
+    recorder = VisitEventRecorder(db, batch_size=1000, max_pending=3)
+
+    for index in range(5):
+        recorder.record(1, f'site{index}', 'https://a.example/')
+        recorder.flush()
+
+    assert recorder.pending_count == 3
+    db.writable = True
+    recorder.flush()
+    assert [event[1] for event in db.written] == ['site2', 'site3', 'site4']
+
+
+def test_schema_is_created_only_when_missing():
+    ready = FakeDbManager(tables=3)
+    assert VisitSchema(ready).ensure()
+    assert ready.transactions == []
+
+    missing = FakeDbManager(tables=1)
+    assert VisitSchema(missing).ensure()
+    (statements,) = missing.transactions
+    assert statements[:len(SCHEMA_STATEMENTS)] == SCHEMA_STATEMENTS
+
+
+def test_rollup_results_are_filled():
+    start = date(2026, 2, 27)
+    assert fill_daily_trend([(date(2026, 3, 1), 4)], start, 3) == [
+        (date(2026, 2, 27), 0), (date(2026, 2, 28), 0), (date(2026, 3, 1), 4)
+    ]
+    hourly = fill_hourly([(datetime(2026, 3, 1, 9), 2), (datetime(2026, 3, 1, 23), 1)])
+    assert len(hourly) == 24
+    assert hourly[9] == (9, 2) and hourly[23] == (23, 1) and hourly[0] == (0, 0)